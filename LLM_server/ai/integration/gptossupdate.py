@@ -24,6 +24,7 @@ from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from ..utils.prompts import prompt
+from ..utils.tts_link import tts_link
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +53,10 @@ class TrulyParallelStreamProcessor:
         # Thread executor for blocking operations
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
         
+        # 🔥 TTS 텍스트 링크: 최종 답변을 문장 단위로 TTS 서버에 바로 전송 (ChatConsumer 가 설정)
+        self.tts_message_base: Optional[Dict[str, Any]] = None
+        self.tts_stream = None
+        
         # Langchain 설정
         self.setup_langchain()
     
@@ -439,8 +444,13 @@ class TrulyParallelStreamProcessor:
                 await self.result_queue.put(error_result)
                 return
             
+            # 🔥 TTS 링크가 연결되어 있으면 생성되는 문장부터 바로 TTS 로 전송
+            tts_stream = self._open_tts_stream(token_id)
+            
             # 🔥 완전한 답변 생성 (제한 없음)
-            content = await self._generate_complete_stream(question)
+            content = await self._generate_complete_stream(
+                question, on_chunk=tts_stream.feed if tts_stream else None
+            )
             
             elapsed_time = time.time() - start_time
             
@@ -449,6 +459,10 @@ class TrulyParallelStreamProcessor:
                 logger.warning(f"⚠️ [{self.session_id}] 생성된 답변이 비어있음: '{content}'")
                 content = "죄송합니다. 답변을 생성할 수 없었습니다."
             
+            if tts_stream is not None:
+                # 남은 문장 + 끝 표시 (청크를 하나도 못 받았으면 대체 응답을 읽어 준다)
+                tts_stream.finish(fallback_text=content)
+            
             # 완료된 응답 저장
             if content.strip():
                 self.last_completed_response = content.strip()
@@ -464,6 +478,7 @@ class TrulyParallelStreamProcessor:
                 "processing_time": round(elapsed_time, 3),
                 "timestamp": datetime.now().isoformat(),
                 "message": "EOS로 인한 최종 답변 완료",
+                "tts_streamed": tts_stream is not None,
                 "processing_stats": {
                     "type": "final",
                     "elapsed_time": round(elapsed_time, 2),
@@ -482,6 +497,11 @@ class TrulyParallelStreamProcessor:
         except Exception as e:
             logger.error(f"❌ [{self.session_id}] 최종 답변 생성 오류 (ID: {token_id}): {e}")
             
+            # 링크로 보내던 문장은 취소 → 오류 응답은 HTTP 로 전송
+            if self.tts_stream is not None:
+                self.tts_stream.cancel()
+                self.tts_stream = None
+            
             # 오류 결과도 큐에 추가
             error_result = {
                 "type": "complete",
@@ -526,7 +546,23 @@ class TrulyParallelStreamProcessor:
         
         return content.strip() or "생각 중..."
 
-    async def _generate_complete_stream(self, question: str) -> str:
+    def _open_tts_stream(self, token_id: int):
+        """이전 답변의 TTS 스트림은 취소하고 새 스트림을 연다. 링크가 없으면 None (HTTP 전송)"""
+        if self.tts_stream is not None:
+            self.tts_stream.cancel()
+            self.tts_stream = None
+        if self.tts_message_base is None:
+            return None
+        # 답변마다 requestId 를 달리해야 TTS 서버가 이전 답변을 대체/취소할 수 있다
+        self.tts_stream = tts_link.open_stream({
+            **self.tts_message_base,
+            'requestId': f"{self.tts_message_base.get('requestId', 'background_result')}-{token_id}",
+        })
+        if self.tts_stream is not None:
+            logger.info(f"🔗 [{self.session_id}] TTS 링크로 문장 단위 전송 (ID: {token_id})")
+        return self.tts_stream
+
+    async def _generate_complete_stream(self, question: str, on_chunk=None) -> str:
         """🔥 완전한 답변 생성"""
         content = ""
         chunk_count = 0
@@ -540,7 +576,7 @@ class TrulyParallelStreamProcessor:
                 return "무엇을 도와드릴까요?"
             
             # 🔥 executor를 통한 논블로킹 스트림 처리
-            chunks = await self._get_stream_chunks_async(question, max_chunks=None)
+            chunks = await self._get_stream_chunks_async(question, max_chunks=None, on_chunk=on_chunk)
             
             for chunk in chunks:
                 if chunk:
@@ -567,7 +603,8 @@ class TrulyParallelStreamProcessor:
             logger.error(f"❌ [{self.session_id}] 완전한 스트림 생성 오류: {e}")
             return "죄송합니다. 답변 생성 중 오류가 발생했습니다."
 
-    async def _get_stream_chunks_async(self, question: str, max_chunks: Optional[int] = None) -> list:
+    async def _get_stream_chunks_async(self, question: str, max_chunks: Optional[int] = None,
+                                       on_chunk=None) -> list:
         """🔥 진정한 비동기 LangChain 스트림 처리 - 실시간 취소 지원"""
         loop = asyncio.get_event_loop()
         
@@ -594,6 +631,9 @@ class TrulyParallelStreamProcessor:
                     if chunk:
                         chunks.append(chunk)
                         chunk_count += 1
+                        if on_chunk is not None:
+                            # 생성 스레드에서 바로 문장 단위 TTS 전송
+                            on_chunk(str(chunk))
                         
                         # 🔥 청크 처리 후에도 취소 확인
                         if hasattr(self, '_current_processing_id'):
@@ -646,6 +686,10 @@ class TrulyParallelStreamProcessor:
         if self.final_task and not self.final_task.done():
             self.final_task.cancel()
         
+        if self.tts_stream is not None:
+            self.tts_stream.cancel()
+            self.tts_stream = None
+        
         # 상태 초기화
         self.current_question = ""
         self.latest_token_id = 0
@@ -700,6 +744,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
         # 🔥 새로운 병렬 프로세서 생성
         processor = TrulyParallelStreamProcessor(session_id=self.session_id)
         ChatConsumer.processors[self.phone_Id] = processor
+        if tts_link.enabled:
+            # 최종 답변을 문장 단위로 TTS 링크에 전송 (링크가 끊겨 있으면 기존 HTTP 전송)
+            processor.tts_message_base = {
+                'phoneId': self.phone_Id,
+                'sessionId': self.session_id,
+                'requestId': "background_result",
+                'voice_config': {'language': 'ko'},
+            }
+            tts_link.start()
         
         logger.info(f"새 클라이언트 연결: {self.phone_Id} (세션: {self.session_id})")
         
@@ -888,7 +941,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     logger.info(f"⏱️ 총 처리 시간: {result.get('processing_time', 0)}초")
                     
                     # 🔥 텍스트가 비어있지 않은 경우에만 TTS 전송
-                    if content and len(content) > 0:
+                    if result.get("tts_streamed"):
+                        logger.info(f"🔗 [{self.phone_Id}] TTS 링크로 문장 단위 전송 완료 - HTTP 전송 생략")
+                    elif content and len(content) > 0:
                         tts_message = {
                             'phoneId': self.phone_Id,
                             'sessionId': self.session_id,
@@ -0,0 +1,309 @@
+# ai/utils/tts_link.py
+"""
+TTS 서버 내부 텍스트 링크 클라이언트 (LLM → TTS, ws/tts-link/)
+- 프로세스당 WebSocket 1개를 계속 유지 (끊기면 백오프 재연결, 못 보낸 메시지는 재연결 후 전송)
+- 답변을 문장 단위로 생성되는 대로 보낸다 → TTS 서버가 첫 문장부터 합성 시작
+- 전용 스레드의 이벤트 루프에서 동작하므로 async 코드 / executor 스레드 어디서나 호출 가능
+- TTS_LINK_ENABLED=true 일 때만 사용. 링크가 없으면 호출 쪽은 기존 HTTP(/api/convert-tts/)로 보낸다
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TTS_LINK_ENABLED = os.getenv("TTS_LINK_ENABLED", "false").lower() == "true"
+# 기본값: TTS_SERVER_URL 의 http(s) → ws(s) + /ws/tts-link/
+TTS_LINK_URL = os.getenv("TTS_LINK_URL", "")
+# 이보다 짧은 문장은 다음 문장과 합쳐 보낸다 (너무 짧은 조각은 합성 품질/효율이 떨어짐)
+TTS_LINK_MIN_CHARS = int(os.getenv("TTS_LINK_MIN_CHARS", "10"))
+# 연결이 끊긴 동안 쌓아 둘 최대 메시지 수
+TTS_LINK_MAX_QUEUE = int(os.getenv("TTS_LINK_MAX_QUEUE", "1000"))
+
+# 문장 끝: 마침표/물음표/느낌표(+닫는 따옴표/괄호) 뒤 공백, 또는 줄바꿈
+_SENTENCE_END = re.compile(r'[.!?。！？…]+["\'”’)\]]*\s+|\n+')
+
+
+def default_link_url() -> str:
+    base = getattr(settings, 'TTS_SERVER_URL', 'http://tts_server:5002')
+    return re.sub(r'^http', 'ws', base.rstrip('/')) + '/ws/tts-link/'
+
+
+class SentenceSplitter:
+    """스트리밍 청크를 모아 완성된 문장 단위로 내보낸다 (짧은 문장은 다음 문장과 합친다)"""
+
+    def __init__(self, min_chars: int = TTS_LINK_MIN_CHARS):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self.buffer):
+            candidate = self.buffer[start:match.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        tail, self.buffer = self.buffer.strip(), ""
+        return tail
+
+
+class TTSTextStream:
+    """
+    답변 하나(requestId)를 문장 단위로 TTS 서버에 보내는 스트림.
+    feed() 로 LLM 청크를 넣고, 생성이 끝나면 finish() 로 남은 텍스트와 final 표시를 보낸다.
+    """
+
+    def __init__(self, link: 'TTSLinkClient', tts_message: Dict[str, Any]):
+        self.link = link
+        self.base = {k: v for k, v in tts_message.items() if k != 'text'}
+        self.request_id = tts_message.get('requestId')
+        self.splitter = SentenceSplitter()
+        self.seq = 0
+        self.fed = False
+        self.closed = False
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self.seq > 0
+
+    def feed(self, text: str) -> int:
+        """청크 추가. 완성된 문장은 바로 전송하고 보낸 문장 수를 반환"""
+        with self._lock:
+            if self.closed or not text:
+                return 0
+            self.fed = True
+            sentences = self.splitter.feed(text)
+            for sentence in sentences:
+                self._push(sentence, final=False)
+            return len(sentences)
+
+    def finish(self, fallback_text: Optional[str] = None):
+        """남은 텍스트 + final 전송. 청크를 하나도 못 받았으면 fallback_text 를 보낸다"""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            tail = self.splitter.flush()
+            if not self.fed and fallback_text:
+                tail = fallback_text.strip()
+            self._push(tail, final=True)
+
+    def cancel(self):
+        """TTS 서버의 남은 문장/진행 중 합성 취소 (finish 이후에도 가능)"""
+        with self._lock:
+            if self.cancelled:
+                return
+            self.closed = True
+            self.cancelled = True
+        self.link.cancel(self.base.get('sessionId'), self.base.get('phoneId'), self.request_id)
+
+    def _push(self, text: str, final: bool):
+        self.link.send({**self.base, 'type': 'text', 'seq': self.seq, 'text': text, 'final': final})
+        self.seq += 1
+
+
+class TTSLinkClient:
+    """TTS 서버와의 상시 WebSocket 링크 - 싱글톤 패턴"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+
+        self.enabled = TTS_LINK_ENABLED
+        self.url = TTS_LINK_URL or default_link_url()
+        self.connected = False
+
+        self._queue: deque = deque()
+        self._queue_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            "connects": 0,
+            "disconnects": 0,
+            "sent": 0,
+            "dropped": 0,
+            "acks": 0,
+            "sentences_done": 0,
+            "requests_done": 0,
+            "cancelled": 0,
+            "errors": 0,
+            "last_first_sentence": None,
+        }
+
+        self._initialized = True
+
+    @property
+    def available(self) -> bool:
+        """링크로 보낼 수 있는지 (활성화 + 연결됨). 처음 호출 시 연결을 시작한다"""
+        if not self.enabled:
+            return False
+        self.start()
+        return self.connected
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            ready = threading.Event()
+
+            def _run():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                self._wakeup = asyncio.Event()
+                ready.set()
+                self._loop.run_until_complete(self._main())
+
+            self._thread = threading.Thread(target=_run, name="tts-link", daemon=True)
+            self._thread.start()
+            ready.wait()
+        logger.info(f"🔗 TTS 텍스트 링크 시작: {self.url}")
+
+    def open_stream(self, tts_message: Dict[str, Any]) -> Optional[TTSTextStream]:
+        """링크가 연결되어 있으면 문장 스트림을 만든다. 아니면 None (HTTP 로 보낼 것)"""
+        if not self.available:
+            return None
+        return TTSTextStream(self, tts_message)
+
+    def send(self, message: Dict[str, Any]) -> bool:
+        """메시지를 전송 큐에 넣는다 (스레드 안전). 연결이 끊겨 있으면 재연결 후 전송"""
+        if not self.enabled:
+            return False
+        self.start()
+        with self._queue_lock:
+            if len(self._queue) >= TTS_LINK_MAX_QUEUE:
+                self.stats["dropped"] += 1
+                logger.warning(f"⚠️ [TTS 링크] 전송 큐 가득 참 - 메시지 버림: {message.get('requestId')}")
+                return False
+            self._queue.append(message)
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    def cancel(self, session_id: Optional[str], phone_id: Optional[str], request_id: Optional[str] = None) -> bool:
+        return self.send({
+            'type': 'cancel',
+            'sessionId': session_id,
+            'phoneId': phone_id,
+            'requestId': request_id,
+        })
+
+    async def _main(self):
+        backoff = 0.5
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(self.url, heartbeat=20, timeout=5) as ws:
+                        self.connected = True
+                        self.stats["connects"] += 1
+                        backoff = 0.5
+                        logger.info(f"✅ [TTS 링크] 연결됨: {self.url}")
+                        reader = asyncio.ensure_future(self._read(ws))
+                        try:
+                            await self._write(ws)
+                        finally:
+                            reader.cancel()
+                except Exception as e:
+                    logger.warning(f"⚠️ [TTS 링크] 연결 오류: {e}")
+                if self.connected:
+                    self.stats["disconnects"] += 1
+                    logger.warning(f"🔌 [TTS 링크] 연결 끊김 - {backoff:.1f}초 후 재연결")
+                self.connected = False
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+
+    async def _write(self, ws):
+        while not ws.closed:
+            with self._queue_lock:
+                message = self._queue[0] if self._queue else None
+            if message is None:
+                self._wakeup.clear()
+                with self._queue_lock:
+                    empty = not self._queue
+                if empty:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=1.0)
+                    except asyncio.TimeoutError:
+                        pass
+                continue
+
+            # 전송에 성공한 메시지만 큐에서 뺀다 (실패하면 재연결 후 다시 보냄)
+            await ws.send_str(json.dumps(message, ensure_ascii=False))
+            with self._queue_lock:
+                if self._queue and self._queue[0] is message:
+                    self._queue.popleft()
+            self.stats["sent"] += 1
+
+    async def _read(self, ws):
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            try:
+                data = json.loads(msg.data)
+            except ValueError:
+                continue
+            message_type = data.get('type')
+            if message_type == 'ack':
+                self.stats["acks"] += 1
+            elif message_type == 'sentence_done':
+                self.stats["sentences_done"] += 1
+                if not data.get('success'):
+                    self.stats["errors"] += 1
+                    logger.warning(f"⚠️ [TTS 링크] 문장 처리 실패: {data}")
+            elif message_type == 'request_done':
+                self.stats["requests_done"] += 1
+                self.stats["last_first_sentence"] = data.get('first_sentence')
+                logger.info(
+                    f"✅ [TTS 링크] 요청 완료: {data.get('requestId')} "
+                    f"({data.get('status')}, 문장 {data.get('sentences')}개, 첫 문장 {data.get('first_sentence')}초)"
+                )
+            elif message_type == 'cancelled':
+                self.stats["cancelled"] += 1
+                logger.info(f"⏹️ [TTS 링크] 요청 취소됨: {data.get('requestId')} ({data.get('reason')})")
+
+    def get_current_stats(self) -> Dict[str, Any]:
+        with self._queue_lock:
+            queued = len(self._queue)
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "connected": self.connected,
+            "url": self.url,
+            "queued": queued,
+            "last_updated": datetime.now().isoformat(),
+        }
+
+
+# 전역 TTS 링크 인스턴스 (싱글톤)
+tts_link = TTSLinkClient()
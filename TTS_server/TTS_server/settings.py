@@ -58,12 +58,28 @@ INSTALLED_APPS = [
 # Channels 설정 (WebSocket 지원)
 ASGI_APPLICATION = 'TTS_server.asgi.application'
 
-# Channels Layer 설정 (메모리 기반 - 개발용)
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
+# Channels Layer 설정
+# - CHANNEL_REDIS_URL 이 있으면 Redis (여러 uvicorn/daphne 워커가 오디오를 주고받음, 접속 표시도 같은 Redis)
+# - 없으면 메모리 기반 (단일 프로세스 / 개발용)
+CHANNEL_REDIS_URL = os.getenv('CHANNEL_REDIS_URL', '')
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [CHANNEL_REDIS_URL],
+                # 스트리밍 조각이 몰려도 버리지 않도록 여유 있게
+                'capacity': int(os.getenv('CHANNEL_LAYER_CAPACITY', '1000')),
+                'expiry': int(os.getenv('CHANNEL_LAYER_EXPIRY', '30')),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer'
+        }
     }
-}
 
 # WebSocket 로깅 설정
 LOGGING = {
@@ -3,25 +3,73 @@ TTS WebSocket 서버 - 외부 클라이언트가 연결하여 오디오 데이
 """
 import json
 import asyncio
+import hashlib
 import logging
 import base64
+import re
+from asgiref.sync import sync_to_async
+from channels.exceptions import ChannelFull
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.conf import settings
+import os
 from typing import Dict, Optional
 
+from .infrastructure.ws_framing import FramedSender, count_chunks, frame_chunks
+
 logger = logging.getLogger(__name__)
 
+# Redis channel layer 에서 다른 워커에 연결된 클라이언트 표시 (group_send 는 멤버가 없어도 성공해서 따로 둔다)
+# 그룹별 Redis set 에 channel_name 을 connect 에서 넣고 disconnect 에서 뺀다. 비정상 종료로 남은 표시는 TTL 로 정리
+TTS_WS_PRESENCE_TTL = int(os.getenv("TTS_WS_PRESENCE_TTL", "86400"))
+
+
+def client_group_name(phone_id: str, session_id: str) -> str:
+    """phone_id/session_id 별 channel layer 그룹 이름 (영숫자/-/_/. , 100자 미만)"""
+    raw = f"{phone_id}_{session_id}"
+    name = re.sub(r'[^0-9A-Za-z_.-]', '-', raw)
+    if len(name) > 80:
+        name = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return f"tts.client.{name}"
+
+
+def client_presence_key(group_name: str) -> str:
+    """그룹에 연결된 channel_name 들을 담는 Redis set 키"""
+    return f"tts.presence.{group_name}"
+
+
 class TtsWebSocketConsumer(AsyncWebsocketConsumer):
     """TTS WebSocket 서버 - 외부 클라이언트로부터 연결을 받고 오디오 데이터 전송"""
 
-    # 클래스 레벨 변수로 연결된 클라이언트 관리
+    # 클래스 레벨 변수로 이 프로세스에 연결된 클라이언트 관리.
+    # 다른 워커 프로세스에 연결된 클라이언트는 Redis 접속 표시(client_presence_key)에 있는 channel_name 으로 전달한다
     connected_clients: Dict[str, 'TtsWebSocketConsumer'] = {}
+    # 접속 표시용 Redis 클라이언트 (Redis channel layer 일 때만, 처음 쓸 때 생성)
+    _presence_redis = None
+    # channel layer 로 다른 워커에 넘긴 이벤트 수 / 못 넘긴 이벤트 수 (클라이언트 없음, 채널 가득 참)
+    group_transfer: Dict[str, int] = {'sent': 0, 'no_client': 0, 'channel_full': 0}
+
+    # 스트리밍 전송: 전체 청크 수를 모를 때 audio_start 의 totalChunks(-1)와
+    # 첫 바이너리 청크의 전체 청크 수 필드(0xFFFFFFFF = int32 -1) 값. 끝은 audio_end 메시지로 알린다
+    STREAMING_TOTAL_CHUNKS = -1
+    STREAMING_TOTAL_CHUNKS_FIELD = 0xFFFFFFFF
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.phone_id = None
         self.session_id = None
+        self.group_name = None
         self.is_connected = False
+        # request_id → 스트리밍 전송 상태 (다음 청크 인덱스, 보낸 바이트 수 등)
+        self.audio_streams: Dict[str, dict] = {}
+        # 청크 크기 / 연결별 전송 큐 (대기 바이트 상한, 한 번에 묶어 보내는 바이트)
+        self.chunk_size = int(os.getenv("TTS_WS_CHUNK_SIZE", "3072"))
+        self.sender = FramedSender(
+            self.send,
+            max_pending_bytes=int(os.getenv("TTS_WS_MAX_PENDING_KB", "512")) * 1024,
+            coalesce_bytes=int(os.getenv("TTS_WS_COALESCE_KB", "64")) * 1024,
+        )
 
     async def connect(self):
         """WebSocket 연결 수락"""
@@ -49,6 +97,9 @@ class TtsWebSocketConsumer(AsyncWebsocketConsumer):
             # 클라이언트 등록
             client_key = f"{self.phone_id}_{self.session_id}"
             TtsWebSocketConsumer.connected_clients[client_key] = self
+            # 다른 워커에서 합성한 오디오도 받을 수 있도록 접속 표시 (그 워커가 이 channel_name 으로 send)
+            self.group_name = client_group_name(self.phone_id, self.session_id)
+            await sync_to_async(self._mark_present, thread_sensitive=False)(True)
 
             logger.info(f"✅ WebSocket 클라이언트 연결 성공: phone_id={self.phone_id}, session_id={self.session_id}")
             logger.info(f"   현재 연결된 클라이언트 수: {len(TtsWebSocketConsumer.connected_clients)}")
@@ -68,11 +119,14 @@ class TtsWebSocketConsumer(AsyncWebsocketConsumer):
     async def disconnect(self, close_code):
         """WebSocket 연결 해제"""
         self.is_connected = False
+        await self.sender.close()
 
-        # 클라이언트 등록 해제
+        # 클라이언트 등록 해제 (재연결로 바뀐 경우 새 연결은 유지)
         client_key = f"{self.phone_id}_{self.session_id}"
-        if client_key in TtsWebSocketConsumer.connected_clients:
+        if TtsWebSocketConsumer.connected_clients.get(client_key) is self:
             del TtsWebSocketConsumer.connected_clients[client_key]
+        if getattr(self, 'group_name', None):
+            await sync_to_async(self._mark_present, thread_sensitive=False)(False)
 
         logger.info(f"WebSocket 클라이언트 연결 해제: phone_id={self.phone_id}, close_code={close_code}")
 
@@ -83,7 +137,8 @@ class TtsWebSocketConsumer(AsyncWebsocketConsumer):
             message_type = data.get('type')
 
             if message_type == 'ping':
-                # Ping-Pong 처리
+                # Ping-Pong 처리 (접속 표시 TTL 도 연장)
+                await sync_to_async(self._mark_present, thread_sensitive=False)(True)
                 await self.send(text_data=json.dumps({
                     'type': 'pong',
                     'timestamp': data.get('timestamp')
@@ -100,18 +155,14 @@ class TtsWebSocketConsumer(AsyncWebsocketConsumer):
             logger.error(f"메시지 처리 오류: {str(e)}")
 
     async def send_audio_data_binary(self, audio_data: bytes, filename: str, text: str,
-                                    request_id: str, chunk_size: int = 3072):
+                                    request_id: str, chunk_size: Optional[int] = None):
         """WAV를 바이너리 청크로 직접 전송 (Spring Boot 명세 준수)"""
         import time
         from datetime import datetime
-        import struct
 
-        logger.info(f"🔵🔵🔵 send_audio_data_binary 메서드 시작!!!")
-        logger.info(f"   self: {self}")
-        logger.info(f"   self.is_connected: {self.is_connected}")
-        logger.info(f"   self.phone_id: {self.phone_id}")
-        logger.info(f"   self.session_id: {self.session_id}")
-        logger.info(f"   📋 받은 request_id: '{request_id}'")
+        chunk_size = chunk_size or self.chunk_size
+        logger.info(f"🔵 send_audio_data_binary 시작: phone_id={self.phone_id}, session_id={self.session_id}, "
+                    f"request_id='{request_id}'")
 
         try:
             if not self.is_connected:
@@ -122,21 +173,14 @@ class TtsWebSocketConsumer(AsyncWebsocketConsumer):
             total_start_time = time.time()
 
             # WAV 파일 확인 로그
-            if len(audio_data) > 44:  # WAV 헤더는 최소 44바이트
-                riff = audio_data[:4]
-                wave = audio_data[8:12]
-                if riff == b'RIFF' and wave == b'WAVE':
-                    logger.info(f"✅ WAV 파일 확인: RIFF/WAVE 헤더 정상")
-                    logger.info(f"   WAV 크기: {len(audio_data):,} bytes")
-                else:
-                    logger.warning(f"⚠️ WAV 형식 확인 필요: {riff} / {wave}")
+            if len(audio_data) > 44 and audio_data[:4] == b'RIFF' and audio_data[8:12] != b'WAVE':
+                logger.warning(f"⚠️ WAV 형식 확인 필요: {audio_data[:4]} / {audio_data[8:12]}")
 
             # 청크 수 계산
-            total_chunks = (len(audio_data) + chunk_size - 1) // chunk_size
-            
-            logger.info(f"📤 바이너리 청크 스트리밍 시작: {filename}")
-            logger.info(f"   📊 원본 WAV: {len(audio_data):,} bytes")
-            logger.info(f"   📦 청크 수: {total_chunks}개 ({chunk_size:,} bytes/청크 = {chunk_size/1024:.1f}KB)")
+            total_chunks = count_chunks(len(audio_data), chunk_size)
+
+            logger.info(f"📤 바이너리 청크 스트리밍 시작: {filename} "
+                        f"({len(audio_data):,} bytes, {total_chunks}청크 x {chunk_size:,} bytes)")
 
             # 1단계: 시작 메시지 전송 (JSON) - Spring Boot 명세에 맞게
             start_message = {
@@ -148,66 +192,16 @@ class TtsWebSocketConsumer(AsyncWebsocketConsumer):
                 'sessionId': self.session_id,
                 'phoneId': self.phone_id
             }
-            
-            logger.info(f"📨 시작 메시지 전송: {start_message}")
-            await self.send(text_data=json.dumps(start_message, ensure_ascii=False))
+            await self.sender.send_text(json.dumps(start_message, ensure_ascii=False))
 
             # 2단계: 오디오 데이터를 바이너리 청크로 전송
-            chunks_start_time = time.time()
-            bytes_sent = 0
-
-            for chunk_index in range(total_chunks):
-                if not self.is_connected:
-                    logger.warning("연결이 끊어져 전송 중단")
-                    return False
-
-                # 청크 데이터 추출
-                start_idx = chunk_index * chunk_size
-                end_idx = min((chunk_index + 1) * chunk_size, len(audio_data))
-                chunk_data = audio_data[start_idx:end_idx]
-
-                # 바이너리 메시지 구조 (Spring Boot 명세):
-                # [0-3 바이트]: 청크 인덱스 (Big-endian int32)
-                # [4-7 바이트]: 전체 청크 수 (첫 번째 청크만)
-                # [8~ 바이트]: 실제 오디오 데이터
-                
-                binary_message = bytearray()
-                
-                # 청크 인덱스 (4바이트, Big-endian)
-                binary_message.extend(struct.pack('>I', chunk_index))
-                
-                # 첫 번째 청크인 경우 전체 청크 수 추가
-                if chunk_index == 0:
-                    # 전체 청크 수 (4바이트, Big-endian)
-                    binary_message.extend(struct.pack('>I', total_chunks))
-                
-                # 실제 오디오 데이터 추가
-                binary_message.extend(chunk_data)
-
-                # 바이너리 전송
-                await self.send(bytes_data=bytes(binary_message))
-                
-                bytes_sent += len(chunk_data)
-
-                # 진행률 로깅
-                if chunk_index == 0:
-                    logger.info(f"🔹 첫 번째 청크 전송 (바이너리)")
-                    logger.info(f"   청크 구조: [인덱스:{chunk_index}][전체수:{total_chunks}][데이터:{len(chunk_data)}bytes]")
-                    logger.info(f"   바이너리 메시지 크기: {len(binary_message)} bytes")
-                elif chunk_index == total_chunks - 1:
-                    logger.info(f"🔹 마지막 청크 전송 (바이너리)")
-                    logger.info(f"   청크 구조: [인덱스:{chunk_index}][데이터:{len(chunk_data)}bytes]")
-                    logger.info(f"   바이너리 메시지 크기: {len(binary_message)} bytes")
-                elif chunk_index % 10 == 0:
-                    progress = (bytes_sent / len(audio_data)) * 100
-                    elapsed = time.time() - chunks_start_time
-                    speed = bytes_sent / elapsed / 1024 if elapsed > 0 else 0
-                    logger.info(f"   📡 전송 진행: {progress:.1f}% ({chunk_index + 1}/{total_chunks} 청크)")
-                    logger.info(f"      {bytes_sent:,}/{len(audio_data):,} bytes, 속도: {speed:.1f} KB/s")
-
-                # 청크 간 짧은 지연 (네트워크 부하 방지)
-                if chunk_index < total_chunks - 1:
-                    await asyncio.sleep(0.001)  # 1ms 지연
+            # 바이너리 메시지 구조 (Spring Boot 명세):
+            # [0-3 바이트]: 청크 인덱스 (Big-endian int32)
+            # [4-7 바이트]: 전체 청크 수 (첫 번째 청크만)
+            # [8~ 바이트]: 실제 오디오 데이터
+            if not await self.sender.send_frames(frame_chunks(audio_data, chunk_size, total_chunks=total_chunks)):
+                logger.warning("연결이 끊어져 전송 중단")
+                return False
 
             # 3단계: 완료 메시지 전송 (JSON) - Spring Boot 명세에 맞게
             complete_message = {
@@ -216,20 +210,17 @@ class TtsWebSocketConsumer(AsyncWebsocketConsumer):
                 'totalChunks': total_chunks,
                 'fileName': filename
             }
-            
-            logger.info(f"📨 완료 메시지 전송: {complete_message}")
-            await self.send(text_data=json.dumps(complete_message, ensure_ascii=False))
+            await self.sender.send_text(json.dumps(complete_message, ensure_ascii=False))
+            if not await self.sender.drain():
+                logger.warning("연결이 끊어져 전송 중단")
+                return False
 
             # 전체 전송 시간 계산
             total_time = time.time() - total_start_time
-            throughput = len(audio_data) / total_time / 1024  # KB/s
+            throughput = len(audio_data) / total_time / 1024 if total_time > 0 else 0.0  # KB/s
 
-            logger.info(f"✅ WAV 바이너리 스트리밍 완료: {filename}")
-            logger.info(f"   📊 원본 WAV: {len(audio_data):,} bytes")
-            logger.info(f"   📦 전송 청크: {total_chunks}개")
-            logger.info(f"   ⏱️ 전체 시간: {total_time:.3f}초")
-            logger.info(f"   📈 전송 속도: {throughput:.1f} KB/s")
-            logger.info(f"   💾 Base64 없이 직접 바이너리 전송 완료!")
+            logger.info(f"✅ WAV 바이너리 스트리밍 완료: {filename} ({total_chunks}청크, "
+                        f"{total_time:.3f}초, {throughput:.1f} KB/s)")
             return True
 
             # 1단계: 전체 WAV를 Base64로 변환
@@ -397,9 +388,256 @@ class TtsWebSocketConsumer(AsyncWebsocketConsumer):
                     'phoneId': self.phone_id
                 }
             }
-            await self.send(text_data=json.dumps(error_message))
+            await self.sender.send_text(json.dumps(error_message))
+            return False
+
+    async def start_audio_stream(self, filename: str, text: str, request_id: str) -> bool:
+        """합성 중 스트리밍 전송 시작: totalChunks 를 모르는 audio_start 전송"""
+        import time
+
+        if not self.is_connected:
+            logger.warning(f"연결되지 않은 클라이언트: {self.phone_id}")
+            return False
+
+        self.audio_streams[request_id] = {
+            'fileName': filename,
+            'nextChunk': 0,
+            'bytesSent': 0,
+            'startedAt': time.time(),
+            'firstChunkAt': None,
+        }
+        start_message = {
+            'type': 'audio_start',
+            'requestId': request_id,
+            'fileName': filename,
+            'totalChunks': self.STREAMING_TOTAL_CHUNKS,
+            'streaming': True,
+            'text': text,
+            'sessionId': self.session_id,
+            'phoneId': self.phone_id
+        }
+        logger.info(f"📨 스트리밍 시작 메시지 전송: {start_message}")
+        return await self.sender.send_text(json.dumps(start_message, ensure_ascii=False))
+
+    async def send_audio_stream_fragment(self, request_id: str, audio_data: bytes,
+                                         chunk_size: Optional[int] = None) -> bool:
+        """합성된 조각을 바로 바이너리 청크로 전송 (청크 구조는 send_audio_data_binary 와 동일)"""
+        import time
+
+        stream = self.audio_streams.get(request_id)
+        if stream is None:
+            logger.warning(f"시작되지 않은 스트림: {request_id}")
+            return False
+        if not self.is_connected:
+            logger.warning("연결이 끊어져 스트리밍 전송 중단")
+            return False
+
+        chunk_size = chunk_size or self.chunk_size
+        first = stream['nextChunk'] == 0
+        # 전체 청크 수를 아직 모름 → 첫 청크에는 STREAMING_TOTAL_CHUNKS_FIELD
+        frames = frame_chunks(audio_data, chunk_size, start_index=stream['nextChunk'],
+                              total_chunks=self.STREAMING_TOTAL_CHUNKS_FIELD)
+        if not await self.sender.send_frames(frames):
+            logger.warning("연결이 끊어져 스트리밍 전송 중단")
+            return False
+        stream['nextChunk'] += count_chunks(len(audio_data), chunk_size)
+        stream['bytesSent'] += len(audio_data)
+        if first and audio_data:
+            stream['firstChunkAt'] = time.time()
+            logger.info(f"🔹 첫 번째 스트리밍 청크 전송 ({stream['firstChunkAt'] - stream['startedAt']:.3f}초)")
+        return True
+
+    async def end_audio_stream(self, request_id: str, status: str = 'success',
+                               message: Optional[str] = None) -> bool:
+        """스트리밍 전송 종료: 실제 청크 수가 담긴 audio_end 전송"""
+        import time
+
+        stream = self.audio_streams.pop(request_id, None)
+        if stream is None:
             return False
 
+        end_message = {
+            'type': 'audio_end',
+            'requestId': request_id,
+            'fileName': stream['fileName'],
+            'totalChunks': stream['nextChunk'],
+            'totalBytes': stream['bytesSent'],
+            'status': status,
+        }
+        if message:
+            end_message['message'] = message
+        if self.is_connected:
+            await self.sender.send_text(json.dumps(end_message, ensure_ascii=False))
+            await self.sender.drain()
+
+        total_time = time.time() - stream['startedAt']
+        logger.info(f"📨 스트리밍 종료 메시지 전송: {end_message}")
+        logger.info(f"   ⏱️ 전체 시간: {total_time:.3f}초, 청크 {stream['nextChunk']}개, {stream['bytesSent']:,} bytes")
+        return self.is_connected
+
+    # ----- channel layer 메시지 핸들러 (다른 워커에서 _send_to_group 으로 보낸 오디오) -----
+    # 오디오는 bytes 그대로 전달 (channels_redis 는 msgpack 이라 base64 불필요)
+    async def tts_audio(self, event):
+        await self.send_audio_data_binary(event['audio'], event['fileName'], event['text'], event['requestId'])
+
+    async def tts_stream_start(self, event):
+        await self.start_audio_stream(event['fileName'], event['text'], event['requestId'])
+
+    async def tts_stream_fragment(self, event):
+        await self.send_audio_stream_fragment(event['requestId'], event['audio'])
+
+    async def tts_stream_end(self, event):
+        await self.end_audio_stream(event['requestId'], event.get('status', 'success'), event.get('message'))
+
+    @staticmethod
+    def _remote_layer():
+        """다른 프로세스까지 닿는 channel layer (InMemoryChannelLayer 는 이 프로세스뿐이라 제외)"""
+        layer = get_channel_layer()
+        if layer is None or isinstance(layer, InMemoryChannelLayer):
+            return None
+        return layer
+
+    @classmethod
+    def _presence(cls):
+        """접속 표시용 Redis 클라이언트. Redis channel layer 가 아니면 None"""
+        if cls._remote_layer() is None or not getattr(settings, 'CHANNEL_REDIS_URL', ''):
+            return None
+        if cls._presence_redis is None:
+            import redis
+
+            cls._presence_redis = redis.Redis.from_url(settings.CHANNEL_REDIS_URL)
+        return cls._presence_redis
+
+    def _mark_present(self, present: bool):
+        """이 연결의 channel_name 을 그룹 접속 표시에 넣거나 뺀다 (블로킹 → 스레드에서 호출)"""
+        client = self._presence()
+        if client is None or not self.group_name:
+            return
+        key = client_presence_key(self.group_name)
+        try:
+            if present:
+                with client.pipeline() as pipe:
+                    pipe.sadd(key, self.channel_name)
+                    pipe.expire(key, TTS_WS_PRESENCE_TTL)
+                    pipe.execute()
+            else:
+                client.srem(key, self.channel_name)
+        except Exception as e:
+            logger.error(f"❌ 접속 표시 갱신 실패: {self.group_name}: {e}")
+
+    @classmethod
+    def _present_channels(cls, phone_id: str, session_id: str) -> list:
+        """다른 워커에 연결된 이 클라이언트의 channel_name 목록"""
+        client = cls._presence()
+        if client is None:
+            return []
+        members = client.smembers(client_presence_key(client_group_name(phone_id, session_id)))
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+    @classmethod
+    async def _send_to_group(cls, phone_id: str, session_id: str, event: dict) -> bool:
+        """
+        다른 워커에 연결된 클라이언트로 전달. group_send 는 멤버가 없거나 채널이 가득 차도 조용히 버리므로
+        접속 표시에 있는 채널마다 send 해서, 못 보내면 False (group_transfer 에 집계)
+        """
+        layer = cls._remote_layer()
+        channels = []
+        if layer is not None:
+            try:
+                channels = await sync_to_async(cls._present_channels, thread_sensitive=False)(phone_id, session_id)
+            except Exception as e:
+                logger.error(f"❌ 접속 표시 조회 실패: {phone_id}_{session_id}: {e}")
+        if not channels:
+            cls.group_transfer['no_client'] += 1
+            logger.warning(f"❌ 연결된 클라이언트를 찾을 수 없음: {phone_id}_{session_id}")
+            return False
+        delivered = 0
+        for channel_name in channels:
+            try:
+                await layer.send(channel_name, event)
+                delivered += 1
+            except ChannelFull:
+                cls.group_transfer['channel_full'] += 1
+                logger.error(f"❌ channel layer 가득 참 (이벤트 버림): {phone_id}_{session_id} {event.get('type')}")
+        if delivered:
+            cls.group_transfer['sent'] += 1
+        return delivered > 0
+
+    @classmethod
+    def has_client(cls, phone_id: str, session_id: str) -> bool:
+        """
+        전송 가능 여부. 이 프로세스에 없으면 Redis channel layer 를 쓸 때 접속 표시로
+        다른 워커에 연결돼 있는지 확인 (조회 실패면 전송을 시도하도록 True)
+        """
+        if cls.get_client(phone_id, session_id) is not None:
+            return True
+        if cls._presence() is None:
+            return False
+        try:
+            return bool(cls._present_channels(phone_id, session_id))
+        except Exception as e:
+            logger.error(f"❌ 접속 표시 조회 실패: {phone_id}_{session_id}: {e}")
+            return True
+
+    @classmethod
+    def connected_client_count(cls) -> Optional[int]:
+        """
+        모든 워커에 연결된 클라이언트 수 (Redis 접속 표시 기준, 그룹마다 1개로 셈).
+        Redis channel layer 가 아니면 이 프로세스 연결 수, 조회 실패면 None
+        """
+        client = cls._presence()
+        if client is None:
+            return len(cls.connected_clients)
+        try:
+            return sum(1 for key in client.scan_iter(match=client_presence_key('*'), count=500) if client.scard(key) > 0)
+        except Exception as e:
+            logger.error(f"❌ 접속 표시 조회 실패: {e}")
+            return None
+
+    @classmethod
+    def group_transfer_stats(cls) -> Dict[str, int]:
+        """channel layer 전달 카운터 (/health)"""
+        return dict(cls.group_transfer)
+
+    @classmethod
+    def transfer_stats(cls) -> Dict[str, dict]:
+        """연결별 전송 카운터 (/health)"""
+        return {key: consumer.sender.stats.snapshot() for key, consumer in list(cls.connected_clients.items())}
+
+    @classmethod
+    def get_client(cls, phone_id: str, session_id: str) -> Optional['TtsWebSocketConsumer']:
+        return cls.connected_clients.get(f"{phone_id}_{session_id}")
+
+    @classmethod
+    async def start_stream_to_client(cls, phone_id: str, session_id: str, filename: str,
+                                     text: str, request_id: str) -> bool:
+        consumer = cls.get_client(phone_id, session_id)
+        if consumer is None:
+            return await cls._send_to_group(phone_id, session_id, {
+                'type': 'tts.stream.start', 'fileName': filename, 'text': text, 'requestId': request_id,
+            })
+        return await consumer.start_audio_stream(filename, text, request_id)
+
+    @classmethod
+    async def send_stream_fragment_to_client(cls, phone_id: str, session_id: str, request_id: str,
+                                             audio_data: bytes) -> bool:
+        consumer = cls.get_client(phone_id, session_id)
+        if consumer is None:
+            return await cls._send_to_group(phone_id, session_id, {
+                'type': 'tts.stream.fragment', 'requestId': request_id, 'audio': bytes(audio_data),
+            })
+        return await consumer.send_audio_stream_fragment(request_id, audio_data)
+
+    @classmethod
+    async def end_stream_to_client(cls, phone_id: str, session_id: str, request_id: str,
+                                   status: str = 'success', message: Optional[str] = None) -> bool:
+        consumer = cls.get_client(phone_id, session_id)
+        if consumer is None:
+            return await cls._send_to_group(phone_id, session_id, {
+                'type': 'tts.stream.end', 'requestId': request_id, 'status': status, 'message': message,
+            })
+        return await consumer.end_audio_stream(request_id, status, message)
+
     @classmethod
     async def send_to_client(cls, phone_id: str, session_id: str, audio_data: bytes,
                             filename: str, text: str, request_id: str, use_binary: bool = True):
@@ -433,6 +671,12 @@ class TtsWebSocketConsumer(AsyncWebsocketConsumer):
             logger.info(f"   📦 전송 결과: {result}")
             return result
         else:
-            logger.warning(f"❌ 연결된 클라이언트를 찾을 수 없음: {client_key}")
-            logger.warning(f"   현재 연결된 클라이언트: {list(cls.connected_clients.keys())}")
-            return False
+            # 다른 워커 프로세스에 연결된 클라이언트일 수 있음 → channel layer 로 전달
+            logger.info(f"   이 프로세스에 없음 → channel layer 로 전달: {client_group_name(phone_id, session_id)}")
+            return await cls._send_to_group(phone_id, session_id, {
+                'type': 'tts.audio',
+                'audio': bytes(audio_data),
+                'fileName': filename,
+                'text': text,
+                'requestId': request_id,
+            })
@@ -16,6 +16,8 @@ from AR.models.utils import (
     make_pad_mask_left,
     make_reject_y,
     sample,
+    sample_batched,
+    select_sampling_params,
     topk_sampling,
 )
 from AR.modules.embedding import SinePositionalEmbedding, TokenEmbedding
@@ -220,6 +222,58 @@ class T2SBlock:
         )
         return x, k_cache, v_cache
 
+    def decode_next_token_static(
+        self,
+        x: torch.Tensor,
+        k_cache: torch.Tensor,
+        v_cache: torch.Tensor,
+        cursor: int,
+        attn_mask: Optional[torch.Tensor] = None,
+        torch_sdpa: bool = True,
+    ):
+        # k_cache/v_cache 是预分配的 [bsz, max_kv_len, hidden] 缓冲区, 新的 k/v 原地写入 cursor 处
+        q, k, v = F.linear(x, self.qkv_w, self.qkv_b).chunk(3, dim=-1)
+
+        k_cache[:, cursor : cursor + 1] = k
+        v_cache[:, cursor : cursor + 1] = v
+
+        batch_size = q.shape[0]
+        q_len = q.shape[1]
+        kv_len = cursor + 1
+
+        q = q.view(batch_size, q_len, self.num_heads, -1).transpose(1, 2)
+        k = k_cache[:, :kv_len].view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+        v = v_cache[:, :kv_len].view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+
+        if attn_mask is not None:
+            attn_mask = attn_mask[..., :kv_len]
+
+        if torch_sdpa:
+            attn = F.scaled_dot_product_attention(q, k, v, (~attn_mask) if attn_mask is not None else None)
+        else:
+            attn = scaled_dot_product_attention(q, k, v, attn_mask)
+
+        attn = attn.transpose(1, 2).reshape(batch_size, q_len, -1)
+        attn = F.linear(attn, self.out_w, self.out_b)
+
+        x = x + attn
+        x = F.layer_norm(
+            x,
+            [self.hidden_dim],
+            self.norm_w1,
+            self.norm_b1,
+            self.norm_eps1,
+        )
+        x = x + self.mlp.forward(x)
+        x = F.layer_norm(
+            x,
+            [self.hidden_dim],
+            self.norm_w2,
+            self.norm_b2,
+            self.norm_eps2,
+        )
+        return x
+
 
 @torch.jit.script
 class T2STransformer:
@@ -256,6 +310,40 @@ class T2STransformer:
             )
         return x, k_cache, v_cache
 
+    def init_static_cache(
+        self,
+        k_cache: List[torch.Tensor],
+        v_cache: List[torch.Tensor],
+        max_kv_len: int,
+    ):
+        # 每层只分配一次 [bsz, max_kv_len, hidden] 的缓冲区, 并把 prompt 阶段的 k/v 拷进去
+        k_static: List[torch.Tensor] = []
+        v_static: List[torch.Tensor] = []
+        for i in range(self.num_blocks):
+            k = k_cache[i]
+            v = v_cache[i]
+            kv_len = k.shape[1]
+            k_buf = torch.zeros(k.shape[0], max_kv_len, k.shape[2], dtype=k.dtype, device=k.device)
+            v_buf = torch.zeros(v.shape[0], max_kv_len, v.shape[2], dtype=v.dtype, device=v.device)
+            k_buf[:, :kv_len] = k
+            v_buf[:, :kv_len] = v
+            k_static.append(k_buf)
+            v_static.append(v_buf)
+        return k_static, v_static
+
+    def decode_next_token_static(
+        self,
+        x: torch.Tensor,
+        k_cache: List[torch.Tensor],
+        v_cache: List[torch.Tensor],
+        cursor: int,
+        attn_mask: Optional[torch.Tensor] = None,
+        torch_sdpa: bool = True,
+    ):
+        for i in range(self.num_blocks):
+            x = self.blocks[i].decode_next_token_static(x, k_cache[i], v_cache[i], cursor, attn_mask, torch_sdpa)
+        return x, k_cache, v_cache
+
 
 class Text2SemanticDecoder(nn.Module):
     def __init__(self, config, norm_first=False, top_k=3):
@@ -575,6 +663,13 @@ class Text2SemanticDecoder(nn.Module):
             y = torch.concat([y, samples], dim=1)
         return y
 
+    def get_static_kv_len(self, src_len: int, early_stop_num: int = -1, max_steps: int = 1500) -> int:
+        """
+        静态KV缓存的长度: prompt(文本+参考音频token) + 最多解码的步数。
+        """
+        steps = max_steps if early_stop_num == -1 else min(early_stop_num + 1, max_steps)
+        return int(src_len) + steps
+
     def pad_y_eos(self, y, y_mask_int, eos_id):
         targets = F.pad(y, (0, 1), value=0) + eos_id * F.pad(y_mask_int, (0, 1), value=1)
         # 错位
@@ -695,25 +790,47 @@ class Text2SemanticDecoder(nn.Module):
         # [PAD, PAD, PAD, 1, 2, 3,   4,   5,   6]]
 
         ###### decode #####
+        static_kv_cache = kwargs.get("static_kv_cache", False)
+        # 外部取消 (比如同一会话来了新请求), 每个解码步检查一次
+        cancel_event = kwargs.get("cancel_event", None)
+        # 逐行采样参数 (make_sampling_params) 和随机数流, 批次里的请求可以用不同的 top_k/top_p/temperature/seed
+        sampling_params = kwargs.get("sampling_params", None)
+        generators = kwargs.get("generators", None)
+        max_kv_len = self.get_static_kv_len(src_len, early_stop_num)
+        kv_len = src_len
         y_list = [None] * y.shape[0]
         batch_idx_map = list(range(y.shape[0]))
         idx_list = [None] * y.shape[0]
         for idx in tqdm(range(1500)):
             if idx == 0:
                 xy_dec, k_cache, v_cache = self.t2s_transformer.process_prompt(xy_pos, attn_mask, None)
+                if static_kv_cache:
+                    k_cache, v_cache = self.t2s_transformer.init_static_cache(k_cache, v_cache, max_kv_len)
+            elif static_kv_cache:
+                xy_dec, k_cache, v_cache = self.t2s_transformer.decode_next_token_static(
+                    xy_pos, k_cache, v_cache, kv_len, attn_mask
+                )
+                kv_len += 1
             else:
                 xy_dec, k_cache, v_cache = self.t2s_transformer.decode_next_token(xy_pos, k_cache, v_cache, attn_mask)
             logits = self.ar_predict_layer(xy_dec[:, -1])
 
             if idx == 0:
-                attn_mask = F.pad(attn_mask[:, :, -1].unsqueeze(-2), (0, 1), value=False)
+                if static_kv_cache:
+                    ### 一次性pad到最大长度, 之后每步只取前 kv_len+1 列
+                    attn_mask = F.pad(attn_mask[:, :, -1].unsqueeze(-2), (0, max_kv_len - src_len), value=False)
+                else:
+                    attn_mask = F.pad(attn_mask[:, :, -1].unsqueeze(-2), (0, 1), value=False)
                 logits = logits[:, :-1]
-            else:
+            elif not static_kv_cache:
                 attn_mask = F.pad(attn_mask, (0, 1), value=False)
 
-            samples = sample(
-                logits, y, top_k=top_k, top_p=top_p, repetition_penalty=repetition_penalty, temperature=temperature
-            )[0]
+            if sampling_params is not None:
+                samples = sample_batched(logits, y, sampling_params, generators)[0]
+            else:
+                samples = sample(
+                    logits, y, top_k=top_k, top_p=top_p, repetition_penalty=repetition_penalty, temperature=temperature
+                )[0]
 
             y = torch.concat([y, samples], dim=1)
 
@@ -739,6 +856,10 @@ class Text2SemanticDecoder(nn.Module):
                 # index = torch.LongTensor(batch_idx_map).to(y.device)
                 y = torch.index_select(y, dim=0, index=reserved_idx_of_batch_for_y)
                 attn_mask = torch.index_select(attn_mask, dim=0, index=reserved_idx_of_batch_for_y)
+                if sampling_params is not None:
+                    sampling_params = select_sampling_params(sampling_params, reserved_idx_of_batch_for_y)
+                if generators is not None:
+                    generators = [generators[i] for i in reserved_idx_of_batch_for_y.tolist()]
                 if k_cache is not None:
                     for i in range(len(k_cache)):
                         k_cache[i] = torch.index_select(k_cache[i], dim=0, index=reserved_idx_of_batch_for_y)
@@ -755,6 +876,13 @@ class Text2SemanticDecoder(nn.Module):
             if None not in idx_list:
                 stop = True
 
+            if not stop and cancel_event is not None and cancel_event.is_set():
+                print("T2S decoding cancelled")
+                stop = True
+                for i, batch_index in enumerate(batch_idx_map):
+                    idx_list[batch_index] = idx
+                    y_list[batch_index] = y[i, :-1]
+
             if stop:
                 if y.shape[1] == 0:
                     y = torch.concat([y, torch.zeros_like(samples)], dim=1)
@@ -793,7 +921,17 @@ class Text2SemanticDecoder(nn.Module):
     ):
         y_list = []
         idx_list = []
+        sampling_params = kwargs.pop("sampling_params", None)
+        generators = kwargs.pop("generators", None)
         for i in range(len(x)):
+            if sampling_params is not None:
+                # 逐条解码, 每条用自己的采样参数
+                top_k, top_p, temperature, repetition_penalty = (
+                    sampling_params[key][i].item() for key in ("top_k", "top_p", "temperature", "repetition_penalty")
+                )
+                top_k = top_k if top_k > 0 else None
+            if generators is not None:
+                kwargs["generator"] = generators[i]
             y, idx = self.infer_panel_naive(
                 x[i].unsqueeze(0),
                 x_lens[i],
@@ -824,6 +962,32 @@ class Text2SemanticDecoder(nn.Module):
         repetition_penalty: float = 1.35,
         **kwargs,
     ):
+        for y, idx, _ in self.infer_panel_naive_stream(
+            x, x_lens, prompts, bert_feature, top_k, top_p, early_stop_num, temperature, repetition_penalty, **kwargs
+        ):
+            pass
+        return y, idx
+
+    def infer_panel_naive_stream(
+        self,
+        x: torch.LongTensor,  #####全部文本token
+        x_lens: torch.LongTensor,
+        prompts: torch.LongTensor,  ####参考音频token
+        bert_feature: torch.LongTensor,
+        top_k: int = -100,
+        top_p: int = 100,
+        early_stop_num: int = -1,
+        temperature: float = 1.0,
+        repetition_penalty: float = 1.35,
+        stream_chunk: int = 0,
+        **kwargs,
+    ):
+        """
+        Same decoding as infer_panel_naive, as a generator.
+        Yields (y, idx, finished): every stream_chunk new tokens (if stream_chunk > 0) with finished=False,
+        where the last idx tokens of y are the new ones, and once at the end with the same (y, idx) that
+        infer_panel_naive returns.
+        """
         x = self.ar_text_embedding(x)
         x = x + self.bert_proj(bert_feature.transpose(1, 2))
         x = self.ar_text_position(x)
@@ -875,9 +1039,20 @@ class Text2SemanticDecoder(nn.Module):
             .to(device=x.device, dtype=torch.bool)
         )
 
+        static_kv_cache = kwargs.get("static_kv_cache", False)
+        cancel_event = kwargs.get("cancel_event", None)
+        max_kv_len = self.get_static_kv_len(src_len, early_stop_num)
+        kv_len = src_len
         for idx in tqdm(range(1500)):
             if xy_attn_mask is not None:
                 xy_dec, k_cache, v_cache = self.t2s_transformer.process_prompt(xy_pos, xy_attn_mask, None)
+                if static_kv_cache:
+                    k_cache, v_cache = self.t2s_transformer.init_static_cache(k_cache, v_cache, max_kv_len)
+            elif static_kv_cache:
+                xy_dec, k_cache, v_cache = self.t2s_transformer.decode_next_token_static(
+                    xy_pos, k_cache, v_cache, kv_len
+                )
+                kv_len += 1
             else:
                 xy_dec, k_cache, v_cache = self.t2s_transformer.decode_next_token(xy_pos, k_cache, v_cache)
 
@@ -889,7 +1064,13 @@ class Text2SemanticDecoder(nn.Module):
                 logits = logits[:, :-1]
 
             samples = sample(
-                logits, y, top_k=top_k, top_p=top_p, repetition_penalty=repetition_penalty, temperature=temperature
+                logits,
+                y,
+                generator=kwargs.get("generator", None),
+                top_k=top_k,
+                top_p=top_p,
+                repetition_penalty=repetition_penalty,
+                temperature=temperature,
             )[0]
 
             y = torch.concat([y, samples], dim=1)
@@ -900,6 +1081,9 @@ class Text2SemanticDecoder(nn.Module):
 
             if torch.argmax(logits, dim=-1)[0] == self.EOS or samples[0, 0] == self.EOS:
                 stop = True
+            if cancel_event is not None and cancel_event.is_set():
+                print("T2S decoding cancelled")
+                stop = True
             if stop:
                 if y.shape[1] == 0:
                     y = torch.concat([y, torch.zeros_like(samples)], dim=1)
@@ -907,6 +1091,10 @@ class Text2SemanticDecoder(nn.Module):
                 print(f"T2S Decoding EOS [{prefix_len} -> {y.shape[1]}]")
                 break
 
+            # 流式: 每生成 stream_chunk 个 token 先交出去一次 (AR 循环不停)
+            if stream_chunk > 0 and (idx + 1) % stream_chunk == 0:
+                yield y, idx + 1, False
+
             ####################### update next step ###################################
             y_emb = self.ar_audio_embedding(y[:, -1:])
             xy_pos = y_emb * self.ar_audio_position.x_scale + self.ar_audio_position.alpha * self.ar_audio_position.pe[
@@ -914,8 +1102,9 @@ class Text2SemanticDecoder(nn.Module):
             ].to(dtype=y_emb.dtype, device=y_emb.device)
 
         if ref_free:
-            return y[:, :-1], 0
-        return y[:, :-1], idx
+            yield y[:, :-1], 0, True
+            return
+        yield y[:, :-1], idx, True
 
     def infer_panel(
         self,
@@ -0,0 +1,189 @@
+# int8 动态量化 (仅 CPU): 权重离线量化为 int8, 激活在每次调用时按张量动态量化 (fbgemm / qnnpack kernel)
+# T2SBlock / T2SMLP 是 jit.script 类, 直接用 F.linear 读 fp32 权重, 所以这里用同样计算的 python 版本替换,
+# 仍由 T2STransformer 串起来, infer_panel_* 的调用方式不变
+from typing import List, Optional
+
+import torch
+from torch import nn
+from torch.nn import functional as F
+
+from AR.models.t2s_model import T2SBlock, T2STransformer, Text2SemanticDecoder, scaled_dot_product_attention
+
+
+def quantize_linear(weight: torch.Tensor, bias: Optional[torch.Tensor], per_channel: bool = True) -> nn.Module:
+    """fp32 (out, in) 权重 -> torch.ao 动态量化 Linear"""
+    linear = nn.Linear(weight.shape[1], weight.shape[0], bias=bias is not None)
+    with torch.no_grad():
+        linear.weight.copy_(weight.detach().float())
+        if bias is not None:
+            linear.bias.copy_(bias.detach().float())
+    return quantize_linears(nn.Sequential(linear), per_channel)[0]
+
+
+def quantize_linears(module: nn.Module, per_channel: bool = True, names=None) -> nn.Module:
+    """把 module 里的 nn.Linear (或 names 指定的子模块) 原地换成 int8 动态量化版本"""
+    qconfig = (
+        torch.ao.quantization.per_channel_dynamic_qconfig
+        if per_channel
+        else torch.ao.quantization.default_dynamic_qconfig
+    )
+    spec = {name: qconfig for name in names} if names is not None else {nn.Linear: qconfig}
+    return torch.ao.quantization.quantize_dynamic(module, spec, dtype=torch.qint8, inplace=True)
+
+
+class T2SBlockInt8:
+    """
+    Eager counterpart of T2SBlock whose qkv / out-proj / MLP projections are int8 dynamically quantized
+    Linear modules. Layer norms, attention and the KV cache stay in fp32.
+
+    Args:
+        block (T2SBlock): the fp32 block to quantize; its tensors are not kept.
+        per_channel (bool): per output channel weight scales (more accurate) instead of one per tensor.
+    """
+
+    def __init__(self, block: T2SBlock, per_channel: bool = True):
+        self.num_heads = block.num_heads
+        self.hidden_dim: int = block.hidden_dim
+        self.qkv = quantize_linear(block.qkv_w, block.qkv_b, per_channel)
+        self.out = quantize_linear(block.out_w, block.out_b, per_channel)
+        self.w1 = quantize_linear(block.mlp.w1, block.mlp.b1, per_channel)
+        self.w2 = quantize_linear(block.mlp.w2, block.mlp.b2, per_channel)
+        self.norm_w1 = block.norm_w1.detach().float()
+        self.norm_b1 = block.norm_b1.detach().float()
+        self.norm_eps1 = block.norm_eps1
+        self.norm_w2 = block.norm_w2.detach().float()
+        self.norm_b2 = block.norm_b2.detach().float()
+        self.norm_eps2 = block.norm_eps2
+
+    def to_mask(self, x: torch.Tensor, padding_mask: Optional[torch.Tensor]):
+        if padding_mask is None:
+            return x
+        if padding_mask.dtype == torch.bool:
+            return x.masked_fill(padding_mask, 0)
+        return x * padding_mask
+
+    def _attention(self, q, k, v, attn_mask, torch_sdpa: bool):
+        batch_size, q_len, kv_len = q.shape[0], q.shape[1], k.shape[1]
+        q = q.view(batch_size, q_len, self.num_heads, -1).transpose(1, 2)
+        k = k.view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+        v = v.view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+        if torch_sdpa:
+            attn = F.scaled_dot_product_attention(q, k, v, (~attn_mask) if attn_mask is not None else None)
+        else:
+            attn = scaled_dot_product_attention(q, k, v, attn_mask)
+        return attn.transpose(1, 2).reshape(batch_size, q_len, -1)
+
+    def _residual(self, x, attn):
+        x = F.layer_norm(x + self.out(attn), [self.hidden_dim], self.norm_w1, self.norm_b1, self.norm_eps1)
+        x = x + self.w2(F.relu(self.w1(x)))
+        return F.layer_norm(x, [self.hidden_dim], self.norm_w2, self.norm_b2, self.norm_eps2)
+
+    def process_prompt(
+        self,
+        x: torch.Tensor,
+        attn_mask: torch.Tensor,
+        padding_mask: Optional[torch.Tensor] = None,
+        torch_sdpa: bool = True,
+    ):
+        q, k, v = self.qkv(self.to_mask(x, padding_mask)).chunk(3, dim=-1)
+        q = self.to_mask(q, padding_mask)
+        k_cache = self.to_mask(k, padding_mask)
+        v_cache = self.to_mask(v, padding_mask)
+        attn = self._attention(q, k_cache, v_cache, attn_mask, torch_sdpa)
+        return self._residual(x, self.to_mask(attn, padding_mask)), k_cache, v_cache
+
+    def decode_next_token(
+        self,
+        x: torch.Tensor,
+        k_cache: torch.Tensor,
+        v_cache: torch.Tensor,
+        attn_mask: torch.Tensor = None,
+        torch_sdpa: bool = True,
+    ):
+        q, k, v = self.qkv(x).chunk(3, dim=-1)
+        k_cache = torch.cat([k_cache, k], dim=1)
+        v_cache = torch.cat([v_cache, v], dim=1)
+        attn = self._attention(q, k_cache, v_cache, attn_mask, torch_sdpa)
+        return self._residual(x, attn), k_cache, v_cache
+
+    def decode_next_token_static(
+        self,
+        x: torch.Tensor,
+        k_cache: torch.Tensor,
+        v_cache: torch.Tensor,
+        cursor: int,
+        attn_mask: Optional[torch.Tensor] = None,
+        torch_sdpa: bool = True,
+    ):
+        q, k, v = self.qkv(x).chunk(3, dim=-1)
+        k_cache[:, cursor : cursor + 1] = k
+        v_cache[:, cursor : cursor + 1] = v
+        kv_len = cursor + 1
+        if attn_mask is not None:
+            attn_mask = attn_mask[..., :kv_len]
+        attn = self._attention(q, k_cache[:, :kv_len], v_cache[:, :kv_len], attn_mask, torch_sdpa)
+        return self._residual(x, attn)
+
+
+def is_quantized(model: Text2SemanticDecoder) -> bool:
+    return getattr(model, "int8", False)
+
+
+def quantize_t2s_model(model: Text2SemanticDecoder, per_channel: bool = True, release_float: bool = True):
+    """
+    原地把 T2S 解码器换成 int8: 每层的 qkv / out-proj / MLP, 以及 ar_predict_layer / bert_proj.
+    release_float=True 时丢掉 fp32 的 self.h (只有训练和旧的 infer 会用), 这样权重内存才真正下降;
+    之后无法再导出 onnx 或回到 fp32, 需要重新加载权重文件.
+    """
+    if is_quantized(model):
+        return model
+    assert not next(model.parameters()).is_cuda, "int8 dynamic quantization only runs on CPU"
+    model.float()
+    blocks: List[T2SBlockInt8] = [T2SBlockInt8(block, per_channel) for block in model.t2s_transformer.blocks]
+    model.t2s_transformer = T2STransformer(model.num_layers, blocks)
+    quantize_linears(model, per_channel, names={"ar_predict_layer", "bert_proj"})
+    if release_float:
+        model.h = None
+    model.int8 = True
+    return model
+
+
+def quantize_vits_model(vits_model: nn.Module, per_channel: bool = True) -> nn.Module:
+    """
+    VITS 里的 nn.Linear (v2Pro 的 sv_emb / ge_to512, 参考编码器, v3/v4 的 CFM DiT) 原地量化为 int8.
+    Conv1d / ConvTranspose1d 没有动态量化 kernel (静态量化需要插 QuantStub 并校准), 保持 fp32.
+    """
+    if getattr(vits_model, "int8", False):
+        return vits_model
+    quantize_linears(vits_model.float(), per_channel)
+    vits_model.int8 = True
+    return vits_model
+
+
+def weight_bytes(module) -> int:
+    """参数 + buffer + 打包的 int8 权重的字节数"""
+    total = 0
+    seen = set()
+    for tensor in list(module.parameters()) + list(module.buffers()):
+        if id(tensor) not in seen:
+            seen.add(id(tensor))
+            total += tensor.numel() * tensor.element_size()
+    for sub in module.modules():
+        if isinstance(sub, torch.ao.nn.quantized.dynamic.Linear):
+            weight, bias = sub._weight_bias()
+            total += weight.numel() * weight.element_size() + (bias.numel() * 4 if bias is not None else 0)
+    return total
+
+
+def t2s_weight_bytes(model: Text2SemanticDecoder) -> int:
+    """T2S 解码器权重字节数, 包括 t2s_transformer 里不属于 nn.Module 的张量/量化 Linear"""
+    total = weight_bytes(model)
+    if model.h is not None:
+        # fp32 的 T2SBlock 和 self.h 共用同一份权重, 已经算过
+        return total
+    for block in model.t2s_transformer.blocks:
+        for linear in (block.qkv, block.out, block.w1, block.w2):
+            total += weight_bytes(linear)
+        for norm in (block.norm_w1, block.norm_b1, block.norm_w2, block.norm_b2):
+            total += norm.numel() * norm.element_size()
+    return total
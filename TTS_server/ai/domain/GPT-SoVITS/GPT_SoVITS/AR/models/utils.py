@@ -1,6 +1,6 @@
 # modified from https://github.com/yangdongchao/SoundStorm/blob/master/soundstorm/s1/AR/models/utils.py
 # reference: https://github.com/lifeiteng/vall-e
-from typing import Tuple
+from typing import Dict, List, Tuple
 
 import torch
 import torch.nn.functional as F
@@ -139,8 +139,9 @@ from typing import Optional
 
 def multinomial_sample_one_no_sync(
     probs_sort,
+    generator: Optional[torch.Generator] = None,
 ):  # Does multinomial sampling without a cuda synchronization
-    q = torch.empty_like(probs_sort).exponential_(1)
+    q = torch.empty_like(probs_sort).exponential_(1, generator=generator)
     return torch.argmax(probs_sort / q, dim=-1, keepdim=True).to(dtype=torch.int)
 
 
@@ -192,10 +193,114 @@ def logits_to_probs(
 def sample(
     logits,
     previous_tokens: Optional[torch.Tensor] = None,
+    generator: Optional[torch.Generator] = None,
     **sampling_kwargs,
 ) -> Tuple[torch.Tensor, torch.Tensor]:
     probs = logits_to_probs(logits=logits, previous_tokens=previous_tokens, **sampling_kwargs)
-    idx_next = multinomial_sample_one_no_sync(probs)
+    idx_next = multinomial_sample_one_no_sync(probs, generator=generator)
+    return idx_next, probs
+
+
+def make_sampling_params(
+    batch_size: int,
+    device: torch.device,
+    top_k=5,
+    top_p=1.0,
+    temperature=1.0,
+    repetition_penalty=1.35,
+) -> Dict[str, torch.Tensor]:
+    """
+    每行一组采样参数 (标量或长度为 batch_size 的列表), 供 sample_batched 使用
+    top_k <= 0 表示不做 top-k 截断
+    """
+
+    def _column(value, dtype):
+        if not isinstance(value, (list, tuple)):
+            value = [value] * batch_size
+        assert len(value) == batch_size, "sampling params must have one value per row"
+        return torch.tensor(value, dtype=dtype, device=device)
+
+    return {
+        "top_k": _column(top_k, torch.long),
+        "top_p": _column(top_p, torch.float32),
+        "temperature": _column(temperature, torch.float32).clamp_min(1e-5),
+        "repetition_penalty": _column(repetition_penalty, torch.float32),
+    }
+
+
+def select_sampling_params(params: Dict[str, torch.Tensor], index: torch.Tensor) -> Dict[str, torch.Tensor]:
+    """移除已结束的行时和 y / kv cache 一起 index_select"""
+    return {key: torch.index_select(value, dim=0, index=index.to(value.device)) for key, value in params.items()}
+
+
+def logits_to_probs_batched(
+    logits: torch.Tensor,
+    previous_tokens: Optional[torch.Tensor],
+    params: Dict[str, torch.Tensor],
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    logits_to_probs 的逐行参数版本 (语义相同: 重复惩罚 -> top-p(温度前) -> 温度 -> top-k)
+    不对整个词表排序: 只取 max(top_k) 个候选 (torch.topk), top-p 的累计概率用全词表 logsumexp 归一化
+
+    Returns:
+        probs (B, K): 候选的采样概率 (被截掉的为 0)
+        candidates (B, K): 候选在词表中的下标
+        keep (B, K): 每行保留的候选
+    """
+    vocab_size = logits.size(-1)
+
+    if previous_tokens is not None:
+        penalty = params["repetition_penalty"].to(logits.dtype).unsqueeze(-1)
+        previous_tokens = previous_tokens.long()
+        score = torch.gather(logits, dim=1, index=previous_tokens)
+        score = torch.where(score < 0, score * penalty, score / penalty)
+        logits.scatter_(dim=1, index=previous_tokens, src=score)
+
+    top_k = params["top_k"]
+    top_k = torch.where(top_k <= 0, torch.full_like(top_k, vocab_size), top_k.clamp_max(vocab_size))
+    # 一次 host 同步取最大 k; 之后全部在 (B, K) 上计算
+    max_k = int(top_k.max())
+    values, candidates = torch.topk(logits, max_k, dim=-1)
+    values = values.float()
+
+    position = torch.arange(max_k, device=logits.device).unsqueeze(0)
+    keep = position < top_k.unsqueeze(-1)
+
+    top_p = params["top_p"].unsqueeze(-1)
+    # 与 logits_to_probs 一致: 累计概率 (含自身) 超过 top_p 的去掉, 至少保留一个
+    cum_probs = torch.cumsum(torch.exp(values - torch.logsumexp(logits.float(), dim=-1, keepdim=True)), dim=-1)
+    keep_p = (cum_probs <= top_p) | (top_p >= 1.0) | (position == 0)
+    keep = keep & keep_p
+
+    scaled = values / params["temperature"].unsqueeze(-1)
+    scaled = scaled.masked_fill(~keep, -float("Inf"))
+    probs = torch.softmax(scaled, dim=-1)
+    return probs, candidates, keep
+
+
+def sample_batched(
+    logits: torch.Tensor,
+    previous_tokens: Optional[torch.Tensor],
+    params: Dict[str, torch.Tensor],
+    generators: Optional[List[Optional[torch.Generator]]] = None,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    每行使用自己的 top_k / top_p / temperature / repetition_penalty 采样 (params 来自 make_sampling_params)
+
+    generators[i] 不为 None 的行从自己的随机数流取噪声, 且每步只取该行 top_k 个,
+    所以同一个 seed 的结果与同批次的其他请求无关; 其余行共用全局随机数
+    """
+    probs, candidates, keep = logits_to_probs_batched(logits, previous_tokens, params)
+    q = torch.empty_like(probs).exponential_(1)
+    if generators is not None:
+        row_k = params["top_k"].tolist()
+        for i, generator in enumerate(generators):
+            if generator is None:
+                continue
+            k = probs.size(-1) if row_k[i] <= 0 else min(row_k[i], probs.size(-1))
+            q[i, :k].exponential_(1, generator=generator)
+    choice = torch.argmax(probs / q, dim=-1, keepdim=True)
+    idx_next = torch.gather(candidates, dim=1, index=choice).to(dtype=torch.int)
     return idx_next, probs
 
 
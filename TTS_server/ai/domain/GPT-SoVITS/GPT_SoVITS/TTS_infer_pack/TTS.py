@@ -3,6 +3,7 @@ import math
 import os
 import random
 import sys
+import threading
 import time
 import traceback
 from copy import deepcopy
@@ -22,6 +23,14 @@ import torch
 import torch.nn.functional as F
 import yaml
 from AR.models.t2s_lightning_module import Text2SemanticLightningModule
+from AR.models.t2s_model_int8 import (
+    is_quantized,
+    quantize_t2s_model,
+    quantize_vits_model,
+    t2s_weight_bytes,
+    weight_bytes,
+)
+from AR.models.utils import make_sampling_params
 from BigVGAN.bigvgan import BigVGAN
 from feature_extractor.cnhubert import CNHubert
 from module.mel_processing import mel_spectrogram_torch, spectrogram_torch
@@ -33,7 +42,12 @@ from transformers import AutoModelForMaskedLM, AutoTokenizer
 from tools.audio_sr import AP_BWE
 from tools.i18n.i18n import I18nAuto, scan_language_list
 from TTS_infer_pack.text_segmentation_method import splits
-from TTS_infer_pack.TextPreprocessor import TextPreprocessor
+from TTS_infer_pack.TextPreprocessor import TextPreprocessor, frontend_languages, loaded_frontends
+from TTS_infer_pack.frontend_pipeline import FrontendPipeline
+from TTS_infer_pack.metrics import metrics
+from TTS_infer_pack.segment_planner import cost_model as segment_cost_model, count_units
+from TTS_infer_pack.prompt_cache import PromptLRUCache
+from TTS_infer_pack.weight_registry import ModelGate, WeightRegistry, hold_models, load_checkpoint
 from sv import SV
 
 resample_transform_dict = {}
@@ -146,6 +160,22 @@ class NO_PROMPT_ERROR(Exception):
     pass
 
 
+class CANCELLED_ERROR(Exception):
+    """The synthesis was cancelled through inputs["cancel_event"] (e.g. superseded by a newer request)."""
+
+    pass
+
+
+class _AllCancelled:
+    """Cancel event of a merged batch: set only when every request of the batch is cancelled."""
+
+    def __init__(self, events: list):
+        self.events = [event for event in events if event is not None]
+
+    def is_set(self) -> bool:
+        return len(self.events) > 0 and all(event.is_set() for event in self.events)
+
+
 # configs/tts_infer.yaml
 """
 custom:
@@ -326,7 +356,34 @@ class TTS_Config:
         self.vits_weights_path = self.configs.get("vits_weights_path", None)
         self.bert_base_path = self.configs.get("bert_base_path", None)
         self.cnhuhbert_base_path = self.configs.get("cnhuhbert_base_path", None)
-        self.languages = self.v1_languages if self.version == "v1" else self.v2_languages
+        # 允许的语言白名单 (None 为该版本支持的全部语言), 例如只服务韩语: ["ko", "all_ko", "en"]
+        self.allowed_languages: list = self.configs.get("languages", None)
+        self.languages = self._filter_languages(self.v1_languages if self.version == "v1" else self.v2_languages)
+        # 文本前端 (各语言 G2P, 中文 BERT) 首次用到时再加载; False 则启动时按 languages 全部加载
+        self.lazy_frontend: bool = bool(self.configs.get("lazy_frontend", True))
+        # 热切换: 不在使用中的已加载模型的内存上限(MB, 0 为换下的模型立即释放) / 等进行中请求结束的最长秒数(0 为一直等)
+        self.resident_models_max_mb: float = float(self.configs.get("resident_models_max_mb", 0))
+        self.swap_drain_timeout: float = float(self.configs.get("swap_drain_timeout", 30))
+        # 多音色参考缓存: 最多缓存的音色数 / 内存上限(MB)
+        self.prompt_cache_size: int = int(self.configs.get("prompt_cache_size", 8))
+        self.prompt_cache_max_mb: float = float(self.configs.get("prompt_cache_max_mb", 512))
+        # 文本前端分句特征缓存: 最多缓存的分句数 / 内存上限(MB)
+        self.text_cache_size: int = int(self.configs.get("text_cache_size", 1024))
+        self.text_cache_max_mb: float = float(self.configs.get("text_cache_max_mb", 256))
+        # 推理后端: "torch" 或 "onnxruntime" (仅 CPU, 见 TTS_infer_pack/onnx_backend.py)
+        self.backend: str = self.configs.get("backend", "torch")
+        assert self.backend in ["torch", "onnxruntime"], "Invalid backend!"
+        self.onnx_dir: str = self.configs.get("onnx_dir", "GPT_SoVITS/onnx_cache")
+        self.onnx_intra_op_threads: int = int(self.configs.get("onnx_intra_op_threads", 0))
+        self.onnx_inter_op_threads: int = int(self.configs.get("onnx_inter_op_threads", 1))
+        # int8 动态量化 (仅 CPU, 见 AR/models/t2s_model_int8.py): T2S 各层和 VITS 的 Linear 权重量化为 int8
+        self.int8: bool = bool(self.configs.get("int8", False))
+        if str(self.device) != "cpu" and self.int8:
+            print(f"Warning: int8 quantization is only supported on CPU, set int8 to False.")
+            self.int8 = False
+        if self.backend == "onnxruntime" and self.int8:
+            print(f"Warning: int8 quantization is only used with the torch backend, set int8 to False.")
+            self.int8 = False
 
         self.use_vocoder: bool = False
 
@@ -384,12 +441,32 @@ class TTS_Config:
             "vits_weights_path": self.vits_weights_path,
             "bert_base_path": self.bert_base_path,
             "cnhuhbert_base_path": self.cnhuhbert_base_path,
+            "prompt_cache_size": self.prompt_cache_size,
+            "prompt_cache_max_mb": self.prompt_cache_max_mb,
+            "text_cache_size": self.text_cache_size,
+            "text_cache_max_mb": self.text_cache_max_mb,
+            "backend": self.backend,
+            "onnx_dir": self.onnx_dir,
+            "onnx_intra_op_threads": self.onnx_intra_op_threads,
+            "onnx_inter_op_threads": self.onnx_inter_op_threads,
+            "int8": self.int8,
+            "languages": self.allowed_languages,
+            "lazy_frontend": self.lazy_frontend,
+            "resident_models_max_mb": self.resident_models_max_mb,
+            "swap_drain_timeout": self.swap_drain_timeout,
         }
         return self.config
 
     def update_version(self, version: str) -> None:
         self.version = version
-        self.languages = self.v1_languages if self.version == "v1" else self.v2_languages
+        self.languages = self._filter_languages(self.v1_languages if self.version == "v1" else self.v2_languages)
+
+    def _filter_languages(self, languages: list) -> list:
+        if self.allowed_languages is None:
+            return languages
+        filtered = [language for language in languages if language in self.allowed_languages]
+        assert filtered, f"None of the configured languages {self.allowed_languages} is supported in {self.version}!"
+        return filtered
 
     def __str__(self):
         self.configs = self.update_configs()
@@ -426,6 +503,18 @@ class TTS:
         self.sr_model: AP_BWE = None
         self.sv_model = None
         self.sr_model_not_exist: bool = False
+        self.vits_hps: dict = None
+        self.ort_backend = None
+        self.text_preprocessor: TextPreprocessor = None
+        # 热切换: 合成请求持有 model_gate 引用, 新模型在 weight_registry 的后台线程构建
+        # prompt_cache / stop_flag / 模型都是实例上的共享状态, 同一时间只放行一个合成 (一次 run_batch 算一个),
+        # 其余请求在 gate 上排队; 跨请求并行靠 run_batch 合批, 不靠多线程同时跑
+        self.model_gate: ModelGate = ModelGate(max_active=1)
+        self.weight_registry: WeightRegistry = WeightRegistry(
+            {"t2s": self._build_t2s, "vits": self._build_vits},
+            self._built_nbytes,
+            self.configs.resident_models_max_mb,
+        )
 
         self.vocoder_configs: dict = {
             "sr": None,
@@ -435,25 +524,41 @@ class TTS:
             "overlapped_len": None,
         }
 
+        self.prompt_lru: PromptLRUCache = PromptLRUCache(
+            self.configs.prompt_cache_size, self.configs.prompt_cache_max_mb
+        )
+
         self._init_models()
 
-        self.text_preprocessor: TextPreprocessor = TextPreprocessor(
-            self.bert_model, self.bert_tokenizer, self.configs.device
+        self.text_preprocessor = TextPreprocessor(
+            self.bert_model,
+            self.bert_tokenizer,
+            self.configs.device,
+            self.configs.text_cache_size,
+            self.configs.text_cache_max_mb,
+            bert_loader=self._load_bert,
         )
+        if not self.configs.lazy_frontend:
+            self.text_preprocessor.preload(self.configs.languages, self.configs.version)
+        print(f"Resident models: {self.get_resident_models()}")
 
         self.prompt_cache: dict = {
             "ref_audio_path": None,
             "prompt_semantic": None,
             "refer_spec": [],
+            "sv_emb": [],
             "prompt_text": None,
             "prompt_lang": None,
             "phones": None,
             "bert_features": None,
             "norm_text": None,
             "aux_ref_audio_paths": [],
+            "cache_key": None,
         }
 
         self.stop_flag: bool = False
+        self.last_ttfa: float = None
+        self.last_frontend_stats: dict = None
         self.precision: torch.dtype = torch.float16 if self.configs.is_half else torch.float32
 
     def _init_models(
@@ -461,10 +566,34 @@ class TTS:
     ):
         self.init_t2s_weights(self.configs.t2s_weights_path)
         self.init_vits_weights(self.configs.vits_weights_path)
-        self.init_bert_weights(self.configs.bert_base_path)
+        # 中文 BERT 只给 zh 文本提特征, 其他语言是全零; lazy_frontend 时等第一条中文文本再加载
+        if not self.configs.lazy_frontend and "zh" in frontend_languages(self.configs.languages):
+            self.init_bert_weights(self.configs.bert_base_path)
         self.init_cnhuhbert_weights(self.configs.cnhuhbert_base_path)
+        self.init_onnx_backend()
         # self.enable_half_precision(self.configs.is_half)
 
+    def init_onnx_backend(self):
+        if self.configs.backend != "onnxruntime":
+            return
+        if str(self.configs.device) != "cpu" or self.configs.is_half:
+            print("Warning: the onnxruntime backend only runs on CPU in float32, falling back to torch.")
+            return
+        from TTS_infer_pack.onnx_backend import OnnxBackend
+
+        self.ort_backend = OnnxBackend(
+            self.configs.onnx_dir, self.configs.onnx_intra_op_threads, self.configs.onnx_inter_op_threads
+        )
+        self.ort_backend.load_t2s(self.t2s_model.model, self.configs.t2s_weights_path)
+        self._load_onnx_vits()
+
+    def _load_onnx_vits(self):
+        # v3/v4 (CFM + 声码器) 的 VITS 部分仍用 torch
+        if self.configs.use_vocoder:
+            self.ort_backend.vits = None
+            return
+        self.ort_backend.load_vits(self.vits_model, self.vits_hps, self.configs.vits_weights_path, self.configs.version)
+
     def init_cnhuhbert_weights(self, base_path: str):
         print(f"Loading CNHuBERT weights from {base_path}")
         self.cnhuhbert_model = CNHubert(base_path)
@@ -481,12 +610,50 @@ class TTS:
         self.bert_model = self.bert_model.to(self.configs.device)
         if self.configs.is_half and str(self.configs.device) != "cpu":
             self.bert_model = self.bert_model.half()
+        if self.text_preprocessor is not None:
+            self.text_preprocessor.bert_model = self.bert_model
+            self.text_preprocessor.tokenizer = self.bert_tokenizer
+
+    def _load_bert(self):
+        self.init_bert_weights(self.configs.bert_base_path)
+        return self.bert_model, self.bert_tokenizer
+
+    def get_resident_models(self) -> dict:
+        """
+        Weight size in MB of every model currently loaded (None if it was never loaded or was skipped),
+        plus the language frontends imported so far.
+        """
+
+        def size_mb(model):
+            if model is None:
+                return None
+            return round(weight_bytes(model) / 2**20, 1)
+
+        return {
+            "t2s": round(t2s_weight_bytes(self.t2s_model.model) / 2**20, 1) if self.t2s_model is not None else None,
+            "vits": size_mb(self.vits_model),
+            "bert": size_mb(self.bert_model),
+            "cnhubert": size_mb(self.cnhuhbert_model),
+            "sv": size_mb(self.sv_model.embedding_model) if self.sv_model is not None else None,
+            "vocoder": size_mb(self.vocoder),
+            "sr": size_mb(self.sr_model.model) if self.sr_model is not None else None,
+            "text_frontends": loaded_frontends(),
+        }
 
     def init_vits_weights(self, weights_path: str):
-        self.configs.vits_weights_path = weights_path
+        built = self._build_vits(weights_path)
+        self.weight_registry.put("vits", weights_path, built)
+        self._apply_vits(built)
+
+    def _build_vits(self, weights_path: str) -> dict:
+        """
+        Builds the SoVITS model of weights_path without touching the one in use (see _apply_vits).
+        """
         version, model_version, if_lora_v3 = get_sovits_version_from_path_fast(weights_path)
+        # v2Pro 系列需要 SV 模型 (与 SoVITS 权重无关, 已有就复用); 新建的放进 built, 由 _apply_vits 换上
+        sv_model = None
         if "Pro" in model_version:
-            self.init_sv_model()
+            sv_model = self.sv_model if self.sv_model is not None else SV(self.configs.device, self.configs.is_half)
         path_sovits = self.configs.default_configs[model_version]["vits_weights_path"]
 
         if if_lora_v3 == True and os.path.exists(path_sovits) == False:
@@ -513,43 +680,33 @@ class TTS:
         else:
             hps["model"]["version"] = model_version
 
-        self.configs.filter_length = hps["data"]["filter_length"]
-        self.configs.segment_size = hps["train"]["segment_size"]
-        self.configs.sampling_rate = hps["data"]["sampling_rate"]
-        self.configs.hop_length = hps["data"]["hop_length"]
-        self.configs.win_length = hps["data"]["win_length"]
-        self.configs.n_speakers = hps["data"]["n_speakers"]
-        self.configs.semantic_frame_rate = hps["model"]["semantic_frame_rate"]
+        filter_length = hps["data"]["filter_length"]
+        segment_size = hps["train"]["segment_size"]
+        hop_length = hps["data"]["hop_length"]
+        n_speakers = hps["data"]["n_speakers"]
         kwargs = hps["model"]
         # print(f"self.configs.sampling_rate:{self.configs.sampling_rate}")
 
-        self.configs.update_version(model_version)
-
         # print(f"model_version:{model_version}")
         # print(f'hps["model"]["version"]:{hps["model"]["version"]}')
         if model_version not in v3v4set:
             vits_model = SynthesizerTrn(
-                self.configs.filter_length // 2 + 1,
-                self.configs.segment_size // self.configs.hop_length,
-                n_speakers=self.configs.n_speakers,
+                filter_length // 2 + 1,
+                segment_size // hop_length,
+                n_speakers=n_speakers,
                 **kwargs,
             )
-            self.configs.use_vocoder = False
         else:
             kwargs["version"] = model_version
             vits_model = SynthesizerTrnV3(
-                self.configs.filter_length // 2 + 1,
-                self.configs.segment_size // self.configs.hop_length,
-                n_speakers=self.configs.n_speakers,
+                filter_length // 2 + 1,
+                segment_size // hop_length,
+                n_speakers=n_speakers,
                 **kwargs,
             )
-            self.configs.use_vocoder = True
-            self.init_vocoder(model_version)
             if "pretrained" not in weights_path and hasattr(vits_model, "enc_q"):
                 del vits_model.enc_q
 
-        self.is_v2pro = model_version in {"v2Pro", "v2ProPlus"}
-
         if if_lora_v3 == False:
             print(
                 f"Loading VITS weights from {weights_path}. {vits_model.load_state_dict(dict_s2['weight'], strict=False)}"
@@ -574,30 +731,136 @@ class TTS:
 
         vits_model = vits_model.to(self.configs.device)
         vits_model = vits_model.eval()
-
-        self.vits_model = vits_model
         if self.configs.is_half and str(self.configs.device) != "cpu":
-            self.vits_model = self.vits_model.half()
+            vits_model = vits_model.half()
+        if self.ort_backend is None and self.configs.int8 and str(self.configs.device) == "cpu":
+            quantize_vits_model(vits_model)
+
+        return {
+            "weights_path": weights_path,
+            "model": vits_model,
+            "hps": hps,
+            "model_version": model_version,
+            "sv_model": sv_model,
+        }
 
-        self.configs.save_configs()
+    def _apply_vits(self, built: dict):
+        """Makes a model from _build_vits the one in use, with the configs that depend on it"""
+        hps = built["hps"]
+        model_version = built["model_version"]
+        self.configs.vits_weights_path = built["weights_path"]
+        self.configs.filter_length = hps["data"]["filter_length"]
+        self.configs.segment_size = hps["train"]["segment_size"]
+        self.configs.sampling_rate = hps["data"]["sampling_rate"]
+        self.configs.hop_length = hps["data"]["hop_length"]
+        self.configs.win_length = hps["data"]["win_length"]
+        self.configs.n_speakers = hps["data"]["n_speakers"]
+        self.configs.semantic_frame_rate = hps["model"]["semantic_frame_rate"]
+        self.vits_hps = hps
+        self.configs.update_version(model_version)
 
+        self.configs.use_vocoder = model_version in {"v3", "v4"}
+        if self.configs.use_vocoder:
+            self.init_vocoder(model_version)
+        self.is_v2pro = model_version in {"v2Pro", "v2ProPlus"}
+        if self.sv_model is None and built.get("sv_model") is not None:
+            self.sv_model = built["sv_model"]
+        self.vits_model = built["model"]
 
+        # prompt_semantic 依赖 vits 权重, 换权重后旧的参考缓存全部失效
+        self.prompt_lru.clear()
+        self.configs.save_configs()
+        if self.ort_backend is not None:
+            self._load_onnx_vits()
 
     def init_t2s_weights(self, weights_path: str):
+        built = self._build_t2s(weights_path)
+        self.weight_registry.put("t2s", weights_path, built)
+        self._apply_t2s(built)
+
+    def _build_t2s(self, weights_path: str) -> dict:
+        """
+        Builds the Text2Semantic model of weights_path without touching the one in use (see _apply_t2s).
+        """
         print(f"Loading Text2Semantic weights from {weights_path}")
-        self.configs.t2s_weights_path = weights_path
-        self.configs.save_configs()
-        self.configs.hz = 50
-        dict_s1 = torch.load(weights_path, map_location=self.configs.device, weights_only=False)
+        dict_s1 = load_checkpoint(weights_path, map_location=self.configs.device)
         config = dict_s1["config"]
-        self.configs.max_sec = config["data"]["max_sec"]
         t2s_model = Text2SemanticLightningModule(config, "****", is_train=False)
         t2s_model.load_state_dict(dict_s1["weight"])
         t2s_model = t2s_model.to(self.configs.device)
         t2s_model = t2s_model.eval()
-        self.t2s_model = t2s_model
         if self.configs.is_half and str(self.configs.device) != "cpu":
-            self.t2s_model = self.t2s_model.half()
+            t2s_model = t2s_model.half()
+        if self.ort_backend is None and self.configs.int8 and str(self.configs.device) == "cpu":
+            quantize_t2s_model(t2s_model.model)
+        return {"weights_path": weights_path, "model": t2s_model, "max_sec": config["data"]["max_sec"]}
+
+    def _apply_t2s(self, built: dict):
+        """Makes a model from _build_t2s the one in use"""
+        self.configs.t2s_weights_path = built["weights_path"]
+        self.configs.save_configs()
+        self.configs.hz = 50
+        self.configs.max_sec = built["max_sec"]
+        self.t2s_model = built["model"]
+        if self.ort_backend is not None:
+            self.ort_backend.load_t2s(self.t2s_model.model, built["weights_path"])
+
+    def _built_nbytes(self, kind: str, built: dict) -> int:
+        if kind == "t2s":
+            return t2s_weight_bytes(built["model"].model)
+        return weight_bytes(built["model"])
+
+    def swap_t2s_weights(self, weights_path: str, wait: bool = True):
+        """
+        Replaces the GPT weights without stopping traffic: the model is built on the weight registry's loader
+        thread (or taken from the registry if resident) while requests keep running, then swapped in between
+        requests once the in-flight ones have finished on the old weights.
+        Args:
+            weights_path: str, the GPT checkpoint.
+            wait: bool, block until the swap is done; if False, it happens in the background.
+        """
+        self._swap({"t2s": weights_path}, wait)
+
+    def swap_vits_weights(self, weights_path: str, wait: bool = True):
+        """Same as swap_t2s_weights for the SoVITS weights."""
+        self._swap({"vits": weights_path}, wait)
+
+    def register_voice(self, name: str, t2s_weights_path: str, vits_weights_path: str):
+        """Registers a named voice (GPT + SoVITS weights) and starts loading it in the background."""
+        self.weight_registry.register_voice(name, t2s_weights_path, vits_weights_path)
+
+    def swap_voice(self, name: str, wait: bool = True):
+        """Swaps in both models of a registered voice in a single step."""
+        self._swap(self.weight_registry.voice(name), wait)
+
+    def _swap(self, paths: dict, wait: bool):
+        futures = {kind: self.weight_registry.preload(kind, path) for kind, path in paths.items()}
+
+        def swap():
+            built = {kind: future.result() for kind, future in futures.items()}
+
+            def apply():
+                if "t2s" in built:
+                    self._apply_t2s(built["t2s"])
+                if "vits" in built:
+                    self._apply_vits(built["vits"])
+
+            self.model_gate.swap(apply, self.configs.swap_drain_timeout or None)
+            for kind, path in paths.items():
+                self.weight_registry.mark_active(kind, path)
+            print(f"Swapped in {paths}, gate: {self.model_gate.stats()}")
+
+        if wait:
+            swap()
+            return
+        threading.Thread(target=self._swap_in_background, args=(swap,), name="tts-weight-swap", daemon=True).start()
+
+    @staticmethod
+    def _swap_in_background(swap):
+        try:
+            swap()
+        except Exception:
+            traceback.print_exc()
 
     def init_vocoder(self, version: str):
         if version == "v3":
@@ -690,6 +953,8 @@ class TTS:
         self.precision = torch.float16 if enable else torch.float32
         if save:
             self.configs.save_configs()
+        # 常驻的备用模型还是旧精度
+        self.weight_registry.clear()
         if enable:
             if self.t2s_model is not None:
                 self.t2s_model = self.t2s_model.half()
@@ -701,6 +966,9 @@ class TTS:
                 self.cnhuhbert_model = self.cnhuhbert_model.half()
             if self.vocoder is not None:
                 self.vocoder = self.vocoder.half()
+            if self.sv_model is not None:
+                self.sv_model.embedding_model = self.sv_model.embedding_model.half()
+                self.sv_model.is_half = True
         else:
             if self.t2s_model is not None:
                 self.t2s_model = self.t2s_model.float()
@@ -712,6 +980,39 @@ class TTS:
                 self.cnhuhbert_model = self.cnhuhbert_model.float()
             if self.vocoder is not None:
                 self.vocoder = self.vocoder.float()
+            if self.sv_model is not None:
+                self.sv_model.embedding_model = self.sv_model.embedding_model.float()
+                self.sv_model.is_half = False
+        self._reset_prompt_cache()
+
+    def enable_int8_quantization(self, enable: bool = True, save: bool = True):
+        """
+        To enable int8 dynamic quantization of the T2S decoder and the VITS Linear layers (CPU only).
+        Quantization drops the fp32 weights, so disabling it reloads the models from the weight files.
+        Args:
+            enable: bool, whether to enable int8 quantization.
+
+        """
+        if str(self.configs.device) != "cpu" and enable:
+            print("Int8 quantization is only supported on CPU.")
+            return
+        if self.ort_backend is not None and enable:
+            print("Int8 quantization is not used with the onnxruntime backend.")
+            return
+
+        was_quantized = self.t2s_model is not None and is_quantized(self.t2s_model.model)
+        self.configs.int8 = enable
+        if save:
+            self.configs.save_configs()
+        self.weight_registry.clear()
+        if enable:
+            if self.t2s_model is not None:
+                quantize_t2s_model(self.t2s_model.model)
+            if self.vits_model is not None:
+                quantize_vits_model(self.vits_model)
+        elif was_quantized:
+            self.init_t2s_weights(self.configs.t2s_weights_path)
+            self.init_vits_weights(self.configs.vits_weights_path)
 
     def set_device(self, device: torch.device, save: bool = True):
         """
@@ -722,6 +1023,10 @@ class TTS:
         self.configs.device = device
         if save:
             self.configs.save_configs()
+        self.weight_registry.clear()
+        if str(device) != "cpu" and self.configs.int8:
+            # int8 模型不能搬到 GPU, 先按新设备重新加载 fp32 权重
+            self.enable_int8_quantization(False, save=save)
         if self.t2s_model is not None:
             self.t2s_model = self.t2s_model.to(device)
         if self.vits_model is not None:
@@ -734,7 +1039,32 @@ class TTS:
             self.vocoder = self.vocoder.to(device)
         if self.sr_model is not None:
             self.sr_model = self.sr_model.to(device)
+        if self.sv_model is not None:
+            self.sv_model.embedding_model = self.sv_model.embedding_model.to(device)
+        self._reset_prompt_cache()
+
+    def _reset_prompt_cache(self):
+        """
+        Drop the prompt LRU cache and recompute the active reference after a device or precision change.
+        """
+        # prompt_semantic / refer_spec / sv_emb 都是按旧设备或精度算的, 缓存全部作废;
+        # 当前参考音频 (set_ref_audio 设置的也算) 按新设置重新计算, 辅助参考和参考文本特征由下次请求重新生成
+        self.prompt_lru.clear()
+        ref_audio_path = self.prompt_cache["ref_audio_path"]
+        self.prompt_cache.update(
+            {
+                "refer_spec": [],
+                "sv_emb": [],
+                "prompt_text": None,
+                "prompt_lang": None,
+                "aux_ref_audio_paths": [],
+                "cache_key": None,
+            }
+        )
+        if ref_audio_path is not None and self.vits_model is not None:
+            self._load_ref_audio(ref_audio_path)
 
+    @hold_models
     def set_ref_audio(self, ref_audio_path: str):
         """
         To set the reference audio for the TTS model,
@@ -742,19 +1072,34 @@ class TTS:
         Args:
             ref_audio_path: str, the path of the reference audio.
         """
+        self._load_ref_audio(ref_audio_path)
+
+    def _load_ref_audio(self, ref_audio_path: str):
+        # run / run_batch 内部调用时已经持有 model_gate
         self._set_prompt_semantic(ref_audio_path)
         self._set_ref_spec(ref_audio_path)
         self._set_ref_audio_path(ref_audio_path)
 
     def _set_ref_audio_path(self, ref_audio_path):
         self.prompt_cache["ref_audio_path"] = ref_audio_path
+        # 直接调用 set_ref_audio 时当前参考不再对应缓存中的任何条目
+        self.prompt_cache["cache_key"] = None
 
     def _set_ref_spec(self, ref_audio_path):
         spec_audio = self._get_ref_spec(ref_audio_path)
+        sv_emb = self._get_sv_emb(spec_audio[1])
         if self.prompt_cache["refer_spec"] in [[], None]:
             self.prompt_cache["refer_spec"] = [spec_audio]
+            self.prompt_cache["sv_emb"] = [sv_emb]
         else:
             self.prompt_cache["refer_spec"][0] = spec_audio
+            self.prompt_cache["sv_emb"][0] = sv_emb
+
+    def _get_sv_emb(self, audio_16k: torch.Tensor):
+        # v2Pro 系列的说话人向量只和参考音频有关, 设置参考时算一次, 推理时直接复用
+        if not self.is_v2pro or audio_16k is None:
+            return None
+        return self.sv_model.compute_embedding3(audio_16k)
 
     def _get_ref_spec(self, ref_audio_path):
         raw_audio, raw_sr = torchaudio.load(ref_audio_path)
@@ -973,6 +1318,32 @@ class TTS:
                 _data[index] = data[i][j]
         return _data
 
+    def warmup(self, inputs_list: List[dict], batched: bool = False) -> List[float]:
+        """
+        Synthesize throwaway requests so that the first real one does not pay for kernel selection,
+        allocator growth, frontend dictionary loading and reference audio encoding.
+
+        Args:
+            inputs_list (List[dict]): the requests, same format as run().
+            batched (bool): synthesize them together with run_batch (the cross-request batching path)
+                instead of one run() each.
+        returns:
+            List[float]: seconds taken by each run(), or by the single run_batch call.
+        """
+        # 预热的耗时不计入 metrics 的阶段统计
+        with metrics.muted():
+            if batched:
+                t0 = time.perf_counter()
+                self.run_batch([dict(inputs) for inputs in inputs_list])
+                return [time.perf_counter() - t0]
+            timings = []
+            for inputs in inputs_list:
+                t0 = time.perf_counter()
+                for _ in self.run(dict(inputs)):
+                    pass
+                timings.append(time.perf_counter() - t0)
+            return timings
+
     def stop(
         self,
     ):
@@ -981,7 +1352,119 @@ class TTS:
         """
         self.stop_flag = True
 
+    def _prompt_cache_key(self, ref_audio_path: str, prompt_text: str, prompt_lang: str) -> tuple:
+        """
+        Key of the multi-voice prompt cache: ((ref audio, mtime, model version, vits weights), (prompt text, lang)).
+        """
+        ref_key = (
+            os.path.abspath(ref_audio_path),
+            os.path.getmtime(ref_audio_path),
+            self.configs.version,
+            self.configs.vits_weights_path,
+        )
+        return ref_key, (prompt_text, prompt_lang)
+
+    def _apply_prompt_entry(self, cache_key: tuple, entry: dict):
+        self.prompt_cache.update(entry)
+        self.prompt_cache["refer_spec"] = list(entry["refer_spec"])
+        self.prompt_cache["sv_emb"] = list(entry["sv_emb"])
+        # 辅助参考音频不进缓存, 由 _prepare_reference 按需重新追加
+        self.prompt_cache["aux_ref_audio_paths"] = []
+        self.prompt_cache["cache_key"] = cache_key
+
+    def _prepare_reference(
+        self,
+        ref_audio_path: str,
+        aux_ref_audio_paths: list,
+        prompt_text: str,
+        prompt_lang: str,
+        no_prompt_text: bool,
+    ):
+        """
+        Set the reference audio, auxiliary reference audios and prompt text features in the prompt cache.
+        Previously used voices are restored from the LRU prompt cache (self.prompt_lru);
+        otherwise only the parts that differ from the current prompt cache are recomputed.
+        """
+        if not no_prompt_text:
+            prompt_text = prompt_text.strip("\n")
+            if prompt_text[-1] not in splits:
+                prompt_text += "。" if prompt_lang != "en" else "."
+            print(i18n("实际输入的参考文本:"), prompt_text)
+
+        cache_key = None
+        new_entry = None
+        if ref_audio_path is not None:
+            if not os.path.exists(ref_audio_path):
+                raise ValueError(f"{ref_audio_path} not exists")
+            cache_key = self._prompt_cache_key(
+                ref_audio_path,
+                None if no_prompt_text else prompt_text,
+                None if no_prompt_text else prompt_lang,
+            )
+            if cache_key != self.prompt_cache["cache_key"]:
+                entry = self.prompt_lru.get(cache_key)
+                if entry is not None:
+                    self._apply_prompt_entry(cache_key, entry)
+                else:
+                    new_entry = {}
+
+            active_key = self.prompt_cache["cache_key"]
+            if (
+                ref_audio_path != self.prompt_cache["ref_audio_path"]
+                or active_key is None
+                or active_key[0] != cache_key[0]
+                or (self.is_v2pro and self.prompt_cache["refer_spec"][0][1] is None)
+            ):
+                self._load_ref_audio(ref_audio_path)
+
+            if new_entry is not None:
+                new_entry.update(
+                    {
+                        "ref_audio_path": ref_audio_path,
+                        "prompt_semantic": self.prompt_cache["prompt_semantic"],
+                        "refer_spec": [self.prompt_cache["refer_spec"][0]],
+                        "sv_emb": [self.prompt_cache["sv_emb"][0]],
+                        "raw_audio": self.prompt_cache["raw_audio"],
+                        "raw_sr": self.prompt_cache["raw_sr"],
+                    }
+                )
+
+        aux_ref_audio_paths = aux_ref_audio_paths if aux_ref_audio_paths is not None else []
+        paths = set(aux_ref_audio_paths) & set(self.prompt_cache["aux_ref_audio_paths"])
+        if not (len(list(paths)) == len(aux_ref_audio_paths) == len(self.prompt_cache["aux_ref_audio_paths"])):
+            self.prompt_cache["aux_ref_audio_paths"] = aux_ref_audio_paths
+            self.prompt_cache["refer_spec"] = [self.prompt_cache["refer_spec"][0]]
+            self.prompt_cache["sv_emb"] = [self.prompt_cache["sv_emb"][0]]
+            for path in aux_ref_audio_paths:
+                if path in [None, ""]:
+                    continue
+                if not os.path.exists(path):
+                    print(i18n("音频文件不存在，跳过："), path)
+                    continue
+                spec_audio = self._get_ref_spec(path)
+                self.prompt_cache["refer_spec"].append(spec_audio)
+                self.prompt_cache["sv_emb"].append(self._get_sv_emb(spec_audio[1]))
+
+        if not no_prompt_text:
+            if self.prompt_cache["prompt_text"] != prompt_text or self.prompt_cache["prompt_lang"] != prompt_lang:
+                phones, bert_features, norm_text = self.text_preprocessor.segment_and_extract_feature_for_text(
+                    prompt_text, prompt_lang, self.configs.version
+                )
+                self.prompt_cache["prompt_text"] = prompt_text
+                self.prompt_cache["prompt_lang"] = prompt_lang
+                self.prompt_cache["phones"] = phones
+                self.prompt_cache["bert_features"] = bert_features
+                self.prompt_cache["norm_text"] = norm_text
+            if new_entry is not None:
+                for key in ["prompt_text", "prompt_lang", "phones", "bert_features", "norm_text"]:
+                    new_entry[key] = self.prompt_cache[key]
+
+        if new_entry is not None:
+            self.prompt_lru.put(cache_key, new_entry)
+            self.prompt_cache["cache_key"] = cache_key
+
     @torch.no_grad()
+    @hold_models
     def run(self, inputs: dict):
         """
         Text to speech inference.
@@ -1010,6 +1493,13 @@ class TTS:
                     "repetition_penalty": 1.35    # float. repetition penalty for T2S model.
                     "sample_steps": 32,           # int. number of sampling steps for VITS model V3.
                     "super_sampling": False,       # bool. whether to use super-sampling for audio when using VITS model V3.
+                    "static_kv_cache": False,     # bool. whether to use the preallocated static KV cache for T2S decoding.
+                    "incremental_stream": False,  # bool. yield audio in rolling windows while T2S is still decoding (VITS models only).
+                    "stream_window": 25,          # int. semantic tokens per streaming window (25 tokens = 1s of audio).
+                    "stream_first_window": 10,    # int. semantic tokens of the first window, smaller for a lower time-to-first-audio.
+                    "stream_overlap": 4,          # int. semantic tokens re-decoded between adjacent windows and stitched with SOLA.
+                    "cancel_event": None,         # threading.Event. when set, decoding stops at the next step and CANCELLED_ERROR is raised.
+                    "frontend_prefetch": 2,       # int. with return_fragment, batches whose text frontend (G2P, BERT) runs ahead on a worker thread; 0 disables.
                 }
         returns:
             Tuple[int, np.ndarray]: sampling rate and audio data.
@@ -1039,6 +1529,23 @@ class TTS:
         repetition_penalty = inputs.get("repetition_penalty", 1.35)
         sample_steps = inputs.get("sample_steps", 32)
         super_sampling = inputs.get("super_sampling", False)
+        static_kv_cache = inputs.get("static_kv_cache", False)
+        incremental_stream = inputs.get("incremental_stream", False)
+        stream_window = int(inputs.get("stream_window", 25))
+        stream_first_window = int(inputs.get("stream_first_window", 10))
+        stream_overlap = int(inputs.get("stream_overlap", 4))
+        cancel_event = inputs.get("cancel_event", None)
+        frontend_prefetch = int(inputs.get("frontend_prefetch", 2))
+        # 各阶段耗时记到这个请求的 trace 里 (见 metrics.py), 和 cancel_event 一样由调用方放进 inputs
+        trace = inputs.get("trace", None)
+
+        if incremental_stream and self.configs.use_vocoder:
+            print("incremental_stream is not supported with SoVITS V3/V4, fall back to return_fragment")
+            incremental_stream = False
+        if incremental_stream:
+            # 逐句逐窗口输出, 每次只处理一句
+            return_fragment = True
+            batch_size = 1
 
         if parallel_infer:
             print(i18n("并行推理模式已开启"))
@@ -1088,61 +1595,29 @@ class TTS:
 
         ###### setting reference audio and prompt text preprocessing ########
         t0 = time.perf_counter()
-        if (ref_audio_path is not None) and (
-            ref_audio_path != self.prompt_cache["ref_audio_path"]
-            or (self.is_v2pro and self.prompt_cache["refer_spec"][0][1] is None)
-        ):
-            if not os.path.exists(ref_audio_path):
-                raise ValueError(f"{ref_audio_path} not exists")
-            self.set_ref_audio(ref_audio_path)
-
-        aux_ref_audio_paths = aux_ref_audio_paths if aux_ref_audio_paths is not None else []
-        paths = set(aux_ref_audio_paths) & set(self.prompt_cache["aux_ref_audio_paths"])
-        if not (len(list(paths)) == len(aux_ref_audio_paths) == len(self.prompt_cache["aux_ref_audio_paths"])):
-            self.prompt_cache["aux_ref_audio_paths"] = aux_ref_audio_paths
-            self.prompt_cache["refer_spec"] = [self.prompt_cache["refer_spec"][0]]
-            for path in aux_ref_audio_paths:
-                if path in [None, ""]:
-                    continue
-                if not os.path.exists(path):
-                    print(i18n("音频文件不存在，跳过："), path)
-                    continue
-                self.prompt_cache["refer_spec"].append(self._get_ref_spec(path))
-
-        if not no_prompt_text:
-            prompt_text = prompt_text.strip("\n")
-            if prompt_text[-1] not in splits:
-                prompt_text += "。" if prompt_lang != "en" else "."
-            print(i18n("实际输入的参考文本:"), prompt_text)
-            if self.prompt_cache["prompt_text"] != prompt_text:
-                phones, bert_features, norm_text = self.text_preprocessor.segment_and_extract_feature_for_text(
-                    prompt_text, prompt_lang, self.configs.version
-                )
-                self.prompt_cache["prompt_text"] = prompt_text
-                self.prompt_cache["prompt_lang"] = prompt_lang
-                self.prompt_cache["phones"] = phones
-                self.prompt_cache["bert_features"] = bert_features
-                self.prompt_cache["norm_text"] = norm_text
+        with metrics.span("reference", trace):
+            self._prepare_reference(ref_audio_path, aux_ref_audio_paths, prompt_text, prompt_lang, no_prompt_text)
 
         ###### text preprocessing ########
-        t1 = time.perf_counter()
         data: list = None
         if not return_fragment:
-            data = self.text_preprocessor.preprocess(text, text_lang, text_split_method, self.configs.version)
+            with metrics.span("frontend", trace):
+                data = self.text_preprocessor.preprocess(text, text_lang, text_split_method, self.configs.version)
             if len(data) == 0:
                 yield 16000, np.zeros(int(16000), dtype=np.int16)
                 return
 
             batch_index_list: list = None
-            data, batch_index_list = self.to_batch(
-                data,
-                prompt_data=self.prompt_cache if not no_prompt_text else None,
-                batch_size=batch_size,
-                threshold=batch_threshold,
-                split_bucket=split_bucket,
-                device=self.configs.device,
-                precision=self.precision,
-            )
+            with metrics.span("batching", trace):
+                data, batch_index_list = self.to_batch(
+                    data,
+                    prompt_data=self.prompt_cache if not no_prompt_text else None,
+                    batch_size=batch_size,
+                    threshold=batch_threshold,
+                    split_bucket=split_bucket,
+                    device=self.configs.device,
+                    precision=self.precision,
+                )
         else:
             print(f"############ {i18n('切分文本')} ############")
             texts = self.text_preprocessor.pre_seg_text(text, text_lang, text_split_method)
@@ -1155,216 +1630,597 @@ class TTS:
             def make_batch(batch_texts):
                 batch_data = []
                 print(f"############ {i18n('提取文本Bert特征')} ############")
-                for text in tqdm(batch_texts):
-                    phones, bert_features, norm_text = self.text_preprocessor.segment_and_extract_feature_for_text(
-                        text, text_lang, self.configs.version
-                    )
-                    if phones is None:
-                        continue
-                    res = {
-                        "phones": phones,
-                        "bert_features": bert_features,
-                        "norm_text": norm_text,
-                    }
-                    batch_data.append(res)
+                # 预取时在前端线程里执行, 所以显式传 trace
+                with metrics.span("frontend", trace):
+                    for text in tqdm(batch_texts):
+                        phones, bert_features, norm_text = self.text_preprocessor.segment_and_extract_feature_for_text(
+                            text, text_lang, self.configs.version
+                        )
+                        if phones is None:
+                            continue
+                        res = {
+                            "phones": phones,
+                            "bert_features": bert_features,
+                            "norm_text": norm_text,
+                        }
+                        batch_data.append(res)
                 if len(batch_data) == 0:
                     return None
-                batch, _ = self.to_batch(
-                    batch_data,
-                    prompt_data=self.prompt_cache if not no_prompt_text else None,
-                    batch_size=batch_size,
-                    threshold=batch_threshold,
-                    split_bucket=False,
-                    device=self.configs.device,
-                    precision=self.precision,
-                )
+                with metrics.span("batching", trace):
+                    batch, _ = self.to_batch(
+                        batch_data,
+                        prompt_data=self.prompt_cache if not no_prompt_text else None,
+                        batch_size=batch_size,
+                        threshold=batch_threshold,
+                        split_bucket=False,
+                        device=self.configs.device,
+                        precision=self.precision,
+                    )
                 return batch[0]
 
-        t2 = time.perf_counter()
+        frontend: FrontendPipeline = None
         try:
             print("############ 推理 ############")
             ###### inference ######
-            t_34 = 0.0
-            t_45 = 0.0
+            ttfa: float = None
             audio = []
             output_sr = self.configs.sampling_rate if not self.configs.use_vocoder else self.vocoder_configs["sr"]
-            for item in data:
+            batches = data
+            if return_fragment:
+                # 后面几句的前端处理(G2P/BERT)在后台线程进行, 与当前句的 T2S+VITS 重叠; 顺序不变
+                frontend = FrontendPipeline(
+                    data,
+                    make_batch,
+                    depth=frontend_prefetch if len(data) > 1 else 0,
+                    should_stop=lambda: self.stop_flag or (cancel_event is not None and cancel_event.is_set()),
+                )
+                batches = frontend
+            for item in batches:
                 t3 = time.perf_counter()
-                if return_fragment:
-                    item = make_batch(item)
-                    if item is None:
-                        continue
-
-                batch_phones: List[torch.LongTensor] = item["phones"]
-                # batch_phones:torch.LongTensor = item["phones"]
-                batch_phones_len: torch.LongTensor = item["phones_len"]
-                all_phoneme_ids: torch.LongTensor = item["all_phones"]
-                all_phoneme_lens: torch.LongTensor = item["all_phones_len"]
-                all_bert_features: torch.LongTensor = item["all_bert_features"]
-                norm_text: str = item["norm_text"]
-                max_len = item["max_len"]
-
-                print(i18n("前端处理后的文本(每句):"), norm_text)
-                if no_prompt_text:
-                    prompt = None
-                else:
-                    prompt = (
-                        self.prompt_cache["prompt_semantic"].expand(len(all_phoneme_ids), -1).to(self.configs.device)
+                if return_fragment and item is None:
+                    continue
+
+                print(i18n("前端处理后的文本(每句):"), item["norm_text"])
+                if incremental_stream:
+                    for audio_chunk, is_last in self._stream_semantic_audio(
+                        item,
+                        no_prompt_text,
+                        top_k=top_k,
+                        top_p=top_p,
+                        temperature=temperature,
+                        repetition_penalty=repetition_penalty,
+                        static_kv_cache=static_kv_cache,
+                        speed_factor=speed_factor,
+                        window=stream_window,
+                        first_window=stream_first_window,
+                        overlap=stream_overlap,
+                        cancel_event=cancel_event,
+                    ):
+                        if ttfa is None:
+                            ttfa = time.perf_counter() - t0
+                            self.last_ttfa = ttfa
+                            print(f"time to first audio: {ttfa * 1000:.1f}ms")
+                        yield output_sr, self._stream_postprocess(audio_chunk, is_last, fragment_interval)
+                        self._check_cancelled(cancel_event)
+                        if self.stop_flag:
+                            break
+                    # T2S 和 VITS 按窗口交替, 合在一起记 (包含调用方在 yield 之间花的时间)
+                    metrics.record("stream_decode", time.perf_counter() - t3, trace)
+                    if self.stop_flag:
+                        yield 16000, np.zeros(int(16000), dtype=np.int16)
+                        return
+                    continue
+
+                with metrics.span("t2s", trace) as span:
+                    pred_semantic_list, idx_list = self._predict_semantic(
+                        item,
+                        no_prompt_text,
+                        top_k=top_k,
+                        top_p=top_p,
+                        temperature=temperature,
+                        repetition_penalty=repetition_penalty,
+                        static_kv_cache=static_kv_cache,
+                        cancel_event=cancel_event,
                     )
+                    span.tokens = sum(int(semantic.shape[-1]) for semantic in pred_semantic_list)
+                # 解码被取消时直接退出, 不再跑 VITS
+                self._check_cancelled(cancel_event)
 
-                print(f"############ {i18n('预测语义Token')} ############")
-                pred_semantic_list, idx_list = self.t2s_model.model.infer_panel(
-                    all_phoneme_ids,
-                    all_phoneme_lens,
-                    prompt,
-                    all_bert_features,
-                    # prompt_phone_len=ph_offset,
-                    top_k=top_k,
-                    top_p=top_p,
-                    temperature=temperature,
-                    early_stop_num=self.configs.hz * self.configs.max_sec,
-                    max_len=max_len,
-                    repetition_penalty=repetition_penalty,
-                )
-                t4 = time.perf_counter()
-                t_34 += t4 - t3
-
-                refer_audio_spec = []
-                if self.is_v2pro:
-                    sv_emb = []
-                for spec, audio_tensor in self.prompt_cache["refer_spec"]:
-                    spec = spec.to(dtype=self.precision, device=self.configs.device)
-                    refer_audio_spec.append(spec)
-                    if self.is_v2pro:
-                        sv_emb.append(self.sv_model.compute_embedding3(audio_tensor))
-
-                batch_audio_fragment = []
-
-                # ## vits并行推理 method 1
-                # pred_semantic_list = [item[-idx:] for item, idx in zip(pred_semantic_list, idx_list)]
-                # pred_semantic_len = torch.LongTensor([item.shape[0] for item in pred_semantic_list]).to(self.configs.device)
-                # pred_semantic = self.batch_sequences(pred_semantic_list, axis=0, pad_value=0).unsqueeze(0)
-                # max_len = 0
-                # for i in range(0, len(batch_phones)):
-                #     max_len = max(max_len, batch_phones[i].shape[-1])
-                # batch_phones = self.batch_sequences(batch_phones, axis=0, pad_value=0, max_length=max_len)
-                # batch_phones = batch_phones.to(self.configs.device)
-                # batch_audio_fragment = (self.vits_model.batched_decode(
-                #         pred_semantic, pred_semantic_len, batch_phones, batch_phones_len,refer_audio_spec
-                #     ))
-                print(f"############ {i18n('合成音频')} ############")
-                if not self.configs.use_vocoder:
-                    if speed_factor == 1.0:
-                        print(f"{i18n('并行合成中')}...")
-                        # ## vits并行推理 method 2
-                        pred_semantic_list = [item[-idx:] for item, idx in zip(pred_semantic_list, idx_list)]
-                        upsample_rate = math.prod(self.vits_model.upsample_rates)
-                        audio_frag_idx = [
-                            pred_semantic_list[i].shape[0] * 2 * upsample_rate
-                            for i in range(0, len(pred_semantic_list))
-                        ]
-                        audio_frag_end_idx = [sum(audio_frag_idx[: i + 1]) for i in range(0, len(audio_frag_idx))]
-                        all_pred_semantic = (
-                            torch.cat(pred_semantic_list).unsqueeze(0).unsqueeze(0).to(self.configs.device)
-                        )
-                        _batch_phones = torch.cat(batch_phones).unsqueeze(0).to(self.configs.device)
-                        if self.is_v2pro != True:
-                            _batch_audio_fragment = self.vits_model.decode(
-                                all_pred_semantic, _batch_phones, refer_audio_spec, speed=speed_factor
-                            ).detach()[0, 0, :]
-                        else:
-                            _batch_audio_fragment = self.vits_model.decode(
-                                all_pred_semantic, _batch_phones, refer_audio_spec, speed=speed_factor, sv_emb=sv_emb
-                            ).detach()[0, 0, :]
-                        audio_frag_end_idx.insert(0, 0)
-                        batch_audio_fragment = [
-                            _batch_audio_fragment[audio_frag_end_idx[i - 1] : audio_frag_end_idx[i]]
-                            for i in range(1, len(audio_frag_end_idx))
-                        ]
-                    else:
-                        # ## vits串行推理
-                        for i, idx in enumerate(tqdm(idx_list)):
-                            phones = batch_phones[i].unsqueeze(0).to(self.configs.device)
-                            _pred_semantic = (
-                                pred_semantic_list[i][-idx:].unsqueeze(0).unsqueeze(0)
-                            )  # .unsqueeze(0)#mq要多unsqueeze一次
-                            if self.is_v2pro != True:
-                                audio_fragment = self.vits_model.decode(
-                                    _pred_semantic, phones, refer_audio_spec, speed=speed_factor
-                                ).detach()[0, 0, :]
-                            else:
-                                audio_fragment = self.vits_model.decode(
-                                    _pred_semantic, phones, refer_audio_spec, speed=speed_factor, sv_emb=sv_emb
-                                ).detach()[0, 0, :]
-                            batch_audio_fragment.append(audio_fragment)  ###试试重建不带上prompt部分
-                else:
-                    if parallel_infer:
-                        print(f"{i18n('并行合成中')}...")
-                        audio_fragments = self.using_vocoder_synthesis_batched_infer(
-                            idx_list, pred_semantic_list, batch_phones, speed=speed_factor, sample_steps=sample_steps
-                        )
-                        batch_audio_fragment.extend(audio_fragments)
-                    else:
-                        for i, idx in enumerate(tqdm(idx_list)):
-                            phones = batch_phones[i].unsqueeze(0).to(self.configs.device)
-                            _pred_semantic = (
-                                pred_semantic_list[i][-idx:].unsqueeze(0).unsqueeze(0)
-                            )  # .unsqueeze(0)#mq要多unsqueeze一次
-                            audio_fragment = self.using_vocoder_synthesis(
-                                _pred_semantic, phones, speed=speed_factor, sample_steps=sample_steps
-                            )
-                            batch_audio_fragment.append(audio_fragment)
+                with metrics.span("vits", trace):
+                    batch_audio_fragment = self._synthesize_audio(
+                        item["phones"], pred_semantic_list, idx_list, speed_factor, parallel_infer, sample_steps
+                    )
 
                 t5 = time.perf_counter()
-                t_45 += t5 - t4
-                if return_fragment:
-                    print("%.3f\t%.3f\t%.3f\t%.3f" % (t1 - t0, t2 - t1, t4 - t3, t5 - t4))
-                    yield self.audio_postprocess(
-                        [batch_audio_fragment],
-                        output_sr,
-                        None,
-                        speed_factor,
-                        False,
-                        fragment_interval,
-                        super_sampling if self.configs.use_vocoder and self.configs.version == "v3" else False,
+                if speed_factor == 1.0 and len(batch_audio_fragment) == 1:
+                    # 用实测的单句合成耗时/音频长度校准 cut6 的切分代价模型
+                    segment_cost_model.observe(
+                        count_units(item["norm_text"][0]),
+                        t5 - t3,
+                        batch_audio_fragment[0].shape[-1] / output_sr,
                     )
+                if return_fragment:
+                    with metrics.span("postprocess", trace):
+                        fragment = self.audio_postprocess(
+                            [batch_audio_fragment],
+                            output_sr,
+                            None,
+                            speed_factor,
+                            False,
+                            fragment_interval,
+                            super_sampling if self.configs.use_vocoder and self.configs.version == "v3" else False,
+                        )
+                    yield fragment
                 else:
                     audio.append(batch_audio_fragment)
 
+                self._check_cancelled(cancel_event)
                 if self.stop_flag:
                     yield 16000, np.zeros(int(16000), dtype=np.int16)
                     return
 
             if not return_fragment:
-                print("%.3f\t%.3f\t%.3f\t%.3f" % (t1 - t0, t2 - t1, t_34, t_45))
                 if len(audio) == 0:
                     yield 16000, np.zeros(int(16000), dtype=np.int16)
                     return
-                yield self.audio_postprocess(
-                    audio,
-                    output_sr,
-                    batch_index_list,
-                    speed_factor,
-                    split_bucket,
-                    fragment_interval,
-                    super_sampling if self.configs.use_vocoder and self.configs.version == "v3" else False,
-                )
+                with metrics.span("postprocess", trace):
+                    result = self.audio_postprocess(
+                        audio,
+                        output_sr,
+                        batch_index_list,
+                        speed_factor,
+                        split_bucket,
+                        fragment_interval,
+                        super_sampling if self.configs.use_vocoder and self.configs.version == "v3" else False,
+                    )
+                yield result
 
+        except CANCELLED_ERROR:
+            # 主动取消, 模型状态正常, 不需要重置
+            print("synthesis cancelled")
+            raise
         except Exception as e:
             traceback.print_exc()
             # 必须返回一个空音频, 否则会导致显存不释放。
             yield 16000, np.zeros(int(16000), dtype=np.int16)
+            # 先停掉前端预取线程, 再重置模型
+            if frontend is not None:
+                frontend.close()
             # 重置模型, 否则会导致显存释放不完全。
             del self.t2s_model
             del self.vits_model
             self.t2s_model = None
             self.vits_model = None
+            self.weight_registry.clear()
             self.init_t2s_weights(self.configs.t2s_weights_path)
             self.init_vits_weights(self.configs.vits_weights_path)
             raise e
         finally:
+            if frontend is not None:
+                frontend.close()
+                self.last_frontend_stats = frontend.stats.as_dict()
+                print(f"frontend pipeline: {self.last_frontend_stats}")
             self.empty_cache()
 
+    @torch.no_grad()
+    @hold_models
+    def run_batch(self, inputs_list: List[dict], batch_size: int = None) -> List[Tuple[int, np.ndarray]]:
+        """
+        Synthesize several independent requests in one batched T2S + VITS pass.
+
+        All requests must share the reference audio, prompt text and the VITS/decoding options
+        (see TTSBatchScheduler.group_key). "text", "text_lang", "text_split_method",
+        "fragment_interval" and the T2S sampling parameters ("top_k", "top_p", "temperature",
+        "repetition_penalty", "seed") may differ between them: every row of the batch is sampled
+        with its own request's parameters, and a request with a seed gets its own random stream,
+        so its semantic tokens do not depend on which other requests it was batched with.
+
+        Args:
+            inputs_list (List[dict]): the inputs of each request, same format as run().
+            batch_size (int): max number of text segments decoded together, default all of them.
+        returns:
+            List[Tuple[int, np.ndarray]]: sampling rate and audio data of each request, in input order.
+        """
+        self.stop_flag: bool = False
+        first: dict = inputs_list[0]
+        ref_audio_path: str = first.get("ref_audio_path", "")
+        aux_ref_audio_paths: list = first.get("aux_ref_audio_paths", [])
+        prompt_text: str = first.get("prompt_text", "")
+        prompt_lang: str = first.get("prompt_lang", "")
+        speed_factor = first.get("speed_factor", 1.0)
+        seeds = [inputs.get("seed", -1) for inputs in inputs_list]
+        seeds = [-1 if seed in ["", None] else int(seed) for seed in seeds]
+        # 全局随机数 (VITS 等) 用第一个指定了 seed 的请求; T2S 采样每个请求用自己的随机数流
+        set_seed(next((seed for seed in seeds if seed != -1), -1))
+        parallel_infer = first.get("parallel_infer", True)
+        sample_steps = first.get("sample_steps", 32)
+        super_sampling = first.get("super_sampling", False)
+        static_kv_cache = first.get("static_kv_cache", False)
+        # 合并批次里只要还有一个请求没被取消就继续解码
+        cancel_event = _AllCancelled([inputs.get("cancel_event", None) for inputs in inputs_list])
+
+        if parallel_infer:
+            self.t2s_model.model.infer_panel = self.t2s_model.model.infer_panel_batch_infer
+        else:
+            self.t2s_model.model.infer_panel = self.t2s_model.model.infer_panel_naive_batched
+
+        no_prompt_text = prompt_text in [None, ""]
+        if not no_prompt_text:
+            assert prompt_lang in self.configs.languages
+        if no_prompt_text and self.configs.use_vocoder:
+            raise NO_PROMPT_ERROR("prompt_text cannot be empty when using SoVITS_V3")
+        if ref_audio_path in [None, ""] and (
+            (self.prompt_cache["prompt_semantic"] is None) or (self.prompt_cache["refer_spec"] in [None, []])
+        ):
+            raise ValueError(
+                "ref_audio_path cannot be empty, when the reference audio is not set using set_ref_audio()"
+            )
+
+        # 共用的阶段 (参考音频, 合并后的解码) 记到批次里每个请求的 trace
+        traces = [inputs.get("trace", None) for inputs in inputs_list]
+        with metrics.span("reference", traces):
+            self._prepare_reference(ref_audio_path, aux_ref_audio_paths, prompt_text, prompt_lang, no_prompt_text)
+
+        ###### text preprocessing (per request, then flattened) ########
+        segments: list = []
+        owners: list = []
+        # 每个分段在自己请求里的序号 (用来派生该分段的随机数流)
+        segment_no: list = []
+        for req_idx, inputs in enumerate(inputs_list):
+            text_lang: str = inputs.get("text_lang", "")
+            assert text_lang in self.configs.languages
+            with metrics.span("frontend", traces[req_idx]):
+                data = self.text_preprocessor.preprocess(
+                    inputs.get("text", ""), text_lang, inputs.get("text_split_method", "cut0"), self.configs.version
+                )
+            segments.extend(data)
+            owners.extend([req_idx] * len(data))
+            segment_no.extend(range(len(data)))
+
+        results: List[Tuple[int, np.ndarray]] = [(16000, np.zeros(int(16000), dtype=np.int16))] * len(inputs_list)
+        if len(segments) == 0:
+            return results
+
+        batch_size = len(segments) if batch_size in [None, 0] else batch_size
+        with metrics.span("batching", traces):
+            data, batch_index_list = self.to_batch(
+                segments,
+                prompt_data=self.prompt_cache if not no_prompt_text else None,
+                batch_size=batch_size,
+                split_bucket=False,
+                device=self.configs.device,
+                precision=self.precision,
+            )
+
+        try:
+            output_sr = self.configs.sampling_rate if not self.configs.use_vocoder else self.vocoder_configs["sr"]
+            fragments: list = []
+            for item, index_list in zip(data, batch_index_list):
+                rows = [inputs_list[owners[idx]] for idx in index_list]
+                sampling_params = make_sampling_params(
+                    len(rows),
+                    self.configs.device,
+                    top_k=[inputs.get("top_k", 5) for inputs in rows],
+                    top_p=[inputs.get("top_p", 1) for inputs in rows],
+                    temperature=[inputs.get("temperature", 1) for inputs in rows],
+                    repetition_penalty=[inputs.get("repetition_penalty", 1.35) for inputs in rows],
+                )
+                generators = [
+                    self._segment_generator(seeds[owners[idx]], segment_no[idx]) for idx in index_list
+                ]
+                item_traces = [traces[req_idx] for req_idx in sorted({owners[idx] for idx in index_list})]
+                with metrics.span("t2s", item_traces) as span:
+                    pred_semantic_list, idx_list = self._predict_semantic(
+                        item,
+                        no_prompt_text,
+                        static_kv_cache=static_kv_cache,
+                        cancel_event=cancel_event,
+                        sampling_params=sampling_params,
+                        generators=generators if any(g is not None for g in generators) else None,
+                    )
+                    span.tokens = sum(int(semantic.shape[-1]) for semantic in pred_semantic_list)
+                self._check_cancelled(cancel_event)
+                with metrics.span("vits", item_traces):
+                    fragments.extend(
+                        self._synthesize_audio(
+                            item["phones"], pred_semantic_list, idx_list, speed_factor, parallel_infer, sample_steps
+                        )
+                    )
+                if self.stop_flag:
+                    return results
+
+            for req_idx, inputs in enumerate(inputs_list):
+                req_fragments = [fragment for fragment, owner in zip(fragments, owners) if owner == req_idx]
+                if len(req_fragments) == 0:
+                    continue
+                fragment_interval = max(inputs.get("fragment_interval", 0.3), 0.01)
+                with metrics.span("postprocess", traces[req_idx]):
+                    results[req_idx] = self.audio_postprocess(
+                        [req_fragments],
+                        output_sr,
+                        None,
+                        speed_factor,
+                        False,
+                        fragment_interval,
+                        super_sampling if self.configs.use_vocoder and self.configs.version == "v3" else False,
+                    )
+            return results
+        except CANCELLED_ERROR:
+            print("[run_batch] cancelled")
+            raise
+        except Exception:
+            traceback.print_exc()
+            raise
+        finally:
+            self.empty_cache()
+
+    def _predict_semantic(
+        self,
+        item: dict,
+        no_prompt_text: bool,
+        top_k: int = 5,
+        top_p: float = 1,
+        temperature: float = 1,
+        repetition_penalty: float = 1.35,
+        static_kv_cache: bool = False,
+        cancel_event=None,
+        sampling_params: dict = None,
+        generators: list = None,
+    ):
+        """
+        Run the T2S model on one batch produced by to_batch.
+
+        sampling_params (see make_sampling_params) and generators, when given, override the scalar
+        sampling arguments with one value / random stream per row.
+
+        Returns:
+            Tuple[List[torch.Tensor], List[int]]: the predicted semantic tokens and the decoded length of each item.
+        """
+        all_phoneme_ids: torch.LongTensor = item["all_phones"]
+        all_phoneme_lens: torch.LongTensor = item["all_phones_len"]
+        all_bert_features: torch.LongTensor = item["all_bert_features"]
+        max_len = item["max_len"]
+
+        if no_prompt_text:
+            prompt = None
+        else:
+            prompt = self.prompt_cache["prompt_semantic"].expand(len(all_phoneme_ids), -1).to(self.configs.device)
+
+        print(f"############ {i18n('预测语义Token')} ############")
+        # onnxruntime 后端只支持有参考文本 (有 prompt 语义 token) 的情况
+        infer_panel = self.t2s_model.model.infer_panel
+        if self.ort_backend is not None and prompt is not None:
+            infer_panel = self.ort_backend.infer_panel
+        pred_semantic_list, idx_list = infer_panel(
+            all_phoneme_ids,
+            all_phoneme_lens,
+            prompt,
+            all_bert_features,
+            # prompt_phone_len=ph_offset,
+            top_k=top_k,
+            top_p=top_p,
+            temperature=temperature,
+            early_stop_num=self.configs.hz * self.configs.max_sec,
+            max_len=max_len,
+            repetition_penalty=repetition_penalty,
+            static_kv_cache=static_kv_cache,
+            cancel_event=cancel_event,
+            sampling_params=sampling_params,
+            generators=generators,
+        )
+        return pred_semantic_list, idx_list
+
+    def _segment_generator(self, seed: int, segment_no: int):
+        """Random stream of one segment of a seeded request (None: use the global RNG)."""
+        if seed == -1:
+            return None
+        generator = torch.Generator(device=self.configs.device)
+        generator.manual_seed((seed + segment_no) % (2**63))
+        return generator
+
+    @staticmethod
+    def _check_cancelled(cancel_event):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CANCELLED_ERROR("synthesis cancelled")
+
+    def _synthesize_audio(
+        self,
+        batch_phones: List[torch.Tensor],
+        pred_semantic_list: List[torch.Tensor],
+        idx_list: List[int],
+        speed_factor: float = 1.0,
+        parallel_infer: bool = True,
+        sample_steps: int = 32,
+    ) -> List[torch.Tensor]:
+        """
+        Decode the predicted semantic tokens of one batch into audio fragments with VITS (or the vocoder for v3/v4).
+        """
+        refer_audio_spec, sv_emb = self._get_refer_inputs()
+
+        batch_audio_fragment = []
+
+        # ## vits并行推理 method 1
+        # pred_semantic_list = [item[-idx:] for item, idx in zip(pred_semantic_list, idx_list)]
+        # pred_semantic_len = torch.LongTensor([item.shape[0] for item in pred_semantic_list]).to(self.configs.device)
+        # pred_semantic = self.batch_sequences(pred_semantic_list, axis=0, pad_value=0).unsqueeze(0)
+        # max_len = 0
+        # for i in range(0, len(batch_phones)):
+        #     max_len = max(max_len, batch_phones[i].shape[-1])
+        # batch_phones = self.batch_sequences(batch_phones, axis=0, pad_value=0, max_length=max_len)
+        # batch_phones = batch_phones.to(self.configs.device)
+        # batch_audio_fragment = (self.vits_model.batched_decode(
+        #         pred_semantic, pred_semantic_len, batch_phones, batch_phones_len,refer_audio_spec
+        #     ))
+        print(f"############ {i18n('合成音频')} ############")
+        if not self.configs.use_vocoder:
+            if speed_factor == 1.0:
+                print(f"{i18n('并行合成中')}...")
+                # ## vits并行推理 method 2
+                pred_semantic_list = [item[-idx:] for item, idx in zip(pred_semantic_list, idx_list)]
+                upsample_rate = math.prod(self.vits_model.upsample_rates)
+                audio_frag_idx = [
+                    pred_semantic_list[i].shape[0] * 2 * upsample_rate for i in range(0, len(pred_semantic_list))
+                ]
+                audio_frag_end_idx = [sum(audio_frag_idx[: i + 1]) for i in range(0, len(audio_frag_idx))]
+                all_pred_semantic = torch.cat(pred_semantic_list).unsqueeze(0).unsqueeze(0).to(self.configs.device)
+                _batch_phones = torch.cat(batch_phones).unsqueeze(0).to(self.configs.device)
+                if self.ort_backend is not None and self.ort_backend.has_vits and len(refer_audio_spec) == 1:
+                    # onnx 图只接一条参考频谱; 有辅助参考音频 (多条取平均) 时走 torch
+                    _batch_audio_fragment = self.ort_backend.vits_decode(
+                        all_pred_semantic, _batch_phones, refer_audio_spec[0], sv_emb[0] if self.is_v2pro else None
+                    )[0, 0, :]
+                elif self.is_v2pro != True:
+                    _batch_audio_fragment = self.vits_model.decode(
+                        all_pred_semantic, _batch_phones, refer_audio_spec, speed=speed_factor
+                    ).detach()[0, 0, :]
+                else:
+                    _batch_audio_fragment = self.vits_model.decode(
+                        all_pred_semantic, _batch_phones, refer_audio_spec, speed=speed_factor, sv_emb=sv_emb
+                    ).detach()[0, 0, :]
+                audio_frag_end_idx.insert(0, 0)
+                batch_audio_fragment = [
+                    _batch_audio_fragment[audio_frag_end_idx[i - 1] : audio_frag_end_idx[i]]
+                    for i in range(1, len(audio_frag_end_idx))
+                ]
+            else:
+                # ## vits串行推理
+                for i, idx in enumerate(tqdm(idx_list)):
+                    phones = batch_phones[i].unsqueeze(0).to(self.configs.device)
+                    _pred_semantic = (
+                        pred_semantic_list[i][-idx:].unsqueeze(0).unsqueeze(0)
+                    )  # .unsqueeze(0)#mq要多unsqueeze一次
+                    if self.is_v2pro != True:
+                        audio_fragment = self.vits_model.decode(
+                            _pred_semantic, phones, refer_audio_spec, speed=speed_factor
+                        ).detach()[0, 0, :]
+                    else:
+                        audio_fragment = self.vits_model.decode(
+                            _pred_semantic, phones, refer_audio_spec, speed=speed_factor, sv_emb=sv_emb
+                        ).detach()[0, 0, :]
+                    batch_audio_fragment.append(audio_fragment)  ###试试重建不带上prompt部分
+        else:
+            if parallel_infer:
+                print(f"{i18n('并行合成中')}...")
+                audio_fragments = self.using_vocoder_synthesis_batched_infer(
+                    idx_list, pred_semantic_list, batch_phones, speed=speed_factor, sample_steps=sample_steps
+                )
+                batch_audio_fragment.extend(audio_fragments)
+            else:
+                for i, idx in enumerate(tqdm(idx_list)):
+                    phones = batch_phones[i].unsqueeze(0).to(self.configs.device)
+                    _pred_semantic = (
+                        pred_semantic_list[i][-idx:].unsqueeze(0).unsqueeze(0)
+                    )  # .unsqueeze(0)#mq要多unsqueeze一次
+                    audio_fragment = self.using_vocoder_synthesis(
+                        _pred_semantic, phones, speed=speed_factor, sample_steps=sample_steps
+                    )
+                    batch_audio_fragment.append(audio_fragment)
+        return batch_audio_fragment
+
+    def _get_refer_inputs(self):
+        refer_audio_spec = []
+        for spec, audio_tensor in self.prompt_cache["refer_spec"]:
+            spec = spec.to(dtype=self.precision, device=self.configs.device)
+            refer_audio_spec.append(spec)
+        # sv_emb 在设置参考音频时已算好 (见 _get_sv_emb)
+        sv_emb = list(self.prompt_cache["sv_emb"]) if self.is_v2pro else None
+        return refer_audio_spec, sv_emb
+
+    def _stream_semantic_audio(
+        self,
+        item: dict,
+        no_prompt_text: bool,
+        top_k: int = 5,
+        top_p: float = 1,
+        temperature: float = 1,
+        repetition_penalty: float = 1.35,
+        static_kv_cache: bool = False,
+        speed_factor: float = 1.0,
+        window: int = 25,
+        first_window: int = 10,
+        overlap: int = 4,
+        cancel_event=None,
+    ):
+        """
+        Incremental synthesis of one text segment (a to_batch batch of size 1, VITS models only).
+        VITS decodes the semantic tokens in rolling windows while the T2S AR loop is still running;
+        each window re-decodes the last `overlap` tokens of the previous one and the two are stitched
+        with sola_algorithm. The last `overlap` tokens of audio are held back until the next window.
+
+        Yields:
+            Tuple[torch.Tensor, bool]: audio chunk and whether it is the last chunk of the segment.
+        """
+        phones = item["phones"][0].unsqueeze(0).to(self.configs.device)
+        if no_prompt_text:
+            prompt = None
+        else:
+            prompt = self.prompt_cache["prompt_semantic"].unsqueeze(0).to(self.configs.device)
+        refer_audio_spec, sv_emb = self._get_refer_inputs()
+
+        def decode(tokens: torch.Tensor) -> torch.Tensor:
+            codes = tokens.unsqueeze(0).unsqueeze(0).to(self.configs.device)
+            if self.is_v2pro != True:
+                audio = self.vits_model.decode(codes, phones, refer_audio_spec, speed=speed_factor)
+            else:
+                audio = self.vits_model.decode(codes, phones, refer_audio_spec, speed=speed_factor, sv_emb=sv_emb)
+            return audio.detach()[0, 0, :]
+
+        overlap = max(1, overlap)
+        window = max(window, overlap + 1)
+        first_window = max(1, first_window)
+        decoded_end = 0
+        tail: torch.Tensor = None
+
+        print(f"############ {i18n('预测语义Token')} (stream) ############")
+        for y, n_new, finished in self.t2s_model.model.infer_panel_naive_stream(
+            item["all_phones"][0].unsqueeze(0),
+            item["all_phones_len"][0],
+            prompt,
+            item["all_bert_features"][0].unsqueeze(0),
+            top_k=top_k,
+            top_p=top_p,
+            temperature=temperature,
+            early_stop_num=self.configs.hz * self.configs.max_sec,
+            repetition_penalty=repetition_penalty,
+            static_kv_cache=static_kv_cache,
+            stream_chunk=math.gcd(window, first_window),
+            cancel_event=cancel_event,
+        ):
+            self._check_cancelled(cancel_event)
+            tokens = y[0] if n_new == 0 else y[0, -n_new:]
+            n = tokens.shape[0]
+            if not finished and n - decoded_end < (first_window if tail is None else window):
+                continue
+
+            if tail is not None and n <= decoded_end:
+                # 最后一个窗口之后没有新 token, 直接放出保留的尾巴
+                yield tail, True
+                return
+
+            start = max(0, decoded_end - overlap) if tail is not None else 0
+            audio = decode(tokens[start:n])
+            if tail is not None:
+                audio = self.sola_algorithm([tail, audio], tail.shape[0])
+            decoded_end = n
+
+            if finished:
+                yield audio, True
+                return
+            # 末尾 overlap 个 token 的音频缺少右侧上下文, 等下一个窗口重新解码后再交叉淡化
+            samples_per_token = audio.shape[0] / max(n - start, 1)
+            tail_len = max(1, min(int(samples_per_token * overlap), audio.shape[0] - 1))
+            tail = audio[-tail_len:]
+            yield audio[:-tail_len], False
+
+    def _stream_postprocess(self, audio_chunk: torch.Tensor, is_last: bool, fragment_interval: float) -> np.ndarray:
+        audio_chunk = torch.clamp(audio_chunk.float(), -1.0, 1.0)
+        if is_last:
+            zero_wav = torch.zeros(
+                int(self.configs.sampling_rate * fragment_interval), dtype=audio_chunk.dtype, device=audio_chunk.device
+            )
+            audio_chunk = torch.cat([audio_chunk, zero_wav], dim=0)
+        return (audio_chunk.cpu().numpy() * 32767).astype(np.int16)
+
     def empty_cache(self):
         try:
             gc.collect()  # 触发gc的垃圾回收。避免内存一直增长。
@@ -1,3 +1,4 @@
+import importlib
 import os
 import sys
 import threading
@@ -10,12 +11,13 @@ sys.path.append(now_dir)
 import re
 import torch
 from text.LangSegmenter import LangSegmenter
-from text import chinese
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 from text.cleaner import clean_text
 from text import cleaned_text_to_sequence
 from transformers import AutoModelForMaskedLM, AutoTokenizer
 from TTS_infer_pack.text_segmentation_method import split_big_text, splits, get_method as get_seg_method
+from TTS_infer_pack.prompt_cache import LRUCache
+from TTS_infer_pack.metrics import metrics
 
 from tools.i18n.i18n import I18nAuto, scan_language_list
 
@@ -24,6 +26,31 @@ language = sys.argv[-1] if sys.argv[-1] in scan_language_list() else language
 i18n = I18nAuto(language=language)
 punctuation = set(["!", "?", "…", ",", ".", "-"])
 
+# clean_text 按语言 import 的前端模块 (见 text/cleaner.py), import 时会加载各自的词典/G2P 模型
+FRONTEND_MODULES = {
+    "v1": {"zh": "chinese", "ja": "japanese", "en": "english"},
+    "v2": {"zh": "chinese2", "ja": "japanese", "en": "english", "ko": "korean", "yue": "cantonese"},
+}
+
+
+def frontend_languages(languages: List[str]) -> set:
+    """请求语言 (text_lang/prompt_lang) 会用到的前端语言; 混合文本里的英文片段总是走 en"""
+    result = {"en"}
+    for language in languages:
+        if language == "auto":
+            result |= {"zh", "ja", "ko"}
+        elif language == "auto_yue":
+            result |= {"yue", "ja", "ko"}
+        else:
+            result.add(language.replace("all_", ""))
+    return result
+
+
+def loaded_frontends() -> List[str]:
+    """已经 import 的语言前端模块"""
+    names = set(FRONTEND_MODULES["v1"].values()) | set(FRONTEND_MODULES["v2"].values()) | {"g2pw"}
+    return sorted(name for name in names if "text." + name in sys.modules)
+
 
 def get_first(text: str) -> str:
     pattern = "[" + "".join(re.escape(sep) for sep in splits) + "]"
@@ -50,11 +77,23 @@ def merge_short_text_in_array(texts: str, threshold: int) -> list:
 
 
 class TextPreprocessor:
-    def __init__(self, bert_model: AutoModelForMaskedLM, tokenizer: AutoTokenizer, device: torch.device):
+    def __init__(
+        self,
+        bert_model: AutoModelForMaskedLM,
+        tokenizer: AutoTokenizer,
+        device: torch.device,
+        feature_cache_size: int = 1024,
+        feature_cache_max_mb: float = 256,
+        bert_loader: Callable = None,
+    ):
         self.bert_model = bert_model
         self.tokenizer = tokenizer
+        # bert_model 为 None 时, 第一条中文文本调用 bert_loader() -> (bert_model, tokenizer) 再加载
+        self.bert_loader = bert_loader
         self.device = device
         self.bert_lock = threading.RLock()
+        # 分句级别的 (phones, bert_features, norm_text) 缓存, key 为 (text, language, version)
+        self.feature_cache: LRUCache = LRUCache(feature_cache_size, feature_cache_max_mb)
 
     def preprocess(self, text: str, lang: str, text_split_method: str, version: str = "v2") -> List[Dict]:
         print(f"############ {i18n('切分文本')} ############")
@@ -120,6 +159,18 @@ class TextPreprocessor:
         return self.get_phones_and_bert(text, language, version)
 
     def get_phones_and_bert(self, text: str, language: str, version: str, final: bool = False):
+        # 命中缓存时不需要 bert_lock, 缓存本身是线程安全的
+        key = (text, language, version)
+        cached = self.feature_cache.get(key)
+        if cached is not None:
+            phones, bert, norm_text = cached
+            return list(phones), bert, norm_text
+
+        phones, bert, norm_text = self._get_phones_and_bert(text, language, version, final)
+        self.feature_cache.put(key, (phones, bert, norm_text))
+        return list(phones), bert, norm_text
+
+    def _get_phones_and_bert(self, text: str, language: str, version: str, final: bool = False):
         with self.bert_lock:
             text = re.sub(r' {2,}', ' ', text)
             textlist = []
@@ -174,8 +225,11 @@ class TextPreprocessor:
             norm_text_list = []
             for i in range(len(textlist)):
                 lang = langlist[i]
-                phones, word2ph, norm_text = self.clean_text_inf(textlist[i], lang, version)
-                bert = self.get_bert_inf(phones, word2ph, norm_text, lang)
+                # 记到外层 span (TTS.run 的 frontend) 所属请求的 trace
+                with metrics.span("g2p"):
+                    phones, word2ph, norm_text = self.clean_text_inf(textlist[i], lang, version)
+                with metrics.span("bert"):
+                    bert = self.get_bert_inf(phones, word2ph, norm_text, lang)
                 phones_list.append(phones)
                 norm_text_list.append(norm_text)
                 bert_list.append(bert)
@@ -184,11 +238,26 @@ class TextPreprocessor:
             norm_text = "".join(norm_text_list)
 
             if not final and len(phones) < 6:
-                return self.get_phones_and_bert("." + text, language, version, final=True)
+                return self._get_phones_and_bert("." + text, language, version, final=True)
 
             return phones, bert, norm_text
 
+    def preload(self, languages: List[str], version: str = "v2"):
+        """启动时把 languages 会用到的语言前端 (和中文 BERT) 先加载好"""
+        modules = FRONTEND_MODULES["v1" if version == "v1" else "v2"]
+        for language in sorted(frontend_languages(languages)):
+            if language in modules:
+                importlib.import_module("text." + modules[language])
+            if language == "zh":
+                self._ensure_bert()
+
+    def _ensure_bert(self):
+        with self.bert_lock:
+            if self.bert_model is None:
+                self.bert_model, self.tokenizer = self.bert_loader()
+
     def get_bert_feature(self, text: str, word2ph: list) -> torch.Tensor:
+        self._ensure_bert()
         with torch.no_grad():
             inputs = self.tokenizer(text, return_tensors="pt")
             for i in inputs:
@@ -0,0 +1,195 @@
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, List, Tuple
+
+import numpy as np
+
+
+class _PendingRequest:
+    __slots__ = ("inputs", "future", "key", "enqueued_at")
+
+    def __init__(self, inputs: dict, key: tuple):
+        self.inputs = inputs
+        self.future: Future = Future()
+        self.key = key
+        self.enqueued_at = time.perf_counter()
+
+
+class TTSBatchScheduler:
+    """
+    Collects non-streaming requests that arrive within a short window and runs
+    compatible ones through a single TTS.run_batch call.
+
+    Requests are compatible when they share the reference voice and the VITS/decoding
+    options (see group_key). T2S sampling parameters (top_k, top_p, temperature,
+    repetition_penalty, seed) are applied per row by run_batch, so they do not split
+    groups. Each caller gets back its own (sr, audio) tuple through the Future
+    returned by submit().
+
+    Args:
+        tts_pipeline (TTS): the TTS instance to run the batches on.
+        max_batch_size (int): max number of requests merged into one batch.
+        max_wait_ms (float): how long the first request of a batch waits for others.
+    """
+
+    DECODING_KEYS = (
+        "speed_factor",
+        "sample_steps",
+        "super_sampling",
+        "parallel_infer",
+        "static_kv_cache",
+    )
+
+    def __init__(self, tts_pipeline, max_batch_size: int = 4, max_wait_ms: float = 20.0):
+        self.tts_pipeline = tts_pipeline
+        self.max_batch_size: int = max(1, int(max_batch_size))
+        self.max_wait_ms: float = max(0.0, float(max_wait_ms))
+
+        self._queue: Deque[_PendingRequest] = deque()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._worker: threading.Thread = None
+
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, float] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "batches": 0,
+            "max_queue_depth": 0,
+            "total_batch_size": 0,
+            "total_wait_ms": 0.0,
+            "total_run_ms": 0.0,
+        }
+
+    @classmethod
+    def group_key(cls, inputs: dict) -> tuple:
+        aux = inputs.get("aux_ref_audio_paths") or []
+        return (
+            inputs.get("ref_audio_path"),
+            tuple(aux),
+            inputs.get("prompt_text", ""),
+            inputs.get("prompt_lang", ""),
+        ) + tuple(inputs.get(k) for k in cls.DECODING_KEYS)
+
+    def start(self):
+        with self._cond:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stopped = False
+            self._worker = threading.Thread(target=self._loop, name="tts-batch-scheduler", daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def submit(self, inputs: dict) -> Future:
+        """
+        Queue one request. The returned Future resolves to (sr, audio) or raises the synthesis error.
+        """
+        request = _PendingRequest(inputs, self.group_key(inputs))
+        self.start()
+        with self._cond:
+            self._queue.append(request)
+            depth = len(self._queue)
+            self._cond.notify_all()
+        with self._stats_lock:
+            self._stats["submitted"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], depth)
+        return request.future
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats["batches"] or 1
+        stats["queue_depth"] = self.queue_depth()
+        stats["avg_batch_size"] = round(stats.pop("total_batch_size") / batches, 3)
+        stats["avg_wait_ms"] = round(stats.pop("total_wait_ms") / max(stats["completed"] + stats["failed"], 1), 3)
+        stats["avg_run_ms"] = round(stats.pop("total_run_ms") / batches, 3)
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait_ms
+        return stats
+
+    def _take_batch(self) -> List[_PendingRequest]:
+        with self._cond:
+            while not self._queue and not self._stopped:
+                self._cond.wait()
+            if self._stopped:
+                return []
+
+            head = self._queue[0]
+            deadline = head.enqueued_at + self.max_wait_ms / 1000
+            while True:
+                same_key = sum(1 for r in self._queue if r.key == head.key)
+                remaining = deadline - time.perf_counter()
+                if same_key >= self.max_batch_size or remaining <= 0 or self._stopped:
+                    break
+                self._cond.wait(timeout=remaining)
+
+            batch: List[_PendingRequest] = []
+            rest: Deque[_PendingRequest] = deque()
+            cancelled = 0
+            for r in self._queue:
+                if self._is_cancelled(r):
+                    # 대기 중에 취소된 요청은 배치에 넣지 않는다
+                    r.future.cancel()
+                    cancelled += 1
+                elif r.key == head.key and len(batch) < self.max_batch_size:
+                    batch.append(r)
+                else:
+                    rest.append(r)
+            self._queue = rest
+        if cancelled:
+            with self._stats_lock:
+                self._stats["cancelled"] += cancelled
+        return batch
+
+    @staticmethod
+    def _is_cancelled(request: _PendingRequest) -> bool:
+        cancel_event = request.inputs.get("cancel_event")
+        return request.future.cancelled() or (cancel_event is not None and cancel_event.is_set())
+
+    def _loop(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if self._stopped:
+                    return
+                continue
+
+            t_start = time.perf_counter()
+            try:
+                results: List[Tuple[int, np.ndarray]] = self.tts_pipeline.run_batch([r.inputs for r in batch])
+                for r, result in zip(batch, results):
+                    if not r.future.done():
+                        r.future.set_result(result)
+                failed = 0
+            except Exception as e:
+                traceback.print_exc()
+                for r in batch:
+                    if not r.future.done():
+                        r.future.set_exception(e)
+                failed = len(batch)
+            t_end = time.perf_counter()
+
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["completed"] += len(batch) - failed
+                self._stats["failed"] += failed
+                self._stats["total_batch_size"] += len(batch)
+                self._stats["total_wait_ms"] += sum((t_start - r.enqueued_at) * 1000 for r in batch)
+                self._stats["total_run_ms"] += (t_end - t_start) * 1000
+            print(
+                f"[TTSBatchScheduler] batch={len(batch)} run={(t_end - t_start) * 1000:.1f}ms "
+                f"queue_depth={self.queue_depth()}"
+            )
@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+_DONE = object()
+
+
+class PipelineStats:
+    """
+    Busy/idle time of the two stages of a FrontendPipeline.
+
+    frontend_busy: time spent in prepare() (segmentation, G2P, BERT).
+    frontend_idle: time the frontend waited for a free slot in the prefetch queue (models are the bottleneck).
+    model_busy:    time between handing an item to the consumer and the consumer asking for the next one.
+    model_idle:    time the consumer waited for the frontend (frontend is the bottleneck).
+    """
+
+    def __init__(self):
+        self.items = 0
+        self.frontend_busy = 0.0
+        self.frontend_idle = 0.0
+        self.model_busy = 0.0
+        self.model_idle = 0.0
+        self.started_at = time.perf_counter()
+        self.wall = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "frontend_busy": round(self.frontend_busy, 4),
+            "frontend_idle": round(self.frontend_idle, 4),
+            "model_busy": round(self.model_busy, 4),
+            "model_idle": round(self.model_idle, 4),
+            "wall": round(self.wall, 4),
+            # 与模型推理重叠掉的前端时间
+            "overlap_saved": round(max(0.0, self.frontend_busy - self.model_idle), 4),
+        }
+
+
+class FrontendPipeline:
+    """
+    Runs prepare() for upcoming items on a worker thread while the caller runs the acoustic models
+    on the current one. Results come out in input order; at most `depth` prepared items wait in the
+    bounded queue, so the frontend never runs far ahead of synthesis (and of a cancellation).
+
+    With depth <= 0 the items are prepared inline on the caller thread (sequential, same stats).
+
+    Args:
+        items (Iterable): inputs of prepare(), e.g. the text batches of TTS.run.
+        prepare (Callable): frontend stage, item -> prepared item.
+        depth (int): number of prepared items buffered ahead of the consumer.
+        should_stop (Callable): polled by the worker between items, e.g. cancel_event.is_set.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[Any],
+        prepare: Callable[[Any], Any],
+        depth: int = 2,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ):
+        self.items = items
+        self.prepare = prepare
+        self.depth = int(depth)
+        self.should_stop = should_stop
+        self.stats = PipelineStats()
+        self._closed = threading.Event()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.depth <= 0:
+            return self._iter_inline()
+        return self._iter_threaded()
+
+    def _iter_inline(self) -> Iterator[Any]:
+        try:
+            for item in self.items:
+                t0 = time.perf_counter()
+                prepared = self.prepare(item)
+                t1 = time.perf_counter()
+                self.stats.frontend_busy += t1 - t0
+                self.stats.model_idle += t1 - t0
+                self.stats.items += 1
+                yield prepared
+                self.stats.model_busy += time.perf_counter() - t1
+        finally:
+            self.close()
+
+    def _iter_threaded(self) -> Iterator[Any]:
+        self._queue = queue.Queue(maxsize=self.depth)
+        self._thread = threading.Thread(target=self._worker, name="tts-frontend", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                t0 = time.perf_counter()
+                kind, value = self._queue.get()
+                t1 = time.perf_counter()
+                self.stats.model_idle += t1 - t0
+                if kind is _DONE:
+                    return
+                if kind == "error":
+                    raise value
+                self.stats.items += 1
+                yield value
+                self.stats.model_busy += time.perf_counter() - t1
+        finally:
+            self.close()
+
+    def _put(self, entry) -> bool:
+        # 队列满时等待消费者, 期间检查是否已关闭
+        t0 = time.perf_counter()
+        while not self._closed.is_set():
+            try:
+                self._queue.put(entry, timeout=0.05)
+                self.stats.frontend_idle += time.perf_counter() - t0
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _worker(self):
+        try:
+            for item in self.items:
+                if self._closed.is_set() or (self.should_stop is not None and self.should_stop()):
+                    break
+                t0 = time.perf_counter()
+                prepared = self.prepare(item)
+                self.stats.frontend_busy += time.perf_counter() - t0
+                if not self._put(("item", prepared)):
+                    return
+        except BaseException as e:
+            self._put(("error", e))
+            return
+        self._put((_DONE, None))
+
+    def close(self):
+        """Stops the worker and waits for it to finish its current item; safe to call more than once."""
+        if self.stats.wall == 0.0:
+            self.stats.wall = time.perf_counter() - self.stats.started_at
+        self._closed.set()
+        # 等正在做的 prepare (G2P / BERT) 结束再返回: TTS.run 结束后会释放 model_gate,
+        # 之后下一个合成或权重切换不能和它重叠
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
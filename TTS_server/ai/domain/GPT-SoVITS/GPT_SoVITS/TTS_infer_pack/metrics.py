@@ -0,0 +1,312 @@
+"""
+推理各阶段耗时 / 吞吐统计
+- RequestTrace: 一个请求的各阶段 span (参考音频, 文本前端, G2P, BERT, T2S 解码, VITS, 后处理, 打包, 发送)
+- MetricsRecorder: 按阶段聚合成直方图 (累计) + 最近 N 次的滑动分位数, 输出 Prometheus 文本格式
+- 关闭时 span() 返回同一个空对象, 几乎没有开销
+
+trace 和 cancel_event 一样放在 TTS.run 的 inputs 里传递 (inputs["trace"]); 嵌套的 span 不传 trace 时
+沿用同一线程外层 span 的 trace (例如 TextPreprocessor 的 g2p / bert)
+"""
+import contextlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKENS_PER_SECOND_BUCKETS = (10, 25, 50, 100, 200, 400, 800, 1600)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RequestTrace:
+    """
+    Spans of one request. Spans may be added from several threads (frontend prefetch, transport).
+
+    Args:
+        kind (str): request type, e.g. "convert_tts" or "tts"; a label of the request metrics.
+        request_id (str): id shown in the recent request list.
+    """
+
+    def __init__(self, kind: str, request_id: Optional[str] = None):
+        self.kind = kind
+        self.request_id = request_id
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.seconds: Optional[float] = None
+        self.status: Optional[str] = None
+        self.spans: List[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: dict):
+        with self._lock:
+            self.spans.append(span)
+
+    def stage_totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = OrderedDict()
+        with self._lock:
+            for span in self.spans:
+                totals[span["stage"]] = totals.get(span["stage"], 0.0) + span["seconds"]
+        return totals
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            spans = [dict(span) for span in self.spans]
+        return {
+            "kind": self.kind,
+            "request_id": self.request_id,
+            "started_at": self.started_at,
+            "seconds": round(self.seconds, 4) if self.seconds is not None else None,
+            "status": self.status,
+            "spans": spans,
+        }
+
+
+class RollingHistogram:
+    """Cumulative Prometheus histogram plus a window of the most recent observations for quantiles."""
+
+    def __init__(self, buckets: Tuple[float, ...], window: int):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def quantiles(self) -> List[Tuple[float, float]]:
+        values = sorted(self.recent)
+        if not values:
+            return []
+        return [(q, values[min(len(values) - 1, int(q * len(values)))]) for q in QUANTILES]
+
+
+class _NullSpan:
+    tokens = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, recorder: "MetricsRecorder", stage: str, traces: list):
+        self.recorder = recorder
+        self.stage = stage
+        self.traces = traces
+        self.tokens: Optional[int] = None
+
+    def __enter__(self):
+        self._outer = self.recorder._bind(self.traces)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self._t0
+        self.recorder._local.traces = self._outer
+        self.recorder.record(self.stage, seconds, self.traces, tokens=self.tokens)
+        return False
+
+
+class MetricsRecorder:
+    """
+    Aggregates per-stage spans into rolling histograms and keeps the most recent request traces.
+
+    Args:
+        enabled (bool): when False spans cost one attribute lookup and nothing is recorded.
+        window (int): observations per series kept for the rolling quantiles.
+        recent (int): finished request traces kept for /metrics/requests.
+        log (bool): print one line per finished request with its stage totals.
+    """
+
+    def __init__(self, enabled: bool = True, window: int = 512, recent: int = 100, log: bool = False):
+        self.enabled = enabled
+        self.window = window
+        self.log = log
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stages: Dict[str, RollingHistogram] = OrderedDict()
+        self._tokens_per_second: Dict[str, RollingHistogram] = OrderedDict()
+        self._tokens: Dict[str, int] = OrderedDict()
+        self._requests: Dict[str, RollingHistogram] = OrderedDict()
+        self._request_counts: Dict[Tuple[str, str], int] = OrderedDict()
+        self._recent: deque = deque(maxlen=recent)
+
+    # ------------------------------------------------------------------ recording
+    def trace(self, kind: str, request_id: Optional[str] = None) -> Optional[RequestTrace]:
+        """New request trace, None when disabled (every recording call accepts None)"""
+        if not self.enabled:
+            return None
+        return RequestTrace(kind, request_id)
+
+    def span(self, stage: str, trace=None):
+        """
+        Times a block as one span of `stage`. trace may be a RequestTrace, a list of them (a batch shared
+        by several requests) or None for the trace of the enclosing span on this thread.
+        """
+        if not self.enabled or getattr(self._local, "muted", False):
+            return _NULL_SPAN
+        return _Span(self, stage, self._traces(trace))
+
+    def record(self, stage: str, seconds: float, trace=None, tokens: Optional[int] = None):
+        """Records a span timed by the caller (e.g. accumulated over the chunks of a stream)"""
+        if not self.enabled or getattr(self._local, "muted", False):
+            return
+        span = {"stage": stage, "seconds": round(seconds, 5)}
+        if tokens is not None:
+            span["tokens"] = int(tokens)
+        self._observe(span)
+        for t in self._traces(trace):
+            t.add(span)
+
+    def merge(self, trace: Optional[RequestTrace], spans: Iterable[dict]):
+        """Adds spans recorded in another process (TTS worker) to the aggregates and to trace"""
+        if not self.enabled:
+            return
+        for span in spans:
+            self._observe(span)
+            if trace is not None:
+                trace.add(span)
+
+    def finish(self, trace: Optional[RequestTrace], status: str = "success"):
+        if trace is None or trace.seconds is not None:
+            return
+        trace.seconds = time.perf_counter() - trace._t0
+        trace.status = status
+        with self._lock:
+            if trace.kind not in self._requests:
+                self._requests[trace.kind] = RollingHistogram(STAGE_BUCKETS, self.window)
+            self._requests[trace.kind].observe(trace.seconds)
+            key = (trace.kind, status)
+            self._request_counts[key] = self._request_counts.get(key, 0) + 1
+            self._recent.append(trace)
+        if self.log:
+            stages = " ".join(f"{stage}={seconds:.3f}" for stage, seconds in trace.stage_totals().items())
+            print(f"[metrics] {trace.kind} {trace.request_id} {status} total={trace.seconds:.3f} {stages}")
+
+    @contextlib.contextmanager
+    def muted(self):
+        """Nothing is recorded on this thread inside the block (warm-up runs stay out of the histograms)"""
+        outer = getattr(self._local, "muted", False)
+        self._local.muted = True
+        try:
+            yield
+        finally:
+            self._local.muted = outer
+
+    def _traces(self, trace) -> list:
+        if trace is None:
+            return getattr(self._local, "traces", None) or []
+        if isinstance(trace, RequestTrace):
+            return [trace]
+        return [t for t in trace if t is not None]
+
+    def _bind(self, traces: list) -> list:
+        outer = getattr(self._local, "traces", None)
+        self._local.traces = traces
+        return outer
+
+    def _observe(self, span: dict):
+        stage, seconds = span["stage"], span["seconds"]
+        with self._lock:
+            if stage not in self._stages:
+                self._stages[stage] = RollingHistogram(STAGE_BUCKETS, self.window)
+            self._stages[stage].observe(seconds)
+            tokens = span.get("tokens")
+            if tokens is not None:
+                self._tokens[stage] = self._tokens.get(stage, 0) + tokens
+                if seconds > 0:
+                    if stage not in self._tokens_per_second:
+                        self._tokens_per_second[stage] = RollingHistogram(TOKENS_PER_SECOND_BUCKETS, self.window)
+                    self._tokens_per_second[stage].observe(tokens / seconds)
+
+    # ------------------------------------------------------------------ export
+    def recent(self, limit: int = 20) -> List[dict]:
+        with self._lock:
+            traces = list(self._recent)[-limit:]
+        return [trace.as_dict() for trace in reversed(traces)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "stages": {
+                    stage: {
+                        "count": h.count,
+                        "mean": round(h.sum / h.count, 4) if h.count else None,
+                        **{f"p{int(q * 100)}": round(v, 4) for q, v in h.quantiles()},
+                    }
+                    for stage, h in self._stages.items()
+                },
+                "tokens": dict(self._tokens),
+                "requests": {f"{kind}/{status}": n for (kind, status), n in self._request_counts.items()},
+            }
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            _histogram(lines, "tts_stage_seconds", "Time spent in each TTS pipeline stage.", "stage", self._stages)
+            _quantiles(lines, "tts_stage_recent_seconds", f"Quantiles of the last {self.window} spans of each stage.",
+                       "stage", self._stages)
+            lines.append("# HELP tts_stage_tokens_total Semantic tokens generated, by stage.")
+            lines.append("# TYPE tts_stage_tokens_total counter")
+            for stage, n in self._tokens.items():
+                lines.append(f'tts_stage_tokens_total{{stage="{_escape(stage)}"}} {n}')
+            _histogram(lines, "tts_stage_tokens_per_second", "Token throughput of each decoding span.", "stage",
+                       self._tokens_per_second)
+            _histogram(lines, "tts_request_seconds", "End to end time of finished requests.", "kind", self._requests)
+            lines.append("# HELP tts_requests_total Finished requests by kind and status.")
+            lines.append("# TYPE tts_requests_total counter")
+            for (kind, status), n in self._request_counts.items():
+                lines.append(f'tts_requests_total{{kind="{_escape(kind)}",status="{_escape(status)}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else f"{int(value)}.0"
+
+
+def _histogram(lines: list, name: str, help_text: str, label: str, series: Dict[str, RollingHistogram]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, h in series.items():
+        tag = f'{label}="{_escape(key)}"'
+        for bound, count in zip(h.buckets, h.counts):
+            lines.append(f'{name}_bucket{{{tag},le="{_number(bound)}"}} {count}')
+        lines.append(f'{name}_bucket{{{tag},le="+Inf"}} {h.count}')
+        lines.append(f"{name}_sum{{{tag}}} {h.sum:.6f}")
+        lines.append(f"{name}_count{{{tag}}} {h.count}")
+
+
+def _quantiles(lines: list, name: str, help_text: str, label: str, series: Dict[str, RollingHistogram]):
+    # 滑动窗口的分位数不是累计值, 按 gauge 输出 (不是 summary 的 _sum/_count 语义)
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} gauge")
+    for key, h in series.items():
+        tag = f'{label}="{_escape(key)}"'
+        for q, value in h.quantiles():
+            lines.append(f'{name}{{{tag},quantile="{q}"}} {value:.6f}')
+
+
+# 进程内唯一的实例; 服务端请按 TTS_infer_pack.metrics 导入 (和 TTS.py 同一个模块名), 否则会得到第二个实例
+metrics = MetricsRecorder(
+    enabled=os.getenv("TTS_METRICS_ENABLED", "true").lower() == "true",
+    window=int(os.getenv("TTS_METRICS_WINDOW", "512")),
+    recent=int(os.getenv("TTS_METRICS_RECENT", "100")),
+    log=os.getenv("TTS_METRICS_LOG", "false").lower() == "true",
+)
@@ -0,0 +1,439 @@
+"""
+ONNX Runtime CPU 推理后端 (TTS_Config.backend = "onnxruntime")
+- 从已加载的 PyTorch 模型导出三张图, 按权重文件缓存在 onnx_dir 下, 权重不变时直接加载:
+    t2s_prefill: 文本/BERT/参考语义 token -> 最后一个位置的 logits + 各层 KV (堆叠成 [layers, 1, len, hidden])
+    t2s_decode:  上一个 token + 位置 + KV -> logits + 追加了一步的 KV (KV 作为显式输入输出, 不在图内采样)
+    vits:        语义 token + 音素 + 参考频谱 (+ sv_emb) + noise_scale -> 音频 (v1/v2/v2Pro, 不含 v3/v4 声码器)
+- 采样仍用 AR.models.utils.sample (与 PyTorch 路径同一实现、同一随机数), 每条逐个解码 (batch=1)
+- KV 在步与步之间以 OrtValue 传递, 不经过 numpy
+"""
+import hashlib
+import json
+import os
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+from AR.models.utils import sample
+
+# 导出图的结构变了就加一, 旧缓存自动失效
+EXPORT_VERSION = 1
+OPSET_VERSION = 17
+
+
+def _weights_tag(weights_path: str, *extra) -> str:
+    stat = os.stat(weights_path)
+    key = json.dumps([os.path.abspath(weights_path), stat.st_size, int(stat.st_mtime), EXPORT_VERSION, *extra])
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+    return f"{stem}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _layer_forward(layer, x: torch.Tensor, k: torch.Tensor, v: torch.Tensor, num_heads: int, mask=None):
+    """T2SBlock 的计算 (post-norm), 只用导出友好的算子"""
+    batch_size, q_len, hidden = x.shape
+    head_dim = hidden // num_heads
+    q = F.linear(x, layer.self_attn.in_proj_weight[:hidden], layer.self_attn.in_proj_bias[:hidden])
+    q = q.view(batch_size, q_len, num_heads, head_dim).transpose(1, 2)
+    kh = k.view(batch_size, -1, num_heads, head_dim).transpose(1, 2)
+    vh = v.view(batch_size, -1, num_heads, head_dim).transpose(1, 2)
+
+    scores = torch.matmul(q, kh.transpose(-2, -1)) * (1.0 / head_dim**0.5)
+    if mask is not None:
+        scores = scores.masked_fill(mask, float("-inf"))
+    attn = torch.matmul(torch.softmax(scores, dim=-1), vh)
+    attn = attn.transpose(1, 2).reshape(batch_size, q_len, hidden)
+    attn = F.linear(attn, layer.self_attn.out_proj.weight, layer.self_attn.out_proj.bias)
+
+    x = F.layer_norm(x + attn, [hidden], layer.norm1.weight, layer.norm1.bias, layer.norm1.eps)
+    mlp = F.linear(F.relu(F.linear(x, layer.linear1.weight, layer.linear1.bias)), layer.linear2.weight, layer.linear2.bias)
+    return F.layer_norm(x + mlp, [hidden], layer.norm2.weight, layer.norm2.bias, layer.norm2.eps)
+
+
+def _kv_proj(layer, x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+    hidden = x.shape[-1]
+    k = F.linear(x, layer.self_attn.in_proj_weight[hidden : 2 * hidden], layer.self_attn.in_proj_bias[hidden : 2 * hidden])
+    v = F.linear(x, layer.self_attn.in_proj_weight[2 * hidden :], layer.self_attn.in_proj_bias[2 * hidden :])
+    return k, v
+
+
+class T2SPrefill(nn.Module):
+    """First decoder pass over [text + BERT, prompt semantic tokens] (batch 1, no padding)."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.ar_text_embedding = model.ar_text_embedding
+        self.bert_proj = model.bert_proj
+        self.ar_text_position = model.ar_text_position
+        self.ar_audio_embedding = model.ar_audio_embedding
+        self.ar_audio_position = model.ar_audio_position
+        self.layers = model.h.layers
+        self.ar_predict_layer = model.ar_predict_layer
+        self.num_heads = model.num_head
+
+    def forward(self, phones, bert, prompt):
+        x = self.ar_text_embedding(phones)
+        x = x + self.bert_proj(bert.transpose(1, 2))
+        x = self.ar_text_position(x)
+        y = self.ar_audio_position(self.ar_audio_embedding(prompt))
+        xy = torch.cat([x, y], dim=1)
+
+        # 文本只看文本, 语义 token 看全部文本 + 因果的语义 token (与 infer_panel_naive 的 xy_attn_mask 相同)
+        src_len = xy.shape[1]
+        pos = torch.arange(src_len, device=xy.device)
+        mask = (pos.unsqueeze(0) >= x.shape[1]) & (pos.unsqueeze(0) > pos.unsqueeze(1))
+        mask = mask.view(1, 1, src_len, src_len)
+
+        k_list, v_list = [], []
+        for layer in self.layers:
+            k, v = _kv_proj(layer, xy)
+            k_list.append(k)
+            v_list.append(v)
+            xy = _layer_forward(layer, xy, k, v, self.num_heads, mask)
+        logits = self.ar_predict_layer(xy[:, -1])
+        return logits, torch.stack(k_list, dim=0), torch.stack(v_list, dim=0)
+
+
+class T2SDecodeStep(nn.Module):
+    """One decoding step with explicit KV inputs/outputs (caches grow by one position)."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.ar_audio_embedding = model.ar_audio_embedding
+        self.alpha = model.ar_audio_position.alpha
+        self.x_scale = model.ar_audio_position.x_scale
+        self.register_buffer("pe", model.ar_audio_position.pe[0].detach().float().clone(), persistent=False)
+        self.layers = model.h.layers
+        self.ar_predict_layer = model.ar_predict_layer
+        self.num_heads = model.num_head
+
+    def forward(self, token, position, k_cache, v_cache):
+        x = self.ar_audio_embedding(token) * self.x_scale + self.alpha * self.pe.index_select(0, position).unsqueeze(0)
+        k_out, v_out = [], []
+        for i, layer in enumerate(self.layers):
+            k, v = _kv_proj(layer, x)
+            k = torch.cat([k_cache[i], k], dim=1)
+            v = torch.cat([v_cache[i], v], dim=1)
+            k_out.append(k)
+            v_out.append(v)
+            x = _layer_forward(layer, x, k, v, self.num_heads)
+        logits = self.ar_predict_layer(x[:, -1])
+        return logits, torch.stack(k_out, dim=0), torch.stack(v_out, dim=0)
+
+
+class VitsDecoder(nn.Module):
+    """SynthesizerTrn.decode for a single reference spectrogram, built on module.models_onnx."""
+
+    def __init__(self, vits_onnx, is_v2pro: bool):
+        super().__init__()
+        self.vits = vits_onnx
+        self.is_v2pro = is_v2pro
+
+    def forward(self, codes, text, refer, noise_scale, sv_emb=None):
+        return self.vits(codes, text, refer, noise_scale=noise_scale, sv_emb=sv_emb if self.is_v2pro else None)
+
+
+class OnnxBackend:
+    """
+    ONNX Runtime sessions for the T2S model and the VITS decoder, exported from the loaded PyTorch models.
+
+    Graphs are cached under onnx_dir, keyed by the weights file (path, size, mtime), so a restart or a
+    switch back to a known checkpoint only loads them.
+
+    Args:
+        onnx_dir (str): directory of the exported graphs.
+        intra_op_threads (int): ORT intra-op threads, 0 uses torch.get_num_threads() (e.g. TTS_WORKER_THREADS).
+        inter_op_threads (int): ORT inter-op threads, <= 1 runs the graph nodes sequentially.
+    """
+
+    def __init__(self, onnx_dir: str, intra_op_threads: int = 0, inter_op_threads: int = 1):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("backend 'onnxruntime' requires the onnxruntime package (pip install onnxruntime)") from e
+        self.ort = onnxruntime
+        self.onnx_dir = onnx_dir
+        self.intra_op_threads = int(intra_op_threads) or torch.get_num_threads()
+        self.inter_op_threads = max(1, int(inter_op_threads))
+        os.makedirs(onnx_dir, exist_ok=True)
+
+        self.prefill = None
+        self.decode = None
+        self.vits = None
+        self.vits_inputs: List[str] = []
+        self.eos: int = None
+        self.stats = {"t2s_steps": 0, "t2s_seconds": 0.0, "vits_calls": 0, "vits_seconds": 0.0}
+
+    def _session(self, path: str):
+        options = self.ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = (
+            self.ort.ExecutionMode.ORT_PARALLEL if self.inter_op_threads > 1 else self.ort.ExecutionMode.ORT_SEQUENTIAL
+        )
+        options.graph_optimization_level = self.ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return self.ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    @torch.no_grad()
+    def load_t2s(self, model, weights_path: str):
+        """Exports (if not cached) and loads the T2S graphs of a Text2SemanticDecoder."""
+        folder = os.path.join(self.onnx_dir, _weights_tag(weights_path))
+        prefill_path = os.path.join(folder, "t2s_prefill.onnx")
+        decode_path = os.path.join(folder, "t2s_decode.onnx")
+        if not (os.path.exists(prefill_path) and os.path.exists(decode_path)):
+            os.makedirs(folder, exist_ok=True)
+            t0 = time.perf_counter()
+            self.export_t2s(model, prefill_path, decode_path)
+            print(f"Exported T2S ONNX graphs to {folder} ({time.perf_counter() - t0:.1f}s)")
+        self.prefill = self._session(prefill_path)
+        self.decode = self._session(decode_path)
+        self.eos = model.EOS
+        print(f"Loaded T2S ONNX graphs from {folder}")
+
+    @staticmethod
+    @torch.no_grad()
+    def export_t2s(model, prefill_path: str, decode_path: str):
+        # model 需在 CPU 上且为 float32 (见 TTS.init_onnx_backend)
+        phones = torch.randint(1, model.phoneme_vocab_size, (1, 24), dtype=torch.long)
+        bert = torch.randn(1, 1024, 24)
+        prompt = torch.randint(0, model.EOS, (1, 32), dtype=torch.long)
+        prefill = T2SPrefill(model).eval()
+        torch.onnx.export(
+            prefill,
+            (phones, bert, prompt),
+            prefill_path,
+            input_names=["phones", "bert", "prompt"],
+            output_names=["logits", "k_cache", "v_cache"],
+            dynamic_axes={
+                "phones": {1: "text_len"},
+                "bert": {2: "text_len"},
+                "prompt": {1: "prompt_len"},
+                "k_cache": {2: "kv_len"},
+                "v_cache": {2: "kv_len"},
+            },
+            opset_version=OPSET_VERSION,
+        )
+        _, k_cache, v_cache = prefill(phones, bert, prompt)
+
+        step = T2SDecodeStep(model).eval()
+        torch.onnx.export(
+            step,
+            (torch.zeros(1, 1, dtype=torch.long), torch.tensor([prompt.shape[1]], dtype=torch.long), k_cache, v_cache),
+            decode_path,
+            input_names=["token", "position", "k_cache", "v_cache"],
+            output_names=["logits", "k_cache_out", "v_cache_out"],
+            dynamic_axes={
+                "k_cache": {2: "kv_len"},
+                "v_cache": {2: "kv_len"},
+                "k_cache_out": {2: "kv_len_out"},
+                "v_cache_out": {2: "kv_len_out"},
+            },
+            opset_version=OPSET_VERSION,
+        )
+
+    @torch.no_grad()
+    def load_vits(self, vits_model, hps: dict, weights_path: str, version: str) -> bool:
+        """Exports (if not cached) and loads the VITS decoder graph; False if this model can not be exported."""
+        self.vits = None
+        folder = os.path.join(self.onnx_dir, _weights_tag(weights_path, version))
+        path = os.path.join(folder, "vits.onnx")
+        if not os.path.exists(path):
+            os.makedirs(folder, exist_ok=True)
+            t0 = time.perf_counter()
+            if not self.export_vits(vits_model, hps, path, version):
+                return False
+            print(f"Exported VITS ONNX graph to {folder} ({time.perf_counter() - t0:.1f}s)")
+        self.vits = self._session(path)
+        self.vits_inputs = [i.name for i in self.vits.get_inputs()]
+        print(f"Loaded VITS ONNX graph from {folder}")
+        return True
+
+    @staticmethod
+    @torch.no_grad()
+    def export_vits(vits_model, hps: dict, path: str, version: str) -> bool:
+        from module.models_onnx import SynthesizerTrn as SynthesizerTrnOnnx
+
+        kwargs = dict(hps["model"])
+        kwargs["version"] = version
+        vits_onnx = SynthesizerTrnOnnx(
+            hps["data"]["filter_length"] // 2 + 1,
+            hps["train"]["segment_size"] // hps["data"]["hop_length"],
+            n_speakers=hps["data"]["n_speakers"],
+            **kwargs,
+        )
+        # enc_q 等训练用模块在 onnx 版里没有 (unexpected), 推理用到的权重必须全部对上
+        missing = vits_onnx.load_state_dict(vits_model.state_dict(), strict=False).missing_keys
+        if missing:
+            print(f"Warning: VITS ONNX export skipped, missing weights: {missing[:5]}")
+            return False
+        vits_onnx = vits_onnx.float().cpu().eval()
+        is_v2pro = vits_onnx.is_v2pro
+        decoder = VitsDecoder(vits_onnx, is_v2pro).eval()
+
+        codes = torch.randint(0, 1024, (1, 1, 40), dtype=torch.long)
+        text = torch.randint(1, 100, (1, 30), dtype=torch.long)
+        refer = torch.randn(1, hps["data"]["filter_length"] // 2 + 1, 120)
+        noise_scale = torch.tensor([0.5])
+        args = (codes, text, refer, noise_scale)
+        input_names = ["codes", "text", "refer", "noise_scale"]
+        dynamic_axes = {"codes": {2: "code_len"}, "text": {1: "text_len"}, "refer": {2: "refer_len"}, "audio": {2: "audio_len"}}
+        if is_v2pro:
+            args = args + (torch.randn(1, 20480),)
+            input_names.append("sv_emb")
+        torch.onnx.export(
+            decoder,
+            args,
+            path,
+            input_names=input_names,
+            output_names=["audio"],
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET_VERSION,
+        )
+        return True
+
+    @property
+    def has_vits(self) -> bool:
+        return self.vits is not None
+
+    def _decode_one(
+        self,
+        phones: torch.Tensor,
+        bert: torch.Tensor,
+        prompt: torch.Tensor,
+        top_k,
+        top_p,
+        temperature,
+        repetition_penalty,
+        early_stop_num: int,
+        generator=None,
+        cancel_event=None,
+    ) -> Tuple[torch.Tensor, int]:
+        ortvalue = self.ort.OrtValue.ortvalue_from_numpy
+        t0 = time.perf_counter()
+        logits, k_cache, v_cache = self.prefill.run_with_ort_values(
+            ["logits", "k_cache", "v_cache"],
+            {
+                "phones": ortvalue(phones.unsqueeze(0).cpu().numpy().astype(np.int64)),
+                "bert": ortvalue(bert.unsqueeze(0).float().cpu().numpy()),
+                "prompt": ortvalue(prompt.unsqueeze(0).cpu().numpy().astype(np.int64)),
+            },
+        )
+        y = prompt.unsqueeze(0).cpu().long()
+        prefix_len = y.shape[1]
+        idx = 0
+        # 与 infer_panel_naive 相同的停止规则
+        for idx in range(1500):
+            logits = torch.from_numpy(logits.numpy())
+            if idx < 11:  ###至少预测出10个token不然不给停止（0.4s）
+                logits = logits[:, :-1]
+            samples = sample(
+                logits,
+                y,
+                generator=generator,
+                top_k=top_k,
+                top_p=top_p,
+                repetition_penalty=repetition_penalty,
+                temperature=temperature,
+            )[0]
+            y = torch.concat([y, samples.long()], dim=1)
+
+            stop = early_stop_num != -1 and (y.shape[1] - prefix_len) > early_stop_num
+            if torch.argmax(logits, dim=-1)[0] == self.eos or samples[0, 0] == self.eos:
+                stop = True
+            if cancel_event is not None and cancel_event.is_set():
+                print("T2S decoding cancelled")
+                stop = True
+            if stop:
+                break
+
+            logits, k_cache, v_cache = self.decode.run_with_ort_values(
+                ["logits", "k_cache_out", "v_cache_out"],
+                {
+                    "token": ortvalue(y[:, -1:].numpy()),
+                    "position": ortvalue(np.array([y.shape[1] - 1], dtype=np.int64)),
+                    "k_cache": k_cache,
+                    "v_cache": v_cache,
+                },
+            )
+        self.stats["t2s_steps"] += idx + 1
+        self.stats["t2s_seconds"] += time.perf_counter() - t0
+        print(f"T2S Decoding EOS (onnxruntime) [{prefix_len} -> {y.shape[1]}]")
+        return y[0, :-1], idx
+
+    def infer_panel(
+        self,
+        x: List[torch.LongTensor],
+        x_lens: torch.LongTensor,
+        prompts: torch.LongTensor,
+        bert_feature: List[torch.Tensor],
+        top_k: int = 5,
+        top_p: float = 1,
+        early_stop_num: int = -1,
+        temperature: float = 1.0,
+        repetition_penalty: float = 1.35,
+        **kwargs,
+    ):
+        """Same inputs/outputs as Text2SemanticDecoder.infer_panel_naive_batched (items are decoded one by one)."""
+        sampling_params = kwargs.get("sampling_params", None)
+        generators = kwargs.get("generators", None)
+        y_list, idx_list = [], []
+        for i in range(len(x)):
+            if sampling_params is not None:
+                top_k, top_p, temperature, repetition_penalty = (
+                    sampling_params[key][i].item() for key in ("top_k", "top_p", "temperature", "repetition_penalty")
+                )
+                top_k = top_k if top_k > 0 else None
+            y, idx = self._decode_one(
+                x[i],
+                bert_feature[i],
+                prompts[i],
+                top_k,
+                top_p,
+                temperature,
+                repetition_penalty,
+                early_stop_num,
+                generator=generators[i] if generators is not None else None,
+                cancel_event=kwargs.get("cancel_event", None),
+            )
+            y_list.append(y.to(prompts.device))
+            idx_list.append(idx)
+        return y_list, idx_list
+
+    def vits_decode(
+        self,
+        codes: torch.Tensor,
+        text: torch.Tensor,
+        refer: torch.Tensor,
+        sv_emb: Optional[torch.Tensor] = None,
+        noise_scale: float = 0.5,
+    ) -> torch.Tensor:
+        """Same result as SynthesizerTrn.decode(codes, text, [refer], noise_scale, sv_emb=[sv_emb]) at speed 1."""
+        t0 = time.perf_counter()
+        feeds = {
+            "codes": codes.cpu().numpy().astype(np.int64),
+            "text": text.cpu().numpy().astype(np.int64),
+            "refer": refer.float().cpu().numpy(),
+            "noise_scale": np.array([noise_scale], dtype=np.float32),
+        }
+        if "sv_emb" in self.vits_inputs:
+            feeds["sv_emb"] = sv_emb.float().cpu().numpy()
+        audio = self.vits.run(["audio"], feeds)[0]
+        self.stats["vits_calls"] += 1
+        self.stats["vits_seconds"] += time.perf_counter() - t0
+        return torch.from_numpy(audio)
+
+    def get_stats(self) -> dict:
+        return {
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "vits": self.has_vits,
+            "t2s_steps": self.stats["t2s_steps"],
+            "t2s_ms_per_step": round(self.stats["t2s_seconds"] / self.stats["t2s_steps"] * 1000, 3)
+            if self.stats["t2s_steps"]
+            else None,
+            "vits_calls": self.stats["vits_calls"],
+            "vits_seconds": round(self.stats["vits_seconds"], 3),
+        }
@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import torch
+
+
+def entry_nbytes(value: Any) -> int:
+    """
+    Rough size in bytes of a cache entry (tensors, numpy arrays and nested containers).
+    """
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(entry_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        if len(value) > 0 and isinstance(value[0], int):
+            return 8 * len(value)
+        return sum(entry_nbytes(v) for v in value)
+    return 0
+
+
+class LRUCache:
+    """
+    Thread-safe LRU bounded by entry count and by the (approximate) memory of its entries.
+
+    Args:
+        max_entries (int): max number of entries kept.
+        max_mb (float): memory budget of all entries in MB, 0 disables the budget.
+    """
+
+    def __init__(self, max_entries: int = 8, max_mb: float = 512):
+        self.max_entries: int = max(1, int(max_entries))
+        self.max_bytes: int = int(max_mb * 1024 * 1024)
+        self._entries: "OrderedDict[Any, Any]" = OrderedDict()
+        self._sizes: dict = {}
+        self._lock = threading.Lock()
+        self.total_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Any, entry: Any):
+        size = entry_nbytes(entry)
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            self._entries[key] = entry
+            self._sizes[key] = size
+            self.total_bytes += size
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or (self.max_bytes > 0 and self.total_bytes > self.max_bytes)
+            ):
+                old_key, _ = self._entries.popitem(last=False)
+                self.total_bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_mb": round(self.total_bytes / 1024 / 1024, 3),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 3),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class PromptLRUCache(LRUCache):
+    """
+    Bounded LRU of reference-voice prompts (prompt_semantic, refer_spec, sv_emb, 16 kHz audio,
+    prompt phones and BERT features), so switching between voices is a dictionary lookup.
+    """
@@ -0,0 +1,252 @@
+"""
+首包延迟规划切分 (cut6)
+- 합성 시간 = fixed + per_unit * units, 음성 길이 = audio_per_unit * units 로 보고 분할 경계를 고른다
+- units 는 G2P 전에 셀 수 있는 음소 근사치 (한글 음절 = 초성 + 중성 (+ 종성) 자모 수)
+- 첫 조각은 짧게 (가까운 절 경계), 이후 조각은 앞 조각 재생이 끝나기 전에 합성이 끝나는 한 최대한 크게
+- 계수는 TTS.run 의 실측 (조각별 units, 합성 시간, 음성 길이) 으로 계속 보정된다
+"""
+import re
+import threading
+from typing import List, Optional, Tuple
+
+# 경계 강도: 문장 끝 > 절 구두점 > 연결 어미 + 공백 > 공백
+_SENTENCE_END = set(".?!…。？！~")
+_CLAUSE_PUNCT = set(",;:，、；：—")
+_CONNECTIVE = re.compile(
+    r"(?:고|며|면|지만|는데|은데|니까|므로|면서|어서|아서|해서|여서|거나|든지|도록|려고|다가|듯이|지요|죠|요)$"
+)
+
+
+def count_units(text: str) -> int:
+    """G2P 없이 세는 음소 수 근사치"""
+    units = 0
+    for ch in text:
+        code = ord(ch)
+        if 0xAC00 <= code <= 0xD7A3:
+            # 한글 음절: 종성이 있으면 자모 3개
+            units += 3 if (code - 0xAC00) % 28 else 2
+        elif 0x3131 <= code <= 0x318E:
+            units += 1
+        elif ch.isdigit():
+            # 숫자는 한국어로 읽으면 한두 음절
+            units += 3
+        elif ch.isalpha():
+            units += 1
+    return units
+
+
+class SegmentCostModel:
+    """
+    Online linear model of synthesis time and audio length per unit, thread-safe.
+
+    synth_seconds(n) = fixed + per_unit * n is fitted by exponentially weighted least squares over the
+    observed fragments; audio_seconds(n) = audio_per_unit * n by an exponentially weighted ratio.
+
+    Args:
+        fixed (float): initial per-segment overhead in seconds.
+        per_unit (float): initial synthesis seconds per unit.
+        audio_per_unit (float): initial audio seconds per unit.
+        decay (float): weight kept by past observations at every new one.
+    """
+
+    def __init__(self, fixed: float = 0.15, per_unit: float = 0.012, audio_per_unit: float = 0.065,
+                 decay: float = 0.95):
+        self.fixed = fixed
+        self.per_unit = per_unit
+        self.audio_per_unit = audio_per_unit
+        self.decay = decay
+        self.observations = 0
+        self._lock = threading.Lock()
+        # 가중 합: w, x, y, xx, xy, 음성 길이, units
+        self._sw = self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._audio = self._audio_units = 0.0
+
+    def synth_seconds(self, units: int) -> float:
+        return self.fixed + self.per_unit * units
+
+    def audio_seconds(self, units: int) -> float:
+        return self.audio_per_unit * units
+
+    def units_within(self, seconds: float) -> int:
+        """seconds 안에 합성할 수 있는 최대 units"""
+        return max(0, int((seconds - self.fixed) / self.per_unit))
+
+    def observe(self, units: int, synth_seconds: float, audio_seconds: Optional[float] = None):
+        if units <= 0 or synth_seconds <= 0:
+            return
+        d = self.decay
+        with self._lock:
+            self.observations += 1
+            self._sw = self._sw * d + 1.0
+            self._sx = self._sx * d + units
+            self._sy = self._sy * d + synth_seconds
+            self._sxx = self._sxx * d + units * units
+            self._sxy = self._sxy * d + units * synth_seconds
+            if audio_seconds is not None and audio_seconds > 0:
+                self._audio = self._audio * d + audio_seconds
+                self._audio_units = self._audio_units * d + units
+                self.audio_per_unit = self._audio / self._audio_units
+
+            var = self._sw * self._sxx - self._sx * self._sx
+            if self.observations >= 4 and var > 1e-9 * self._sw * self._sxx:
+                slope = (self._sw * self._sxy - self._sx * self._sy) / var
+                intercept = (self._sy - slope * self._sx) / self._sw
+                if slope > 0 and intercept >= 0:
+                    self.per_unit, self.fixed = slope, intercept
+                    return
+            # 길이 분산이 작으면 고정 비용은 두고 기울기만 맞춘다
+            mean_x = self._sx / self._sw
+            mean_y = self._sy / self._sw
+            self.per_unit = max(1e-5, (mean_y - self.fixed) / mean_x)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "observations": self.observations,
+                "fixed": round(self.fixed, 4),
+                "per_unit": round(self.per_unit, 6),
+                "audio_per_unit": round(self.audio_per_unit, 6),
+                "rtf": round(self.per_unit / self.audio_per_unit, 4) if self.audio_per_unit > 0 else None,
+            }
+
+
+# 프로세스 전체에서 공유하는 모델 (TTS.run 이 보정)
+cost_model = SegmentCostModel()
+
+
+def _pieces(text: str) -> List[Tuple[str, int, int]]:
+    """text 를 경계마다 자른 (조각, units, 경계 강도) 목록. 마지막 조각의 강도는 3"""
+    pieces = []
+    start = 0
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        strength = -1
+        end = i + 1
+        if ch in _SENTENCE_END or ch in _CLAUSE_PUNCT:
+            # 연속 구두점/닫는 따옴표는 함께 붙인다
+            while end < n and (text[end] in _SENTENCE_END or text[end] in _CLAUSE_PUNCT or text[end] in "\"')]”’"):
+                end += 1
+            # 소수점 (3.5) 은 경계가 아니다
+            if ch == "." and 0 < i and end < n and text[i - 1].isdigit() and text[end].isdigit():
+                strength = -1
+            else:
+                strength = 3 if any(c in _SENTENCE_END for c in text[i:end]) else 2
+        elif ch.isspace():
+            word = text[start:i].split()[-1] if text[start:i].split() else ""
+            strength = 1 if _CONNECTIVE.search(word) else 0
+        if strength >= 0:
+            chunk = text[start:end]
+            if chunk.strip():
+                pieces.append((chunk, count_units(chunk), strength))
+                start = end
+        i = end
+    if text[start:].strip():
+        pieces.append((text[start:], count_units(text[start:]), 3))
+    elif pieces:
+        chunk, units, _ = pieces[-1]
+        pieces[-1] = (chunk, units, 3)
+    return pieces
+
+
+def _choose(cum: List[int], strengths: List[int], lo: int, hi: int, start: int, prefer_short: bool) -> int:
+    """start 이후 경계 중 누적 units 가 [lo, hi] 인 가장 강한 경계의 인덱스. 없으면 lo 를 넘는 첫 경계"""
+    best = None
+    for j in range(start, len(cum)):
+        units = cum[j] - (cum[start - 1] if start > 0 else 0)
+        if units < lo:
+            continue
+        if units > hi:
+            break
+        key = (strengths[j], -units if prefer_short else units)
+        if best is None or key > best[0]:
+            best = (key, j)
+    if best is not None:
+        return best[1]
+    for j in range(start, len(cum)):
+        if cum[j] - (cum[start - 1] if start > 0 else 0) >= lo:
+            return j
+    return len(cum) - 1
+
+
+def plan_segments(
+    text: str,
+    model: Optional[SegmentCostModel] = None,
+    first_min_units: int = 12,
+    first_max_units: int = 45,
+    min_units: int = 30,
+    max_units: int = 240,
+    min_tail_units: int = 15,
+) -> List[str]:
+    """
+    Splits text so the first fragment is short and ends on a natural (clause) boundary, and each later
+    fragment is as large as possible while it can still be synthesized before the audio already produced
+    has finished playing (according to the cost model), within [min_units, max_units].
+    """
+    model = model or cost_model
+    pieces = _pieces(text.strip())
+    if not pieces:
+        return []
+    cum = []
+    total = 0
+    for _, units, _ in pieces:
+        total += units
+        cum.append(total)
+    strengths = [s for _, _, s in pieces]
+
+    segments: List[Tuple[int, int]] = []
+    start = 0
+    synth_done = 0.0
+    play_end = 0.0
+    while start < len(pieces):
+        done_units = cum[start - 1] if start > 0 else 0
+        remaining = total - done_units
+        if not segments:
+            end = _choose(cum, strengths, first_min_units, first_max_units, start, prefer_short=True)
+        else:
+            # 앞 조각들이 재생되는 동안 합성할 수 있는 양
+            budget = model.units_within(play_end - synth_done)
+            hi = min(max_units, max(min_units, budget))
+            end = _choose(cum, strengths, min(min_units, remaining), hi, start, prefer_short=False)
+        units = cum[end] - done_units
+        # 남은 꼬리가 너무 짧으면 이번 조각에 합친다
+        if total - cum[end] < min_tail_units:
+            end = len(pieces) - 1
+            units = total - done_units
+        synth_done += model.synth_seconds(units)
+        play_end = max(play_end, synth_done) + model.audio_seconds(units)
+        segments.append((start, end))
+        start = end + 1
+
+    return ["".join(pieces[k][0] for k in range(a, b + 1)).strip() for a, b in segments]
+
+
+def simulate(segments: List[str], model: Optional[SegmentCostModel] = None) -> dict:
+    """
+    Time to first audio, stall (gap) time and total synthesis time of a segmentation under the cost model,
+    with segments synthesized one after another.
+    """
+    model = model or cost_model
+    synth_done = 0.0
+    play_end = 0.0
+    stall = 0.0
+    ttfa = None
+    audio = 0.0
+    for segment in segments:
+        units = count_units(segment)
+        synth_done += model.synth_seconds(units)
+        if ttfa is None:
+            ttfa = synth_done
+        elif synth_done > play_end:
+            stall += synth_done - play_end
+        play_end = max(play_end, synth_done) + model.audio_seconds(units)
+        audio += model.audio_seconds(units)
+    return {
+        "segments": len(segments),
+        "ttfa": ttfa or 0.0,
+        "stall": stall,
+        "synth": synth_done,
+        "audio": audio,
+        "rtf": synth_done / audio if audio > 0 else 0.0,
+    }
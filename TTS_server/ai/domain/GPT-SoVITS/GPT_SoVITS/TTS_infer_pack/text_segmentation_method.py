@@ -276,6 +276,17 @@ def cut15(
     # 여러 조각은 개행으로 합쳐 반환 (브랜치에 따라 '\n' 또는 splits 기준 재분할됨)
     return "\n".join(chunks)
 
+# 按首包延迟规划切分: 첫 조각은 가까운 절 경계에서 짧게, 이후는 재생이 끊기지 않는 한 크게 (segment_planner.py)
+@register_method("cut6")
+def cut6(inp):
+    from TTS_infer_pack.segment_planner import plan_segments
+
+    inp = inp.strip("\n")
+    opts = plan_segments(inp)
+    opts = [item for item in opts if not set(item).issubset(punctuation)]
+    return "\n".join(opts)
+
+
 if __name__ == "__main__":
     method = get_method("cut5")
     print(method("你好，我是小明。你好，我是小红。你好，我是小刚。你好，我是小张。"))
@@ -0,0 +1,276 @@
+"""
+模型热切换
+- WeightRegistry: 在后台线程把 GPT / SoVITS 检查点构建成可以直接换上的模型, 按内存预算常驻多个命名音色
+- ModelGate: 合成请求持有引用计数, 换模型时挡住新请求, 等进行中的请求用旧模型跑完再原子地换上;
+  max_active=1 时同一时间只放行一个合成 (TTS 实例的 prompt_cache / stop_flag 是共享状态)
+"""
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+import torch
+
+
+def load_checkpoint(path: str, map_location="cpu"):
+    """
+    torch.load, memory-mapping zip-format checkpoints (torch.save >= 1.6) so the tensors are paged in from
+    the file instead of being read into a heap copy first; legacy checkpoints are loaded normally.
+    """
+    try:
+        return torch.load(path, map_location=map_location, weights_only=False, mmap=True)
+    except RuntimeError:
+        return torch.load(path, map_location=map_location, weights_only=False)
+
+
+class ModelGate:
+    """
+    Reference-counted gate between synthesis runs and model swaps.
+
+    Every run holds a reference for its whole duration (a streaming run until its generator is exhausted
+    or closed). swap() stops new runs from starting, waits until the in-flight ones have finished on the
+    current models, applies the swap and reopens the gate, so a run never sees a half-swapped pipeline and
+    new runs only wait for the tail of the in-flight ones, not for checkpoint loading.
+
+    Args:
+        max_active (int): runs allowed to hold the models at the same time; further hold() calls wait for
+            a slot in arrival order of the condition. 0 means unlimited.
+    """
+
+    def __init__(self, max_active: int = 0):
+        self._cond = threading.Condition()
+        self.max_active: int = max(0, int(max_active))
+        self._active: int = 0
+        self._waiting: int = 0
+        self._swapping: bool = False
+        self.swaps: int = 0
+        self.timeouts: int = 0
+        self.last_drain_seconds: float = 0.0
+
+    def hold(self):
+        with self._cond:
+            self._waiting += 1
+            try:
+                while self._swapping or (self.max_active and self._active >= self.max_active):
+                    self._cond.wait()
+            finally:
+                self._waiting -= 1
+            self._active += 1
+        return _GateRef(self)
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            # swap() 等 active 降到 0, 排队的 hold() 等空位
+            self._cond.notify_all()
+
+    def swap(self, apply: Callable[[], None], timeout: Optional[float] = None):
+        """Runs apply() once no run holds the models; raises TimeoutError if they do not drain in time"""
+        with self._cond:
+            while self._swapping:
+                self._cond.wait()
+            self._swapping = True
+            t0 = time.perf_counter()
+            try:
+                if not self._cond.wait_for(lambda: self._active == 0, timeout):
+                    self.timeouts += 1
+                    raise TimeoutError(f"{self._active} runs still in progress after {timeout}s, swap aborted")
+                self.last_drain_seconds = time.perf_counter() - t0
+                apply()
+                self.swaps += 1
+            finally:
+                self._swapping = False
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "active_runs": self._active,
+                "waiting_runs": self._waiting,
+                "max_active": self.max_active,
+                "swapping": self._swapping,
+                "swaps": self.swaps,
+                "timeouts": self.timeouts,
+                "last_drain_seconds": round(self.last_drain_seconds, 4),
+            }
+
+
+class _GateRef:
+    def __init__(self, gate: ModelGate):
+        self.gate = gate
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.gate._release()
+        return False
+
+
+def hold_models(method):
+    """TTS 方法装饰器: 执行期间持有 self.model_gate 的引用 (生成器方法一直持有到迭代结束或被关闭)"""
+    if inspect.isgeneratorfunction(method):
+
+        @functools.wraps(method)
+        def generator_wrapper(self, *args, **kwargs):
+            with self.model_gate.hold():
+                yield from method(self, *args, **kwargs)
+
+        return generator_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.model_gate.hold():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class WeightRegistry:
+    """
+    Models built from checkpoints off to the side, ready to be swapped in, kept resident under a budget.
+
+    Entries are keyed by (kind, weights_path) with kind "t2s" or "vits"; builders[kind](weights_path)
+    builds one on a single background loader thread and returns a dict with at least "model". The entries
+    in use (see mark_active) are never evicted; the others are dropped least recently used first once
+    their total size exceeds max_mb. Named voices map a name to a pair of weight paths.
+
+    Args:
+        builders (dict): kind -> callable(weights_path) -> built entry.
+        size_fn (callable): (kind, built entry) -> size in bytes.
+        max_mb (float): memory budget in MB of the resident entries that are not in use; 0 keeps none.
+    """
+
+    def __init__(self, builders: Dict[str, Callable[[str], dict]], size_fn: Callable[[str, dict], int],
+                 max_mb: float = 0):
+        self._builders = builders
+        self._size_fn = size_fn
+        self.max_bytes: int = int(max_mb * 1024 * 1024)
+        self._entries: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        self._sizes: Dict[Tuple[str, str], int] = {}
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._active: Dict[str, Tuple[str, str]] = {}
+        self.voices: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-weight-loader")
+        self.loads: int = 0
+        self.hits: int = 0
+        self.evictions: int = 0
+        self.failures: int = 0
+        self.last_load_seconds: float = 0.0
+
+    def preload(self, kind: str, weights_path: str) -> Future:
+        """Starts building (kind, weights_path) on the loader thread unless it is resident or already loading"""
+        key = (kind, weights_path)
+        with self._lock:
+            if key in self._entries:
+                future = Future()
+                future.set_result(self._entries[key])
+                return future
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._load, key)
+                self._pending[key] = future
+            return future
+
+    def _load(self, key: Tuple[str, str]) -> dict:
+        kind, weights_path = key
+        t0 = time.perf_counter()
+        try:
+            built = self._builders[kind](weights_path)
+            size = self._size_fn(kind, built)
+        except Exception:
+            with self._lock:
+                self._pending.pop(key, None)
+                self.failures += 1
+            raise
+        with self._lock:
+            self._pending.pop(key, None)
+            self._store(key, built, size)
+            self.loads += 1
+            self.last_load_seconds = time.perf_counter() - t0
+        return built
+
+    def get(self, kind: str, weights_path: str, timeout: Optional[float] = None) -> dict:
+        """The built entry, waiting for the loader thread if it is not resident yet"""
+        key = (kind, weights_path)
+        with self._lock:
+            built = self._entries.get(key)
+            if built is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return built
+        return self.preload(kind, weights_path).result(timeout)
+
+    def put(self, kind: str, weights_path: str, built: dict, active: bool = True):
+        """Records an entry built outside the loader thread (startup, reloads)"""
+        size = self._size_fn(kind, built)
+        with self._lock:
+            if active:
+                self._active[kind] = (kind, weights_path)
+            self._store((kind, weights_path), built, size)
+
+    def mark_active(self, kind: str, weights_path: str):
+        with self._lock:
+            self._active[kind] = (kind, weights_path)
+            self._evict()
+
+    def register_voice(self, name: str, t2s_path: str, vits_path: str, preload: bool = True):
+        with self._lock:
+            self.voices[name] = {"t2s": t2s_path, "vits": vits_path}
+        if preload:
+            self.preload("t2s", t2s_path)
+            self.preload("vits", vits_path)
+
+    def voice(self, name: str) -> Dict[str, str]:
+        with self._lock:
+            if name not in self.voices:
+                raise KeyError(f"voice {name} is not registered")
+            return dict(self.voices[name])
+
+    def clear(self):
+        """Drops every resident entry (after a device / precision change the built models are stale)"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+
+    def _store(self, key: Tuple[str, str], built: dict, size: int):
+        # 调用方需持有 self._lock
+        self._entries.pop(key, None)
+        self._entries[key] = built
+        self._sizes[key] = size
+        self._evict()
+
+    def _evict(self):
+        # 调用方需持有 self._lock
+        active = set(self._active.values())
+        idle = [key for key in self._entries if key not in active]
+        idle_bytes = sum(self._sizes[key] for key in idle)
+        for key in idle:
+            if idle_bytes <= self.max_bytes:
+                break
+            idle_bytes -= self._sizes.pop(key)
+            del self._entries[key]
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            active = set(self._active.values())
+            return {
+                "resident": [
+                    {"kind": kind, "path": path, "mb": round(self._sizes[(kind, path)] / 2**20, 1),
+                     "active": (kind, path) in active}
+                    for kind, path in self._entries
+                ],
+                "loading": [{"kind": kind, "path": path} for kind, path in self._pending],
+                "voices": dict(self.voices),
+                "max_mb": round(self.max_bytes / 2**20, 1),
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "failures": self.failures,
+                "last_load_seconds": round(self.last_load_seconds, 3),
+            }
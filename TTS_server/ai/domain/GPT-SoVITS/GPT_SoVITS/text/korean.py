@@ -1,6 +1,7 @@
 # reference: https://github.com/ORI-Muchim/MB-iSTFT-VITS-Korean/blob/main/text/korean.py
 
 import re
+from functools import lru_cache
 from jamo import h2j, j2hcj
 import ko_pron
 from g2pk2 import G2p
@@ -127,6 +128,18 @@ _latin_to_hangul = [
     ]
 ]
 
+# 上面两张表的替换结果互不重叠, 逐条 re.sub 等价于一次 str.translate
+_hangul_divided_table = str.maketrans({x[0].pattern: x[1] for x in _hangul_divided})
+_latin_to_hangul_table = str.maketrans(
+    {**{x[0].pattern: x[1] for x in _latin_to_hangul}, **{x[0].pattern.upper(): x[1] for x in _latin_to_hangul}}
+)
+_has_latin = re.compile(r"[A-Za-z]")
+_has_digit = re.compile(r"\d")
+_g2pk2_error = re.compile(r"(ㅇㅡㄹ|ㄹㅡㄹ) ㄹ")
+
+# g2p 结果缓存大小 (按整句/分句文本缓存)
+_G2P_CACHE_SIZE = int(os.environ.get("KO_G2P_CACHE_SIZE", 4096))
+
 # List of (ipa, lazy ipa) pairs:
 _ipa_to_lazy_ipa = [
     (re.compile("%s" % x[0], re.IGNORECASE), x[1])
@@ -153,31 +166,19 @@ _ipa_to_lazy_ipa = [
 
 
 def fix_g2pk2_error(text):
-    new_text = ""
-    i = 0
-    while i < len(text) - 4:
-        if (text[i : i + 3] == "ㅇㅡㄹ" or text[i : i + 3] == "ㄹㅡㄹ") and text[i + 3] == " " and text[i + 4] == "ㄹ":
-            new_text += text[i : i + 3] + " " + "ㄴ"
-            i += 5
-        else:
-            new_text += text[i]
-            i += 1
-
-    new_text += text[i:]
-    return new_text
+    # "을 ㄹ" / "를 ㄹ" -> "을 ㄴ" / "를 ㄴ"
+    return _g2pk2_error.sub(r"\1 ㄴ", text)
 
 
 def latin_to_hangul(text):
-    for regex, replacement in _latin_to_hangul:
-        text = re.sub(regex, replacement, text)
-    return text
+    if not _has_latin.search(text):
+        return text
+    return text.translate(_latin_to_hangul_table)
 
 
 def divide_hangul(text):
     text = j2hcj(h2j(text))
-    for regex, replacement in _hangul_divided:
-        text = re.sub(regex, replacement, text)
-    return text
+    return text.translate(_hangul_divided_table)
 
 
 def hangul_number(num, sino=True):
@@ -261,6 +262,8 @@ def hangul_number(num, sino=True):
 
 def number_to_hangul(text):
     """Reference https://github.com/Kyubyong/g2pK"""
+    if not _has_digit.search(text):
+        return text
     tokens = set(re.findall(r"(\d[\d,]*)([\uac00-\ud71f]+)", text))
     for token in tokens:
         num, classifier = token
@@ -288,11 +291,20 @@ def korean_to_lazy_ipa(text):
 
 _g2p = G2p()
 
+# g2pk2 每次调用都会跑一遍 Mecab 形态分析, 同一字符串的分析结果直接复用
+if hasattr(_g2p, "mecab") and hasattr(_g2p.mecab, "pos"):
+    _g2p.mecab.pos = lru_cache(maxsize=_G2P_CACHE_SIZE)(_g2p.mecab.pos)
+
+
+@lru_cache(maxsize=_G2P_CACHE_SIZE)
+def _g2pk2(text):
+    return _g2p(text)
+
 
 def korean_to_ipa(text):
     text = latin_to_hangul(text)
     text = number_to_hangul(text)
-    text = _g2p(text)
+    text = _g2pk2(text)
     text = fix_g2pk2_error(text)
     text = korean_to_lazy_ipa(text)
     return text.replace("ʧ", "tʃ").replace("ʥ", "dʑ")
@@ -321,15 +333,26 @@ def post_replace_ph(ph):
     return ph
 
 
-def g2p(text):
+@lru_cache(maxsize=_G2P_CACHE_SIZE)
+def _cached_g2p(text):
     text = latin_to_hangul(text)
-    text = _g2p(text)
+    text = _g2pk2(text)
     text = divide_hangul(text)
     text = fix_g2pk2_error(text)
     text = re.sub(r"([\u3131-\u3163])$", r"\1.", text)
     # text = "".join([post_replace_ph(i) for i in text])
-    text = [post_replace_ph(i) for i in text]
-    return text
+    return tuple(post_replace_ph(i) for i in text)
+
+
+def g2p(text):
+    return list(_cached_g2p(text))
+
+
+def g2p_cache_info():
+    return {
+        "g2p": _cached_g2p.cache_info()._asdict(),
+        "g2pk2": _g2pk2.cache_info()._asdict(),
+    }
 
 
 if __name__ == "__main__":
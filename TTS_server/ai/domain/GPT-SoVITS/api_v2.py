@@ -15,8 +15,7 @@ import wave
 from io import BytesIO
 from typing import Generator, Iterable, Optional
 import yaml
-from scipy.signal import resample_poly
-import math
+from concurrent.futures import CancelledError
 from django.http import (
     JsonResponse,
     HttpResponse,
@@ -34,7 +33,8 @@ TTS_MODULE_DIR = os.path.join(ROOT_DIR, "GPT_SoVITS")
 sys.path.append(ROOT_DIR)
 sys.path.append(TTS_MODULE_DIR)
 
-config_path = os.path.join(ROOT_DIR, "GPT_SoVITS", "configs", "tts_infer.yaml")
+# TTS_INFER_CONFIG 로 다른 설정 파일 사용 (예: benchmarks/make_tiny_models.py 가 만든 CPU 벤치마크용 소형 모델)
+config_path = os.getenv("TTS_INFER_CONFIG", os.path.join(ROOT_DIR, "GPT_SoVITS", "configs", "tts_infer.yaml"))
 print(config_path)
 
 #이거 고쳐야할수도
@@ -56,10 +56,18 @@ print(config_path)
 
 
 from tools.i18n.i18n import I18nAuto
-from GPT_SoVITS.TTS_infer_pack.TTS import TTS, TTS_Config
+from GPT_SoVITS.TTS_infer_pack.TTS import CANCELLED_ERROR, TTS, TTS_Config
 from GPT_SoVITS.TTS_infer_pack.text_segmentation_method import (
     get_method_names as get_cut_method_names,
 )
+from GPT_SoVITS.TTS_infer_pack.batch_scheduler import TTSBatchScheduler
+# TTS.py 와 같은 모듈 이름(TTS_infer_pack.metrics)으로 가져와야 같은 집계 인스턴스를 쓴다
+from TTS_infer_pack.metrics import metrics
+from audio_cache import AudioCache, file_identity, make_key, normalize_text
+from worker_pool import TTSWorkerPool
+from session_registry import SessionRegistry, SessionTicket
+from telephony import TELEPHONY_CODECS, TELEPHONY_SR, TelephonyEncoder
+from warmup import TTSWarmup
 
 i18n = I18nAuto()
 CUT_METHOD_NAMES = get_cut_method_names()
@@ -70,7 +78,45 @@ CUT_METHOD_NAMES = get_cut_method_names()
 tts_config = TTS_Config(config_path)
 print("뭔가이상한데")
 print(tts_config)
-tts_pipeline = TTS(tts_config)
+# ----- 워커 프로세스 풀 (TTS_WORKER_PROCESSES > 0 이면 이 프로세스에서는 모델을 올리지 않음) -----
+TTS_WORKER_PROCESSES = int(os.getenv("TTS_WORKER_PROCESSES", "0"))
+if TTS_WORKER_PROCESSES > 0:
+    tts_pipeline = None
+    tts_worker_pool = TTSWorkerPool(
+        config_path,
+        num_workers=TTS_WORKER_PROCESSES,
+        devices=[d for d in os.getenv("TTS_WORKER_DEVICES", "").split(",") if d],
+        num_threads=int(os.getenv("TTS_WORKER_THREADS", "0")),
+        default_timeout=float(os.getenv("TTS_WORKER_DEADLINE_MS", "0")) / 1000,
+    )
+    tts_worker_pool.start()
+else:
+    tts_pipeline = TTS(tts_config)
+    tts_worker_pool = None
+
+# ----- Cross-request dynamic batching (non-streaming 요청만) -----
+TTS_BATCH_ENABLED = os.getenv("TTS_BATCH_ENABLED", "true").lower() == "true"
+tts_scheduler = TTSBatchScheduler(
+    tts_pipeline,
+    max_batch_size=int(os.getenv("TTS_BATCH_MAX_SIZE", "4")),
+    max_wait_ms=float(os.getenv("TTS_BATCH_WAIT_MS", "20")),
+)
+
+# ----- 합성 결과 디스크 캐시 (non-streaming 요청만) -----
+audio_cache = AudioCache(
+    cache_dir=os.getenv("TTS_AUDIO_CACHE_DIR", os.path.join(ROOT_DIR, "audio_cache")),
+    max_mb=float(os.getenv("TTS_AUDIO_CACHE_MAX_MB", "1024")),
+    enabled=os.getenv("TTS_AUDIO_CACHE_ENABLED", "true").lower() == "true",
+)
+# seed=-1(랜덤)인 요청도 캐시할지. 기본은 seed를 고정한 요청만 캐시 (켜면 랜덤 요청도 항상 같은 음성이 나간다)
+TTS_AUDIO_CACHE_RANDOM_SEED = os.getenv("TTS_AUDIO_CACHE_RANDOM_SEED", "false").lower() == "true"
+# pack_wav 처리(게인/리샘플)가 바뀌면 올려서 기존 캐시 무효화
+AUDIO_PACK_VERSION = "wav8k-gain10db-v2"
+# 전화망 출력(wav/pcm16/ulaw/alaw) 게인. 리샘플 필터 탭에 포함된다
+TTS_TELEPHONY_GAIN_DB = float(os.getenv("TTS_TELEPHONY_GAIN_DB", "10"))
+
+# ----- 세션별 진행 중 합성 (같은 세션에 새 requestId 가 오면 이전 합성 취소) -----
+session_registry = SessionRegistry()
 
 
 # =========================
@@ -86,42 +132,15 @@ def pack_raw(io_buffer: BytesIO, data: np.ndarray, rate: int) -> BytesIO:
     io_buffer.write(data.tobytes())
     return io_buffer
 
-def to_float32(x: np.ndarray) -> np.ndarray:
-    if x.dtype == np.int16:
-        x = x.astype(np.float32) / 32768.0
-    elif x.dtype == np.int32:
-        x = x.astype(np.float32) / 2147483648.0
-    else:
-        x = x.astype(np.float32)
-    return np.nan_to_num(x, nan=0.0, posinf=0.0, neginf=0.0)
-
-def resample_to(x: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
-    if orig_sr == target_sr:
-        return x
-    # (N,) 또는 (N, C) 형태를 기대. (C, N)이면 전치 필요
-    if x.ndim == 2 and x.shape[0] < x.shape[1]:
-        pass
-    elif x.ndim == 2:
-        x = x.T
-    g = math.gcd(orig_sr, target_sr)
-    up, down = target_sr // g, orig_sr // g
-    return resample_poly(x, up, down, axis=0)
-
-def amplify_db(data: np.ndarray, gain_db: float = 0.0) -> np.ndarray:
-    factor = 10 ** (gain_db / 20.0)
-    y = to_float32(data) * factor
-    return np.clip(y, -1.0, 1.0).astype(np.float32)
+def pack_telephony(io_buffer: BytesIO, data: np.ndarray, rate: int, codec: str) -> BytesIO:
+    # 게인 + 8k 리샘플 + 인코딩을 한 번에 (pcm16 / ulaw / alaw, 헤더 없음)
+    io_buffer.write(TelephonyEncoder(rate, codec, gain_db=TTS_TELEPHONY_GAIN_DB).encode_all(data))
+    return io_buffer
 
 def pack_wav(io_buffer: BytesIO, data: np.ndarray, rate: int) -> BytesIO:
-    # 1) 볼륨 원하는 만큼 (예: +3 dB)
-    y = amplify_db(data, gain_db=10.0)
-
-    # 2) 32k → 24k 리샘플
-    out_sr = 8000
-    y24 = resample_to(y, orig_sr=rate, target_sr=out_sr)
-
-    # 3) 저장
-    sf.write(io_buffer, y24, out_sr, format="wav")
+    # +10 dB, 8k 리샘플한 PCM16 에 WAV 헤더만 붙인다
+    pcm = TelephonyEncoder(rate, "pcm16", gain_db=TTS_TELEPHONY_GAIN_DB).encode_all(data)
+    io_buffer.write(wave_header_chunk(frame_input=pcm, sample_rate=TELEPHONY_SR))
     return io_buffer
 
 def pack_aac(io_buffer: BytesIO, data: np.ndarray, rate: int) -> BytesIO:
@@ -162,6 +181,8 @@ def pack_audio(io_buffer: BytesIO, data: np.ndarray, rate: int, media_type: str)
         io_buffer = pack_aac(io_buffer, data, rate)
     elif media_type == "wav":
         io_buffer = pack_wav(io_buffer, data, rate)
+    elif media_type in TELEPHONY_CODECS:
+        io_buffer = pack_telephony(io_buffer, data, rate, media_type)
     else:
         io_buffer = pack_raw(io_buffer, data, rate)
     io_buffer.seek(0)
@@ -214,7 +235,7 @@ def check_params(req: dict) -> Optional[JsonResponse]:
             {"message": f"prompt_lang: {prompt_lang} is not supported in version {tts_config.version}"},
             status=400,
         )
-    if media_type not in ["wav", "raw", "ogg", "aac"]:
+    if media_type not in ["wav", "raw", "ogg", "aac", *TELEPHONY_CODECS]:
         return JsonResponse({"message": f"media_type: {media_type} is not supported"}, status=400)
     elif media_type == "ogg" and not streaming_mode:
         return JsonResponse({"message": "ogg format is not supported in non-streaming mode"}, status=400)
@@ -225,34 +246,284 @@ def check_params(req: dict) -> Optional[JsonResponse]:
     return None
 
 
-def tts_streaming_iter(tts_generator: Generator, media_type: str) -> Iterable[bytes]:
+def audio_cache_key(req: dict) -> Optional[str]:
+    """요청에서 캐시 키 생성. 캐시하지 않을 요청이면 None"""
+    seed = req.get("seed", -1)
+    seed = -1 if seed in ["", None] else int(seed)
+    if seed == -1 and not TTS_AUDIO_CACHE_RANDOM_SEED:
+        return None
+    parts = {
+        "text": normalize_text(req.get("text", "")),
+        "text_lang": _lower_or_empty(req.get("text_lang")),
+        "ref_audio": file_identity(req.get("ref_audio_path")),
+        "aux_ref_audio": [file_identity(p) for p in (req.get("aux_ref_audio_paths") or [])],
+        "prompt_text": normalize_text(req.get("prompt_text", "")),
+        "prompt_lang": _lower_or_empty(req.get("prompt_lang")),
+        "version": tts_config.version,
+        "t2s_weights": file_identity(tts_config.t2s_weights_path),
+        "vits_weights": file_identity(tts_config.vits_weights_path),
+        # 같은 가중치라도 추론 백엔드 / 정밀도가 다르면 출력이 다르다
+        "backend": tts_config.backend,
+        "int8": tts_config.int8,
+        "is_half": tts_config.is_half,
+        "seed": seed,
+        "media_type": req.get("media_type", "wav"),
+        "pack_version": AUDIO_PACK_VERSION,
+    }
+    for k in [
+        "top_k",
+        "top_p",
+        "temperature",
+        "repetition_penalty",
+        "text_split_method",
+        "speed_factor",
+        "fragment_interval",
+        "sample_steps",
+        "super_sampling",
+    ]:
+        parts[k] = req.get(k)
+    return make_key(parts)
+
+
+def _job_options(req: dict) -> dict:
+    deadline_ms = req.get("deadline_ms")
+    return {
+        "priority": int(req.get("priority", 0)),
+        "timeout": float(deadline_ms) / 1000 if deadline_ms not in (None, "") else None,
+    }
+
+
+def pipeline_call(method: str, *args):
+    """set_ref_audio / swap_t2s_weights / swap_vits_weights 등을 (모든 워커의) TTS 에 적용"""
+    if tts_worker_pool is not None:
+        tts_worker_pool.broadcast(method, *args)
+        # 이 프로세스의 tts_config 도 맞춰 둔다 (audio_cache 키가 가중치 경로를 사용)
+        if method in ("init_t2s_weights", "swap_t2s_weights"):
+            tts_config.t2s_weights_path = args[0]
+        elif method in ("init_vits_weights", "swap_vits_weights"):
+            tts_config.vits_weights_path = args[0]
+    else:
+        return getattr(tts_pipeline, method)(*args)
+
+
+# =========================
+# Warm-up / readiness
+# =========================
+TTS_WARMUP_ENABLED = os.getenv("TTS_WARMUP_ENABLED", "true").lower() == "true"
+# 워밍업이 실패하면 ready 를 주지 않을지 (기본: 실패해도 콜드 상태로 서비스)
+TTS_WARMUP_REQUIRED = os.getenv("TTS_WARMUP_REQUIRED", "false").lower() == "true"
+# 워밍업할 batch_size 목록 (기본: 1 과 동적 배칭 최대 크기)
+TTS_WARMUP_BATCH_SIZES = sorted({
+    int(b) for b in os.getenv("TTS_WARMUP_BATCH_SIZES", f"1,{tts_scheduler.max_batch_size}").split(",") if b.strip()
+})
+# 대표 문장 ("|" 로 구분). batch_size=n 단계는 앞에서부터 n 문장을 이어 붙여 n 개 조각으로 합성
+TTS_WARMUP_SENTENCES = [s.strip() for s in os.getenv(
+    "TTS_WARMUP_SENTENCES",
+    "안녕하세요, 무엇을 도와드릴까요?"
+    "|네, 고객님 확인해 보니 주문하신 상품은 현재 배송 준비 중이며 내일 오후에 도착할 예정입니다."
+    "|잠시만 기다려 주시면 담당자에게 바로 연결해 드리겠습니다."
+    "|요청하신 내용은 문자 메시지로 다시 한 번 안내해 드리겠습니다.",
+).split("|") if s.strip()]
+# convert-tts 기본 참조 음성 / 프롬프트 (컨테이너 경로)
+TTS_REF_AUDIO_PATH = os.getenv("TTS_REF_AUDIO_PATH", "/code/media/my_voice_03.wav")
+TTS_REF_PROMPT_TEXT = os.getenv("TTS_REF_PROMPT_TEXT", "저는 인공지능 모델 학습을 위한 음성 데이터를 녹음하고 있어요.")
+# convert-tts 와 같은 참조 음성/프롬프트로 돌려서 prompt 캐시를 미리 채운다
+TTS_WARMUP_REF_AUDIO = os.getenv("TTS_WARMUP_REF_AUDIO", TTS_REF_AUDIO_PATH)
+TTS_WARMUP_PROMPT_TEXT = os.getenv("TTS_WARMUP_PROMPT_TEXT", TTS_REF_PROMPT_TEXT)
+TTS_WARMUP_LANG = os.getenv("TTS_WARMUP_LANG", "ko")
+TTS_WARMUP_ROUNDS = int(os.getenv("TTS_WARMUP_ROUNDS", "1"))
+# 워커 프로세스 모드에서 워커 기동 + 워밍업을 기다리는 최대 시간
+TTS_WARMUP_TIMEOUT_S = float(os.getenv("TTS_WARMUP_TIMEOUT_S", "600"))
+
+
+def _warmup_request(text: str, batch_size: int) -> dict:
+    return {
+        "text": text,
+        "text_lang": TTS_WARMUP_LANG,
+        "ref_audio_path": TTS_WARMUP_REF_AUDIO,
+        "prompt_text": TTS_WARMUP_PROMPT_TEXT,
+        "prompt_lang": TTS_WARMUP_LANG,
+        "top_k": 5,
+        "text_split_method": "cut5",
+        "batch_size": batch_size,
+        "split_bucket": True,
+        "seed": 0,
+        "parallel_infer": True,
+        "static_kv_cache": False,
+    }
+
+
+def _warmup_call(inputs_list: list, batched: bool = False):
+    if tts_worker_pool is not None:
+        # 모든 워커가 각자 워밍업 (각 워커의 작업 루프에서 실행, 워커 기동도 함께 기다린다)
+        tts_worker_pool.broadcast("warmup", inputs_list, batched, timeout=TTS_WARMUP_TIMEOUT_S or None)
+        return None
+    return tts_pipeline.warmup(inputs_list, batched)
+
+
+def _warmup_steps() -> list:
+    steps = []
+    for batch_size in TTS_WARMUP_BATCH_SIZES:
+        sentences = [TTS_WARMUP_SENTENCES[i % len(TTS_WARMUP_SENTENCES)] for i in range(batch_size)]
+        request = _warmup_request(" ".join(sentences), batch_size)
+        steps.append((f"run batch_size={batch_size}", lambda r=request: _warmup_call([r] * TTS_WARMUP_ROUNDS)))
+    if tts_worker_pool is None and TTS_BATCH_ENABLED:
+        # 요청 간 동적 배칭 경로 (run_batch)
+        for batch_size in TTS_WARMUP_BATCH_SIZES:
+            if 1 < batch_size <= tts_scheduler.max_batch_size:
+                requests = [
+                    _warmup_request(TTS_WARMUP_SENTENCES[i % len(TTS_WARMUP_SENTENCES)], 1)
+                    for i in range(batch_size)
+                ]
+                steps.append((f"run_batch requests={batch_size}", lambda r=requests: _warmup_call(r, True)))
+    return steps
+
+
+tts_warmup = TTSWarmup(
+    _warmup_steps() if TTS_WARMUP_ENABLED and TTS_WARMUP_SENTENCES else [],
+    enabled=TTS_WARMUP_ENABLED and bool(TTS_WARMUP_SENTENCES),
+    required=TTS_WARMUP_REQUIRED,
+)
+tts_warmup.start(background=True)
+
+
+def tts_readiness() -> dict:
+    """로드밸런서용 readiness: 워밍업 완료 + (워커 모드면) 살아있는 워커가 있어야 ready"""
+    reasons = []
+    if not tts_warmup.ready:
+        reasons.append(f"warmup {tts_warmup.status}")
+    if tts_worker_pool is not None and tts_worker_pool.stats()["alive_workers"] == 0:
+        reasons.append("no tts worker is alive")
+    return {"ready": not reasons, "reasons": reasons}
+
+
+def tts_streaming_iter(tts_generator: Generator, media_type: str, trace=None) -> Iterable[bytes]:
     """Django StreamingHttpResponse용 제너레이터"""
+    if media_type in TELEPHONY_CODECS:
+        yield from telephony_stream_iter(tts_generator, media_type, trace)
+        return
+
     first = True
     _media = media_type  # 로컬 변수로 유지
-    for sr, chunk in tts_generator:
-        # WAV의 첫 조각은 헤더부터
-        if first and _media == "wav":
-            yield wave_header_chunk(sample_rate=sr)
-            _media = "raw"
-            first = False
-        buf = pack_audio(BytesIO(), chunk, sr, _media)
-        yield buf.getvalue()
+    pack_seconds = 0.0
+    try:
+        for sr, chunk in tts_generator:
+            t0 = time.perf_counter()
+            # WAV의 첫 조각은 헤더부터
+            if first and _media == "wav":
+                header = wave_header_chunk(sample_rate=sr)
+                pack_seconds += time.perf_counter() - t0
+                yield header
+                t0 = time.perf_counter()
+                _media = "raw"
+                first = False
+            data = pack_audio(BytesIO(), chunk, sr, _media).getvalue()
+            pack_seconds += time.perf_counter() - t0
+            yield data
+    finally:
+        # 조각마다가 아니라 요청당 한 번 기록
+        metrics.record("pack", pack_seconds, trace)
+
+
+def telephony_stream_iter(tts_generator: Generator, media_type: str, trace=None) -> Iterable[bytes]:
+    """
+    조각이 올 때마다 이어서 8 kHz 리샘플/인코딩 (필터 상태 유지)
+    - wav 는 길이 미정 WAV 헤더 + 8 kHz PCM16
+    """
+    codec = "pcm16" if media_type == "wav" else media_type
+    if media_type == "wav":
+        yield wave_header_chunk(sample_rate=TELEPHONY_SR)
+    encoder = None
+    pack_seconds = 0.0
+    try:
+        for sr, chunk in tts_generator:
+            t0 = time.perf_counter()
+            if encoder is None:
+                encoder = TelephonyEncoder(sr, codec, gain_db=TTS_TELEPHONY_GAIN_DB)
+            data = encoder.encode(chunk)
+            pack_seconds += time.perf_counter() - t0
+            if data:
+                yield data
+        if encoder is not None:
+            t0 = time.perf_counter()
+            tail = encoder.flush()
+            pack_seconds += time.perf_counter() - t0
+            if tail:
+                yield tail
+    finally:
+        metrics.record("pack", pack_seconds, trace)
+
+
+def _release_after(tts_generator: Generator, ticket: SessionTicket, trace=None) -> Generator:
+    """
+    스트리밍이 끝나거나 취소되면 세션 티켓 반환. 소비자가 중간에 닫으면 합성도 취소
+    - trace 를 넘기면 (이 스트림이 trace 의 주인일 때) 끝날 때 요청 집계에 기록
+    """
+    status = "success"
+    try:
+        yield from tts_generator
+    except (CANCELLED_ERROR, CancelledError):
+        status = "cancelled"
+        print(f"⏹️ [TTS] 스트리밍 중단 (세션 {ticket.session_key}, 요청 {ticket.request_id})")
+    except GeneratorExit:
+        status = "cancelled"
+        ticket.cancel()
+        raise
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        session_registry.end(ticket)
+        metrics.finish(trace, status)
+
+
+def _fragment_source(req: dict, ticket: SessionTicket) -> Generator:
+    """return_fragment 합성 조각 (sr, int16 ndarray) 제너레이터"""
+    if tts_worker_pool is not None:
+        job = tts_worker_pool.submit(req, stream=True, **_job_options(req))
+        ticket.attach(job)
+        return job.iter_fragments()
+    return tts_pipeline.run(req)
+
+
+def tts_fragment_stream(req: dict, session_key: Optional[str] = None, request_id: Optional[str] = None):
+    """
+    전화 게이트웨이 전송용: 문장 조각이 합성되는 대로 8 kHz 로 인코딩된 bytes 를 내보낸다
+    - 반환: (SessionTicket, bytes 제너레이터), 파라미터 오류면 JsonResponse
+    - 취소(새 요청으로 대체)되면 제너레이터가 일찍 끝나고 ticket.cancelled 가 True
+    """
+    res = check_params(req)
+    if isinstance(res, JsonResponse):
+        return res
+    media_type = req.get("media_type", "wav")
+    if media_type not in ("wav", *TELEPHONY_CODECS):
+        return JsonResponse({"message": f"media_type: {media_type} is not supported for phone streaming"}, status=400)
 
+    req["return_fragment"] = True
+    ticket = session_registry.begin(session_key, request_id)
+    if tts_worker_pool is None:
+        req["cancel_event"] = ticket.cancel_event
+    try:
+        tts_generator = _fragment_source(req, ticket)
+    except Exception:
+        session_registry.end(ticket)
+        raise
+    # trace 는 호출한 쪽(views)이 전송까지 포함해서 끝낸다
+    return ticket, telephony_stream_iter(_release_after(tts_generator, ticket), media_type, req.get("trace"))
 
-def tts_handle(req: dict):
+
+def tts_handle(req: dict, session_key: Optional[str] = None, request_id: Optional[str] = None):
     """
     FastAPI 버전의 tts_handle을 Django에 맞게 포팅
     - streaming_mode=True면 StreamingHttpResponse 반환
     - 아니면 단일 HttpResponse 반환
     - 오류는 JsonResponse로
+    - session_key 가 같은 새 request_id 가 들어오면 진행 중이던 합성은 취소되고 409 반환
+    - req["trace"] (metrics.trace) 가 있으면 구간별 시간을 거기에 기록, 없으면 여기서 만들고 끝낸다
     """
     streaming_mode = bool(req.get("streaming_mode", False))
     return_fragment = bool(req.get("return_fragment", False))
     media_type = req.get("media_type", "wav")
-    print("여기는잘옴?4")
-    start_time = time.time()
-    processing_time = time.time() - start_time
-    print(f"**************실제 모델 체크 ************* ({processing_time:.3f}초)")
 
     res = check_params(req)
     if isinstance(res, JsonResponse):
@@ -261,37 +532,80 @@ def tts_handle(req: dict):
     if streaming_mode or return_fragment:
         req["return_fragment"] = True
 
+    owns_trace = req.get("trace") is None
+    if owns_trace:
+        req["trace"] = metrics.trace("tts", request_id)
+    trace = req["trace"]
+
+    ticket = session_registry.begin(session_key, request_id)
+    if tts_worker_pool is None:
+        # 워커 프로세스로는 Event 를 넘길 수 없으므로 로컬 파이프라인일 때만 (워커는 작업 취소로 전달)
+        req["cancel_event"] = ticket.cancel_event
+    streaming_started = False
+    status = "error"
     try:
-        tts_generator = tts_pipeline.run(req)
-        processing_time = time.time() - start_time
-        print(f"**************실제 모델 들어감 ************* ({processing_time:.3f}초)")
         if streaming_mode:
+            tts_generator = _fragment_source(req, ticket)
+            streaming_started = True
             return StreamingHttpResponse(
-                streaming_content=tts_streaming_iter(tts_generator, media_type),
+                streaming_content=tts_streaming_iter(
+                    _release_after(tts_generator, ticket, trace if owns_trace else None), media_type, trace
+                ),
                 content_type=f"audio/{media_type}",
             )
         else:
-            try:
-                sr, audio_data = next(tts_generator)
-                tts_generator = tts_pipeline.run(req)
-
-                processing_time = time.time() - start_time
-                print(f"**************실제 모델 들어갔을시간 ************* ({processing_time:.3f}초)")
-                pay_load = audio_data
-                payload = pack_audio(BytesIO(), audio_data, sr, media_type).getvalue()
-                processing_time = time.time() - start_time
-                print(f"**************pay_load 바꾸는 시간************* ({processing_time:.3f}초)")
-            except Exception as e:
-                import traceback
-                print("GEN ERROR at first next():", repr(e), flush=True)
-                print(traceback.format_exc(), flush=True)
-                return JsonResponse({"message": "tts failed at first next()", "Exception": str(e)}, status=400)
-            # 원래는 여기서 다 보내주는데 함수 분할을 위해 여기서는 payload만 반환하게 변경
-            # return HttpResponse(payload, content_type=f"audio/{media_type}")
+            # 같은 문장/음성/파라미터면 디스크 캐시에서 바로 반환, 동시 요청은 합성 1회로 합침
+            cache_key = None if req.get("return_fragment", False) else audio_cache_key(req)
+            if cache_key is not None:
+                payload = audio_cache.get_or_create(cache_key, lambda: synthesize_payload(req, media_type, ticket))
+            else:
+                payload = synthesize_payload(req, media_type, ticket)
+            if not isinstance(payload, JsonResponse):
+                status = "success"
             return payload
 
+    except (CANCELLED_ERROR, CancelledError):
+        status = "cancelled"
+        print(f"⏹️ [TTS] 합성 취소됨 (세션 {session_key}, 요청 {request_id})")
+        return JsonResponse({"message": "tts cancelled: superseded by a newer request"}, status=409)
     except Exception as e:
         return JsonResponse({"message": "tts failed", "Exception": str(e)}, status=400)
+    finally:
+        if not streaming_started:
+            session_registry.end(ticket)
+            if owns_trace:
+                metrics.finish(trace, status)
+
+
+def synthesize_payload(req: dict, media_type: str, ticket: Optional[SessionTicket] = None):
+    """non-streaming 합성 → 패킹된 bytes, 실패 시 JsonResponse (취소는 예외로 그대로 전달)"""
+    try:
+        if tts_worker_pool is not None:
+            job = tts_worker_pool.submit(req, **_job_options(req))
+            if ticket is not None:
+                ticket.attach(job)
+            sr, audio_data = job.result()
+        elif TTS_BATCH_ENABLED and not req.get("return_fragment", False):
+            # 동시에 들어온 호환 요청들과 묶어서 한 번에 합성
+            future = tts_scheduler.submit(req)
+            if ticket is not None:
+                ticket.attach(future)
+            sr, audio_data = future.result()
+        else:
+            sr, audio_data = next(tts_pipeline.run(req))
+
+        with metrics.span("pack", req.get("trace")):
+            payload = pack_audio(BytesIO(), audio_data, sr, media_type).getvalue()
+    except (CANCELLED_ERROR, CancelledError):
+        raise
+    except Exception as e:
+        import traceback
+        print("GEN ERROR at first next():", repr(e), flush=True)
+        print(traceback.format_exc(), flush=True)
+        return JsonResponse({"message": "tts failed at first next()", "Exception": str(e)}, status=400)
+    # 원래는 여기서 다 보내주는데 함수 분할을 위해 여기서는 payload만 반환하게 변경
+    # return HttpResponse(payload, content_type=f"audio/{media_type}")
+    return payload
 
 
 def handle_control(command: str):
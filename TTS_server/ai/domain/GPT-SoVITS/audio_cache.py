@@ -0,0 +1,211 @@
+"""
+합성 결과(패킹된 오디오 바이트) 디스크 캐시
+- 키: 정규화 텍스트 + 참조 음성 + 모델 가중치 + 샘플링 파라미터 + seed + 출력 포맷의 sha256
+- 저장: <cache_dir>/<앞 2글자>/<sha256>.bin, 읽기는 mmap
+- 용량 상한을 넘으면 가장 오래 안 쓴 파일부터 삭제 (LRU)
+- 같은 키의 동시 요청은 한 번만 합성하고 결과를 공유 (single-flight)
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").strip())
+
+
+def file_identity(path: Optional[str]) -> list:
+    """경로 + 수정시각 + 크기. 파일이 바뀌면 키도 바뀐다."""
+    if path in (None, ""):
+        return [None]
+    try:
+        st = os.stat(path)
+        return [os.path.abspath(path), st.st_mtime_ns, st.st_size]
+    except OSError:
+        return [os.path.abspath(path), None, None]
+
+
+def make_key(parts: Dict[str, Any]) -> str:
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Content-addressed on-disk cache of packed audio bytes with LRU eviction and single-flight.
+
+    Args:
+        cache_dir (str): directory of the cache files.
+        max_mb (float): total size cap of the cache files in MB.
+        enabled (bool): when False, get_or_create just calls the producer.
+    """
+
+    SUFFIX = ".bin"
+
+    def __init__(self, cache_dir: str, max_mb: float = 1024, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+        self.evictions = 0
+
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + self.SUFFIX)
+
+    def _load_index(self):
+        # 재시작 후에도 캐시 유지: 수정시각(= 마지막 사용 시각) 순으로 LRU 복원
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if not name.endswith(self.SUFFIX):
+                    # 쓰다가 죽은 임시 파일 정리
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, name[: -len(self.SUFFIX)], st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._index and self.total_bytes > self.max_bytes:
+            key, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    data = bytes(m)
+            os.utime(path)
+            return data
+        except (OSError, ValueError):
+            # 외부에서 지워졌거나 빈 파일
+            with self._lock:
+                size = self._index.pop(key, None)
+                if size is not None:
+                    self.total_bytes -= size
+            return None
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 임시 파일에 쓰고 rename → 읽는 쪽이 쓰다 만 파일을 보지 않음
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old
+            self._index[key] = len(data)
+            self.total_bytes += len(data)
+            self._evict()
+
+    def get_or_create(self, key: str, producer: Callable[[], Any]) -> Any:
+        """
+        Return the cached bytes for key, or run producer() once for all concurrent callers of the same key.
+        Only bytes results are stored; anything else (e.g. an error response) is returned uncached.
+        """
+        if not self.enabled:
+            return producer()
+
+        data = self.get(key)
+        if data is not None:
+            with self._lock:
+                self.hits += 1
+            return data
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.joined += 1
+        if not owner:
+            try:
+                result = future.result()
+            except BaseException:
+                result = None
+            if isinstance(result, (bytes, bytearray)):
+                return result
+            # 먼저 시작한 요청이 실패/취소(세션 교체)됐으면 그 결과를 공유하지 않고 직접 합성
+            return producer()
+
+        try:
+            result = producer()
+            if isinstance(result, (bytes, bytearray)) and len(result) > 0:
+                self.put(key, bytes(result))
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.joined
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._index),
+                "size_mb": round(self.total_bytes / 1024 / 1024, 3),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 3),
+                "hits": self.hits,
+                "misses": self.misses,
+                "single_flight_joined": self.joined,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.joined) / lookups, 4) if lookups else 0.0,
+                "inflight": len(self._inflight),
+            }
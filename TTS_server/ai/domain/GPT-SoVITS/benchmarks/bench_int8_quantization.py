@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+int8 동적 양자화 정확도 / 속도 / 메모리 벤치마크 (CPU)
+- model 모드 (기본, 체크포인트 불필요): 랜덤 초기화한 T2S 디코더를 fp32 / int8(per-channel) / int8(per-tensor)
+  로 돌려서 prefill + teacher forcing decode 스텝의 logits 차이, argmax 일치율, 스텝당 시간, 가중치 크기를 비교한다.
+  --min_match 보다 argmax 일치율이 낮으면 종료 코드 1 (양자화 설정 점검용).
+- live 모드: 실제 가중치로 TTS 를 올려 같은 문장을 fp32 / int8 로 합성한다.
+  top_k=1 (greedy) 로 의미 토큰 일치율, RTF, 모델 가중치 크기, 프로세스 RSS 를 출력한다.
+
+사용법 (GPT-SoVITS 디렉터리에서):
+    python benchmarks/bench_int8_quantization.py --layers 24 --threads 4
+    python benchmarks/bench_int8_quantization.py --mode live --ref_audio ref.wav --prompt_text "..." --threads 4
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "GPT_SoVITS"))
+
+import psutil
+import torch
+
+from AR.models.t2s_model import Text2SemanticDecoder
+from AR.models.t2s_model_int8 import quantize_t2s_model, t2s_weight_bytes, weight_bytes
+
+DEFAULT_TEXT = "네, 고객님 확인해 보니 주문하신 상품은 현재 배송 준비 중이며 내일 오후에 도착할 예정입니다."
+
+
+def build_decoder(layers: int, hidden: int, heads: int) -> Text2SemanticDecoder:
+    config = {
+        "model": {
+            "vocab_size": 1025,
+            "phoneme_vocab_size": 732,
+            "embedding_dim": hidden,
+            "hidden_dim": hidden,
+            "head": heads,
+            "linear_units": hidden * 4,
+            "n_layer": layers,
+            "dropout": 0,
+            "EOS": 1024,
+        }
+    }
+    return Text2SemanticDecoder(config=config).eval()
+
+
+def rss_mb() -> float:
+    gc.collect()
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+
+@torch.no_grad()
+def teacher_forcing(model: Text2SemanticDecoder, phones, bert, prompt, tokens):
+    """prefill + 주어진 토큰열 decode 의 logits 와 decode 스텝당 시간(ms)"""
+    x = model.ar_text_position(model.ar_text_embedding(phones) + model.bert_proj(bert.transpose(1, 2)))
+    y_pos = model.ar_audio_position(model.ar_audio_embedding(prompt))
+    xy_pos = torch.concat([x, y_pos], dim=1)
+    x_len, y_len = x.shape[1], prompt.shape[1]
+    x_mask = torch.nn.functional.pad(torch.zeros(x_len, x_len, dtype=torch.bool), (0, y_len), value=True)
+    y_mask = torch.nn.functional.pad(torch.triu(torch.ones(y_len, y_len, dtype=torch.bool), diagonal=1), (x_len, 0))
+    mask = torch.concat([x_mask, y_mask], dim=0).view(1, 1, x_len + y_len, -1).expand(1, model.num_head, -1, -1)
+    xy_dec, k_cache, v_cache = model.t2s_transformer.process_prompt(xy_pos, mask, None)
+    logits = [model.ar_predict_layer(xy_dec[:, -1])]
+    t0 = time.perf_counter()
+    for i, token in enumerate(tokens):
+        y_emb = model.ar_audio_embedding(torch.tensor([[token]]))
+        pos = model.ar_audio_position
+        xy_pos = y_emb * pos.x_scale + pos.alpha * pos.pe[:, y_len + i].to(dtype=y_emb.dtype)
+        xy_dec, k_cache, v_cache = model.t2s_transformer.decode_next_token(xy_pos, k_cache, v_cache)
+        logits.append(model.ar_predict_layer(xy_dec[:, -1]))
+    ms = (time.perf_counter() - t0) / max(1, len(tokens)) * 1000
+    return torch.cat(logits, dim=0), ms
+
+
+def bench_model(args) -> bool:
+    torch.manual_seed(0)
+    phones = torch.randint(1, 700, (1, args.text_len))
+    bert = torch.randn(1, 1024, args.text_len)
+    prompt = torch.randint(0, 1024, (1, args.prompt_len))
+    tokens = torch.randint(0, 1024, (args.steps,)).tolist()
+
+    reference = build_decoder(args.layers, args.hidden, args.heads)
+    state = reference.state_dict()
+    teacher_forcing(reference, phones, bert, prompt, tokens[:10])
+    ref_logits, ref_ms = teacher_forcing(reference, phones, bert, prompt, tokens)
+    ref_bytes = t2s_weight_bytes(reference)
+
+    print(f"torch threads={torch.get_num_threads()}, layers={args.layers}, hidden={args.hidden}")
+    print(
+        f"{'mode':>16} | {'ms/step':>8} | {'speedup':>7} | {'weights MB':>10} | "
+        f"{'max |dlogit|':>12} | {'cosine':>8} | {'argmax match':>12}"
+    )
+    print("-" * 96)
+    print(f"{'fp32':>16} | {ref_ms:>8.3f} | {1.0:>6.2f}x | {ref_bytes / 2**20:>10.1f} | {0.0:>12.2e} | {1.0:>8.5f} | {1.0:>12.1%}")
+
+    ok = True
+    for name, per_channel in (("int8 per-channel", True), ("int8 per-tensor", False)):
+        model = build_decoder(args.layers, args.hidden, args.heads)
+        model.load_state_dict(state)
+        quantize_t2s_model(model, per_channel=per_channel)
+        teacher_forcing(model, phones, bert, prompt, tokens[:10])
+        logits, ms = teacher_forcing(model, phones, bert, prompt, tokens)
+        diff = (logits - ref_logits).abs().max().item()
+        cosine = torch.nn.functional.cosine_similarity(logits, ref_logits, dim=-1).mean().item()
+        match = (logits.argmax(-1) == ref_logits.argmax(-1)).float().mean().item()
+        size = t2s_weight_bytes(model) / 2**20
+        print(f"{name:>16} | {ms:>8.3f} | {ref_ms / ms:>6.2f}x | {size:>10.1f} | {diff:>12.2e} | {cosine:>8.5f} | {match:>12.1%}")
+        if per_channel and match < args.min_match:
+            ok = False
+    return ok
+
+
+def bench_live(args):
+    from TTS_infer_pack.TTS import TTS, TTS_Config
+
+    config = TTS_Config(args.config)
+    config.device = "cpu"
+    config.is_half = False
+    config.backend = "torch"
+    config.int8 = False
+    pipeline = TTS(config)
+    inputs = {
+        "text": args.text,
+        "text_lang": args.lang,
+        "ref_audio_path": args.ref_audio,
+        "prompt_text": args.prompt_text,
+        "prompt_lang": args.lang,
+        "top_k": 1,
+        "batch_size": 1,
+        "seed": 1234,
+    }
+
+    captured = {}
+    predict = pipeline._predict_semantic
+
+    def capture(*a, **kw):
+        result = predict(*a, **kw)
+        captured.setdefault("tokens", []).extend(t.tolist() for t in result[0])
+        return result
+
+    pipeline._predict_semantic = capture
+
+    def measure():
+        next(iter(pipeline.run(dict(inputs))))  # 워밍업 (참조 음성 캐시)
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            captured.clear()
+            sr, audio = next(iter(pipeline.run(dict(inputs))))
+        elapsed = (time.perf_counter() - t0) / args.rounds
+        tokens = [t for seq in captured.pop("tokens") for t in seq]
+        weights = t2s_weight_bytes(pipeline.t2s_model.model) + weight_bytes(pipeline.vits_model)
+        return elapsed, len(audio) / sr, tokens, weights / 2**20, rss_mb()
+
+    fp32 = measure()
+    pipeline.enable_int8_quantization(True, save=False)
+    int8 = measure()
+
+    n = max(1, max(len(fp32[2]), len(int8[2])))
+    same = sum(a == b for a, b in zip(fp32[2], int8[2])) / n
+    print(f"torch threads={torch.get_num_threads()}, rounds={args.rounds}")
+    print(f"{'mode':>6} | {'total s':>8} | {'audio s':>8} | {'RTF':>6} | {'weights MB':>10} | {'RSS MB':>8}")
+    print("-" * 62)
+    for name, (elapsed, audio_len, _, weights, rss) in (("fp32", fp32), ("int8", int8)):
+        print(f"{name:>6} | {elapsed:>8.3f} | {audio_len:>8.2f} | {elapsed / audio_len:>6.3f} | {weights:>10.1f} | {rss:>8.1f}")
+    print(f"greedy semantic token match: {same:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="int8 dynamic quantization accuracy / speed / memory benchmark")
+    parser.add_argument("--mode", choices=["model", "live"], default="model")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op 스레드 수 (0 이면 기본값)")
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--text_len", type=int, default=60)
+    parser.add_argument("--prompt_len", type=int, default=150)
+    parser.add_argument("--layers", type=int, default=24)
+    parser.add_argument("--hidden", type=int, default=512)
+    parser.add_argument("--heads", type=int, default=16)
+    parser.add_argument("--min_match", type=float, default=0.9, help="per-channel int8 의 최소 argmax 일치율")
+    parser.add_argument("--config", type=str, default="GPT_SoVITS/configs/tts_infer.yaml")
+    parser.add_argument("--ref_audio", type=str, default=None)
+    parser.add_argument("--prompt_text", type=str, default="")
+    parser.add_argument("--text", type=str, default=DEFAULT_TEXT)
+    parser.add_argument("--lang", type=str, default="ko")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    if args.mode == "live":
+        if not args.ref_audio:
+            parser.error("--mode live 에는 --ref_audio 가 필요합니다")
+        bench_live(args)
+        return
+    if not bench_model(args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+한국어 G2P 마이크로 벤치마크 (CPU)
+text/korean.py 의 기존 g2p 경로(매 호출마다 정규식 + g2pk2)와 캐시/번역 테이블을 쓰는
+현재 g2p 경로의 문장당 처리 시간을 비교하고, 두 결과가 같은지도 확인한다.
+g2pk2 + mecab 이 설치된 환경에서 실행.
+
+사용법:
+    python benchmarks/bench_korean_g2p.py --rounds 20
+    python benchmarks/bench_korean_g2p.py --corpus my_sentences.txt
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "GPT_SoVITS"))
+
+from text import korean
+
+# 상담 응답에서 자주 나오는 짧은 문장 위주
+DEFAULT_CORPUS = [
+    "네, 알겠습니다.",
+    "안녕하세요, 무엇을 도와드릴까요?",
+    "잠시만 기다려 주세요.",
+    "고객님의 주문은 3개이며 총 금액은 25000원입니다.",
+    "확인해 보니 배송은 내일 오후 2시에 도착할 예정입니다.",
+    "네, 맞습니다. 다른 문의 사항이 있으신가요?",
+    "죄송합니다. 다시 한 번 말씀해 주시겠어요?",
+    "본인 확인을 위해 생년월일 6자리를 말씀해 주세요.",
+    "감사합니다. 좋은 하루 보내세요.",
+    "AI 상담원이 도와드리겠습니다.",
+    "결제는 카드와 계좌이체 모두 가능합니다.",
+    "예약하신 시간은 오전 10시 30분입니다.",
+    "앞으로 더 나은 서비스를 제공하겠습니다.",
+    "할 일을 리스트로 정리해 드릴게요.",
+]
+
+
+def legacy_g2p(text):
+    # 변경 전 korean.g2p 와 동일한 처리 (캐시 없음, 정규식 치환 루프)
+    for regex, replacement in korean._latin_to_hangul:
+        text = re.sub(regex, replacement, text)
+    text = korean._g2p(text)
+    text = korean.j2hcj(korean.h2j(text))
+    for regex, replacement in korean._hangul_divided:
+        text = re.sub(regex, replacement, text)
+    new_text = ""
+    i = 0
+    while i < len(text) - 4:
+        if (text[i : i + 3] == "ㅇㅡㄹ" or text[i : i + 3] == "ㄹㅡㄹ") and text[i + 3] == " " and text[i + 4] == "ㄹ":
+            new_text += text[i : i + 3] + " " + "ㄴ"
+            i += 5
+        else:
+            new_text += text[i]
+            i += 1
+    text = new_text + text[i:]
+    text = re.sub(r"([\u3131-\u3163])$", r"\1.", text)
+    return [korean.post_replace_ph(i) for i in text]
+
+
+def clear_caches():
+    korean._cached_g2p.cache_clear()
+    korean._g2pk2.cache_clear()
+    mecab_pos = getattr(getattr(korean._g2p, "mecab", None), "pos", None)
+    if hasattr(mecab_pos, "cache_clear"):
+        mecab_pos.cache_clear()
+
+
+def bench(fn, corpus, rounds):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for sentence in corpus:
+            fn(sentence)
+    return (time.perf_counter() - t0) / (rounds * len(corpus)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Korean G2P micro-benchmark")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--corpus", type=str, default=None, help="한 줄에 한 문장인 텍스트 파일")
+    args = parser.parse_args()
+
+    corpus = DEFAULT_CORPUS
+    if args.corpus is not None:
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            corpus = [line.strip() for line in f if line.strip()]
+
+    mismatches = [s for s in corpus if legacy_g2p(s) != korean.g2p(s)]
+
+    # 워밍업 (mecab 사전 로딩 등)
+    legacy_g2p(corpus[0])
+
+    legacy_ms = bench(legacy_g2p, corpus, args.rounds)
+    clear_caches()
+    cold_ms = bench(korean.g2p, corpus, 1)
+    warm_ms = bench(korean.g2p, corpus, args.rounds)
+
+    print(f"sentences: {len(corpus)}, rounds: {args.rounds}")
+    print(f"{'path':>12} | {'ms/sentence':>12}")
+    print("-" * 28)
+    print(f"{'legacy':>12} | {legacy_ms:>12.3f}")
+    print(f"{'cold cache':>12} | {cold_ms:>12.3f}")
+    print(f"{'warm cache':>12} | {warm_ms:>12.3f}")
+    print("-" * 28)
+    print(f"output mismatches: {len(mismatches)}")
+    for s in mismatches:
+        print(f"  {s}")
+    print(korean.g2p_cache_info())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+TTS 서버 부하 테스트 / 벤치마크 (가짜 게이트웨이 클라이언트)
+- 게이트웨이 역할의 WebSocket 클라이언트 --clients 개를 /ws/tts/ 에 phone-id / session-id 헤더로 붙여 둔다
+- 한국어 문장 코퍼스로 /api/convert-tts/ 에 --rate 요청/초 (poisson 또는 uniform 도착) 로 동시에 요청
+- 요청마다 HTTP 응답 시간, 첫 오디오 청크까지 시간(TTFC), 마지막 청크(audio_complete / audio_end)까지 시간,
+  받은 오디오 길이와 RTF 를 기록하고 p50/p90/p95/p99 와 처리량을 출력
+- 서버의 /metrics/requests 에서 같은 requestId 의 구간별 시간(참조 음성, 프론트엔드, T2S, VITS, 전송 ...)도 모은다
+- 결과는 --output JSON 으로 저장, --baseline 으로 이전 커밋 결과와 비교 (--max_regression 넘으면 종료 코드 1)
+
+같은 세션에 새 requestId 가 오면 서버가 이전 합성을 취소하므로 클라이언트 하나에는 요청을 하나씩만 보낸다.
+빈 클라이언트가 없으면 도착한 요청은 기다리고, 그 대기 시간은 queue_wait 로 따로 기록된다 (--clients 를 늘릴 것).
+HTTP 와 WebSocket 이 같은 프로세스여야 전송되므로 (InMemoryChannelLayer) daphne 하나로 띄우거나 Redis 를 쓴다.
+같은 문장이 반복되므로 오디오 캐시는 끄고 측정: TTS_AUDIO_CACHE_ENABLED=false
+
+GPU 없이 (CPU, 소형 랜덤 모델):
+    python benchmarks/make_tiny_models.py --out_dir /tmp/tts_tiny      # 출력되는 환경 변수로 서버 실행
+    python benchmarks/bench_load.py --rate 2 --requests 40 --clients 8 --output before.json
+    python benchmarks/bench_load.py --rate 2 --requests 40 --clients 8 --output after.json --baseline before.json
+
+사용법:
+    python benchmarks/bench_load.py --url http://127.0.0.1:5002 --rate 4 --duration 60 --stream
+    python benchmarks/bench_load.py --corpus sentences.txt --arrival uniform --media_type pcm16
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import struct
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import requests
+import websockets
+
+# 상담 응답 길이 분포 (짧은 맞장구 ~ 두 문장 안내)
+DEFAULT_CORPUS = [
+    "네, 알겠습니다.",
+    "안녕하세요, 무엇을 도와드릴까요?",
+    "잠시만 기다려 주세요.",
+    "네, 맞습니다. 다른 문의 사항이 있으신가요?",
+    "죄송합니다. 다시 한 번 말씀해 주시겠어요?",
+    "본인 확인을 위해 생년월일 여섯 자리를 말씀해 주세요.",
+    "감사합니다. 좋은 하루 보내세요.",
+    "결제는 카드와 계좌이체 모두 가능합니다.",
+    "예약하신 시간은 내일 오전 열 시 삼십 분입니다.",
+    "네, 고객님 확인해 보니 주문하신 상품은 현재 배송 준비 중이며 내일 오후에 도착할 예정입니다.",
+    "잠시만 기다려 주시면 담당자에게 바로 연결해 드리겠습니다.",
+    "요청하신 내용은 문자 메시지로 다시 한 번 안내해 드리겠습니다.",
+    "해당 상품은 현재 품절 상태입니다. 입고되면 바로 알림을 보내 드릴까요?",
+    "환불은 영업일 기준 삼 일에서 오 일 정도 소요되며, 카드사 사정에 따라 조금 늦어질 수 있습니다.",
+    "주소 변경은 출고 전까지만 가능합니다. 지금 바로 변경해 드릴까요?",
+    "상담원 연결을 원하시면 일 번, 자동 응답으로 계속 진행하시려면 이 번을 눌러 주세요.",
+]
+
+TELEPHONY_SR = 8000
+# 헤더 없는 전화망 포맷의 샘플당 바이트 (wav 는 헤더에서 읽음)
+RAW_SAMPLE_BYTES = {"pcm16": 2, "ulaw": 1, "alaw": 1}
+PERCENTILES = (50, 90, 95, 99)
+# --baseline 비교와 --max_regression 판정에 쓰는 지표 (값이 클수록 나쁨)
+GATED_METRICS = ("latency", "ttfc", "e2e", "rtf")
+
+
+class RequestResult:
+    """One convert-tts request as seen by the load generator and its gateway client."""
+
+    def __init__(self, index: int, request_id: str, text: str, scheduled: float):
+        self.index = index
+        self.request_id = request_id
+        self.text = text
+        self.scheduled = scheduled
+        self.sent_at: Optional[float] = None
+        self.response_at: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.response: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.audio_start_at: Optional[float] = None
+        self.first_chunk_at: Optional[float] = None
+        self.done_at: Optional[float] = None
+        self.ws_status: Optional[str] = None
+        self.chunks = 0
+        self.audio = bytearray()
+        self.done = asyncio.Event()
+
+    def audio_seconds(self, media_type: str) -> Optional[float]:
+        data = bytes(self.audio)
+        if not data:
+            return None
+        if data[:4] == b"RIFF" and len(data) >= 44:
+            channels = int.from_bytes(data[22:24], "little")
+            sample_rate = int.from_bytes(data[24:28], "little")
+            sample_width = int.from_bytes(data[34:36], "little") // 8
+            offset = data.find(b"data", 12)
+            # 스트리밍 WAV 는 길이 미정 헤더 → data 크기 필드 대신 실제 받은 바이트로 계산
+            payload = len(data) - (offset + 8 if offset >= 0 else 44)
+            return payload / (sample_rate * channels * sample_width)
+        return len(data) / (TELEPHONY_SR * RAW_SAMPLE_BYTES.get(media_type, 2))
+
+    def as_dict(self, media_type: str) -> dict:
+        def since_sent(t):
+            return round(t - self.sent_at, 4) if t is not None and self.sent_at is not None else None
+
+        audio_seconds = self.audio_seconds(media_type)
+        e2e = since_sent(self.done_at)
+        return {
+            "index": self.index,
+            "request_id": self.request_id,
+            "chars": len(self.text),
+            "status_code": self.status_code,
+            "ws_status": self.ws_status,
+            "error": self.error,
+            "queue_wait": round(self.sent_at - self.scheduled, 4) if self.sent_at is not None else None,
+            "latency": since_sent(self.response_at),
+            "ttfc": since_sent(self.first_chunk_at),
+            "e2e": e2e,
+            "audio_seconds": round(audio_seconds, 4) if audio_seconds else None,
+            "rtf": round(e2e / audio_seconds, 4) if e2e is not None and audio_seconds else None,
+            "chunks": self.chunks,
+            "bytes": len(self.audio),
+            "server_timing": (self.response or {}).get("timing_details"),
+        }
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200 and self.error is None and self.done_at is not None
+
+
+class GatewayClient:
+    """
+    Simulated gateway connection on /ws/tts/, one request in flight at a time.
+
+    Binary frames carry no requestId, so they are attributed to the current request; text messages with
+    another requestId (late frames of a previous request) are ignored.
+    """
+
+    def __init__(self, ws_url: str, phone_id: str, session_id: str):
+        self.ws_url = ws_url
+        self.phone_id = phone_id
+        self.session_id = session_id
+        self.current: Optional[RequestResult] = None
+        self.ws = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(
+            self.ws_url,
+            extra_headers={"phone-id": self.phone_id, "session-id": self.session_id},
+            max_size=None,
+        )
+        message = json.loads(await self.ws.recv())
+        if message.get("type") != "connection_established":
+            raise RuntimeError(f"unexpected first message: {message}")
+        self._reader = asyncio.create_task(self._read())
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def _read(self):
+        try:
+            async for message in self.ws:
+                now = time.perf_counter()
+                result = self.current
+                if result is None:
+                    continue
+                if isinstance(message, bytes):
+                    # [인덱스 >I][전체 청크 수 >I (인덱스 0 만)][오디오]
+                    (index,) = struct.unpack(">I", message[:4])
+                    if result.first_chunk_at is None:
+                        result.first_chunk_at = now
+                    result.audio.extend(message[8 if index == 0 else 4:])
+                    result.chunks += 1
+                    continue
+                data = json.loads(message)
+                request_id = data.get("requestId", (data.get("metadata") or {}).get("requestId"))
+                if request_id is not None and request_id != result.request_id:
+                    continue
+                kind = data.get("type")
+                if kind == "audio_start":
+                    result.audio_start_at = now
+                elif kind in ("audio_complete", "audio_end"):
+                    result.done_at = now
+                    result.ws_status = data.get("status", "success")
+                    result.done.set()
+                elif data.get("status") == "error":
+                    result.error = data.get("message", "gateway error")
+                    result.done.set()
+        except websockets.ConnectionClosed:
+            if self.current is not None and not self.current.done.is_set():
+                self.current.error = "websocket closed"
+                self.current.done.set()
+
+
+def load_corpus(path: Optional[str]) -> List[str]:
+    if not path:
+        return list(DEFAULT_CORPUS)
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def arrival_times(n: int, rate: float, arrival: str, rng: random.Random) -> List[float]:
+    """요청 n 개의 시작 시각(초). poisson 은 지수분포 간격, uniform 은 1/rate 간격"""
+    times, t = [], 0.0
+    for _ in range(n):
+        times.append(t)
+        t += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+    return times
+
+
+def request_body(args, result: RequestResult, client: GatewayClient) -> dict:
+    body = {
+        "text": result.text,
+        "phoneId": client.phone_id,
+        "sessionId": client.session_id,
+        "requestId": result.request_id,
+        "media_type": args.media_type,
+        "stream_audio": args.stream,
+        "use_websocket": True,
+        "fire_and_forget": False,
+    }
+    if args.prompt_text:
+        body["prompt_text"] = args.prompt_text
+    if args.extra:
+        body.update(json.loads(args.extra))
+    return body
+
+
+async def run_request(args, session: requests.Session, executor, clients: asyncio.Queue, result: RequestResult):
+    loop = asyncio.get_running_loop()
+    client: GatewayClient = await clients.get()
+    try:
+        client.current = result
+        result.sent_at = time.perf_counter()
+        try:
+            response = await loop.run_in_executor(
+                executor,
+                lambda: session.post(f"{args.url}/api/convert-tts/", json=request_body(args, result, client),
+                                     timeout=args.timeout),
+            )
+            result.response_at = time.perf_counter()
+            result.status_code = response.status_code
+            try:
+                result.response = response.json()
+            except ValueError:
+                result.response = None
+        except requests.RequestException as e:
+            result.error = f"{type(e).__name__}: {e}"
+            return
+        if result.status_code != 200:
+            result.error = (result.response or {}).get("error") or (result.response or {}).get("message") or "http error"
+            return
+        # HTTP 응답 뒤에도 전송이 남아 있을 수 있음 (fire_and_forget / 채널 레이어 경유)
+        try:
+            remaining = max(0.0, args.timeout - (time.perf_counter() - result.sent_at))
+            await asyncio.wait_for(result.done.wait(), remaining)
+        except asyncio.TimeoutError:
+            result.error = "no audio_complete / audio_end before timeout"
+    finally:
+        client.current = None
+        clients.put_nowait(client)
+
+
+async def wait_ready(args, session: requests.Session):
+    deadline = time.perf_counter() + args.ready_timeout
+    while True:
+        try:
+            if session.get(f"{args.url}/health/ready", timeout=5).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        if time.perf_counter() > deadline:
+            raise SystemExit(f"server not ready after {args.ready_timeout}s: {args.url}/health/ready")
+        await asyncio.sleep(1.0)
+
+
+def percentiles(values: List[float]) -> Optional[dict]:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    stats = {"count": len(values), "mean": round(sum(values) / len(values), 4)}
+    for p in PERCENTILES:
+        stats[f"p{p}"] = round(values[min(len(values) - 1, int(p / 100 * len(values)))], 4)
+    stats["max"] = round(values[-1], 4)
+    return stats
+
+
+def summarize(records: List[dict], wall_seconds: float) -> dict:
+    ok = [r for r in records if r["error"] is None and r["e2e"] is not None]
+    errors: Dict[str, int] = {}
+    for r in records:
+        if r["error"] is not None:
+            key = str(r["status_code"] or r["error"])
+            errors[key] = errors.get(key, 0) + 1
+    audio_total = sum(r["audio_seconds"] or 0.0 for r in ok)
+    return {
+        "requests": len(records),
+        "ok": len(ok),
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(ok) / wall_seconds, 4) if wall_seconds > 0 else None,
+        "audio_seconds_per_second": round(audio_total / wall_seconds, 4) if wall_seconds > 0 else None,
+        **{name: percentiles([r[name] for r in ok]) for name in ("queue_wait", "latency", "ttfc", "e2e", "rtf")},
+    }
+
+
+def server_stages(session: requests.Session, args, request_ids: set) -> Optional[dict]:
+    """/metrics/requests 에서 이번 실행의 요청만 골라 구간별 합계 시간의 분포"""
+    try:
+        response = session.get(f"{args.url}/metrics/requests", params={"limit": len(request_ids) * 2}, timeout=10)
+        traces = response.json().get("requests", [])
+    except (requests.RequestException, ValueError):
+        return None
+    stages: Dict[str, List[float]] = {}
+    for trace in traces:
+        if trace.get("request_id") not in request_ids:
+            continue
+        totals: Dict[str, float] = {}
+        for span in trace.get("spans", []):
+            totals[span["stage"]] = totals.get(span["stage"], 0.0) + span["seconds"]
+        for stage, seconds in totals.items():
+            stages.setdefault(stage, []).append(seconds)
+    return {stage: percentiles(values) for stage, values in stages.items()} or None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_summary(summary: dict, stages: Optional[dict]):
+    print(f"requests={summary['requests']} ok={summary['ok']} errors={summary['errors'] or '-'} "
+          f"wall={summary['wall_seconds']:.1f}s throughput={summary['throughput_rps']} req/s "
+          f"audio={summary['audio_seconds_per_second']} s/s")
+    print(f"{'metric':>12} | {'count':>5} | {'mean':>8} | {'p50':>8} | {'p90':>8} | {'p95':>8} | {'p99':>8} | {'max':>8}")
+    print("-" * 86)
+    rows = [(name, summary[name]) for name in ("queue_wait", "latency", "ttfc", "e2e", "rtf")]
+    rows += [(f"[{stage}]", stats) for stage, stats in (stages or {}).items()]
+    for name, stats in rows:
+        if stats is None:
+            print(f"{name:>12} | {'-':>5} |")
+            continue
+        print(f"{name:>12} | {stats['count']:>5} | {stats['mean']:>8.3f} | {stats['p50']:>8.3f} | {stats['p90']:>8.3f} | "
+              f"{stats['p95']:>8.3f} | {stats['p99']:>8.3f} | {stats['max']:>8.3f}")
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> bool:
+    """baseline 대비 지표 변화 표. max_regression > 0 이면 p50/p95 가 그 비율 넘게 나빠졌을 때 False"""
+    print(f"\nvs baseline {baseline.get('label') or ''} ({baseline.get('git_commit')})")
+    print(f"{'metric':>16} | {'baseline':>9} | {'current':>9} | {'change':>8}")
+    print("-" * 52)
+    ok = True
+    for name in GATED_METRICS:
+        for p in ("p50", "p95"):
+            before = (baseline["summary"].get(name) or {}).get(p)
+            after = (current["summary"].get(name) or {}).get(p)
+            if not before or after is None:
+                continue
+            change = after / before - 1
+            flag = ""
+            if max_regression > 0 and change > max_regression:
+                ok = False
+                flag = " !"
+            print(f"{name + ' ' + p:>16} | {before:>9.3f} | {after:>9.3f} | {change:>+7.1%}{flag}")
+    before = baseline["summary"].get("throughput_rps")
+    after = current["summary"].get("throughput_rps")
+    if before and after is not None:
+        print(f"{'throughput_rps':>16} | {before:>9.3f} | {after:>9.3f} | {after / before - 1:>+7.1%}")
+    return ok
+
+
+async def bench(args) -> dict:
+    rng = random.Random(args.seed)
+    corpus = load_corpus(args.corpus)
+    run_id = f"{int(time.time())}{rng.randrange(1000):03d}"
+    session = requests.Session()
+    executor = ThreadPoolExecutor(max_workers=args.clients)
+    await wait_ready(args, session)
+
+    gateway = [
+        GatewayClient(args.ws_url, f"bench{i:03d}", f"bench_{run_id}_{i}") for i in range(args.clients)
+    ]
+    await asyncio.gather(*(client.connect() for client in gateway))
+    clients: asyncio.Queue = asyncio.Queue()
+    for client in gateway:
+        clients.put_nowait(client)
+    print(f"{len(gateway)} gateway clients connected to {args.ws_url}")
+
+    # 워밍업 요청은 결과에서 제외 (참조 음성 캐시, 첫 요청 지연)
+    for i in range(args.warmup):
+        warm = RequestResult(-1 - i, f"bench-{run_id}-warmup{i}", corpus[i % len(corpus)], time.perf_counter())
+        await run_request(args, session, executor, clients, warm)
+
+    n = args.requests if args.requests > 0 else max(1, int(args.duration * args.rate))
+    schedule = arrival_times(n, args.rate, args.arrival, rng)
+    texts = [rng.choice(corpus) for _ in range(n)]
+    results: List[RequestResult] = []
+    tasks = []
+    t_start = time.perf_counter()
+    for i, (offset, text) in enumerate(zip(schedule, texts)):
+        delay = t_start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        result = RequestResult(i, f"bench-{run_id}-{i}", text, t_start + offset)
+        results.append(result)
+        tasks.append(asyncio.create_task(run_request(args, session, executor, clients, result)))
+    await asyncio.gather(*tasks)
+    wall_seconds = time.perf_counter() - t_start
+
+    await asyncio.gather(*(client.close() for client in gateway))
+    executor.shutdown(wait=False)
+
+    records = [result.as_dict(args.media_type) for result in results]
+    summary = summarize(records, wall_seconds)
+    stages = server_stages(session, args, {result.request_id for result in results})
+    return {
+        "label": args.label,
+        "git_commit": git_commit(),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "args": vars(args),
+        "summary": summary,
+        "server_stages": stages,
+        "requests": records,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS server load test with simulated gateway WebSocket clients")
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:5002", help="HTTP 주소 (convert-tts, health, metrics)")
+    parser.add_argument("--ws_url", type=str, default=None, help="게이트웨이 WebSocket 주소 (기본: --url 의 /ws/tts/)")
+    parser.add_argument("--rate", type=float, default=1.0, help="평균 도착률 (요청/초)")
+    parser.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--requests", type=int, default=0, help="요청 수 (0 이면 --duration x --rate)")
+    parser.add_argument("--duration", type=float, default=30.0, help="부하 시간(초)")
+    parser.add_argument("--clients", type=int, default=8, help="게이트웨이 연결 수 = 최대 동시 요청 수")
+    parser.add_argument("--warmup", type=int, default=1, help="결과에서 빼는 워밍업 요청 수")
+    parser.add_argument("--stream", action="store_true", help="stream_audio: 합성 중 조각 단위 전송")
+    parser.add_argument("--media_type", choices=["wav", "pcm16", "ulaw", "alaw"], default="wav")
+    parser.add_argument("--prompt_text", type=str, default=None, help="참조 음성 프롬프트 (기본: 서버 설정)")
+    parser.add_argument("--extra", type=str, default=None, help='요청 본문에 합칠 JSON, 예: \'{"top_k": 1, "seed": 1}\'')
+    parser.add_argument("--corpus", type=str, default=None, help="한 줄에 한 문장인 텍스트 파일")
+    parser.add_argument("--seed", type=int, default=1234, help="도착 간격 / 문장 선택 시드")
+    parser.add_argument("--timeout", type=float, default=120.0, help="요청당 최대 대기 시간(초)")
+    parser.add_argument("--ready_timeout", type=float, default=600.0, help="/health/ready 대기 시간(초)")
+    parser.add_argument("--label", type=str, default=None)
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 경로")
+    parser.add_argument("--baseline", type=str, default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--max_regression", type=float, default=0.0, help="예: 0.1 → p50/p95 가 10%% 넘게 나빠지면 종료 코드 1")
+    args = parser.parse_args()
+    args.url = args.url.rstrip("/")
+    if args.ws_url is None:
+        args.ws_url = args.url.replace("http", "ws", 1) + "/ws/tts/"
+    if args.rate <= 0:
+        parser.error("--rate 는 0 보다 커야 합니다")
+
+    report = asyncio.run(bench(args))
+    print_summary(report["summary"], report["server_stages"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"saved {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.max_regression):
+            sys.exit(1)
+    if report["summary"]["ok"] == 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
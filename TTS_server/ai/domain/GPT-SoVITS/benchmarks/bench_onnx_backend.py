@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtime 백엔드 정합성 / 속도 벤치마크 (CPU)
+- model 모드 (기본, 체크포인트 불필요): 랜덤 초기화한 T2S 디코더를 onnx 로 내보내서
+  prefill / decode 스텝 logits 를 PyTorch 경로(process_prompt / decode_next_token)와 비교하고
+  스텝당 시간을 ORT 스레드 수별로 잰다.
+- live 모드: 실제 가중치로 TTS 를 올려 같은 문장을 torch / onnxruntime 백엔드로 합성한다.
+  top_k=1 (greedy) 로 의미 토큰 일치율, noise_scale=0 으로 VITS 출력 차이, 구간별 시간과 RTF 를 출력한다.
+
+사용법 (GPT-SoVITS 디렉터리에서):
+    python benchmarks/bench_onnx_backend.py --layers 24 --threads 1 2 4
+    python benchmarks/bench_onnx_backend.py --mode live --ref_audio ref.wav --prompt_text "..." --threads 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "GPT_SoVITS"))
+
+import numpy as np
+import torch
+
+from AR.models.t2s_model import Text2SemanticDecoder
+from TTS_infer_pack.onnx_backend import OnnxBackend
+
+DEFAULT_TEXT = "네, 고객님 확인해 보니 주문하신 상품은 현재 배송 준비 중이며 내일 오후에 도착할 예정입니다."
+
+
+def build_decoder(layers: int, hidden: int, heads: int) -> Text2SemanticDecoder:
+    config = {
+        "model": {
+            "vocab_size": 1025,
+            "phoneme_vocab_size": 732,
+            "embedding_dim": hidden,
+            "hidden_dim": hidden,
+            "head": heads,
+            "linear_units": hidden * 4,
+            "n_layer": layers,
+            "dropout": 0,
+            "EOS": 1024,
+        }
+    }
+    return Text2SemanticDecoder(config=config).eval()
+
+
+@torch.no_grad()
+def torch_decode(model: Text2SemanticDecoder, phones, bert, prompt, tokens):
+    """PyTorch 경로 (infer_panel_naive 와 같은 계산) 의 prefill + 주어진 토큰열 teacher forcing logits"""
+    x = model.ar_text_position(model.ar_text_embedding(phones) + model.bert_proj(bert.transpose(1, 2)))
+    y_pos = model.ar_audio_position(model.ar_audio_embedding(prompt))
+    xy_pos = torch.concat([x, y_pos], dim=1)
+    x_len, y_len = x.shape[1], prompt.shape[1]
+    x_mask = torch.nn.functional.pad(torch.zeros(x_len, x_len, dtype=torch.bool), (0, y_len), value=True)
+    y_mask = torch.nn.functional.pad(torch.triu(torch.ones(y_len, y_len, dtype=torch.bool), diagonal=1), (x_len, 0))
+    mask = torch.concat([x_mask, y_mask], dim=0).view(1, 1, x_len + y_len, -1).expand(1, model.num_head, -1, -1)
+    xy_dec, k_cache, v_cache = model.t2s_transformer.process_prompt(xy_pos, mask, None)
+    logits = [model.ar_predict_layer(xy_dec[:, -1])]
+    for i, token in enumerate(tokens):
+        y_emb = model.ar_audio_embedding(torch.tensor([[token]]))
+        pos = model.ar_audio_position
+        xy_pos = y_emb * pos.x_scale + pos.alpha * pos.pe[:, y_len + i].to(dtype=y_emb.dtype)
+        xy_dec, k_cache, v_cache = model.t2s_transformer.decode_next_token(xy_pos, k_cache, v_cache)
+        logits.append(model.ar_predict_layer(xy_dec[:, -1]))
+    return torch.cat(logits, dim=0)
+
+
+def ort_decode(backend: OnnxBackend, phones, bert, prompt, tokens):
+    ortvalue = backend.ort.OrtValue.ortvalue_from_numpy
+    logits, k_cache, v_cache = backend.prefill.run_with_ort_values(
+        ["logits", "k_cache", "v_cache"],
+        {"phones": ortvalue(phones.numpy()), "bert": ortvalue(bert.numpy()), "prompt": ortvalue(prompt.numpy())},
+    )
+    out = [logits.numpy()]
+    for i, token in enumerate(tokens):
+        logits, k_cache, v_cache = backend.decode.run_with_ort_values(
+            ["logits", "k_cache_out", "v_cache_out"],
+            {
+                "token": ortvalue(np.array([[token]], dtype=np.int64)),
+                "position": ortvalue(np.array([prompt.shape[1] + i], dtype=np.int64)),
+                "k_cache": k_cache,
+                "v_cache": v_cache,
+            },
+        )
+        out.append(logits.numpy())
+    return torch.from_numpy(np.concatenate(out, axis=0))
+
+
+def bench_model(args):
+    torch.manual_seed(0)
+    model = build_decoder(args.layers, args.hidden, args.heads)
+    phones = torch.randint(1, 700, (1, args.text_len))
+    bert = torch.randn(1, 1024, args.text_len)
+    prompt = torch.randint(0, 1024, (1, args.prompt_len))
+    tokens = torch.randint(0, 1024, (args.steps,)).tolist()
+
+    with tempfile.TemporaryDirectory() as folder:
+        prefill_path = os.path.join(folder, "t2s_prefill.onnx")
+        decode_path = os.path.join(folder, "t2s_decode.onnx")
+        OnnxBackend.export_t2s(model, prefill_path, decode_path)
+
+        if args.torch_threads > 0:
+            torch.set_num_threads(args.torch_threads)
+        torch_decode(model, phones, bert, prompt, tokens[:10])
+        t0 = time.perf_counter()
+        reference = torch_decode(model, phones, bert, prompt, tokens)
+        torch_ms = (time.perf_counter() - t0) / (args.steps + 1) * 1000
+
+        print(f"torch threads={torch.get_num_threads()}: {torch_ms:.3f} ms/step")
+        print(f"{'ort threads':>11} | {'ms/step':>8} | {'speedup':>7} | {'max |dlogit|':>12} | {'argmax match':>12}")
+        print("-" * 64)
+        for threads in args.threads:
+            backend = OnnxBackend(folder, intra_op_threads=threads)
+            backend.prefill = backend._session(prefill_path)
+            backend.decode = backend._session(decode_path)
+            ort_decode(backend, phones, bert, prompt, tokens[:10])
+            t0 = time.perf_counter()
+            logits = ort_decode(backend, phones, bert, prompt, tokens)
+            ort_ms = (time.perf_counter() - t0) / (args.steps + 1) * 1000
+            diff = (logits - reference).abs().max().item()
+            match = (logits.argmax(-1) == reference.argmax(-1)).float().mean().item()
+            print(f"{threads:>11} | {ort_ms:>8.3f} | {torch_ms / ort_ms:>6.2f}x | {diff:>12.2e} | {match:>12.1%}")
+
+
+def bench_live(args):
+    from TTS_infer_pack.TTS import TTS, TTS_Config
+
+    config = TTS_Config(args.config)
+    config.device = "cpu"
+    config.is_half = False
+    config.backend = "torch"
+    pipeline = TTS(config)
+    inputs = {
+        "text": args.text,
+        "text_lang": args.lang,
+        "ref_audio_path": args.ref_audio,
+        "prompt_text": args.prompt_text,
+        "prompt_lang": args.lang,
+        "top_k": 1,
+        "batch_size": 1,
+        "seed": 1234,
+    }
+
+    def synthesize():
+        t0 = time.perf_counter()
+        sr, audio = next(iter(pipeline.run(dict(inputs))))
+        return time.perf_counter() - t0, len(audio) / sr
+
+    # 토큰 비교용: _predict_semantic 결과를 가로챈다
+    captured = {}
+    predict = pipeline._predict_semantic
+
+    def capture(*a, **kw):
+        result = predict(*a, **kw)
+        captured.setdefault("tokens", []).append([t.tolist() for t in result[0]])
+        return result
+
+    pipeline._predict_semantic = capture
+
+    synthesize()
+    captured.clear()
+    torch_time, audio_len = synthesize()
+    torch_tokens = captured.pop("tokens")
+
+    pipeline.ort_backend = OnnxBackend(config.onnx_dir, args.threads[0], 1)
+    pipeline.ort_backend.load_t2s(pipeline.t2s_model.model, config.t2s_weights_path)
+    pipeline._load_onnx_vits()
+    synthesize()
+    captured.clear()
+    ort_time, ort_audio_len = synthesize()
+    ort_tokens = captured.pop("tokens")
+
+    flat_torch = [t for batch in torch_tokens for seq in batch for t in seq]
+    flat_ort = [t for batch in ort_tokens for seq in batch for t in seq]
+    same = sum(a == b for a, b in zip(flat_torch, flat_ort)) / max(1, max(len(flat_torch), len(flat_ort)))
+
+    # VITS: 같은 토큰, noise_scale=0
+    vits_diff = None
+    if pipeline.ort_backend.has_vits:
+        refer, sv_emb = pipeline._get_refer_inputs()
+        codes = torch.LongTensor(flat_torch[-200:]).view(1, 1, -1)
+        phones = torch.randint(1, 300, (1, 40))
+        with torch.no_grad():
+            kwargs = {"sv_emb": sv_emb} if pipeline.is_v2pro else {}
+            a = pipeline.vits_model.decode(codes, phones, refer[:1], noise_scale=0, **kwargs)[0, 0]
+        b = pipeline.ort_backend.vits_decode(codes, phones, refer[0], sv_emb[0] if pipeline.is_v2pro else None, 0.0)[0, 0]
+        n = min(len(a), len(b))
+        vits_diff = (a[:n] - b[:n]).abs().max().item()
+
+    print(f"{'backend':>12} | {'total s':>8} | {'audio s':>8} | {'RTF':>6}")
+    print("-" * 44)
+    print(f"{'torch':>12} | {torch_time:>8.3f} | {audio_len:>8.2f} | {torch_time / audio_len:>6.3f}")
+    print(f"{'onnxruntime':>12} | {ort_time:>8.3f} | {ort_audio_len:>8.2f} | {ort_time / ort_audio_len:>6.3f}")
+    print(f"greedy semantic token match: {same:.1%}")
+    print(f"VITS max |diff| (noise_scale=0): {vits_diff}")
+    print(f"onnx backend stats: {pipeline.ort_backend.get_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX Runtime backend parity / speed benchmark")
+    parser.add_argument("--mode", choices=["model", "live"], default="model")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4], help="ORT intra-op 스레드 수")
+    parser.add_argument("--torch_threads", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--text_len", type=int, default=60)
+    parser.add_argument("--prompt_len", type=int, default=150)
+    parser.add_argument("--layers", type=int, default=24)
+    parser.add_argument("--hidden", type=int, default=512)
+    parser.add_argument("--heads", type=int, default=16)
+    parser.add_argument("--config", type=str, default="GPT_SoVITS/configs/tts_infer.yaml")
+    parser.add_argument("--ref_audio", type=str, default=None)
+    parser.add_argument("--prompt_text", type=str, default="")
+    parser.add_argument("--text", type=str, default=DEFAULT_TEXT)
+    parser.add_argument("--lang", type=str, default="ko")
+    args = parser.parse_args()
+
+    if args.mode == "live":
+        if not args.ref_audio:
+            parser.error("--mode live 에는 --ref_audio 가 필요합니다")
+        bench_live(args)
+        return
+    bench_model(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+텍스트 분할 방식별 첫 음성 지연(TTFA) / 전체 RTF 벤치마크
+- model 모드 (기본, CPU, 체크포인트 불필요): 분할 결과를 합성 비용 모델(segment_planner.SegmentCostModel)로
+  시뮬레이션해서 조각 수, TTFA, 재생 끊김(stall), RTF 를 비교한다. --fixed/--per_unit/--audio_per_unit 으로
+  실측 계수 (/health 또는 live 모드 출력) 를 넣을 수 있다.
+- live 모드: 실제 파이프라인(TTS.run, return_fragment=True)으로 방식별 TTFA 와 RTF 를 잰다. 측정하면서
+  cut6 의 비용 모델도 보정되므로 마지막에 보정된 계수를 출력한다.
+
+사용법 (GPT-SoVITS 디렉터리에서):
+    python benchmarks/bench_segmentation_latency.py
+    python benchmarks/bench_segmentation_latency.py --fixed 0.2 --per_unit 0.015 --audio_per_unit 0.07
+    python benchmarks/bench_segmentation_latency.py --mode live --ref_audio ref.wav --prompt_text "..." --rounds 3
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "GPT_SoVITS"))
+
+from TTS_infer_pack.segment_planner import SegmentCostModel, cost_model, simulate
+from TTS_infer_pack.text_segmentation_method import get_method
+
+METHODS = ["cut0", "cut1", "cut2", "cut3", "cut4", "cut5", "cut15", "cut6"]
+
+# 상담 응답 길이의 여러 문장 답변
+DEFAULT_CORPUS = [
+    "네, 고객님 확인해 보니 주문하신 상품은 현재 배송 준비 중이며 내일 오후 2시에서 4시 사이에 도착할 예정입니다. "
+    "배송 조회는 문자로 보내 드린 링크에서 하실 수 있고, 일정 변경이 필요하시면 언제든지 말씀해 주세요.",
+    "죄송하지만 말씀하신 계좌 정보로는 본인 확인이 어렵습니다. 등록하신 휴대폰 번호 뒤 네 자리와 생년월일 6자리를 "
+    "말씀해 주시면 다시 확인해 드리겠습니다.",
+    "결제 금액은 총 3.5만 원이며 카드 결제로 처리되었습니다. 영수증은 이메일로 발송되었고, "
+    "할부 변경은 카드사 앱에서 가능합니다. 다른 문의 사항이 있으신가요?",
+    "예약하신 시간은 오전 10시 30분입니다.",
+    "안녕하세요, 무엇을 도와드릴까요?",
+]
+
+
+def split_with(method: str, text: str) -> list:
+    return [t for t in get_method(method)(text).split("\n") if t.strip()]
+
+
+def bench_model(corpus, model: SegmentCostModel):
+    print(f"cost model: {model.stats()}")
+    print(f"{'method':>8} | {'segments':>8} | {'TTFA s':>8} | {'stall s':>8} | {'RTF':>6}")
+    print("-" * 50)
+    for method in METHODS:
+        results = [simulate(split_with(method, text), model) for text in corpus]
+        n = len(results)
+        segments = sum(r["segments"] for r in results) / n
+        ttfa = sum(r["ttfa"] for r in results) / n
+        stall = sum(r["stall"] for r in results) / n
+        rtf = sum(r["synth"] for r in results) / sum(r["audio"] for r in results)
+        print(f"{method:>8} | {segments:>8.2f} | {ttfa:>8.3f} | {stall:>8.3f} | {rtf:>6.3f}")
+
+
+def bench_live(corpus, args):
+    from TTS_infer_pack.TTS import TTS, TTS_Config
+
+    pipeline = TTS(TTS_Config(args.config))
+    base = {
+        "text_lang": args.lang,
+        "ref_audio_path": args.ref_audio,
+        "prompt_text": args.prompt_text,
+        "prompt_lang": args.lang,
+        "return_fragment": True,
+        "batch_size": 1,
+        "seed": 1234,
+    }
+
+    def run_once(method, text):
+        t0 = time.perf_counter()
+        ttfa = None
+        samples = 0
+        sr = 1
+        for sr, chunk in pipeline.run({**base, "text": text, "text_split_method": method}):
+            if ttfa is None:
+                ttfa = time.perf_counter() - t0
+            samples += len(chunk)
+        total = time.perf_counter() - t0
+        return ttfa, total, samples / sr
+
+    # 워밍업 (참조 음성/프롬프트 캐시, CUDA 초기화)
+    run_once("cut0", corpus[0])
+
+    print(f"{'method':>8} | {'TTFA s':>8} | {'total s':>8} | {'audio s':>8} | {'RTF':>6}")
+    print("-" * 52)
+    for method in METHODS:
+        ttfas, totals, audios = [], [], []
+        for _ in range(args.rounds):
+            for text in corpus:
+                ttfa, total, audio = run_once(method, text)
+                ttfas.append(ttfa)
+                totals.append(total)
+                audios.append(audio)
+        print(
+            f"{method:>8} | {sum(ttfas) / len(ttfas):>8.3f} | {sum(totals) / len(totals):>8.3f} | "
+            f"{sum(audios) / len(audios):>8.2f} | {sum(totals) / sum(audios):>6.3f}"
+        )
+    print(f"calibrated cost model: {cost_model.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segmentation latency benchmark")
+    parser.add_argument("--mode", choices=["model", "live"], default="model")
+    parser.add_argument("--corpus", type=str, default=None, help="한 줄에 답변 하나인 텍스트 파일")
+    parser.add_argument("--fixed", type=float, default=None, help="조각당 고정 합성 시간 (초)")
+    parser.add_argument("--per_unit", type=float, default=None, help="unit 당 합성 시간 (초)")
+    parser.add_argument("--audio_per_unit", type=float, default=None, help="unit 당 음성 길이 (초)")
+    parser.add_argument("--config", type=str, default="GPT_SoVITS/configs/tts_infer.yaml")
+    parser.add_argument("--ref_audio", type=str, default=None)
+    parser.add_argument("--prompt_text", type=str, default="")
+    parser.add_argument("--lang", type=str, default="ko")
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    corpus = DEFAULT_CORPUS
+    if args.corpus is not None:
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            corpus = [line.strip() for line in f if line.strip()]
+
+    if args.mode == "live":
+        if not args.ref_audio:
+            parser.error("--mode live 에는 --ref_audio 가 필요합니다")
+        bench_live(corpus, args)
+        return
+
+    for key in ("fixed", "per_unit", "audio_per_unit"):
+        value = getattr(args, key)
+        if value is not None:
+            setattr(cost_model, key, value)
+    bench_model(corpus, cost_model)
+
+
+if __name__ == "__main__":
+    main()
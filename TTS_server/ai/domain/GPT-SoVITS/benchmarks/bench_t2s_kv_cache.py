@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+T2S 디코더 KV 캐시 벤치마크 (CPU)
+torch.cat 기반 동적 캐시와 사전 할당 정적 캐시의 스텝당 디코딩 시간을 비교한다.
+랜덤 초기화한 작은 모델을 사용하므로 체크포인트 없이 실행 가능.
+
+사용법:
+    python benchmarks/bench_t2s_kv_cache.py --steps 1000 --batch 1 --layers 12
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "GPT_SoVITS"))
+
+import torch
+
+from AR.models.t2s_model import Text2SemanticDecoder
+
+
+def build_decoder(layers: int, hidden: int, heads: int) -> Text2SemanticDecoder:
+    config = {
+        "model": {
+            "vocab_size": 1025,
+            "phoneme_vocab_size": 732,
+            "embedding_dim": hidden,
+            "hidden_dim": hidden,
+            "head": heads,
+            "linear_units": hidden * 4,
+            "n_layer": layers,
+            "dropout": 0,
+            "EOS": 1024,
+        }
+    }
+    return Text2SemanticDecoder(config=config).eval()
+
+
+@torch.no_grad()
+def run_decode(model: Text2SemanticDecoder, batch: int, prompt_len: int, steps: int, static: bool, window: int):
+    transformer = model.t2s_transformer
+    xy_pos = torch.randn(batch, prompt_len, model.model_dim)
+    attn_mask = torch.zeros(batch, model.num_head, prompt_len, prompt_len, dtype=torch.bool)
+    x = torch.randn(batch, 1, model.model_dim)
+
+    _, k_cache, v_cache = transformer.process_prompt(xy_pos, attn_mask, None)
+    if static:
+        k_cache, v_cache = transformer.init_static_cache(k_cache, v_cache, prompt_len + steps)
+
+    kv_len = prompt_len
+    window_times = []
+    t_window = time.perf_counter()
+    for idx in range(steps):
+        if static:
+            _, k_cache, v_cache = transformer.decode_next_token_static(x, k_cache, v_cache, kv_len)
+        else:
+            _, k_cache, v_cache = transformer.decode_next_token(x, k_cache, v_cache)
+        kv_len += 1
+        if (idx + 1) % window == 0:
+            now = time.perf_counter()
+            window_times.append((now - t_window) / window * 1000)
+            t_window = now
+    return window_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="T2S static KV cache benchmark")
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--prompt_len", type=int, default=200)
+    parser.add_argument("--layers", type=int, default=12)
+    parser.add_argument("--hidden", type=int, default=512)
+    parser.add_argument("--heads", type=int, default=16)
+    parser.add_argument("--window", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    model = build_decoder(args.layers, args.hidden, args.heads)
+
+    # 워밍업
+    run_decode(model, args.batch, args.prompt_len, args.window, False, args.window)
+    run_decode(model, args.batch, args.prompt_len, args.window, True, args.window)
+
+    dynamic = run_decode(model, args.batch, args.prompt_len, args.steps, False, args.window)
+    static = run_decode(model, args.batch, args.prompt_len, args.steps, True, args.window)
+
+    print(f"{'steps':>10} | {'dynamic ms/step':>16} | {'static ms/step':>15}")
+    print("-" * 48)
+    for i, (d, s) in enumerate(zip(dynamic, static)):
+        print(f"{(i + 1) * args.window:>10} | {d:>16.3f} | {s:>15.3f}")
+    print("-" * 48)
+    print(f"{'mean':>10} | {sum(dynamic) / len(dynamic):>16.3f} | {sum(static) / len(static):>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
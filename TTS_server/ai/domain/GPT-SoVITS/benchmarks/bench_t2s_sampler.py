@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+T2S 샘플링 커널 벤치마크 (CPU/GPU)
+- sample: 기존 커널 (배치 전체가 같은 파라미터, top-p 에서 전체 어휘 정렬)
+- per-row: 요청마다 파라미터가 다를 때 기존 커널로 행마다 따로 샘플링하는 경우
+- batched: sample_batched (행별 top_k/top_p/temperature/repetition_penalty, topk 후보 안에서만 top-p)
+- batched+seed: sample_batched + 행별 torch.Generator
+디코더 한 스텝 시간(decode)도 같이 재서 샘플링이 스텝 비용에서 차지하는 비율을 본다.
+마지막에 시드를 준 행이 다른 요청과 섞여도 같은 토큰을 뽑는지 확인한다.
+
+사용법:
+    python benchmarks/bench_t2s_sampler.py --batches 1 4 8 16 --steps 200
+    python benchmarks/bench_t2s_sampler.py --device cuda --history 600
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "GPT_SoVITS"))
+
+import torch
+
+from AR.models.t2s_model import Text2SemanticDecoder
+from AR.models.utils import make_sampling_params, sample, sample_batched
+
+VOCAB = 1025
+
+
+def build_decoder(layers: int, hidden: int, heads: int, device: str) -> Text2SemanticDecoder:
+    config = {
+        "model": {
+            "vocab_size": VOCAB,
+            "phoneme_vocab_size": 732,
+            "embedding_dim": hidden,
+            "hidden_dim": hidden,
+            "head": heads,
+            "linear_units": hidden * 4,
+            "n_layer": layers,
+            "dropout": 0,
+            "EOS": 1024,
+        }
+    }
+    return Text2SemanticDecoder(config=config).eval().to(device)
+
+
+def mixed_params(batch: int):
+    # 서로 다른 요청이 섞인 배치
+    presets = [(5, 1.0, 1.0, 1.35), (15, 0.8, 0.7, 1.2), (50, 0.95, 1.2, 1.0), (0, 0.6, 1.0, 1.35)]
+    rows = [presets[i % len(presets)] for i in range(batch)]
+    return {key: [row[i] for row in rows] for i, key in enumerate(["top_k", "top_p", "temperature", "repetition_penalty"])}
+
+
+def sync(device: str):
+    if device.startswith("cuda"):
+        torch.cuda.synchronize()
+
+
+@torch.no_grad()
+def time_ms(fn, steps: int, device: str) -> float:
+    for _ in range(10):
+        fn()
+    sync(device)
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        fn()
+    sync(device)
+    return (time.perf_counter() - t0) / steps * 1000
+
+
+@torch.no_grad()
+def bench(batch: int, args, decoder) -> dict:
+    device = args.device
+    logits = torch.randn(batch, VOCAB, device=device) * 3
+    history = torch.randint(0, VOCAB, (batch, args.history), device=device)
+    mixed = mixed_params(batch)
+    uniform = make_sampling_params(batch, device)
+    params = make_sampling_params(batch, device, **mixed)
+    generators = [torch.Generator(device=device).manual_seed(1234 + i) for i in range(batch)]
+
+    results = {
+        "sample": time_ms(
+            lambda: sample(logits.clone(), history, top_k=15, top_p=0.8, temperature=0.7, repetition_penalty=1.35),
+            args.steps,
+            device,
+        ),
+        "per-row": time_ms(
+            lambda: [
+                sample(
+                    logits[i : i + 1].clone(),
+                    history[i : i + 1],
+                    top_k=mixed["top_k"][i] if mixed["top_k"][i] > 0 else None,
+                    top_p=mixed["top_p"][i],
+                    temperature=mixed["temperature"][i],
+                    repetition_penalty=mixed["repetition_penalty"][i],
+                )
+                for i in range(batch)
+            ],
+            args.steps,
+            device,
+        ),
+        "batched": time_ms(lambda: sample_batched(logits.clone(), history, params), args.steps, device),
+        "batched+seed": time_ms(
+            lambda: sample_batched(logits.clone(), history, params, generators), args.steps, device
+        ),
+        "uniform": time_ms(lambda: sample_batched(logits.clone(), history, uniform), args.steps, device),
+    }
+
+    if decoder is not None:
+        transformer = decoder.t2s_transformer
+        xy_pos = torch.randn(batch, args.history, decoder.model_dim, device=device)
+        attn_mask = torch.zeros(batch, decoder.num_head, args.history, args.history, dtype=torch.bool, device=device)
+        x = torch.randn(batch, 1, decoder.model_dim, device=device)
+        _, k_cache, v_cache = transformer.process_prompt(xy_pos, attn_mask, None)
+        k_cache, v_cache = transformer.init_static_cache(k_cache, v_cache, args.history + 1)
+        results["decode"] = time_ms(
+            lambda: transformer.decode_next_token_static(x, k_cache, v_cache, args.history), args.steps, device
+        )
+    return results
+
+
+@torch.no_grad()
+def check_reproducible(args) -> bool:
+    """시드를 준 행이 혼자일 때와 다른 요청과 섞였을 때 같은 토큰 열을 뽑는지"""
+    device = args.device
+    torch.manual_seed(0)
+    logits = torch.randn(50, 4, VOCAB, device=device) * 3
+    history = torch.randint(0, VOCAB, (4, 20), device=device)
+    mixed = mixed_params(4)
+
+    def run(rows):
+        params = make_sampling_params(len(rows), device, **{k: [v[i] for i in rows] for k, v in mixed.items()})
+        generators = [torch.Generator(device=device).manual_seed(42) if i == 0 else None for i in rows]
+        tokens = []
+        for step in range(logits.shape[0]):
+            torch.manual_seed(step)  # 시드 없는 행이 쓰는 전역 난수는 매번 달라진다
+            tokens.append(sample_batched(logits[step, rows].clone(), history[rows], params, generators)[0][0, 0].item())
+        return tokens
+
+    return run([0]) == run([0, 1, 2, 3])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="T2S batched sampler benchmark")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--history", type=int, default=300, help="이미 생성된 토큰 수 (repetition penalty 대상)")
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--layers", type=int, default=24, help="0 이면 decode 스텝 측정 생략")
+    parser.add_argument("--hidden", type=int, default=512)
+    parser.add_argument("--heads", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    decoder = build_decoder(args.layers, args.hidden, args.heads, args.device) if args.layers > 0 else None
+
+    columns = ["sample", "per-row", "batched", "batched+seed", "uniform"] + (["decode"] if decoder else [])
+    print("ms/step, vocab=%d history=%d device=%s" % (VOCAB, args.history, args.device))
+    print(f"{'batch':>6} | " + " | ".join(f"{c:>12}" for c in columns))
+    print("-" * (9 + 15 * len(columns)))
+    for batch in args.batches:
+        results = bench(batch, args, decoder)
+        print(f"{batch:>6} | " + " | ".join(f"{results[c]:>12.3f}" for c in columns))
+    print(f"seeded row reproducible in mixed batch: {check_reproducible(args)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+CPU 부하 테스트용 소형 랜덤 초기화 모델 세트 생성 (사전학습 가중치 / GPU 불필요)
+- T2S: 층 수 / 폭을 줄인 Text2SemanticDecoder (max_sec 를 짧게 둬서 조각마다 의미 토큰 수가 일정)
+- SoVITS: v2 SynthesizerTrn (MRTE 가 192/512 채널 고정이라 폭은 그대로, 층 수와 업샘플 채널만 축소)
+- HuBERT: 2층 HubertModel + Wav2Vec2FeatureExtractor (출력 768 차원은 SoVITS 가 고정으로 기대)
+- 참조 음성: 5초짜리 합성 모음 소리 WAV (32 kHz)
+- tts_infer.yaml: 위 경로 + device=cpu, 한국어만 허용 (중국어 BERT 는 만들지 않음)
+
+음성 품질은 의미 없고, 연산 모양(층 수 / 토큰 수 / 샘플 수)만 실제 파이프라인과 같다.
+성능 변경을 GPU 없이 비교할 때 bench_load.py 와 같이 사용.
+
+사용법 (GPT-SoVITS 디렉터리에서):
+    python benchmarks/make_tiny_models.py --out_dir /tmp/tts_tiny
+    TTS_INFER_CONFIG=/tmp/tts_tiny/tts_infer.yaml TTS_REF_AUDIO_PATH=/tmp/tts_tiny/ref.wav \\
+        TTS_REF_PROMPT_TEXT="$(cat /tmp/tts_tiny/ref.txt)" TTS_AUDIO_CACHE_ENABLED=false \\
+        daphne -b 127.0.0.1 -p 5002 TTS_server.asgi:application      # TTS_server 디렉터리에서
+"""
+import argparse
+import os
+import sys
+import wave
+from io import BytesIO
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "GPT_SoVITS"))
+
+import numpy as np
+import torch
+import yaml
+from transformers import HubertConfig, HubertModel, Wav2Vec2FeatureExtractor
+
+from AR.models.t2s_lightning_module import Text2SemanticLightningModule
+from module.models import SynthesizerTrn
+
+REF_PROMPT_TEXT = "저는 인공지능 모델 학습을 위한 음성 데이터를 녹음하고 있어요."
+REF_SECONDS = 5.0
+REF_SR = 32000
+
+
+def build_t2s(args) -> dict:
+    config = {
+        "data": {"max_sec": args.max_sec, "pad_val": 1024},
+        "model": {
+            "vocab_size": 1025,
+            "phoneme_vocab_size": 732,
+            "embedding_dim": args.t2s_hidden,
+            "hidden_dim": args.t2s_hidden,
+            "head": args.t2s_heads,
+            "linear_units": args.t2s_hidden * 4,
+            "n_layer": args.t2s_layers,
+            "dropout": 0,
+            "EOS": 1024,
+            "random_bert": 0,
+        },
+    }
+    model = Text2SemanticLightningModule(config, "****", is_train=False)
+    return {"weight": model.state_dict(), "config": config, "info": "random-init tiny T2S"}
+
+
+def build_vits(args) -> dict:
+    hps = {
+        "train": {"segment_size": 20480},
+        "data": {
+            "max_wav_value": 32768.0,
+            "sampling_rate": 32000,
+            "filter_length": 2048,
+            "hop_length": 640,
+            "win_length": 2048,
+            "n_mel_channels": 128,
+            "mel_fmin": 0.0,
+            "mel_fmax": None,
+            "add_blank": True,
+            "n_speakers": 300,
+            "cleaned_text": True,
+        },
+        "model": {
+            "inter_channels": 192,
+            "hidden_channels": 192,
+            "filter_channels": args.vits_filter_channels,
+            "n_heads": 2,
+            "n_layers": args.vits_layers,
+            "kernel_size": 3,
+            "p_dropout": 0.1,
+            "resblock": "1",
+            "resblock_kernel_sizes": [3, 7, 11],
+            "resblock_dilation_sizes": [[1, 3, 5], [1, 3, 5], [1, 3, 5]],
+            "upsample_rates": [10, 8, 2, 2, 2],
+            "upsample_initial_channel": args.vits_upsample_channels,
+            "upsample_kernel_sizes": [16, 16, 8, 2, 2],
+            "n_layers_q": 3,
+            "use_spectral_norm": False,
+            "gin_channels": 512,
+            "semantic_frame_rate": "25hz",
+            "freeze_quantizer": True,
+            "version": "v2",
+        },
+    }
+    model = SynthesizerTrn(
+        hps["data"]["filter_length"] // 2 + 1,
+        hps["train"]["segment_size"] // hps["data"]["hop_length"],
+        n_speakers=hps["data"]["n_speakers"],
+        **hps["model"],
+    )
+    # 추론에 쓰지 않는 enc_q 는 학습 체크포인트처럼 빼고 저장
+    weight = {k: v for k, v in model.state_dict().items() if "enc_q" not in k}
+    return {"weight": weight, "config": hps, "info": "random-init tiny SoVITS"}
+
+
+def save_vits(ckpt: dict, path: str):
+    # process_ckpt.my_save2 와 같은 방식: zip 헤더 "PK" 대신 버전 바이트 (b"01" = v2) 를 써서
+    # get_sovits_version_from_path_fast 가 파일 크기로 v1 으로 추정하지 않게 한다
+    bio = BytesIO()
+    torch.save(ckpt, bio)
+    data = bio.getvalue()
+    with open(path, "wb") as f:
+        f.write(b"01" + data[2:])
+
+
+def build_hubert(args, path: str):
+    config = HubertConfig(
+        hidden_size=768,
+        num_hidden_layers=args.hubert_layers,
+        num_attention_heads=12,
+        intermediate_size=1024,
+    )
+    HubertModel(config).save_pretrained(path)
+    Wav2Vec2FeatureExtractor(
+        feature_size=1, sampling_rate=16000, padding_value=0.0, do_normalize=True, return_attention_mask=False
+    ).save_pretrained(path)
+
+
+def write_ref_audio(path: str):
+    """기본 주파수가 천천히 흔들리는 배음 + 약한 잡음, 음절처럼 4 Hz 로 진폭 변조 (참조 음성 3~10초 조건 충족)"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(REF_SECONDS * REF_SR)) / REF_SR
+    f0 = 140 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / REF_SR
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.5 * (1 - np.cos(2 * np.pi * 4 * t))
+    audio = 0.3 * voice * envelope + 0.01 * rng.standard_normal(t.shape)
+    pcm = (np.clip(audio / np.abs(audio).max() * 0.8, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(REF_SR)
+        f.writeframes(pcm.tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="random-init tiny GPT-SoVITS model set for CPU load tests")
+    parser.add_argument("--out_dir", type=str, default="tiny_models")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max_sec", type=int, default=3, help="조각당 최대 의미 토큰 길이(초). 랜덤 모델은 EOS 가 거의 안 나와 이 길이까지 생성")
+    parser.add_argument("--t2s_layers", type=int, default=4)
+    parser.add_argument("--t2s_hidden", type=int, default=256)
+    parser.add_argument("--t2s_heads", type=int, default=4)
+    parser.add_argument("--vits_layers", type=int, default=2)
+    parser.add_argument("--vits_filter_channels", type=int, default=384)
+    parser.add_argument("--vits_upsample_channels", type=int, default=128)
+    parser.add_argument("--hubert_layers", type=int, default=2)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    out_dir = os.path.abspath(args.out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {
+        "t2s_weights_path": os.path.join(out_dir, "t2s_tiny.ckpt"),
+        "vits_weights_path": os.path.join(out_dir, "sovits_tiny.pth"),
+        "cnhuhbert_base_path": os.path.join(out_dir, "hubert_tiny"),
+        "ref_audio": os.path.join(out_dir, "ref.wav"),
+    }
+
+    torch.save(build_t2s(args), paths["t2s_weights_path"])
+    save_vits(build_vits(args), paths["vits_weights_path"])
+    build_hubert(args, paths["cnhuhbert_base_path"])
+    write_ref_audio(paths["ref_audio"])
+    with open(os.path.join(out_dir, "ref.txt"), "w", encoding="utf-8") as f:
+        f.write(REF_PROMPT_TEXT)
+
+    config = {
+        "custom": {
+            "device": "cpu",
+            "is_half": False,
+            "version": "v2",
+            "t2s_weights_path": paths["t2s_weights_path"],
+            "vits_weights_path": paths["vits_weights_path"],
+            "cnhuhbert_base_path": paths["cnhuhbert_base_path"],
+            # 중국어 텍스트에만 쓰이고 languages 에서 빠져 있어 로드되지 않음
+            "bert_base_path": os.path.join(out_dir, "bert_unused"),
+            "languages": ["ko", "all_ko"],
+        }
+    }
+    config_path = os.path.join(out_dir, "tts_infer.yaml")
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.dump(config, f, allow_unicode=True)
+
+    print(f"{'file':>22} | {'MB':>8}")
+    print("-" * 80)
+    for name in ("t2s_weights_path", "vits_weights_path", "ref_audio"):
+        print(f"{name:>22} | {os.path.getsize(paths[name]) / 2**20:>8.1f} | {paths[name]}")
+    hubert_mb = sum(
+        os.path.getsize(os.path.join(paths["cnhuhbert_base_path"], f)) for f in os.listdir(paths["cnhuhbert_base_path"])
+    ) / 2**20
+    print(f"{'cnhuhbert_base_path':>22} | {hubert_mb:>8.1f} | {paths['cnhuhbert_base_path']}")
+    print()
+    print("서버 실행 (TTS_server 디렉터리에서):")
+    print(f"    export TTS_INFER_CONFIG={config_path}")
+    print(f"    export TTS_REF_AUDIO_PATH={paths['ref_audio']}")
+    print(f'    export TTS_REF_PROMPT_TEXT="{REF_PROMPT_TEXT}"')
+    print("    export TTS_AUDIO_CACHE_ENABLED=false")
+    print("    daphne -b 127.0.0.1 -p 5002 TTS_server.asgi:application")
+
+
+if __name__ == "__main__":
+    main()
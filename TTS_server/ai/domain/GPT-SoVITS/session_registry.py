@@ -0,0 +1,114 @@
+"""
+세션별 진행 중 합성 관리
+- 같은 세션(phoneId/sessionId)에 새 requestId 가 들어오면 이전 합성을 취소한다
+- 취소는 cancel_event(TTS.run 이 디코딩 스텝/조각 사이에서 확인) + 큐/워커 작업 취소로 전달
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class SessionTicket:
+    """
+    One in-flight synthesis of a session.
+    cancel_event goes into the TTS inputs; attach() registers other handles (scheduler Future, TTSJob)
+    that must be cancelled together with it.
+    """
+
+    def __init__(self, session_key: str, request_id: str):
+        self.session_key = session_key
+        self.request_id = request_id
+        self.cancel_event = threading.Event()
+        self.started_at = time.monotonic()
+        self._handles: List[Any] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def attach(self, handle: Any):
+        """handle 은 cancel() 이 있는 객체. 이미 취소된 티켓이면 바로 취소한다."""
+        with self._lock:
+            self._handles.append(handle)
+            cancelled = self.cancel_event.is_set()
+        if cancelled:
+            handle.cancel()
+
+    def cancel(self):
+        with self._lock:
+            if self.cancel_event.is_set():
+                return
+            self.cancel_event.set()
+            handles = list(self._handles)
+        for handle in handles:
+            try:
+                handle.cancel()
+            except Exception:
+                pass
+
+
+class SessionRegistry:
+    """
+    Tracks the latest request of every session and cancels the superseded one.
+
+    A retry with the same request_id does not cancel the running synthesis.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[str, List[SessionTicket]] = {}
+        self._stats: Dict[str, int] = {
+            "started": 0,
+            "superseded": 0,
+            "cancelled": 0,
+            "finished": 0,
+        }
+
+    def begin(self, session_key: Optional[str], request_id: Optional[str]) -> SessionTicket:
+        ticket = SessionTicket(session_key, request_id)
+        superseded: List[SessionTicket] = []
+        with self._lock:
+            self._stats["started"] += 1
+            if session_key is not None:
+                tickets = self._active.setdefault(session_key, [])
+                superseded = [t for t in tickets if t.request_id != request_id]
+                tickets[:] = [t for t in tickets if t.request_id == request_id]
+                tickets.append(ticket)
+                self._stats["superseded"] += len(superseded)
+        for previous in superseded:
+            print(
+                f"⏹️ [TTS] 세션 {session_key}: 새 요청 {request_id} → 이전 요청 {previous.request_id} 합성 취소"
+            )
+            previous.cancel()
+        return ticket
+
+    def cancel(self, session_key: Optional[str], request_id: Optional[str] = None) -> int:
+        """세션의 진행 중 합성 취소 (request_id 를 주면 그 요청만). 취소한 티켓 수 반환"""
+        with self._lock:
+            tickets = [
+                t for t in self._active.get(session_key, [])
+                if request_id is None or t.request_id == request_id
+            ]
+            self._stats["cancelled"] += len(tickets)
+        for ticket in tickets:
+            ticket.cancel()
+        return len(tickets)
+
+    def end(self, ticket: SessionTicket):
+        with self._lock:
+            self._stats["finished"] += 1
+            tickets = self._active.get(ticket.session_key)
+            if tickets is None:
+                return
+            if ticket in tickets:
+                tickets.remove(ticket)
+            if not tickets:
+                del self._active[ticket.session_key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["active_sessions"] = len(self._active)
+            stats["inflight"] = sum(len(tickets) for tickets in self._active.values())
+        return stats
@@ -0,0 +1,211 @@
+"""
+전화망 출력 인코더
+- 모델 출력(32k/24k/48k int16) → 8 kHz 로 조각 단위 리샘플 (상태 유지 polyphase FIR, 게인은 필터 탭에 포함)
+- 8 kHz PCM16 / G.711 μ-law / G.711 A-law 로 바로 인코딩 (전체 버퍼 float 복사, WAV 재인코딩 없음)
+- 필터는 scipy.signal.resample_poly 와 같은 설계라 한 번에 넣으면 결과도 같다
+"""
+import math
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import firwin
+
+TELEPHONY_SR = 8000
+TELEPHONY_CODECS = ("pcm16", "ulaw", "alaw")
+
+
+@lru_cache(maxsize=16)
+def polyphase_taps(orig_sr: int, target_sr: int, gain_db: float = 0.0):
+    """
+    Low-pass FIR of resample_poly (Kaiser, beta 5) split into `up` phases, reversed for a dot product
+    with the input window, with the output gain folded into the taps.
+
+    Returns:
+        Tuple[int, int, int, np.ndarray]: up, down, delay in upsampled samples and taps of shape (up, K).
+    """
+    g = math.gcd(orig_sr, target_sr)
+    up, down = target_sr // g, orig_sr // g
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    h = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    h = h * up * 10 ** (gain_db / 20.0)
+    taps_per_phase = -(-len(h) // up)
+    h = np.concatenate([h, np.zeros(taps_per_phase * up - len(h))])
+    phases = h.reshape(taps_per_phase, up).T[:, ::-1]
+    return up, down, half_len, np.ascontiguousarray(phases, dtype=np.float32)
+
+
+class StreamingResampler:
+    """
+    Stateful rational resampler fed fragment by fragment.
+
+    The concatenation of process() outputs followed by flush() equals resample_poly over the whole signal
+    (times the gain), so fragments can be encoded as soon as they arrive.
+
+    Args:
+        orig_sr (int): input sampling rate.
+        target_sr (int): output sampling rate.
+        gain_db (float): gain applied inside the filter.
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int = TELEPHONY_SR, gain_db: float = 0.0):
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        self.gain = 10 ** (gain_db / 20.0)
+        self.passthrough = orig_sr == target_sr
+        if not self.passthrough:
+            self.up, self.down, self.delay, self.taps = polyphase_taps(orig_sr, target_sr, float(gain_db))
+            self.num_taps = self.taps.shape[1]
+        self.reset()
+
+    def reset(self):
+        self._n_in = 0
+        self._next_out = 0
+        if not self.passthrough:
+            # 입력 앞쪽(음수 인덱스)은 0 으로 본다
+            self._buf = np.zeros(self.num_taps - 1, dtype=np.float32)
+            self._base = -(self.num_taps - 1)
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        x = to_float32(x)
+        if self.passthrough:
+            self._n_in += len(x)
+            return x * np.float32(self.gain)
+        self._buf = np.concatenate([self._buf, x])
+        self._n_in += len(x)
+        return self._emit(self._base + len(self._buf))
+
+    def flush(self) -> np.ndarray:
+        """남은 꼬리(필터 지연분)를 내보내고 상태를 초기화"""
+        if self.passthrough:
+            self.reset()
+            return np.zeros(0, dtype=np.float32)
+        n_out = -(-self._n_in * self.up // self.down)
+        pad = self.delay // self.up + self.num_taps + 1
+        self._buf = np.concatenate([self._buf, np.zeros(pad, dtype=np.float32)])
+        y = self._emit(self._base + len(self._buf), limit=n_out)
+        self.reset()
+        return y
+
+    def _emit(self, available: int, limit: Optional[int] = None) -> np.ndarray:
+        # 출력 m 은 입력 (m*down + delay)//up 까지 필요
+        end = (self.up * available - 1 - self.delay) // self.down + 1
+        if limit is not None:
+            end = min(end, limit)
+        if end <= self._next_out:
+            return np.zeros(0, dtype=np.float32)
+
+        count = end - self._next_out
+        y = np.empty(count, dtype=np.float32)
+        windows = sliding_window_view(self._buf, self.num_taps)
+        # 출력 m 과 m+up 은 같은 위상이고 입력 위치는 down 만큼 차이 → 위상별로 strided view @ 탭
+        for r in range(min(self.up, count)):
+            n = (self._next_out + r) * self.down + self.delay
+            start = n // self.up - (self.num_taps - 1) - self._base
+            num = len(range(r, count, self.up))
+            y[r :: self.up] = windows[start :: self.down][:num] @ self.taps[n % self.up]
+        self._next_out = end
+
+        # 다음 출력에 필요 없는 입력은 버린다
+        keep_from = (self._next_out * self.down + self.delay) // self.up - (self.num_taps - 1)
+        drop = keep_from - self._base
+        if drop > 0:
+            self._buf = self._buf[drop:]
+            self._base += drop
+        return y
+
+
+def to_float32(x: np.ndarray) -> np.ndarray:
+    if x.dtype == np.int16:
+        return x.astype(np.float32) * np.float32(1.0 / 32768.0)
+    if x.dtype == np.int32:
+        return x.astype(np.float32) * np.float32(1.0 / 2147483648.0)
+    return np.nan_to_num(x.astype(np.float32, copy=False), nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def float_to_pcm16(y: np.ndarray) -> np.ndarray:
+    return np.clip(y * 32767.0, -32768, 32767).astype(np.int16)
+
+
+# ----- G.711 (ITU-T G.711, Sun g711.c 와 같은 변환). int16 전 범위 룩업 테이블로 인코딩 -----
+_SEG_ULAW_END = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+_SEG_ALAW_END = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+
+
+def _linear_to_ulaw(pcm: np.ndarray) -> np.ndarray:
+    pcm = pcm.astype(np.int32) >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    pcm = np.minimum(np.abs(pcm), 8159) + 0x21
+    seg = np.searchsorted(_SEG_ULAW_END, pcm)
+    uval = (seg << 4) | ((pcm >> (seg + 1)) & 0xF)
+    uval = np.where(seg >= 8, 0x7F, uval)
+    return (uval ^ mask).astype(np.uint8)
+
+
+def _linear_to_alaw(pcm: np.ndarray) -> np.ndarray:
+    pcm = pcm.astype(np.int32) >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    pcm = np.where(pcm >= 0, pcm, -pcm - 1)
+    seg = np.searchsorted(_SEG_ALAW_END, pcm)
+    aval = (seg << 4) | ((pcm >> np.where(seg < 2, 1, seg)) & 0xF)
+    aval = np.where(seg >= 8, 0x7F, aval)
+    return (aval ^ mask).astype(np.uint8)
+
+
+_ALL_PCM16 = np.arange(-32768, 32768, dtype=np.int32).astype(np.int16)
+# uint16 로 본 int16 값 → 코드
+_ULAW_TABLE = np.empty(65536, dtype=np.uint8)
+_ULAW_TABLE[_ALL_PCM16.view(np.uint16)] = _linear_to_ulaw(_ALL_PCM16)
+_ALAW_TABLE = np.empty(65536, dtype=np.uint8)
+_ALAW_TABLE[_ALL_PCM16.view(np.uint16)] = _linear_to_alaw(_ALL_PCM16)
+
+
+def encode_pcm16(pcm: np.ndarray) -> bytes:
+    return pcm.astype("<i2", copy=False).tobytes()
+
+
+def encode_ulaw(pcm: np.ndarray) -> bytes:
+    return _ULAW_TABLE[pcm.view(np.uint16)].tobytes()
+
+
+def encode_alaw(pcm: np.ndarray) -> bytes:
+    return _ALAW_TABLE[pcm.view(np.uint16)].tobytes()
+
+
+_ENCODERS = {
+    "pcm16": encode_pcm16,
+    "ulaw": encode_ulaw,
+    "alaw": encode_alaw,
+}
+
+
+class TelephonyEncoder:
+    """
+    Fragment-by-fragment 8 kHz encoder: StreamingResampler + PCM16 / G.711 μ-law / A-law.
+
+    Args:
+        orig_sr (int): sampling rate of the model output.
+        codec (str): one of TELEPHONY_CODECS.
+        gain_db (float): output gain, folded into the resampling filter.
+        target_sr (int): output sampling rate.
+    """
+
+    def __init__(self, orig_sr: int, codec: str = "pcm16", gain_db: float = 0.0, target_sr: int = TELEPHONY_SR):
+        if codec not in _ENCODERS:
+            raise ValueError(f"unsupported telephony codec: {codec}")
+        self.codec = codec
+        self.sample_rate = target_sr
+        self.resampler = StreamingResampler(orig_sr, target_sr, gain_db)
+        self._encode = _ENCODERS[codec]
+
+    def encode(self, chunk: np.ndarray) -> bytes:
+        return self._encode(float_to_pcm16(self.resampler.process(chunk)))
+
+    def flush(self) -> bytes:
+        return self._encode(float_to_pcm16(self.resampler.flush()))
+
+    def encode_all(self, data: np.ndarray) -> bytes:
+        """한 번에 합성된 오디오 전체 인코딩"""
+        return self.encode(data) + self.flush()
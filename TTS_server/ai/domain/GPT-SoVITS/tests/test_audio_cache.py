@@ -0,0 +1,196 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from audio_cache import AudioCache, file_identity, make_key, normalize_text
+
+
+def _cache(tmp_path, max_bytes: int = 1024 * 1024, **kwargs) -> AudioCache:
+    return AudioCache(str(tmp_path / "cache"), max_mb=max_bytes / 1024 / 1024, **kwargs)
+
+
+def test_make_key_normalizes_text_and_ignores_dict_order():
+    a = make_key({"text": normalize_text("  안녕하세요\n  반갑습니다 "), "seed": 1})
+    b = make_key({"seed": 1, "text": normalize_text("안녕하세요 반갑습니다")})
+    assert a == b
+    assert a != make_key({"seed": 2, "text": "안녕하세요 반갑습니다"})
+
+
+def test_file_identity_changes_with_content(tmp_path):
+    path = tmp_path / "ref.wav"
+    path.write_bytes(b"a")
+    before = file_identity(str(path))
+    path.write_bytes(b"ab")
+    assert file_identity(str(path)) != before
+    assert file_identity(None) == [None]
+    assert file_identity(str(tmp_path / "missing.wav"))[1:] == [None, None]
+
+
+def test_put_get_round_trip(tmp_path):
+    cache = _cache(tmp_path)
+    key = make_key({"text": "a"})
+    assert cache.get(key) is None
+    cache.put(key, b"RIFF....")
+    assert cache.get(key) == b"RIFF...."
+    assert os.path.exists(cache._path(key))
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = _cache(tmp_path, max_bytes=250)
+    keys = [make_key({"n": i}) for i in range(3)]
+    cache.put(keys[0], b"0" * 100)
+    cache.put(keys[1], b"1" * 100)
+    assert cache.get(keys[0]) is not None  # keys[0] 을 최근 사용으로
+    cache.put(keys[2], b"2" * 100)
+
+    assert cache.get(keys[1]) is None
+    assert not os.path.exists(cache._path(keys[1]))
+    assert cache.get(keys[0]) == b"0" * 100
+    assert cache.get(keys[2]) == b"2" * 100
+    assert cache.stats()["evictions"] == 1
+    assert cache.total_bytes == 200
+
+
+def test_oversized_entry_is_not_stored(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10)
+    key = make_key({"n": 0})
+    cache.put(key, b"x" * 11)
+    assert cache.get(key) is None
+
+
+def test_index_survives_restart_in_lru_order(tmp_path):
+    cache = _cache(tmp_path, max_bytes=250)
+    keys = [make_key({"n": i}) for i in range(2)]
+    for i, key in enumerate(keys):
+        cache.put(key, bytes([i]) * 100)
+        # 수정시각 = 마지막 사용 시각. 같은 시각이 되지 않게 간격을 둔다
+        os.utime(cache._path(key), (time.time() + i, time.time() + i))
+    # 쓰다 만 임시 파일은 재시작 때 정리
+    stale_tmp = os.path.join(os.path.dirname(cache._path(keys[0])), "abc.tmp")
+    open(stale_tmp, "wb").close()
+
+    reopened = _cache(tmp_path, max_bytes=250)
+    assert reopened.stats()["entries"] == 2
+    assert not os.path.exists(stale_tmp)
+    reopened.put(make_key({"n": 2}), b"2" * 100)
+    assert reopened.get(keys[0]) is None
+    assert reopened.get(keys[1]) == bytes([1]) * 100
+
+
+def test_disabled_cache_always_calls_producer(tmp_path):
+    cache = _cache(tmp_path, enabled=False)
+    calls = []
+    for _ in range(2):
+        assert cache.get_or_create("k", lambda: calls.append(1) or b"audio") == b"audio"
+    assert len(calls) == 2
+    assert not os.path.exists(tmp_path / "cache")
+
+
+def test_get_or_create_hits_after_first_call(tmp_path):
+    cache = _cache(tmp_path)
+    key = make_key({"text": "a"})
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_create(key, lambda: calls.append(1) or b"audio") == b"audio"
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"]) == (1, 2)
+
+
+def _run_concurrently(cache: AudioCache, key: str, producers: list) -> list:
+    """첫 producer 가 시작한 뒤 나머지 호출을 같은 키로 동시에 시작한다"""
+    results = [None] * len(producers)
+    errors = [None] * len(producers)
+
+    def call(i):
+        try:
+            results[i] = cache.get_or_create(key, producers[i])
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(producers))]
+    threads[0].start()
+    deadline = time.monotonic() + 5
+    while cache.stats()["inflight"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()["single_flight_joined"] < len(producers) - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return threads, results, errors
+
+
+def test_single_flight_runs_producer_once(tmp_path):
+    cache = _cache(tmp_path)
+    key = make_key({"text": "a"})
+    release = threading.Event()
+    calls = []
+
+    def producer():
+        calls.append(1)
+        release.wait(5)
+        return b"audio"
+
+    threads, results, errors = _run_concurrently(cache, key, [producer] * 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [b"audio"] * 4
+    assert errors == [None] * 4
+    assert len(calls) == 1
+    assert cache.stats()["single_flight_joined"] == 3
+
+
+def test_waiters_produce_themselves_when_owner_fails(tmp_path):
+    cache = _cache(tmp_path)
+    key = make_key({"text": "a"})
+    release = threading.Event()
+
+    def failing_owner():
+        release.wait(5)
+        raise RuntimeError("cancelled")
+
+    def waiter():
+        return b"own"
+
+    threads, results, errors = _run_concurrently(cache, key, [failing_owner, waiter])
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert isinstance(errors[0], RuntimeError)
+    assert results[1] == b"own"
+    # 실패한 결과는 저장하지 않고, 대기자가 만든 결과도 get_or_create 의 owner 가 아니라서 저장되지 않는다
+    assert cache.get(key) is None
+
+
+def test_non_bytes_result_is_not_cached_or_shared(tmp_path):
+    cache = _cache(tmp_path)
+    key = make_key({"text": "a"})
+    release = threading.Event()
+    error_response = {"message": "tts failed"}
+
+    def owner():
+        release.wait(5)
+        return error_response
+
+    threads, results, errors = _run_concurrently(cache, key, [owner, lambda: b"retried"])
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [error_response, b"retried"]
+    assert cache.get(key) is None
+
+
+@pytest.mark.parametrize("data", [b"", bytearray(b"abc")])
+def test_only_non_empty_bytes_are_stored(tmp_path, data):
+    cache = _cache(tmp_path)
+    key = make_key({"text": "a"})
+    assert cache.get_or_create(key, lambda: data) == data
+    assert (cache.get(key) is not None) == (len(data) > 0)
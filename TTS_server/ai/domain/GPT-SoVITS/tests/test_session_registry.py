@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from session_registry import SessionRegistry
+
+
+class Handle:
+    """scheduler Future / TTSJob 대역"""
+
+    def __init__(self):
+        self.cancelled = 0
+
+    def cancel(self):
+        self.cancelled += 1
+        return True
+
+
+def test_new_request_id_cancels_previous_ticket_and_handles():
+    registry = SessionRegistry()
+    first = registry.begin("phone-1", "req-1")
+    handle = Handle()
+    first.attach(handle)
+
+    second = registry.begin("phone-1", "req-2")
+    assert first.cancelled
+    assert handle.cancelled == 1
+    assert not second.cancelled
+    assert registry.stats()["superseded"] == 1
+
+    # 이미 취소된 티켓에 붙이는 핸들은 바로 취소
+    late = Handle()
+    first.attach(late)
+    assert late.cancelled == 1
+    # 두 번 취소해도 핸들은 한 번만
+    first.cancel()
+    assert handle.cancelled == 1
+
+
+def test_retry_with_same_request_id_does_not_cancel():
+    registry = SessionRegistry()
+    first = registry.begin("phone-1", "req-1")
+    retry = registry.begin("phone-1", "req-1")
+    assert not first.cancelled and not retry.cancelled
+    assert registry.stats()["inflight"] == 2
+
+    registry.begin("phone-1", "req-2")
+    assert first.cancelled and retry.cancelled
+
+
+def test_sessions_are_independent():
+    registry = SessionRegistry()
+    a = registry.begin("phone-1", "req-1")
+    b = registry.begin("phone-2", "req-1")
+    registry.begin("phone-2", "req-2")
+    assert not a.cancelled
+    assert b.cancelled
+
+
+def test_no_session_key_is_never_superseded():
+    registry = SessionRegistry()
+    a = registry.begin(None, "req-1")
+    b = registry.begin(None, "req-2")
+    assert not a.cancelled and not b.cancelled
+    assert registry.stats()["active_sessions"] == 0
+
+
+def test_end_removes_ticket_and_empty_session():
+    registry = SessionRegistry()
+    ticket = registry.begin("phone-1", "req-1")
+    assert registry.stats()["active_sessions"] == 1
+    registry.end(ticket)
+    registry.end(ticket)
+    stats = registry.stats()
+    assert (stats["active_sessions"], stats["inflight"], stats["finished"]) == (0, 0, 2)
+
+
+def test_cancel_by_session_and_request_id():
+    registry = SessionRegistry()
+    first = registry.begin("phone-1", "req-1")
+    retry = registry.begin("phone-1", "req-1")
+    assert registry.cancel("phone-1", "req-2") == 0
+    assert registry.cancel("phone-1", "req-1") == 2
+    assert first.cancelled and retry.cancelled
+    assert registry.cancel("phone-9") == 0
+    assert registry.stats()["cancelled"] == 2
+
+
+def test_concurrent_requests_leave_only_the_last_one_running():
+    registry = SessionRegistry()
+    tickets = {}
+    barrier = threading.Barrier(8)
+
+    def request(i):
+        barrier.wait()
+        tickets[i] = registry.begin("phone-1", f"req-{i}")
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    running = [t for t in tickets.values() if not t.cancelled]
+    assert len(running) == 1
+    assert registry.stats()["inflight"] == 1
+    assert registry.stats()["superseded"] == 7
@@ -0,0 +1,97 @@
+import os
+import sys
+import warnings
+
+import numpy as np
+import pytest
+from scipy.signal import resample_poly
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from telephony import TELEPHONY_SR, StreamingResampler, TelephonyEncoder, encode_alaw, encode_ulaw
+
+with warnings.catch_warnings():
+    # Python 3.13 에서 제거됨 → 그때는 G.711 비교 테스트만 건너뛴다
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+ALL_PCM16 = np.arange(-32768, 32768, dtype=np.int32).astype(np.int16)
+
+
+def _test_signal(sr: int, seconds: float = 0.7) -> np.ndarray:
+    rng = np.random.default_rng(sr)
+    t = np.arange(int(sr * seconds)) / sr
+    x = 0.4 * np.sin(2 * np.pi * 440 * t) + 0.2 * np.sin(2 * np.pi * 3700 * t) + 0.05 * rng.standard_normal(t.shape)
+    return x.astype(np.float32)
+
+
+def _stream(resampler: StreamingResampler, x: np.ndarray, chunk_sizes) -> np.ndarray:
+    out, pos, i = [], 0, 0
+    while pos < len(x):
+        size = chunk_sizes[i % len(chunk_sizes)]
+        out.append(resampler.process(x[pos : pos + size]))
+        pos += size
+        i += 1
+    out.append(resampler.flush())
+    return np.concatenate(out)
+
+
+@pytest.mark.parametrize("orig_sr", [32000, 24000, 48000, 22050])
+@pytest.mark.parametrize("gain_db", [0.0, 10.0])
+def test_streaming_resampler_matches_resample_poly(orig_sr, gain_db):
+    x = _test_signal(orig_sr)
+    resampler = StreamingResampler(orig_sr, TELEPHONY_SR, gain_db)
+    expected = resample_poly(x.astype(np.float64), resampler.up, resampler.down) * 10 ** (gain_db / 20.0)
+
+    # 조각 크기가 고르지 않아도 (1 샘플 조각 포함) 한 번에 넣은 결과와 같아야 한다
+    y = _stream(resampler, x, [1, 37, 1000, 4096, 5])
+    assert len(y) == len(expected)
+    np.testing.assert_allclose(y, expected, atol=2e-5)
+
+    # flush 뒤에는 상태가 초기화되어 같은 입력에 같은 출력
+    np.testing.assert_array_equal(_stream(resampler, x, [len(x)]), _stream(resampler, x, [len(x)]))
+
+
+def test_streaming_resampler_passthrough_applies_gain():
+    x = _test_signal(TELEPHONY_SR)
+    resampler = StreamingResampler(TELEPHONY_SR, TELEPHONY_SR, gain_db=6.0)
+    y = _stream(resampler, x, [100])
+    np.testing.assert_allclose(y, x * 10 ** (6.0 / 20.0), rtol=1e-6)
+
+
+def test_int16_input_is_scaled():
+    x = _test_signal(32000)
+    pcm = (x * 32768).astype(np.int16)
+    a = _stream(StreamingResampler(32000), pcm, [640])
+    b = _stream(StreamingResampler(32000), pcm.astype(np.float32) / 32768, [640])
+    np.testing.assert_allclose(a, b, atol=1e-7)
+
+
+@pytest.mark.skipif(audioop is None, reason="audioop is not available")
+def test_ulaw_matches_audioop():
+    assert encode_ulaw(ALL_PCM16) == audioop.lin2ulaw(ALL_PCM16.tobytes(), 2)
+
+
+@pytest.mark.skipif(audioop is None, reason="audioop is not available")
+def test_alaw_matches_audioop():
+    assert encode_alaw(ALL_PCM16) == audioop.lin2alaw(ALL_PCM16.tobytes(), 2)
+
+
+@pytest.mark.parametrize("codec", ["pcm16", "ulaw", "alaw"])
+def test_encoder_fragments_equal_encode_all(codec):
+    pcm = (_test_signal(32000) * 32767).astype(np.int16)
+    whole = TelephonyEncoder(32000, codec, gain_db=10.0).encode_all(pcm)
+    encoder = TelephonyEncoder(32000, codec, gain_db=10.0)
+    fragments = b"".join(encoder.encode(pcm[i : i + 3000]) for i in range(0, len(pcm), 3000)) + encoder.flush()
+    assert fragments == whole
+    samples = -(-len(pcm) * TELEPHONY_SR // 32000)
+    assert len(whole) == samples * (2 if codec == "pcm16" else 1)
+
+
+def test_encoder_rejects_unknown_codec():
+    with pytest.raises(ValueError):
+        TelephonyEncoder(32000, "opus")
@@ -0,0 +1,174 @@
+import importlib.util
+import os
+import queue
+import sys
+import threading
+import time
+import types
+from concurrent.futures import CancelledError
+
+import pytest
+
+# GPT-SoVITS 디렉터리 (api_v2.py 와 같은 sys.path 구성)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "GPT_SoVITS"))
+
+import worker_pool
+from session_registry import SessionRegistry
+
+
+class FakeTTS:
+    """텍스트마다 release 될 때까지(또는 cancel_event 까지) 멈춰 있는 TTS 대역"""
+
+    def __init__(self, config=None):
+        self.started = {}
+        self.release = {}
+        self.ran = []
+        self.stop_calls = 0
+
+    def _event(self, events, text):
+        return events.setdefault(text, threading.Event())
+
+    def run(self, inputs):
+        text = inputs["text"]
+        self.ran.append(text)
+        self._event(self.started, text).set()
+        release = self._event(self.release, text)
+        while not release.is_set():
+            if inputs["cancel_event"].is_set():
+                return
+            time.sleep(0.005)
+        yield 32000, text
+
+    def stop(self):
+        self.stop_calls += 1
+
+
+@pytest.fixture
+def fake_tts(monkeypatch):
+    tts = FakeTTS()
+    fake_torch = types.ModuleType("torch")
+    fake_torch.set_num_threads = lambda n: None
+    fake_torch.device = lambda name: name
+    fake_tts_module = types.ModuleType("GPT_SoVITS.TTS_infer_pack.TTS")
+    fake_tts_module.TTS = lambda config: tts
+    fake_tts_module.TTS_Config = lambda path: types.SimpleNamespace(device="cpu", is_half=False)
+    monkeypatch.setitem(sys.modules, "torch", fake_torch)
+    monkeypatch.setitem(sys.modules, "GPT_SoVITS.TTS_infer_pack.TTS", fake_tts_module)
+    if "TTS_infer_pack.metrics" not in sys.modules:
+        # 패키지 __init__ (TTS.py → torch) 을 거치지 않고 metrics.py 만 불러온다 (표준 라이브러리만 사용)
+        spec = importlib.util.spec_from_file_location(
+            "TTS_infer_pack.metrics", os.path.join(ROOT_DIR, "GPT_SoVITS", "TTS_infer_pack", "metrics.py")
+        )
+        metrics_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(metrics_module)
+        monkeypatch.setitem(sys.modules, "TTS_infer_pack.metrics", metrics_module)
+    return tts
+
+
+class _ThreadProcess:
+    """워커 프로세스 대신 같은 프로세스의 스레드에서 _worker_main 실행"""
+
+    def __init__(self, target, args, name, daemon):
+        self._thread = threading.Thread(target=target, args=args, name=name, daemon=daemon)
+        self.pid = None
+        self.exitcode = None
+
+    def start(self):
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+
+class _ThreadContext:
+    Queue = staticmethod(queue.Queue)
+    Process = _ThreadProcess
+
+
+def _thread_pool(**kwargs) -> worker_pool.TTSWorkerPool:
+    pool = worker_pool.TTSWorkerPool("unused.yaml", **kwargs)
+    pool._ctx = _ThreadContext()
+    pool._result_queue = queue.Queue()
+    return pool
+
+
+def _run_worker(job_queue, control_queue, result_queue) -> threading.Thread:
+    thread = threading.Thread(
+        target=worker_pool._worker_main,
+        args=(0, "unused.yaml", None, 0, job_queue, control_queue, result_queue),
+        daemon=True,
+    )
+    thread.start()
+    assert result_queue.get(timeout=5)[0] == "ready"
+    return thread
+
+
+def _next_result(result_queue) -> tuple:
+    while True:
+        kind, _, job_id, data = result_queue.get(timeout=5)
+        if kind != "spans":
+            return kind, job_id, data
+
+
+def test_cancel_before_worker_picks_up_job(fake_tts):
+    job_queue, control_queue, result_queue = queue.Queue(), queue.Queue(), queue.Queue()
+    thread = _run_worker(job_queue, control_queue, result_queue)
+
+    job_queue.put((1, "tts", ({"text": "busy"}, False)))
+    assert fake_tts._event(fake_tts.started, "busy").wait(5)
+    # 작업 2 는 워커에 넘어갔지만 아직 시작 전 → 이때 온 취소가 버려지면 안 된다
+    job_queue.put((2, "tts", ({"text": "superseded"}, False)))
+    control_queue.put(("cancel", 2))
+    deadline = time.monotonic() + 5
+    while not control_queue.empty() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    time.sleep(0.05)
+    fake_tts._event(fake_tts.release, "busy").set()
+
+    assert _next_result(result_queue) == ("done", 1, (32000, "busy"))
+    kind, job_id, _ = _next_result(result_queue)
+    assert (kind, job_id) == ("error", 2)
+    assert fake_tts.ran == ["busy"]
+
+    job_queue.put(None)
+    thread.join(5)
+
+
+def test_new_request_id_supersedes_running_job_of_same_session(fake_tts):
+    pool = _thread_pool(num_workers=1)
+    registry = SessionRegistry()
+    results = {}
+
+    def request(request_id: str, text: str):
+        # api_v2.synthesize_payload 와 같은 순서: begin → submit → attach → result
+        ticket = registry.begin("phone-1", request_id)
+        job = pool.submit({"text": text})
+        ticket.attach(job)
+        try:
+            results[request_id] = job.result(timeout=5)
+        except CancelledError as e:
+            results[request_id] = e
+        finally:
+            registry.end(ticket)
+
+    first = threading.Thread(target=request, args=("req-1", "first"))
+    second = threading.Thread(target=request, args=("req-2", "second"))
+    first.start()
+    assert fake_tts._event(fake_tts.started, "first").wait(5)
+    fake_tts._event(fake_tts.release, "second").set()
+    second.start()
+    first.join(5)
+    second.join(5)
+    try:
+        assert isinstance(results["req-1"], CancelledError)
+        assert results["req-2"] == (32000, "second")
+        assert fake_tts.stop_calls >= 1
+        assert pool.stats()["cancelled"] == 1
+        assert registry.stats()["superseded"] == 1
+    finally:
+        pool.shutdown()
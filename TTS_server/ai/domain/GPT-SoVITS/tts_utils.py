@@ -217,7 +217,7 @@ class TTSProcessor:
     def set_gpt_weights(self, weights_path: str):
         """GPT 모델 가중치 변경"""
         try:
-            self.tts_pipeline.init_t2s_weights(weights_path)
+            self.tts_pipeline.swap_t2s_weights(weights_path)
             return {"success": True}
         except Exception as e:
             return {"error": f"GPT 가중치 변경 실패: {str(e)}"}
@@ -225,7 +225,7 @@ class TTSProcessor:
     def set_sovits_weights(self, weights_path: str):
         """SoVITS 모델 가중치 변경"""
         try:
-            self.tts_pipeline.init_vits_weights(weights_path)
+            self.tts_pipeline.swap_vits_weights(weights_path)
             return {"success": True}
         except Exception as e:
             return {"error": f"SoVITS 가중치 변경 실패: {str(e)}"}
@@ -0,0 +1,97 @@
+"""
+서버 시작 워밍업 + liveness / readiness
+- 대표 문장을 설정된 batch_size 마다 미리 합성해서 커널 선택, 메모리 할당자 확장, g2pk2/Mecab 사전 로딩,
+  참조 음성 인코딩(prompt 캐시)을 첫 실제 요청 전에 끝낸다
+- 워밍업이 끝나기 전까지 ready=False → /health/ready 가 503 이라 로드밸런서가 콜드 레플리카로 보내지 않는다
+- 프로세스가 요청에 응답하면 live (워밍업 여부와 무관)
+"""
+import threading
+import time
+import traceback
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class TTSWarmup:
+    """
+    Runs the warm-up steps once, in order, and tracks readiness.
+
+    Args:
+        steps (list): (name, callable) pairs; a callable may return the seconds of each synthesis it ran.
+        enabled (bool): False marks the server ready right away.
+        required (bool): when False a failed warm-up still marks the server ready (cold, but serving).
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], Any]]], enabled: bool = True, required: bool = False):
+        self.steps = steps
+        self.enabled = enabled
+        self.required = required
+        self.status: str = "pending" if enabled else "disabled"
+        self.error: Optional[str] = None
+        self.timings: List[dict] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if not enabled:
+            self._done.set()
+
+    def start(self, background: bool = True):
+        """워밍업 시작. background=True 면 데몬 스레드에서 돌고 바로 반환 (그동안 live 이지만 not ready)"""
+        with self._lock:
+            if self.status != "pending":
+                return
+            self.status = "running"
+            self.started_at = time.time()
+        if background:
+            threading.Thread(target=self._run, name="tts-warmup", daemon=True).start()
+        else:
+            self._run()
+
+    def _run(self):
+        t_start = time.perf_counter()
+        try:
+            for name, step in self.steps:
+                print(f"🔥 [TTS] 워밍업: {name}")
+                t0 = time.perf_counter()
+                runs = step()
+                timing = {"step": name, "seconds": round(time.perf_counter() - t0, 3)}
+                if runs:
+                    timing["runs"] = [round(seconds, 3) for seconds in runs]
+                with self._lock:
+                    self.timings.append(timing)
+            status = "done"
+        except Exception as e:
+            traceback.print_exc()
+            with self._lock:
+                self.error = f"{type(e).__name__}: {e}"
+            status = "failed"
+        with self._lock:
+            self.status = status
+            self.finished_at = time.time()
+        self._done.set()
+        icon = "✅" if status == "done" else "❌"
+        print(f"{icon} [TTS] 워밍업 {status} ({time.perf_counter() - t_start:.2f}초, ready={self.ready})")
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self.status in ("done", "disabled") or (self.status == "failed" and not self.required)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._done.wait(timeout)
+        return self.ready
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = None
+            if self.started_at is not None and self.finished_at is not None:
+                total = round(self.finished_at - self.started_at, 3)
+            return {
+                "status": self.status,
+                "required": self.required,
+                "error": self.error,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "total_seconds": total,
+                "steps": list(self.timings),
+            }
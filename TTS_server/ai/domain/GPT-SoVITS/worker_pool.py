@@ -0,0 +1,425 @@
+"""
+TTS 워커 프로세스 풀
+- 워커 프로세스마다 TTS 인스턴스 1개 (GPU 복제본 또는 CPU 코어 분할)
+- 부모(Django/ASGI) 쪽은 로컬 multiprocessing 큐로 작업을 넘기고 결과/조각을 받는다
+- 우선순위(priority 가 클수록 먼저), 작업별 deadline, TTS.stop() 을 통한 취소 지원
+"""
+import heapq
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import CancelledError, Future
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# TTS_infer_pack.metrics 는 쓰는 곳에서 가져온다: 패키지 __init__ 이 TTS.py(torch) 까지 불러와서
+# 모듈 로드 시점에 import 하면 이 모듈만 쓰는 곳(테스트 등)도 모델 스택이 필요해진다
+_END = object()
+
+
+def _worker_main(worker_id: int, config_path: str, device: Optional[str], num_threads: int, job_queue, control_queue, result_queue):
+    """워커 프로세스 진입점. 부모의 sys.path 를 그대로 물려받는다(spawn)."""
+    try:
+        import torch
+
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+
+        from GPT_SoVITS.TTS_infer_pack.TTS import TTS, TTS_Config
+        from TTS_infer_pack.metrics import metrics
+
+        tts_config = TTS_Config(config_path)
+        if device:
+            tts_config.device = torch.device(device)
+            if "cuda" not in device:
+                tts_config.is_half = False
+        tts = TTS(tts_config)
+    except Exception:
+        result_queue.put(("dead", worker_id, None, traceback.format_exc()))
+        return
+
+    current: Dict[str, Any] = {"job_id": None, "cancel_event": None}
+    # 부모가 작업을 넘긴 직후(워커가 job_queue 에서 꺼내기 전)에 온 취소. 꺼낼 때 확인해서 바로 버린다
+    pending_cancels: set = set()
+    current_lock = threading.Lock()
+
+    def control_loop():
+        while True:
+            msg = control_queue.get()
+            if msg is None:
+                return
+            kind, job_id = msg
+            if kind != "cancel":
+                continue
+            with current_lock:
+                if current["job_id"] != job_id:
+                    pending_cancels.add(job_id)
+                    continue
+                # 디코딩 스텝 사이에서 바로 멈추도록 작업별 이벤트도 세운다
+                cancel_event = current["cancel_event"]
+                if cancel_event is not None:
+                    cancel_event.set()
+            tts.stop()
+
+    threading.Thread(target=control_loop, name=f"tts-worker-{worker_id}-control", daemon=True).start()
+    result_queue.put(("ready", worker_id, None, os.getpid()))
+
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        job_id, kind, payload = job
+        with current_lock:
+            # 워커에는 한 번에 작업 하나만 넘어오므로, 다른 id 의 취소는 이미 끝난 작업에 늦게 도착한 것
+            cancelled = job_id in pending_cancels
+            pending_cancels.clear()
+            if not cancelled:
+                current["cancel_event"] = threading.Event()
+                current["job_id"] = job_id
+        if cancelled:
+            # 부모 쪽 작업은 cancel() 에서 이미 끝났다. 워커를 다시 idle 로 돌리기 위한 응답만 보낸다
+            result_queue.put(("error", worker_id, job_id, "CancelledError: cancelled before start"))
+            continue
+        try:
+            if kind == "tts":
+                inputs, stream = payload
+                inputs["cancel_event"] = current["cancel_event"]
+                # 워커에서 잰 구간별 시간은 done 보다 먼저 부모로 보내서 부모 쪽 trace / 집계에 합친다
+                trace = metrics.trace("worker", job_id)
+                inputs["trace"] = trace
+                if stream:
+                    for sr, audio in tts.run(inputs):
+                        result_queue.put(("fragment", worker_id, job_id, (sr, audio)))
+                    result = None
+                else:
+                    result = next(tts.run(inputs))
+                if trace is not None:
+                    result_queue.put(("spans", worker_id, job_id, trace.spans))
+                result_queue.put(("done", worker_id, job_id, result))
+            else:
+                method, args = payload
+                getattr(tts, method)(*args)
+                result_queue.put(("done", worker_id, job_id, None))
+        except Exception as e:
+            result_queue.put(("error", worker_id, job_id, f"{type(e).__name__}: {e}\n{traceback.format_exc()}"))
+        finally:
+            with current_lock:
+                current["job_id"] = None
+                current["cancel_event"] = None
+    control_queue.put(None)
+
+
+class TTSJob:
+    """
+    One synthesis job submitted to TTSWorkerPool.
+    future resolves to (sr, audio) for non-stream jobs; stream jobs are consumed with iter_fragments().
+    """
+
+    def __init__(self, pool: "TTSWorkerPool", job_id: int, kind: str, payload: tuple, priority: int, deadline: float, stream: bool):
+        self.pool = pool
+        self.job_id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.deadline = deadline
+        self.stream = stream
+        self.trace = None
+        self.future: Future = Future()
+        self.fragments: "queue.Queue" = queue.Queue()
+        self.worker_id: Optional[int] = None
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+    def result(self, timeout: Optional[float] = None):
+        return self.future.result(timeout)
+
+    def iter_fragments(self) -> Iterator[Tuple[int, Any]]:
+        while True:
+            item = self.fragments.get()
+            if item is _END:
+                break
+            yield item
+        # 오류/취소/타임아웃이면 여기서 예외
+        self.future.result()
+
+    def cancel(self) -> bool:
+        return self.pool.cancel(self.job_id)
+
+    def _finish(self, result: Any = None, error: BaseException = None):
+        if self.future.done():
+            return
+        if error is not None:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(result)
+        self.fragments.put(_END)
+
+
+class TTSWorkerPool:
+    """
+    Pool of worker processes, each owning one TTS instance, fed from a priority queue.
+
+    Args:
+        config_path (str): tts_infer.yaml path given to TTS_Config in every worker.
+        num_workers (int): number of worker processes.
+        devices (list): optional device per worker (round robin), e.g. ["cuda:0", "cuda:1"] or ["cpu"].
+        num_threads (int): torch threads per worker, 0 keeps the torch default.
+        default_timeout (float): deadline in seconds for jobs submitted without one, 0 means no deadline.
+    """
+
+    def __init__(
+        self,
+        config_path: str,
+        num_workers: int = 1,
+        devices: List[str] = None,
+        num_threads: int = 0,
+        default_timeout: float = 0.0,
+    ):
+        self.config_path = config_path
+        self.num_workers = max(1, int(num_workers))
+        self.devices = devices or []
+        self.num_threads = num_threads
+        self.default_timeout = default_timeout
+
+        self._ctx = mp.get_context("spawn")
+        self._result_queue = self._ctx.Queue()
+        self._procs: List[Any] = [None] * self.num_workers
+        self._job_queues: List[Any] = [None] * self.num_workers
+        self._control_queues: List[Any] = [None] * self.num_workers
+
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        self._jobs: Dict[int, TTSJob] = {}
+        self._pinned: Dict[int, List[TTSJob]] = {i: [] for i in range(self.num_workers)}
+        self._idle: set = set()
+        self._ever_ready: set = set()
+        self._running: Dict[int, TTSJob] = {}
+        self._ids = itertools.count(1)
+        self._started = False
+        self._stopped = False
+
+        self._stats: Dict[str, int] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "expired": 0,
+            "worker_restarts": 0,
+        }
+
+    # ------------------------------------------------------------------ lifecycle
+    def start(self):
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        for worker_id in range(self.num_workers):
+            self._spawn(worker_id)
+        threading.Thread(target=self._reader_loop, name="tts-pool-reader", daemon=True).start()
+        threading.Thread(target=self._dispatch_loop, name="tts-pool-dispatcher", daemon=True).start()
+
+    def _spawn(self, worker_id: int):
+        device = self.devices[worker_id % len(self.devices)] if self.devices else None
+        self._job_queues[worker_id] = self._ctx.Queue()
+        self._control_queues[worker_id] = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                self.config_path,
+                device,
+                self.num_threads,
+                self._job_queues[worker_id],
+                self._control_queues[worker_id],
+                self._result_queue,
+            ),
+            name=f"tts-worker-{worker_id}",
+            daemon=True,
+        )
+        proc.start()
+        self._procs[worker_id] = proc
+        print(f"🧵 [TTSWorkerPool] worker {worker_id} started (pid={proc.pid}, device={device})")
+
+    def shutdown(self):
+        with self._cond:
+            self._stopped = True
+            pending = list(self._jobs.values())
+            self._heap.clear()
+            self._cond.notify_all()
+        for job in pending:
+            job._finish(error=CancelledError())
+        for q in self._job_queues:
+            if q is not None:
+                q.put(None)
+        for proc in self._procs:
+            if proc is not None:
+                proc.join(timeout=5)
+
+    # ------------------------------------------------------------------ public api
+    def submit(self, inputs: dict, priority: int = 0, timeout: float = None, stream: bool = False) -> TTSJob:
+        """
+        Queue one TTS.run(inputs) job. Higher priority runs first; timeout (seconds) is the deadline
+        measured from now, covering both the wait in the queue and the synthesis.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout and timeout > 0 else float("inf")
+        # trace 는 프로세스 간에 넘길 수 없으므로 부모가 들고 있고, 워커가 보낸 구간 시간을 합친다
+        inputs = dict(inputs)
+        trace = inputs.pop("trace", None)
+        job = TTSJob(self, next(self._ids), "tts", (inputs, stream), priority, deadline, stream)
+        job.trace = trace
+        self.start()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("TTSWorkerPool is shut down")
+            self._jobs[job.job_id] = job
+            heapq.heappush(self._heap, (-priority, job.job_id))
+            self._stats["submitted"] += 1
+            self._cond.notify_all()
+        return job
+
+    def broadcast(self, method: str, *args, timeout: float = None):
+        """
+        Call a TTS method (set_ref_audio, init_t2s_weights, init_vits_weights, ...) on every worker
+        and wait for all of them. Each call runs after the job the worker is currently on.
+        """
+        self.start()
+        jobs = []
+        with self._cond:
+            for worker_id in range(self.num_workers):
+                job = TTSJob(self, next(self._ids), "call", (method, args), 0, float("inf"), False)
+                self._jobs[job.job_id] = job
+                self._pinned[worker_id].append(job)
+                jobs.append(job)
+            self._cond.notify_all()
+        for job in jobs:
+            job.result(timeout)
+
+    def cancel(self, job_id: int) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.future.done():
+                return False
+            self._stats["cancelled"] += 1
+            if job.worker_id is not None:
+                # 실행 중이면 워커에서 cancel_event + TTS.stop() → 다음 디코딩 스텝에서 멈춘다
+                self._control_queues[job.worker_id].put(("cancel", job_id))
+        job._finish(error=CancelledError())
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["workers"] = self.num_workers
+            stats["alive_workers"] = sum(1 for p in self._procs if p is not None and p.is_alive())
+            stats["idle_workers"] = len(self._idle)
+            stats["running"] = len(self._running)
+            stats["queued"] = len(self._heap)
+        return stats
+
+    # ------------------------------------------------------------------ internals
+    def _next_job(self) -> Optional[TTSJob]:
+        while self._heap:
+            _, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            if job is None or job.future.done():
+                self._jobs.pop(job_id, None)
+                continue
+            if time.monotonic() > job.deadline:
+                self._jobs.pop(job_id, None)
+                self._stats["expired"] += 1
+                job._finish(error=TimeoutError(f"tts job {job_id} expired in queue"))
+                continue
+            return job
+        return None
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                self._check_running()
+                for worker_id in sorted(self._idle):
+                    job = self._pinned[worker_id].pop(0) if self._pinned[worker_id] else self._next_job()
+                    if job is None:
+                        continue
+                    self._idle.discard(worker_id)
+                    job.worker_id = worker_id
+                    job.started_at = time.monotonic()
+                    self._running[worker_id] = job
+                    self._job_queues[worker_id].put((job.job_id, job.kind, job.payload))
+                self._cond.wait(timeout=0.05)
+
+    def _check_running(self):
+        now = time.monotonic()
+        for worker_id, job in list(self._running.items()):
+            if now > job.deadline and not job.future.done():
+                self._stats["expired"] += 1
+                self._control_queues[worker_id].put(("cancel", job.job_id))
+                job._finish(error=TimeoutError(f"tts job {job.job_id} exceeded its deadline"))
+        for worker_id, proc in enumerate(self._procs):
+            if proc is not None and not proc.is_alive() and not self._stopped:
+                job = self._running.pop(worker_id, None)
+                if job is not None:
+                    self._stats["failed"] += 1
+                    self._jobs.pop(job.job_id, None)
+                    job._finish(error=RuntimeError(f"tts worker {worker_id} died (exitcode={proc.exitcode})"))
+                self._idle.discard(worker_id)
+                if worker_id in self._ever_ready:
+                    # 실행 중 죽은 워커만 재시작 (모델 로딩 자체가 실패하면 계속 죽으므로 재시작하지 않음)
+                    self._ever_ready.discard(worker_id)
+                    self._stats["worker_restarts"] += 1
+                    self._spawn(worker_id)
+                else:
+                    self._procs[worker_id] = None
+        if all(proc is None for proc in self._procs):
+            # 살아있는 워커가 없으면 대기 중인 작업을 바로 실패 처리
+            while True:
+                job = self._next_job()
+                if job is None:
+                    break
+                self._jobs.pop(job.job_id, None)
+                self._stats["failed"] += 1
+                job._finish(error=RuntimeError("no tts worker is available"))
+
+    def _reader_loop(self):
+        from TTS_infer_pack.metrics import metrics
+
+        while True:
+            try:
+                kind, worker_id, job_id, data = self._result_queue.get()
+            except (EOFError, OSError):
+                return
+            with self._cond:
+                if kind == "ready":
+                    self._idle.add(worker_id)
+                    self._ever_ready.add(worker_id)
+                    self._cond.notify_all()
+                    continue
+                if kind == "dead":
+                    print(f"❌ [TTSWorkerPool] worker {worker_id} failed to start:\n{data}")
+                    continue
+                job = self._jobs.get(job_id)
+                if kind == "fragment":
+                    if job is not None and not job.future.done():
+                        job.fragments.put(data)
+                    continue
+                if kind == "spans":
+                    metrics.merge(job.trace if job is not None else None, data)
+                    continue
+                # done / error: 워커는 다시 idle
+                self._running.pop(worker_id, None)
+                self._idle.add(worker_id)
+                self._jobs.pop(job_id, None)
+                if job is not None and not job.future.done():
+                    # 취소/만료된 작업은 이미 집계됨
+                    self._stats["completed" if kind == "done" else "failed"] += 1
+                self._cond.notify_all()
+            if job is not None:
+                if kind == "done":
+                    job._finish(result=data)
+                else:
+                    job._finish(error=RuntimeError(data))
@@ -0,0 +1,186 @@
+"""
+WebSocket 오디오 청크 프레이밍 / 전송
+- 청크 = [인덱스 >I][전체 청크 수 >I (첫 청크만)][오디오] (Spring Boot 명세)
+- memoryview 슬라이스로 헤더+페이로드를 한 번에 만든다 (bytearray/bytes 중간 복사 없음)
+- 연결마다 전송 큐 1개: 바이트 예산만큼 묶어서 보내고, 대기 바이트가 상한을 넘으면 보내는 쪽을 기다리게 한다 (backpressure)
+"""
+import asyncio
+import logging
+import struct
+import time
+from collections import deque
+from typing import Awaitable, Callable, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_INDEX = struct.Struct('>I')
+_INDEX_TOTAL = struct.Struct('>II')
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def frame_chunks(audio_data: BytesLike, chunk_size: int = 3072, start_index: int = 0,
+                 total_chunks: Optional[int] = None) -> Iterator[bytes]:
+    """
+    오디오를 chunk_size 단위 바이너리 메시지로 나눈다.
+    인덱스 0 청크에는 total_chunks (스트리밍이면 0xFFFFFFFF) 필드를 붙인다.
+    """
+    view = memoryview(audio_data)
+    index = start_index
+    for start in range(0, len(view), chunk_size):
+        if index == 0:
+            header = _INDEX_TOTAL.pack(index, total_chunks)
+        else:
+            header = _INDEX.pack(index)
+        yield b''.join((header, view[start:start + chunk_size]))
+        index += 1
+
+
+def count_chunks(size: int, chunk_size: int) -> int:
+    return (size + chunk_size - 1) // chunk_size
+
+
+class TransferStats:
+    """연결별 전송 카운터"""
+
+    def __init__(self):
+        self.created_at = time.time()
+        self.messages = 0
+        self.bytes = 0
+        self.batches = 0
+        self.send_seconds = 0.0
+        self.stalls = 0
+        self.stall_seconds = 0.0
+        self.max_pending_bytes = 0
+
+    def snapshot(self) -> dict:
+        return {
+            'messages': self.messages,
+            'bytes': self.bytes,
+            'batches': self.batches,
+            'send_seconds': round(self.send_seconds, 4),
+            'throughput_kbps': round(self.bytes / self.send_seconds / 1024, 1) if self.send_seconds > 0 else 0.0,
+            'backpressure_stalls': self.stalls,
+            'backpressure_seconds': round(self.stall_seconds, 4),
+            'max_pending_bytes': self.max_pending_bytes,
+            'uptime': round(time.time() - self.created_at, 1),
+        }
+
+
+class FramedSender:
+    """
+    Per-connection send queue in front of AsyncWebsocketConsumer.send.
+
+    Text and binary messages keep their order. The writer task sends queued messages back to back
+    up to coalesce_bytes and then yields to the event loop so the transport can flush; enqueue()
+    waits while more than max_pending_bytes are queued, which pushes a slow gateway's backpressure
+    back to the producer (and through async_to_sync to the synthesis thread).
+
+    Args:
+        send (Callable): the consumer's send(text_data=..., bytes_data=...).
+        max_pending_bytes (int): queued bytes above which enqueue() waits.
+        coalesce_bytes (int): bytes sent per batch before yielding.
+    """
+
+    def __init__(self, send: Callable[..., Awaitable], max_pending_bytes: int = 512 * 1024,
+                 coalesce_bytes: int = 64 * 1024):
+        self._send = send
+        self.max_pending_bytes = max(1, int(max_pending_bytes))
+        self.coalesce_bytes = max(1, int(coalesce_bytes))
+        self._queue: deque = deque()
+        self._pending = 0
+        self._cond: Optional[asyncio.Condition] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._closed = False
+        self.error: Optional[BaseException] = None
+        self.stats = TransferStats()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _condition(self) -> asyncio.Condition:
+        # 이벤트 루프 안에서 처음 쓸 때 만든다
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def send_text(self, text_data: str) -> bool:
+        return await self._enqueue((None, text_data), len(text_data))
+
+    async def send_frames(self, frames) -> bool:
+        for frame in frames:
+            if not await self._enqueue((frame, None), len(frame)):
+                return False
+        return True
+
+    async def _enqueue(self, item: tuple, size: int) -> bool:
+        cond = self._condition()
+        async with cond:
+            if self._pending > 0 and self._pending + size > self.max_pending_bytes and not self._closed:
+                self.stats.stalls += 1
+                stall_start = time.perf_counter()
+                while self._pending > 0 and self._pending + size > self.max_pending_bytes and not self._closed:
+                    await cond.wait()
+                self.stats.stall_seconds += time.perf_counter() - stall_start
+            if self._closed:
+                return False
+            self._queue.append((item, size))
+            self._pending += size
+            self.stats.max_pending_bytes = max(self.stats.max_pending_bytes, self._pending)
+            cond.notify_all()
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self._run())
+        return True
+
+    async def drain(self) -> bool:
+        """큐에 쌓인 메시지가 모두 전송될 때까지 대기. 전송 실패/종료면 False"""
+        cond = self._condition()
+        async with cond:
+            while self._pending > 0 and not self._closed:
+                await cond.wait()
+        return not self._closed
+
+    async def _run(self):
+        cond = self._condition()
+        while True:
+            async with cond:
+                if not self._queue or self._closed:
+                    return
+                batch = []
+                batch_bytes = 0
+                while self._queue and batch_bytes < self.coalesce_bytes:
+                    item, size = self._queue.popleft()
+                    batch.append(item)
+                    batch_bytes += size
+
+            t0 = time.perf_counter()
+            try:
+                for bytes_data, text_data in batch:
+                    if bytes_data is not None:
+                        await self._send(bytes_data=bytes_data)
+                    else:
+                        await self._send(text_data=text_data)
+            except Exception as e:
+                logger.error(f"WebSocket 전송 오류: {e}")
+                self.error = e
+                await self.close()
+                return
+            self.stats.send_seconds += time.perf_counter() - t0
+            self.stats.messages += len(batch)
+            self.stats.bytes += batch_bytes
+            self.stats.batches += 1
+
+            async with cond:
+                self._pending -= batch_bytes
+                cond.notify_all()
+            # 배치 사이에 이벤트 루프 양보 → 트랜스포트가 버퍼를 비울 시간
+            await asyncio.sleep(0)
+
+    async def close(self):
+        cond = self._condition()
+        async with cond:
+            self._closed = True
+            self._queue.clear()
+            self._pending = 0
+            cond.notify_all()
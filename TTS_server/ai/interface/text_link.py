@@ -0,0 +1,266 @@
+"""
+LLM 서버 → TTS 서버 내부 텍스트 링크 (ws/tts-link/)
+- LLM 서버는 연결 1개를 계속 유지하고, 여러 세션의 답변을 문장 단위로 생성되는 대로 보낸다
+- 요청(requestId)마다 seq 순서를 맞춰 한 문장씩 합성/전송 → LLM 이 나머지 문장을 만드는 동안 첫 문장 합성이 시작된다
+- 같은 세션에 새 requestId 가 오거나 cancel 메시지가 오면 남은 문장은 버리고 진행 중 합성은 취소한다
+
+메시지 (JSON 텍스트 프레임)
+  LLM → TTS
+    {"type": "text", "sessionId", "phoneId", "requestId", "seq", "text", "final", ...convert-tts 옵션}
+    {"type": "cancel", "sessionId", "phoneId", "requestId"(없으면 세션 전체)}
+    {"type": "ping"}
+  TTS → LLM
+    ack / sentence_done / request_done / cancelled / error / pong
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from ..views import process_tts_request_async, session_registry
+
+logger = logging.getLogger(__name__)
+
+# final 없이 멈춘 요청을 정리하기까지 기다리는 시간 (초)
+TTS_LINK_IDLE_TIMEOUT = float(os.getenv("TTS_LINK_IDLE_TIMEOUT", "60"))
+
+# 문장 메시지에서 convert-tts 요청으로 넘기지 않는 필드
+_LINK_FIELDS = ('type', 'seq', 'final')
+
+
+def _session_key(data: dict) -> Optional[str]:
+    # convert_tts 와 같은 규칙: sessionId, 없으면 phoneId
+    return next((v for v in (data.get('sessionId'), data.get('phoneId')) if v and v != 'unknown'), None)
+
+
+class TextStream:
+    """한 요청(requestId)의 문장 스트림: seq 순서 맞추기 + 순차 합성 큐"""
+
+    def __init__(self, key: str, session_key: Optional[str], request_id: str, link: 'TtsTextLinkConsumer'):
+        self.key = key
+        self.session_key = session_key
+        self.request_id = request_id
+        self.link = link
+        self.next_seq = 0
+        self.pending: Dict[int, dict] = {}
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        self.cancelled = False
+        self.sentences = 0
+        self.started_at = time.time()
+        self.first_sentence: Optional[float] = None
+
+    def offer(self, seq: Optional[int], data: dict) -> bool:
+        """문장을 받아 순서가 맞는 것부터 큐에 넣는다. 중복이면 False"""
+        if seq is None:
+            seq = max([self.next_seq - 1, *self.pending]) + 1
+        if seq < self.next_seq or seq in self.pending:
+            return False
+        self.pending[seq] = data
+        while self.next_seq in self.pending:
+            self.queue.put_nowait(self.pending.pop(self.next_seq))
+            self.next_seq += 1
+        return True
+
+
+class TtsTextLinkConsumer(AsyncWebsocketConsumer):
+    """LLM 서버 전용 내부 WebSocket: 문장 단위 텍스트 수신 → 순서대로 합성해 게이트웨이로 전송"""
+
+    # 진행 중 스트림은 프로세스 전체에서 관리 (링크가 재연결돼도 같은 요청은 이어서 처리)
+    streams: Dict[str, TextStream] = {}
+    links: Dict[str, 'TtsTextLinkConsumer'] = {}
+    counters: Dict[str, int] = {
+        'connections': 0,
+        'requests': 0,
+        'sentences': 0,
+        'duplicates': 0,
+        'cancelled': 0,
+        'errors': 0,
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.is_connected = False
+
+    async def connect(self):
+        await self.accept()
+        self.is_connected = True
+        TtsTextLinkConsumer.links[self.channel_name] = self
+        TtsTextLinkConsumer.counters['connections'] += 1
+        logger.info(f"🔗 LLM 텍스트 링크 연결: {self.scope.get('client')}")
+        await self.send_json({'type': 'link_established', 'active_requests': len(TtsTextLinkConsumer.streams)})
+
+    async def disconnect(self, close_code):
+        self.is_connected = False
+        TtsTextLinkConsumer.links.pop(self.channel_name, None)
+        # 이미 받은 문장은 계속 합성한다 (응답만 못 보냄). 재연결되면 이어서 받는다
+        logger.info(f"🔗 LLM 텍스트 링크 해제: close_code={close_code}, 진행 중 요청 {len(TtsTextLinkConsumer.streams)}개")
+
+    async def send_json(self, payload: dict):
+        if not self.is_connected:
+            return
+        try:
+            await self.send(text_data=json.dumps(payload, ensure_ascii=False))
+        except Exception as e:
+            logger.warning(f"⚠️ 텍스트 링크 응답 전송 실패: {e}")
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data)
+        except (TypeError, json.JSONDecodeError):
+            await self.send_json({'type': 'error', 'error': 'invalid json'})
+            return
+
+        message_type = data.get('type', 'text')
+        if message_type == 'text':
+            await self.handle_text(data)
+        elif message_type == 'cancel':
+            await self.handle_cancel(data)
+        elif message_type == 'ping':
+            await self.send_json({'type': 'pong', 'timestamp': data.get('timestamp')})
+        else:
+            logger.info(f"텍스트 링크 메시지 무시: {message_type}")
+
+    async def handle_text(self, data: dict):
+        session_key = _session_key(data)
+        request_id = data.get('requestId') or 'unknown'
+        key = session_key or f"request:{request_id}"
+
+        stream = TtsTextLinkConsumer.streams.get(key)
+        if stream is not None and stream.request_id != request_id:
+            # 같은 세션의 새 요청 → 이전 요청의 남은 문장은 버린다
+            await self.cancel_stream(stream, 'superseded by a newer request')
+            stream = None
+        if stream is None:
+            stream = TextStream(key, session_key, request_id, self)
+            TtsTextLinkConsumer.streams[key] = stream
+            TtsTextLinkConsumer.counters['requests'] += 1
+            stream.task = asyncio.ensure_future(self._run_stream(stream))
+        stream.link = self
+
+        seq = data.get('seq')
+        try:
+            seq = int(seq) if seq is not None else None
+        except (TypeError, ValueError):
+            seq = None
+        accepted = stream.offer(seq, data)
+        if not accepted:
+            TtsTextLinkConsumer.counters['duplicates'] += 1
+        await self.send_json({
+            'type': 'ack',
+            'sessionId': data.get('sessionId'),
+            'requestId': request_id,
+            'seq': seq,
+            'duplicate': not accepted,
+            'queued': stream.queue.qsize(),
+        })
+
+    async def handle_cancel(self, data: dict):
+        session_key = _session_key(data)
+        request_id = data.get('requestId')
+        key = session_key or f"request:{request_id}"
+        stream = TtsTextLinkConsumer.streams.get(key)
+        if stream is not None and (request_id is None or stream.request_id == request_id):
+            await self.cancel_stream(stream, 'cancelled by llm server')
+        elif session_key is not None:
+            # 링크 밖(HTTP)으로 시작된 합성도 같은 세션이면 취소
+            session_registry.cancel(session_key, request_id)
+
+    async def cancel_stream(self, stream: TextStream, reason: str):
+        if stream.cancelled:
+            return
+        stream.cancelled = True
+        TtsTextLinkConsumer.counters['cancelled'] += 1
+        if TtsTextLinkConsumer.streams.get(stream.key) is stream:
+            del TtsTextLinkConsumer.streams[stream.key]
+        if stream.session_key is not None:
+            # 합성 스레드는 cancel_event 로 멈춘다
+            session_registry.cancel(stream.session_key, stream.request_id)
+        if stream.task is not None:
+            stream.task.cancel()
+        logger.info(f"⏹️ [TTS 링크] 요청 취소: {stream.request_id} ({reason}, 남은 문장 {stream.queue.qsize() + len(stream.pending)}개)")
+        await stream.link.send_json({
+            'type': 'cancelled',
+            'requestId': stream.request_id,
+            'sessionKey': stream.session_key,
+            'reason': reason,
+        })
+
+    async def _run_stream(self, stream: TextStream):
+        """요청 하나의 문장을 순서대로 합성. final 문장 / 취소 / 유휴 시간 초과로 끝난다"""
+        status = 'success'
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(stream.queue.get(), timeout=TTS_LINK_IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    status = 'timeout'
+                    break
+
+                text = data.get('text') or ''
+                if text.strip():
+                    await self._synthesize_sentence(stream, data)
+                if data.get('final') is True or str(data.get('final')).lower() == 'true':
+                    break
+        except asyncio.CancelledError:
+            status = 'cancelled'
+        finally:
+            if TtsTextLinkConsumer.streams.get(stream.key) is stream:
+                del TtsTextLinkConsumer.streams[stream.key]
+            total = time.time() - stream.started_at
+            logger.info(f"🏁 [TTS 링크] 요청 종료: {stream.request_id} ({status}, 문장 {stream.sentences}개, {total:.3f}초)")
+            await stream.link.send_json({
+                'type': 'request_done',
+                'sessionId': stream.session_key,
+                'requestId': stream.request_id,
+                'status': status,
+                'sentences': stream.sentences,
+                'first_sentence': round(stream.first_sentence, 3) if stream.first_sentence is not None else None,
+                'total': round(total, 3),
+            })
+
+    async def _synthesize_sentence(self, stream: TextStream, data: dict):
+        payload = {k: v for k, v in data.items() if k not in _LINK_FIELDS}
+        start_time = time.time()
+        try:
+            # 합성은 블로킹 → HTTP convert-tts 와 같은 tts_request_executor 에서 (합성은 model_gate 로 한 번에 하나씩,
+            # 게이트웨이 전송은 그 안에서 async_to_sync 로 이벤트 루프에 넘긴다)
+            response = await process_tts_request_async(payload)
+            status_code = response.status_code
+            try:
+                result = json.loads(response.content)
+            except ValueError:
+                result = {}
+        except Exception as e:
+            logger.error(f"❌ [TTS 링크] 문장 합성 오류: {e}")
+            TtsTextLinkConsumer.counters['errors'] += 1
+            status_code, result = 500, {'error': str(e)}
+
+        elapsed = time.time() - start_time
+        stream.sentences += 1
+        TtsTextLinkConsumer.counters['sentences'] += 1
+        if stream.first_sentence is None:
+            stream.first_sentence = time.time() - stream.started_at
+        await stream.link.send_json({
+            'type': 'sentence_done',
+            'sessionId': data.get('sessionId'),
+            'requestId': stream.request_id,
+            'seq': data.get('seq'),
+            'status_code': status_code,
+            'success': status_code == 200 and result.get('success', True),
+            'external_transfer': result.get('external_transfer'),
+            'processing_time': round(elapsed, 3),
+        })
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {
+            **cls.counters,
+            'links': len(cls.links),
+            'active_requests': len(cls.streams),
+            'queued_sentences': sum(s.queue.qsize() + len(s.pending) for s in cls.streams.values()),
+        }
@@ -1,9 +1,12 @@
 from django.urls import re_path
 from . import consumers
+from .interface import text_link
 
 websocket_urlpatterns = [
     # WebSocket 엔드포인트: ws://서버주소/ws/tts/
     re_path(r'^ws/tts/$', consumers.TtsWebSocketConsumer.as_asgi()),
     # 선택적: phone_id와 session_id를 URL 파라미터로 받는 경우
     re_path(r'^ws/tts/(?P<phone_id>\w+)/(?P<session_id>\w+)/$', consumers.TtsWebSocketConsumer.as_asgi()),
+    # LLM 서버 내부 텍스트 링크: 문장 단위로 텍스트를 받아 순서대로 합성 (ws://서버주소/ws/tts-link/)
+    re_path(r'^ws/tts-link/$', text_link.TtsTextLinkConsumer.as_asgi()),
 ]
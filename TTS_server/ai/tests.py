@@ -1,3 +1,108 @@
-from django.test import TestCase
+import asyncio
+import struct
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .infrastructure.ws_framing import FramedSender, count_chunks, frame_chunks
+
+
+class FrameChunksTests(SimpleTestCase):
+    """청크 = [인덱스 >I][전체 청크 수 >I (첫 청크만)][오디오]"""
+
+    def test_first_chunk_carries_total(self):
+        audio = bytes(range(256)) * 30  # 7680 bytes → 3072 / 3072 / 1536
+        frames = list(frame_chunks(audio, 3072, total_chunks=3))
+        self.assertEqual(len(frames), count_chunks(len(audio), 3072))
+        self.assertEqual(struct.unpack('>II', frames[0][:8]), (0, 3))
+        self.assertEqual(frames[0][8:], audio[:3072])
+        self.assertEqual(struct.unpack('>I', frames[1][:4]), (1,))
+        self.assertEqual(frames[2][4:], audio[6144:])
+        self.assertEqual(b''.join(f[8:] if i == 0 else f[4:] for i, f in enumerate(frames)), audio)
+
+    def test_streaming_continuation_has_no_total(self):
+        frames = list(frame_chunks(b'\x01' * 10, 4, start_index=5, total_chunks=0xFFFFFFFF))
+        self.assertEqual([struct.unpack('>I', f[:4])[0] for f in frames], [5, 6, 7])
+        self.assertEqual([len(f) for f in frames], [8, 8, 6])
+
+    def test_streaming_first_chunk_total_field(self):
+        frame = next(frame_chunks(memoryview(b'\x02' * 4), 4, total_chunks=0xFFFFFFFF))
+        self.assertEqual(frame[:8], b'\x00\x00\x00\x00\xff\xff\xff\xff')
+
+    def test_empty_audio_and_count(self):
+        self.assertEqual(list(frame_chunks(b'', 3072, total_chunks=0)), [])
+        self.assertEqual([count_chunks(n, 4) for n in (0, 1, 4, 5)], [0, 1, 1, 2])
+
+
+class RecordingSocket:
+    """AsyncWebsocketConsumer.send 대역. gate 가 열릴 때까지 전송을 멈출 수 있다"""
+
+    def __init__(self, fail_after=None):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.fail_after = fail_after
+
+    async def send(self, text_data=None, bytes_data=None):
+        await self.gate.wait()
+        if self.fail_after is not None and len(self.sent) >= self.fail_after:
+            raise ConnectionError('closed')
+        self.sent.append(text_data if text_data is not None else bytes_data)
+
+
+class FramedSenderTests(SimpleTestCase):
+
+    async def test_keeps_text_and_binary_order(self):
+        socket = RecordingSocket()
+        sender = FramedSender(socket.send, coalesce_bytes=5)
+        self.assertTrue(await sender.send_text('start'))
+        self.assertTrue(await sender.send_frames([b'a' * 4, b'b' * 4, b'c' * 4]))
+        self.assertTrue(await sender.send_text('end'))
+        self.assertTrue(await sender.drain())
+        self.assertEqual(socket.sent, ['start', b'aaaa', b'bbbb', b'cccc', 'end'])
+        stats = sender.stats.snapshot()
+        self.assertEqual((stats['messages'], stats['bytes']), (5, 20))
+        self.assertGreater(stats['batches'], 1)
+
+    async def test_backpressure_waits_for_pending_bytes(self):
+        socket = RecordingSocket()
+        socket.gate.clear()
+        sender = FramedSender(socket.send, max_pending_bytes=8, coalesce_bytes=4)
+        self.assertTrue(await sender.send_frames([b'x' * 4, b'y' * 4]))
+        blocked = asyncio.ensure_future(sender.send_frames([b'z' * 4]))
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+
+        socket.gate.set()
+        self.assertTrue(await asyncio.wait_for(blocked, 1))
+        self.assertTrue(await sender.drain())
+        self.assertEqual(socket.sent, [b'xxxx', b'yyyy', b'zzzz'])
+        self.assertEqual(sender.stats.stalls, 1)
+        self.assertLessEqual(sender.stats.max_pending_bytes, 8)
+
+    async def test_oversized_message_is_sent_when_queue_is_empty(self):
+        socket = RecordingSocket()
+        sender = FramedSender(socket.send, max_pending_bytes=4)
+        self.assertTrue(await sender.send_frames([b'x' * 16]))
+        self.assertTrue(await sender.drain())
+        self.assertEqual(socket.sent, [b'x' * 16])
+
+    async def test_send_error_closes_and_releases_waiters(self):
+        socket = RecordingSocket(fail_after=1)
+        sender = FramedSender(socket.send, max_pending_bytes=4, coalesce_bytes=4)
+        self.assertTrue(await sender.send_frames([b'a' * 4]))
+        await sender.send_frames([b'b' * 4, b'c' * 4])
+        self.assertFalse(await asyncio.wait_for(sender.drain(), 1))
+        self.assertTrue(sender.closed)
+        self.assertIsInstance(sender.error, ConnectionError)
+        self.assertFalse(await sender.send_text('late'))
+        self.assertEqual(socket.sent, [b'aaaa'])
+
+    async def test_close_wakes_blocked_producer(self):
+        socket = RecordingSocket()
+        socket.gate.clear()
+        sender = FramedSender(socket.send, max_pending_bytes=4, coalesce_bytes=4)
+        self.assertTrue(await sender.send_frames([b'a' * 4]))
+        blocked = asyncio.ensure_future(sender.send_frames([b'b' * 4]))
+        await asyncio.sleep(0.01)
+        await sender.close()
+        self.assertFalse(await asyncio.wait_for(blocked, 1))
@@ -7,7 +7,13 @@ urlpatterns = [
     path("tts", views.tts, name="tts"),
     path("set_gpt_weights", views.set_gpt_weights, name="set_gpt_weights"),
     path("set_sovits_weights", views.set_sovits_weights, name="set_sovits_weights"),
+    path("register_voice", views.register_voice, name="register_voice"),
+    path("set_voice", views.set_voice, name="set_voice"),
     path("set_refer_audio", views.set_refer_audio, name="set_refer_audio"),
     path("health", views.health, name="health"),
+    path("health/live", views.health_live, name="health_live"),
+    path("health/ready", views.health_ready, name="health_ready"),
+    path("metrics", views.metrics_view, name="metrics"),
+    path("metrics/requests", views.metrics_requests, name="metrics_requests"),
     path('api/convert-tts/', views.convert_tts, name='convert_tts'),
 ]
\ No newline at end of file
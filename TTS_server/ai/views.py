@@ -3,7 +3,7 @@ import json
 import os
 import sys
 import asyncio
-from django.http import JsonResponse, StreamingHttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 from django.utils.decorators import method_decorator
@@ -13,12 +13,14 @@ import base64
 import numpy as np
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 # 경로
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'domain', 'GPT-SoVITS'))
-from api_v2 import tts_pipeline, tts_config, tts_handle  # tts_engine.py
-from asgiref.sync import async_to_sync
+from TTS_infer_pack.metrics import metrics  # api_v2 / TTS.py 와 같은 집계 인스턴스
+from api_v2 import tts_pipeline, tts_config, tts_handle, tts_scheduler, audio_cache, tts_worker_pool, pipeline_call, session_registry, tts_fragment_stream, tts_warmup, tts_readiness, TTS_REF_AUDIO_PATH, TTS_REF_PROMPT_TEXT  # tts_engine.py
+from asgiref.sync import async_to_sync, sync_to_async
 
 # WebSocket 서버로 데이터 전송을 위한 임포트
 from channels.layers import get_channel_layer
@@ -26,6 +28,16 @@ from asgiref.sync import async_to_sync
 from .consumers import TtsWebSocketConsumer
 
 logger = logging.getLogger(__name__)
+
+# WebSocket 전송 시 합성이 끝나기 전에 문장 조각 단위로 바로 전송할지 (요청의 stream_audio 로 덮어쓰기 가능)
+TTS_WS_STREAMING = os.getenv("TTS_WS_STREAMING", "false").lower() == "true"
+# convert-tts 기본 분할 방식 (cut6: 첫 음성 지연 기준 분할). 요청의 text_split_method 로 덮어쓰기 가능
+TTS_TEXT_SPLIT_METHOD = os.getenv("TTS_TEXT_SPLIT_METHOD", "cut0")
+# convert-tts 처리 스레드 수. daphne 에서 sync 뷰는 전부 한 스레드에서 차례로 돌아서 요청이 겹치지 않는다
+# → 이 풀로 넘겨야 동시 요청이 배치 스케줄러에서 함께 기다려 합쳐지고, 같은 세션의 새 요청이 이전 합성을 취소할 수 있다
+# (합성 자체는 TTS.model_gate 가 한 번에 하나씩 실행)
+TTS_REQUEST_THREADS = int(os.getenv("TTS_REQUEST_THREADS", "16"))
+tts_request_executor = ThreadPoolExecutor(max_workers=TTS_REQUEST_THREADS, thread_name_prefix="tts-request")
 #통신과 관련한 함수
 # LLM_server에서 오는 text받기
 def send_to_external_server(filename: str, audio_data: bytes, text: str,
@@ -158,8 +170,119 @@ def send_to_external_server_websocket(filename: str, audio_data: bytes, text: st
         traceback.print_exc()
         return False
 
+def stream_to_external_server_websocket(fragments, filename: str, text: str, session_id: str,
+                                        request_id: str, phone_id: str, ticket=None, trace=None) -> dict:
+    """
+    합성되는 조각을 WebSocket 클라이언트로 바로 전송 (audio_start(totalChunks=-1) → 바이너리 청크 → audio_end)
+    반환: 전송 결과/시간 정보 (조각 전송에 쓴 시간은 trace 의 ws_send 구간으로 기록)
+    """
+    start_time = time.time()
+    result = {'started': False, 'success': False, 'bytes': 0, 'first_chunk': None, 'status': 'error'}
+
+    send_start = time.perf_counter()
+    started = async_to_sync(TtsWebSocketConsumer.start_stream_to_client)(
+        phone_id=phone_id, session_id=session_id, filename=filename, text=text, request_id=request_id
+    )
+    send_seconds = time.perf_counter() - send_start
+    if not started:
+        print(f"❌ [TTS] WebSocket 스트리밍 실패 - 클라이언트 미연결")
+        return result
+    result['started'] = True
+
+    status, message = 'success', None
+    try:
+        for data in fragments:
+            if result['first_chunk'] is None:
+                result['first_chunk'] = time.time() - start_time
+                print(f"⚡ [TTS] 첫 조각 전송 ({result['first_chunk']:.3f}초)")
+            send_start = time.perf_counter()
+            sent = async_to_sync(TtsWebSocketConsumer.send_stream_fragment_to_client)(
+                phone_id=phone_id, session_id=session_id, request_id=request_id, audio_data=data
+            )
+            send_seconds += time.perf_counter() - send_start
+            if not sent:
+                print(f"❌ [TTS] WebSocket 스트리밍 중 연결 끊김")
+                fragments.close()
+                status, message = 'error', 'client disconnected'
+                break
+            result['bytes'] += len(data)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        status, message = 'error', str(e)
+    if status == 'success' and ticket is not None and ticket.cancelled:
+        # 같은 세션의 새 요청으로 대체됨
+        status, message = 'cancelled', 'superseded by a newer request'
+
+    result['status'] = status
+    send_start = time.perf_counter()
+    result['success'] = async_to_sync(TtsWebSocketConsumer.end_stream_to_client)(
+        phone_id=phone_id, session_id=session_id, request_id=request_id, status=status, message=message
+    ) and status == 'success'
+    metrics.record("ws_send", send_seconds + time.perf_counter() - send_start, trace)
+    result['total'] = time.time() - start_time
+    return result
+
+
+def convert_tts_streaming(req: dict, text: str, phone_id: str, session_id: str, request_id: str,
+                          session_key, start_time: float):
+    """convert_tts 의 파이프라인 경로: 합성과 WebSocket 전송을 겹친다"""
+    if not TtsWebSocketConsumer.has_client(phone_id, session_id):
+        print(f"❌ [TTS] WebSocket 클라이언트 미연결 - 합성 생략: {phone_id}_{session_id}")
+        return JsonResponse({
+            'success': False,
+            'error': 'WebSocket 클라이언트 미연결',
+            'external_transfer': 'failed',
+            'use_websocket': True,
+            'streaming': True,
+        }, status=503)
+
+    res = tts_fragment_stream(req, session_key=session_key, request_id=request_id)
+    if isinstance(res, JsonResponse):
+        logger.error(f"❌ TTS 파라미터 에러: {res.content}")
+        return res
+    ticket, fragments = res
+
+    timestamp = int(time.time() * 1000)
+    filename = f"tts_{phone_id}_{timestamp}.{req.get('media_type', 'wav')}"
+    print(f"🔌 [TTS] WebSocket 스트리밍 전송 모드 (합성과 동시 전송)")
+
+    result = stream_to_external_server_websocket(
+        fragments, filename=filename, text=text, session_id=session_id,
+        request_id=request_id, phone_id=phone_id, ticket=ticket, trace=req.get("trace"),
+    )
+    if not result['started']:
+        # 제너레이터를 시작하지 않았으므로 직접 정리
+        ticket.cancel()
+        session_registry.end(ticket)
+    if result['status'] == 'cancelled':
+        # 새 요청으로 대체되어 중간에 끊김 (audio_end 는 이미 전송)
+        print(f"⏹️ [TTS] 새 요청으로 대체되어 스트리밍 중단 (request_id: {request_id})")
+        return JsonResponse({"message": "tts cancelled: superseded by a newer request"}, status=409)
+
+    total_processing_time = time.time() - start_time
+    first_chunk = result['first_chunk']
+
+    return JsonResponse({
+        'success': True,
+        'message': 'TTS 변환 완료',
+        'filename': filename,
+        'transfer_method': 'websocket_stream',
+        'processing_time': total_processing_time,
+        'timing_details': {
+            'first_chunk': round(first_chunk, 3) if first_chunk is not None else None,
+            'total': round(total_processing_time, 3)
+        },
+        'data_size': result['bytes'],
+        'engine': 'GPT-sovits',
+        'external_transfer': 'success' if result['success'] else 'failed',
+        'use_websocket': True,
+        'streaming': True,
+    })
+
+
 @csrf_exempt
-def convert_tts(request):
+async def convert_tts(request):
     if request.method != 'POST':
         return JsonResponse({'error': 'POST 메소드만 허용'}, status=405)
 
@@ -167,6 +290,35 @@ def convert_tts(request):
         # 요청 데이터 파싱
         print("djklsfafjdsalkfjsdlkfsdaj------------------------------------------------------------", request.body)
         data = json.loads(request.body)
+    except Exception as e:
+        logger.error(f"❌ [TTS] 요청 파싱 오류: {e}")
+        return JsonResponse({"message": "invalid json"}, status=400)
+    return await process_tts_request_async(data)
+
+
+async def process_tts_request_async(data: dict):
+    """process_tts_request 를 tts_request_executor 에서 실행 (HTTP convert-tts / 텍스트 링크 공용)"""
+    return await sync_to_async(process_tts_request, thread_sensitive=False, executor=tts_request_executor)(data)
+
+
+def process_tts_request(data: dict):
+    """
+    convert-tts 요청 1건 처리 (합성 → 게이트웨이 전송)
+    HTTP /api/convert-tts/ 와 LLM 서버 내부 텍스트 링크(ws/tts-link/)가 같이 사용
+    구간별 시간(참조 음성, 프론트엔드, T2S, VITS, 패킹, 전송)은 요청 trace 로 /metrics 에 집계
+    """
+    trace = metrics.trace("convert_tts", data.get('requestId'))
+    response = None
+    try:
+        response = _process_tts_request(data, trace)
+        return response
+    finally:
+        status_code = getattr(response, 'status_code', 500)
+        metrics.finish(trace, 'success' if status_code == 200 else 'cancelled' if status_code == 409 else 'error')
+
+
+def _process_tts_request(data: dict, trace):
+    try:
         text = data.get('text', '')
         phone_id = data.get('phoneId', 'unknown')
         session_id = data.get('sessionId', 'unknown')
@@ -177,10 +329,7 @@ def convert_tts(request):
 
         if not text.strip():
             return JsonResponse({'error': '텍스트가 비어있습니다'}, status=400)
-        try:
-            body = json.loads(request.body.decode("utf-8")) if request.body else {}
-        except json.JSONDecodeError:
-            return JsonResponse({"message": "invalid json"}, status=400)
+        body = data
 
         def as_bool(v, default):
             if isinstance(v, bool):
@@ -197,13 +346,13 @@ def convert_tts(request):
         # "text": data.get("text"),
         "text": text,
         "text_lang": "ko",
-        "ref_audio_path": "/code/media/my_voice_03.wav",  # 컨테이너 경로
-        "prompt_text": body.get("prompt_text", "저는 인공지능 모델 학습을 위한 음성 데이터를 녹음하고 있어요."),  # 고정/기본 프롬프트
+        "ref_audio_path": TTS_REF_AUDIO_PATH,  # 컨테이너 경로 (TTS_REF_AUDIO_PATH)
+        "prompt_text": body.get("prompt_text", TTS_REF_PROMPT_TEXT),  # 고정/기본 프롬프트
         "prompt_lang": body.get("prompt_lang", "ko").lower(),            # ← 분리/추가
         "top_k": int(body.get("top_k", 5)),
         "top_p": float(body.get("top_p", 1)),
         "temperature": float(body.get("temperature", 1)),
-        "text_split_method": body.get("text_split_method", "cut0"),
+        "text_split_method": body.get("text_split_method", TTS_TEXT_SPLIT_METHOD),
         "batch_size": int(body.get("batch_size", 1)),
         "batch_threshold": float(body.get("batch_threshold", 0.75)),
         "split_bucket": as_bool(body.get("split_bucket", True), True),
@@ -216,23 +365,31 @@ def convert_tts(request):
         "repetition_penalty": float(body.get("repetition_penalty", 1.35)),
         "sample_steps": int(body.get("sample_steps", 32)),
         "super_sampling": as_bool(body.get("super_sampling", False), False),
+        "static_kv_cache": as_bool(body.get("static_kv_cache", False), False),
+        "trace": trace,
         }
 
         start_time = time.time()
-        processing_time = time.time() - start_time
-        print(f"✅ 모델 들어가기전 시간 ({processing_time:.3f}초)")
+
+        # 같은 세션(없으면 같은 전화)의 새 requestId 가 오면 진행 중인 이전 합성은 취소된다
+        session_key = next((v for v in (session_id, phone_id) if v and v != 'unknown'), None)
+
+        # 문장 조각이 나오는 대로 게이트웨이에 전송 (합성 완료를 기다리지 않음)
+        if use_websocket and as_bool(data.get('stream_audio'), TTS_WS_STREAMING):
+            return convert_tts_streaming(req, text, phone_id, session_id, request_id, session_key, start_time)
 
         # TTS 모델에서 원본 WAV 생성 (변환 없이 사용)
-        wav_data = tts_handle(req)
+        wav_data = tts_handle(req, session_key=session_key, request_id=request_id)
 
         # tts_handle이 JsonResponse 에러를 반환했는지 확인
         if isinstance(wav_data, JsonResponse):
+            if wav_data.status_code == 409:
+                print(f"⏹️ [TTS] 새 요청으로 대체되어 전송 생략 (request_id: {request_id})")
+                return wav_data
             logger.error(f"❌ TTS 모델 에러: {wav_data.content}")
             return wav_data  # 에러 응답 반환
 
-        processing_time = time.time() - start_time
-        print(f"✅ TTS 모델 음성 생성 완료 ({processing_time:.3f}초)")
-        print("-----------------------------------------------")
+        print(f"✅ TTS 모델 음성 생성 완료")
 
         # TTS 원본 WAV 정보 확인
         if isinstance(wav_data, bytes) and len(wav_data) > 0:
@@ -241,8 +398,8 @@ def convert_tts(request):
             print(f"   WAV 헤더: {wav_data[:4]} ... {wav_data[8:12] if len(wav_data) > 12 else 'N/A'}")
             print(f"   미디어 타입: {req.get('media_type')}")
 
-            # WAV 헤더에서 샘플레이트 확인 (변휈하지 않음)
-            if len(wav_data) > 44:
+            # WAV 헤더에서 샘플레이트 확인 (변휈하지 않음). pcm16/ulaw/alaw 는 헤더 없는 8kHz
+            if len(wav_data) > 44 and wav_data[:4] == b'RIFF':
                 sample_rate = int.from_bytes(wav_data[24:28], 'little')
                 channels = int.from_bytes(wav_data[22:24], 'little')
                 print(f"   샘플레이트: {sample_rate}Hz (TTS 원본 유지)")
@@ -267,53 +424,46 @@ def convert_tts(request):
         # print(f"💾 [TTS] WAV 파일 저장 완료: {wav_file_path}")
         processing_time = time.time() - start_time
 
-
-        print(f"✅ [TTS] wav파일 저장 시간 ({processing_time:.3f}초)")
-
-        print("----------------------------------------------------")
-
         # 파일명 생성
         timestamp = int(time.time() * 1000)
-        wav_filename = f"tts_{phone_id}_{timestamp}.wav"
+        wav_filename = f"tts_{phone_id}_{timestamp}.{req.get('media_type', 'wav')}"
 
         # 전송 방식 선택
         if use_websocket:
             print(f"🔌 [TTS] WebSocket 전송 모드 (TTS 원본 그대로)")
             print(f"   🎵 TTS 원본 WAV: {len(wav_data):,} bytes")
-            print(f"   📦 4096 바이트 청크로 분할 예정")
             print(f"   🎯 Fire-and-forget: {fire_and_forget}")
 
-            # WebSocket 전송 시작 시간 측정
+            # WebSocket 전송 시간 측정
             ws_start_time = time.time()
             
             # TTS 원본 WAV를 그대로 전송 (변환 없이)
-            external_success = send_to_external_server_websocket(
-                filename=wav_filename,
-                audio_data=wav_data,  # TTS 원본 그대로
-                text=text,
-                session_id=session_id,
-                request_id=request_id,
-                phone_id=phone_id,
-                engine="GPT-sovits",
-                fire_and_forget=fire_and_forget
-            )
+            with metrics.span("ws_send", trace):
+                external_success = send_to_external_server_websocket(
+                    filename=wav_filename,
+                    audio_data=wav_data,  # TTS 원본 그대로
+                    text=text,
+                    session_id=session_id,
+                    request_id=request_id,
+                    phone_id=phone_id,
+                    engine="GPT-sovits",
+                    fire_and_forget=fire_and_forget
+                )
             
-            # WebSocket 전송 완료 시간 측정
             ws_time = time.time() - ws_start_time
-            print(f"   ⏱️ WebSocket 전송 완료: {ws_time:.3f}초")
-            print(f"   📊 전송 속도: {len(wav_data) / ws_time / 1024:.1f} KB/s")
             transfer_method = "websocket"
         else:
             print(f"📡 [TTS] HTTP 전송 모드 선택")
-            external_success = send_to_external_server(
-                filename=wav_filename,
-                audio_data=wav_data,
-                text=text,
-                session_id=session_id,
-                request_id=request_id,
-                phone_id=phone_id,
-                engine="GPT-sovits"
-            )
+            with metrics.span("http_send", trace):
+                external_success = send_to_external_server(
+                    filename=wav_filename,
+                    audio_data=wav_data,
+                    text=text,
+                    session_id=session_id,
+                    request_id=request_id,
+                    phone_id=phone_id,
+                    engine="GPT-sovits"
+                )
             transfer_method = "http"
 
         # 전체 처리 시간 계산
@@ -325,16 +475,7 @@ def convert_tts(request):
         # 전송 시간 (WebSocket 또는 HTTP)
         transfer_time = ws_time if use_websocket and 'ws_time' in locals() else 0
 
-        # TTS 변환은 성공했으므로 항상 성공으로 처리
-        print("=" * 60)
-        print(f"📊 [TTS] 전체 처리 시간 분석:")
-        print(f"   ⏱️ TTS 음성 생성: {tts_generation_time:.3f}초")
-        print(f"   ⏱️ 외부 서버 전송: {transfer_time:.3f}초")
-        print(f"   ⏱️ 전체 처리 시간: {total_processing_time:.3f}초")
-        print(f"   📦 전송된 데이터: {len(wav_data):,} bytes ({len(wav_data)/1024:.1f} KB)")
-        print(f"   ✅ [TTS] 처리 완료!")
-        print("=" * 60)
-
+        # TTS 변환은 성공했으므로 항상 성공으로 처리 (구간별 시간은 /metrics, TTS_METRICS_LOG=true 면 로그 한 줄)
         return JsonResponse({
             'success': True,
             'message': 'TTS 변환 완료',
@@ -432,21 +573,28 @@ def tts(request):
 def set_refer_audio(request):
     refer_audio_path = request.GET.get("refer_audio_path") or request.GET.get("refer_audio") or request.GET.get("path")
     try:
-        tts_pipeline.set_ref_audio(refer_audio_path)
+        pipeline_call("set_ref_audio", refer_audio_path)
     except Exception as e:
         return JsonResponse({"message": "set refer audio failed", "Exception": str(e)}, status=400)
     return JsonResponse({"message": "success"}, status=200)
 
 
+# 가중치 교체는 무중단 핫스왑: 백그라운드에서 새 모델을 올리고, 진행 중인 합성이 끝나면 요청 사이에 교체한다.
+# 워커 프로세스 모드에서는 각 워커가 백그라운드로 교체하므로 바로 "accepted" 를 돌려준다 (/health 의 weight_registry 로 확인)
+def _swap_response(method: str, *args):
+    wait = tts_worker_pool is None
+    pipeline_call(method, *args, wait)
+    return JsonResponse({"message": "success" if wait else "accepted"}, status=200)
+
+
 def set_gpt_weights(request):
     weights_path = request.GET.get("weights_path")
     try:
         if not weights_path:
             return JsonResponse({"message": "gpt weight path is required"}, status=400)
-        tts_pipeline.init_t2s_weights(weights_path)
+        return _swap_response("swap_t2s_weights", weights_path)
     except Exception as e:
         return JsonResponse({"message": "change gpt weight failed", "Exception": str(e)}, status=400)
-    return JsonResponse({"message": "success"}, status=200)
 
 
 def set_sovits_weights(request):
@@ -454,28 +602,104 @@ def set_sovits_weights(request):
     try:
         if not weights_path:
             return JsonResponse({"message": "sovits weight path is required"}, status=400)
-        tts_pipeline.init_vits_weights(weights_path)
+        return _swap_response("swap_vits_weights", weights_path)
     except Exception as e:
         return JsonResponse({"message": "change sovits weight failed", "Exception": str(e)}, status=400)
+
+
+def register_voice(request):
+    """이름 붙인 음색(GPT + SoVITS 가중치)을 등록하고 백그라운드로 미리 올린다"""
+    name = request.GET.get("name")
+    gpt_path = request.GET.get("gpt_weights_path")
+    sovits_path = request.GET.get("sovits_weights_path")
+    if not name or not gpt_path or not sovits_path:
+        return JsonResponse({"message": "name, gpt_weights_path and sovits_weights_path are required"}, status=400)
+    try:
+        pipeline_call("register_voice", name, gpt_path, sovits_path)
+    except Exception as e:
+        return JsonResponse({"message": "register voice failed", "Exception": str(e)}, status=400)
     return JsonResponse({"message": "success"}, status=200)
 
 
+def set_voice(request):
+    """등록된 음색의 GPT / SoVITS 가중치를 한 번에 교체"""
+    name = request.GET.get("name")
+    try:
+        if not name:
+            return JsonResponse({"message": "voice name is required"}, status=400)
+        return _swap_response("swap_voice", name)
+    except Exception as e:
+        return JsonResponse({"message": "change voice failed", "Exception": str(e)}, status=400)
+
+
 
 # views.py
 from django.http import JsonResponse
 def health(request):
-    """헬스체크 엔드포인트"""
+    """헬스체크 엔드포인트 (워밍업이 끝나기 전이면 ok=false + 503, 프로세스 생존만 볼 때는 /health/live)"""
     print(">>> HIT /health", flush=True)
 
     # WebSocket 클라이언트 상태 확인
     from .consumers import TtsWebSocketConsumer
-    connected_clients = len(TtsWebSocketConsumer.connected_clients)
+    from .interface.text_link import TtsTextLinkConsumer
+    connected_clients = TtsWebSocketConsumer.connected_client_count()
+    readiness = tts_readiness()
 
     return JsonResponse({
-        "ok": True,
+        "ok": readiness["ready"],
+        "live": True,
+        "ready": readiness["ready"],
+        "reasons": readiness["reasons"],
+        "warmup": tts_warmup.stats(),
         "service": "TTS Server",
         "websocket_enabled": True,
         "websocket_endpoint": "/ws/tts/",
-        "connected_clients": connected_clients,
+        "connected_clients": connected_clients,  # 모든 워커 합계 (Redis channel layer 일 때)
+        "connected_clients_local": len(TtsWebSocketConsumer.connected_clients),  # 이 프로세스
+        "websocket_transfer": TtsWebSocketConsumer.transfer_stats(),
+        "websocket_group_transfer": TtsWebSocketConsumer.group_transfer_stats(),
+        "text_link": TtsTextLinkConsumer.stats(),
+        "tts_scheduler": tts_scheduler.stats(),
+        "prompt_cache": tts_pipeline.prompt_lru.stats() if tts_pipeline is not None else None,
+        "text_feature_cache": tts_pipeline.text_preprocessor.feature_cache.stats() if tts_pipeline is not None else None,
+        "frontend_pipeline": tts_pipeline.last_frontend_stats if tts_pipeline is not None else None,
+        "onnx_backend": (
+            tts_pipeline.ort_backend.get_stats()
+            if tts_pipeline is not None and tts_pipeline.ort_backend is not None else None
+        ),
+        "int8": tts_pipeline.configs.int8 if tts_pipeline is not None else None,
+        "resident_models": tts_pipeline.get_resident_models() if tts_pipeline is not None else None,
+        "weight_registry": tts_pipeline.weight_registry.stats() if tts_pipeline is not None else None,
+        "model_gate": tts_pipeline.model_gate.stats() if tts_pipeline is not None else None,
+        "audio_cache": audio_cache.stats(),
+        "tts_worker_pool": tts_worker_pool.stats() if tts_worker_pool is not None else None,
+        "tts_sessions": session_registry.stats(),
+        "metrics": metrics.stats(),
         "port": 5002
-    }, status=200)
+    }, status=200 if readiness["ready"] else 503)
+
+
+def health_live(request):
+    """liveness: 프로세스가 요청에 응답하면 200 (워밍업 중이어도)"""
+    return JsonResponse({"ok": True, "live": True}, status=200)
+
+
+def health_ready(request):
+    """readiness: 워밍업이 끝나야 200, 그 전에는 503 (로드밸런서가 콜드 레플리카로 보내지 않도록)"""
+    readiness = tts_readiness()
+    return JsonResponse({
+        "ok": readiness["ready"],
+        "ready": readiness["ready"],
+        "reasons": readiness["reasons"],
+        "warmup": tts_warmup.stats(),
+    }, status=200 if readiness["ready"] else 503)
+
+
+def metrics_view(request):
+    """Prometheus 스크레이프용: 구간별 시간 히스토그램 / 토큰 처리량 / 요청 수 (text exposition format)"""
+    return HttpResponse(metrics.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def metrics_requests(request):
+    """최근 요청의 구간별 시간 (최신순, ?limit=N)"""
+    return JsonResponse({"requests": metrics.recent(int(request.GET.get("limit", 20)))})